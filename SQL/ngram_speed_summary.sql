@@ -1,3 +1,5 @@
+-- Reference query for one session's speed summary rows (ngram_speed_summary_curr/_hist).
+-- add_speed_summary_for_session produces the same rows incrementally from ngram_speed_state.
 WITH vars AS (
     SELECT
         'a287befc-0570-4eb3-a5d7-46653054cf0f'::text AS user_id,
@@ -22,7 +24,9 @@ total_instance_cnt AS (
         session_ngram_summary AS sns
         cross join vars 
     WHERE
-        sns.session_dt <= (select start_time from practice_sessions where session_id = vars.session_id)
+        sns.user_id = vars.user_id
+        AND sns.keyboard_id = vars.keyboard_id
+        AND sns.session_dt <= (select start_time from practice_sessions where session_id = vars.session_id)
     GROUP BY
         sns.ngram_text,
         sns.ngram_size
@@ -52,7 +56,9 @@ in_scope_rows AS (
         AND ngr.ngram_size = sns.ngram_size
             cross join vars 
     WHERE
-        sns.session_dt <= 
+        sns.user_id = vars.user_id
+        AND sns.keyboard_id = vars.keyboard_id
+        AND sns.session_dt <= 
         (select start_time 
         from practice_sessions 
         where session_id = vars.session_id)
@@ -63,7 +69,7 @@ avg_calc AS (
         isr.ngram_size,
         isr.session_dt,
         AVG(isr.avg_ms_per_keystroke) AS simple_avg_ms,
-        SUM(isr.avg_ms_per_keystroke * (1 / row_num)) / SUM(1 / row_num) AS decaying_average_ms
+        SUM(isr.avg_ms_per_keystroke * (1.0 / row_num)) / SUM(1.0 / row_num) AS decaying_average_ms
     FROM in_scope_rows AS isr
     WHERE isr.row_num <= 20
     GROUP BY
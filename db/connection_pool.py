@@ -0,0 +1,254 @@
+"""Bounded connection pool used by DatabaseManager.
+
+The pool hands out fully configured PostgreSQL connections (autocommit on,
+schema created, search_path set) produced by a factory supplied by
+``DatabaseManager``. Connections are checked out per thread so QThread workers
+and concurrent callers never share a single psycopg2 connection.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Deque, Dict, Optional, Tuple
+
+from .exceptions import DBConnectionError
+
+if TYPE_CHECKING:
+    from .database_manager import ConnectionProtocol
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PoolStats:
+    """Point-in-time snapshot of connection pool usage."""
+
+    max_size: int
+    open_connections: int
+    idle_connections: int
+    in_use_connections: int
+    total_created: int
+    total_checkouts: int
+    total_reaped: int
+    total_waits: int
+    total_wait_ms: float
+
+
+class ConnectionPool:
+    """Thread-safe, bounded pool of database connections.
+
+    Connections are created lazily up to ``max_size``. When the pool is
+    exhausted, ``acquire`` blocks until a connection is released or the timeout
+    elapses. Idle connections older than ``idle_timeout_s`` are closed by
+    ``reap_idle`` (also invoked opportunistically on release).
+    """
+
+    def __init__(
+        self,
+        *,
+        factory: Callable[[], "ConnectionProtocol"],
+        max_size: int,
+        idle_timeout_s: float = 300.0,
+        acquire_timeout_s: float = 30.0,
+    ) -> None:
+        """Initialize the pool.
+
+        Args:
+            factory: Callable returning a new, configured connection.
+            max_size: Maximum number of open connections managed by the pool.
+            idle_timeout_s: Seconds an idle connection may live before being reaped.
+            acquire_timeout_s: Default seconds to wait for a free connection.
+
+        Raises:
+            ValueError: If max_size is less than 1.
+        """
+        if max_size < 1:
+            raise ValueError("Connection pool max_size must be at least 1")
+        self._factory = factory
+        self.max_size = max_size
+        self.idle_timeout_s = idle_timeout_s
+        self.acquire_timeout_s = acquire_timeout_s
+
+        self._cond = threading.Condition(threading.Lock())
+        # Idle connections with the monotonic time they were returned
+        self._idle: Deque[Tuple["ConnectionProtocol", float]] = deque()
+        # id(conn) -> conn for every connection currently checked out
+        self._in_use: Dict[int, "ConnectionProtocol"] = {}
+        self._pending_creates = 0
+        self._closed = False
+        self._last_reap = time.monotonic()
+
+        self._total_created = 0
+        self._total_checkouts = 0
+        self._total_reaped = 0
+        self._total_waits = 0
+        self._total_wait_ms = 0.0
+
+    def _open_count(self) -> int:
+        """Return the number of open (idle + in use + being created) connections."""
+        return len(self._idle) + len(self._in_use) + self._pending_creates
+
+    def acquire(self, *, timeout_s: Optional[float] = None) -> "ConnectionProtocol":
+        """Check out a connection, creating one if the pool has capacity.
+
+        Args:
+            timeout_s: Seconds to wait when the pool is exhausted; defaults to
+                ``acquire_timeout_s``.
+
+        Returns:
+            A connection reserved for the caller until ``release`` is called.
+
+        Raises:
+            DBConnectionError: If the pool is closed, the wait times out, or a new
+                connection cannot be created.
+        """
+        wait_limit = self.acquire_timeout_s if timeout_s is None else timeout_s
+        deadline = time.monotonic() + wait_limit
+        waited = False
+        wait_started = time.monotonic()
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise DBConnectionError("Connection pool is closed")
+                if self._idle:
+                    conn, _ = self._idle.pop()  # LIFO keeps hot connections warm
+                    self._in_use[id(conn)] = conn
+                    self._record_checkout(waited, wait_started)
+                    return conn
+                if self._open_count() < self.max_size:
+                    self._pending_creates += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise DBConnectionError(
+                        f"Timed out after {wait_limit:.1f}s waiting for a pooled connection "
+                        f"(max_size={self.max_size})"
+                    )
+                waited = True
+                self._cond.wait(remaining)
+
+        # Create outside the lock so slow connects do not block other threads
+        try:
+            conn = self._factory()
+        except Exception as exc:
+            with self._cond:
+                self._pending_creates -= 1
+                self._cond.notify()
+            traceback.print_exc()
+            raise DBConnectionError(f"Failed to open pooled connection: {exc}") from exc
+
+        with self._cond:
+            self._pending_creates -= 1
+            self._total_created += 1
+            self._in_use[id(conn)] = conn
+            self._record_checkout(waited, wait_started)
+        return conn
+
+    def _record_checkout(self, waited: bool, wait_started: float) -> None:
+        """Update checkout counters; caller must hold the pool lock."""
+        self._total_checkouts += 1
+        if waited:
+            self._total_waits += 1
+            self._total_wait_ms += (time.monotonic() - wait_started) * 1000.0
+
+    def release(self, conn: "ConnectionProtocol", *, discard: bool = False) -> None:
+        """Return a connection to the pool.
+
+        Any transaction left open on the connection is rolled back so the next
+        borrower starts from a clean state.
+
+        Args:
+            conn: Connection previously returned by ``acquire``.
+            discard: Close the connection instead of keeping it idle (e.g. after
+                a connection-level failure).
+        """
+        if not discard:
+            try:
+                if not getattr(conn, "autocommit", True):
+                    conn.rollback()
+                    conn.autocommit = True
+            except Exception as exc:
+                logger.warning("Discarding pooled connection after reset failure: %s", exc)
+                discard = True
+
+        with self._cond:
+            self._in_use.pop(id(conn), None)
+            if discard or self._closed:
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+            reap_due = time.monotonic() - self._last_reap >= self.idle_timeout_s / 2
+
+        if reap_due:
+            self.reap_idle()
+
+    def reap_idle(self, *, now: Optional[float] = None) -> int:
+        """Close idle connections that have exceeded the idle timeout.
+
+        Args:
+            now: Monotonic timestamp to evaluate against (defaults to current time).
+
+        Returns:
+            Number of connections closed.
+        """
+        current = time.monotonic() if now is None else now
+        expired: list["ConnectionProtocol"] = []
+        with self._cond:
+            self._last_reap = current
+            kept: Deque[Tuple["ConnectionProtocol", float]] = deque()
+            for conn, returned_at in self._idle:
+                if current - returned_at >= self.idle_timeout_s:
+                    expired.append(conn)
+                else:
+                    kept.append((conn, returned_at))
+            self._idle = kept
+            self._total_reaped += len(expired)
+            if expired:
+                self._cond.notify_all()
+
+        for conn in expired:
+            self._close_quietly(conn)
+        return len(expired)
+
+    def stats(self) -> PoolStats:
+        """Return a snapshot of pool counters."""
+        with self._cond:
+            return PoolStats(
+                max_size=self.max_size,
+                open_connections=len(self._idle) + len(self._in_use),
+                idle_connections=len(self._idle),
+                in_use_connections=len(self._in_use),
+                total_created=self._total_created,
+                total_checkouts=self._total_checkouts,
+                total_reaped=self._total_reaped,
+                total_waits=self._total_waits,
+                total_wait_ms=self._total_wait_ms,
+            )
+
+    def close_all(self) -> None:
+        """Close every idle connection and refuse further checkouts.
+
+        Connections still checked out are closed when they are released.
+        """
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._cond.notify_all()
+        for conn in idle:
+            self._close_quietly(conn)
+
+    @staticmethod
+    def _close_quietly(conn: "ConnectionProtocol") -> None:
+        """Close a connection, logging instead of raising on failure."""
+        try:
+            conn.close()
+        except Exception as exc:
+            logger.warning("Error closing pooled connection: %s", exc)
@@ -0,0 +1,162 @@
+"""Streaming COPY FROM STDIN support for DatabaseManager.
+
+``CopyRowStream`` is a read-only file-like object that encodes rows into
+PostgreSQL COPY text format lazily, a chunk of rows at a time, as the driver
+reads from it. Large append-only payloads (keystrokes, n-grams) can therefore be
+written from a generator or columnar batch without first building the whole
+list of tuples or the whole TSV payload in memory.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Iterable, Iterator, List, Sequence
+
+# COPY text format escapes (https://www.postgresql.org/docs/current/sql-copy.html)
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+_COPY_NULL = "\\N"
+
+
+@dataclass(frozen=True)
+class CopyResult:
+    """Outcome of a streaming COPY.
+
+    Attributes:
+        table: Target table name.
+        rows: Number of rows written.
+        chunks: Number of chunks handed to the driver.
+        bytes_sent: Characters of COPY payload produced.
+        elapsed_ms: Wall time of the COPY, including commit.
+    """
+
+    table: str
+    rows: int
+    chunks: int
+    bytes_sent: int
+    elapsed_ms: float
+
+    @property
+    def rows_per_sec(self) -> float:
+        """Throughput of the COPY in rows per second."""
+        if self.elapsed_ms <= 0:
+            return float(self.rows) * 1000.0 if self.rows else 0.0
+        return self.rows / (self.elapsed_ms / 1000.0)
+
+
+def format_copy_value(value: object) -> str:
+    r"""Encode one value as a COPY text-format field.
+
+    None becomes ``\N``; booleans become ``t``/``f``; datetimes use ISO 8601;
+    backslash, tab, newline and carriage return are escaped so values round-trip
+    unchanged.
+    """
+    if value is None:
+        return _COPY_NULL
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value).translate(_COPY_ESCAPES)
+
+
+class CopyRowStream:
+    """File-like reader producing COPY text rows on demand.
+
+    Rows are pulled from ``rows`` ``chunk_rows`` at a time; only the current
+    chunk is held in memory. Each row must have exactly ``column_count`` fields.
+    """
+
+    def __init__(
+        self,
+        *,
+        rows: Iterable[Sequence[object]],
+        column_count: int,
+        chunk_rows: int = 5000,
+    ) -> None:
+        """Wrap a row iterable.
+
+        Args:
+            rows: Iterable of row tuples, consumed lazily.
+            column_count: Expected number of fields per row.
+            chunk_rows: Rows encoded per refill of the internal buffer.
+
+        Raises:
+            ValueError: If column_count or chunk_rows is less than 1.
+        """
+        if column_count < 1:
+            raise ValueError("column_count must be at least 1")
+        if chunk_rows < 1:
+            raise ValueError("chunk_rows must be at least 1")
+        self._rows: Iterator[Sequence[object]] = iter(rows)
+        self._column_count = column_count
+        self._chunk_rows = chunk_rows
+        self._buffer = ""
+        self._pos = 0
+        self._exhausted = False
+        self.rows = 0
+        self.chunks = 0
+        self.bytes_sent = 0
+
+    def _encode_row(self, row: Sequence[object]) -> str:
+        if len(row) != self._column_count:
+            raise ValueError(
+                f"Row {self.rows + 1} has {len(row)} fields; expected {self._column_count}"
+            )
+        return "\t".join([format_copy_value(v) for v in row]) + "\n"
+
+    def _refill(self) -> bool:
+        """Encode the next chunk of rows; return False once the source is drained."""
+        if self._exhausted:
+            return False
+        lines: List[str] = []
+        for row in self._rows:
+            lines.append(self._encode_row(row))
+            self.rows += 1
+            if len(lines) >= self._chunk_rows:
+                break
+        else:
+            self._exhausted = True
+        if not lines:
+            return False
+        self._buffer = "".join(lines)
+        self._pos = 0
+        self.chunks += 1
+        return True
+
+    def read(self, size: int = -1) -> str:
+        """Return up to ``size`` characters of COPY data ('' at end of stream)."""
+        parts: List[str] = []
+        remaining = size
+        while size < 0 or remaining > 0:
+            if self._pos >= len(self._buffer) and not self._refill():
+                break
+            end = len(self._buffer) if size < 0 else min(len(self._buffer), self._pos + remaining)
+            piece = self._buffer[self._pos : end]
+            self._pos = end
+            parts.append(piece)
+            remaining -= len(piece)
+        data = "".join(parts)
+        self.bytes_sent += len(data)
+        return data
+
+    def readline(self, size: int = -1) -> str:
+        """Return the next encoded row (COPY drivers may read line by line)."""
+        if self._pos >= len(self._buffer) and not self._refill():
+            return ""
+        newline = self._buffer.find("\n", self._pos)
+        end = len(self._buffer) if newline < 0 else newline + 1
+        if size >= 0:
+            end = min(end, self._pos + size)
+        data = self._buffer[self._pos : end]
+        self._pos = end
+        self.bytes_sent += len(data)
+        return data
+
+
+def copy_statement(*, table: str, columns: Sequence[str]) -> str:
+    """Build ``COPY table (cols) FROM STDIN`` for already-validated identifiers."""
+    return f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT text)"
+
@@ -13,25 +13,36 @@ import json
 import logging
 import os
 import re
+import threading
 import time
 import traceback
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
 from typing import (
     IO,
     TYPE_CHECKING,
     Any,
+    Callable,
     Dict,
     Iterable,
+    Iterator,
     List,
+    Literal,
     NoReturn,
     Optional,
     Protocol,
     Self,
     Sequence,
+    Set,
     TextIO,
     Tuple,
     Type,
     Union,
     cast,
+    overload,
 )
 
 import boto3
@@ -41,7 +52,8 @@ from psycopg2 import extras as psycopg2_extras
 if TYPE_CHECKING:
     pass
 
-
+from .connection_pool import ConnectionPool, PoolStats
+from .copy_stream import CopyResult, CopyRowStream, copy_statement
 from .exceptions import (
     ConstraintError,
     DatabaseError,
@@ -52,6 +64,17 @@ from .exceptions import (
     SchemaError,
     TableNotFoundError,
 )
+from .index_manager import IndexManager, IndexSpec
+from .query_stats import (
+    QUERY_STATS_FILE_ENV,
+    SLOW_QUERY_MS_ENV,
+    QueryRecorder,
+    QueryStat,
+    SlowQuery,
+    format_report,
+)
+from .row_formats import ROW_SHAPED_FORMATS, RowFormat, column_names, require_numpy, shape_row, shape_rows
+from .statement_cache import Statement, StatementCache, StatementCacheStats
 
 # Removed optional alias/guards; direct imports are now required.
 
@@ -89,11 +112,16 @@ def debug_print(*args: object, **kwargs: object) -> None:
             print(*args_tuple, sep=sep_arg, end=end_arg, flush=flush_arg)
 
 
+def _ms_since(start: float) -> float:
+    """Milliseconds elapsed since a ``time.perf_counter()`` reading."""
+    return (time.perf_counter() - start) * 1000.0
+
+
 class ConnectionProtocol(Protocol):
     """Minimal DB-API connection protocol used by DatabaseManager."""
 
-    def cursor(self) -> "CursorProtocol":
-        """Return a new database cursor."""
+    def cursor(self, name: Optional[str] = ..., *, withhold: bool = ...) -> "CursorProtocol":
+        """Return a new database cursor (a server-side cursor when ``name`` is given)."""
         ...
 
     def commit(self) -> None:
@@ -159,6 +187,10 @@ class CursorProtocol(Protocol):
         """PostgreSQL COPY FROM STDIN interface."""
         ...
 
+    def copy_expert(self, sql: str, file: Any, size: int = ...) -> None:
+        """PostgreSQL COPY with an explicit statement (psycopg2 extension)."""
+        ...
+
     # Optional attribute for column metadata
     @property
     def description(self) -> Optional[Sequence[Sequence[object]]]:
@@ -233,6 +265,53 @@ class BulkMethod(enum.Enum):
     EXECUTEMANY = "execute_many"  # Force DB-API executemany fallback
 
 
+@dataclass
+class TransactionHandle:
+    """Handle yielded by ``DatabaseManager.transaction()``.
+
+    Attributes:
+        connection: Connection the unit of work runs on.
+        depth: Nesting level (1 for the outermost transaction).
+        savepoint: Savepoint name for nested scopes, None for the outermost one.
+        commit_ms: Commit latency in milliseconds, set when the outermost scope commits.
+    """
+
+    connection: ConnectionProtocol
+    depth: int
+    savepoint: Optional[str] = None
+    commit_ms: Optional[float] = None
+
+
+@dataclass
+class TransactionStats:
+    """Cumulative unit-of-work counters for a DatabaseManager."""
+
+    commits: int = 0
+    rollbacks: int = 0
+    total_commit_ms: float = 0.0
+    last_commit_ms: float = 0.0
+
+
+@dataclass(frozen=True)
+class Migration:
+    """One versioned step of the application schema.
+
+    Attributes:
+        version: Position in the migration sequence (1, 2, ...); never reused.
+        description: Short human-readable summary recorded in schema_migrations.
+        apply: Callable issuing the DDL. Migrations must be idempotent
+            (``IF NOT EXISTS``...) so ``init_tables(force=True)`` can replay them.
+        online: Run outside the migration transaction, after it commits, and
+            record the version once done. Used for CREATE INDEX CONCURRENTLY,
+            which PostgreSQL refuses inside a transaction block.
+    """
+
+    version: int
+    description: str
+    apply: Callable[[], None]
+    online: bool = False
+
+
 class DatabaseManager:
     """Centralized manager for database connections and operations.
 
@@ -290,6 +369,12 @@ class DatabaseManager:
         password: Optional[str] = None,
         connection_type: ConnectionType = ConnectionType.POSTGRESS_DOCKER,
         debug_util: Optional[object] = None,
+        pool_size: int = 0,
+        pool_idle_timeout_s: float = 300.0,
+        statement_cache_size: int = 512,
+        record_queries: bool = True,
+        slow_query_ms: Optional[float] = None,
+        explain_slow_queries: bool = True,
     ) -> None:
         """Initialize a DatabaseManager with the specified connection type and parameters.
 
@@ -302,6 +387,20 @@ class DatabaseManager:
             connection_type: Whether to connect to Aurora (cloud) or a Docker/local
                 PostgreSQL instance.
             debug_util: Optional DebugUtil instance for handling debug output.
+            pool_size: Maximum number of additional pooled connections that can be
+                checked out via ``connection()`` (e.g. by QThread workers). ``0``
+                keeps the single shared connection for every caller.
+            pool_idle_timeout_s: Seconds an idle pooled connection is kept open
+                before it is reaped.
+            statement_cache_size: Number of translated statements kept in the
+                LRU statement cache (``0`` translates every call afresh).
+            record_queries: Keep per-statement counters and latency histograms
+                (see ``query_stats()``).
+            slow_query_ms: Log executions at least this slow in ``slow_queries()``.
+                Defaults to the ``AITT_SLOW_QUERY_MS`` environment variable;
+                unset disables the slow-query log.
+            explain_slow_queries: Capture an ``EXPLAIN`` plan for slow queries
+                (``ANALYZE, BUFFERS`` for SELECTs), at most once a minute per statement.
 
         Raises:
             DBConnectionError: If the database connection cannot be established.
@@ -312,6 +411,23 @@ class DatabaseManager:
         self.is_postgres = False
         self._conn: Optional[ConnectionProtocol] = None
         self.debug_util = debug_util  # Store the DebugUtil instance
+        # Opens a new, fully configured connection; set by the connect methods
+        self._connection_factory: Optional[Callable[[], ConnectionProtocol]] = None
+        self._pool: Optional[ConnectionPool] = None
+        # Per-thread pinned connection (and nesting depth) for connection() scopes
+        self._local = threading.local()
+        # id(connection) -> open transaction depth; statements skip commit while > 0
+        self._tx_depths: Dict[int, int] = {}
+        self._tx_stats = TransactionStats()
+        # Raw SQL -> translated Statement, so hot statements are parsed once
+        self._statements = StatementCache(schema=self.SCHEMA_NAME, max_size=statement_cache_size)
+        # Per-fingerprint query counters and slow-query log (None when disabled)
+        if slow_query_ms is None and os.environ.get(SLOW_QUERY_MS_ENV):
+            slow_query_ms = float(os.environ[SLOW_QUERY_MS_ENV])
+        self._query_recorder: Optional[QueryRecorder] = (
+            QueryRecorder(slow_query_ms=slow_query_ms) if record_queries else None
+        )
+        self.explain_slow_queries = explain_slow_queries
 
         provided_params: Tuple[Optional[Union[str, int]], ...] = (
             host,
@@ -347,6 +463,19 @@ class DatabaseManager:
         else:
             raise DBConnectionError(f"Unsupported connection type: {connection_type}")
 
+        if pool_size > 0:
+            self._init_pool(max_size=pool_size, idle_timeout_s=pool_idle_timeout_s)
+
+    def _init_pool(self, *, max_size: int, idle_timeout_s: float) -> None:
+        """Create the connection pool backed by the active connection factory."""
+        if self._connection_factory is None:
+            raise DBConnectionError("Connection pooling requires a reconnectable backend")
+        self._pool = ConnectionPool(
+            factory=self._connection_factory,
+            max_size=max_size,
+            idle_timeout_s=idle_timeout_s,
+        )
+
     def _debug_message(self, *args: object, **kwargs: object) -> None:
         """Send debug message through DebugUtil if available, otherwise use debug_print fallback."""
         if self.debug_util and hasattr(self.debug_util, "debugMessage"):
@@ -376,63 +505,74 @@ class DatabaseManager:
                 raise DBConnectionError("Secrets Manager secret payload is not a mapping")
             config = cast(Dict[str, str], raw_config)
 
-            # Generate auth token for Aurora serverless
-            rds_client = _create_rds_client(self.AWS_REGION)
-            token = rds_client.generate_db_auth_token(
-                DBHostname=config["host"],
-                Port=int(config["port"]),
-                DBUsername=config["username"],
-                Region=self.AWS_REGION,
-            )
-
-            # Connect to Aurora
-            conn = cast(
-                ConnectionProtocol,
-                psycopg2.connect(
-                    host=config["host"],
-                    port=int(config["port"]),
-                    database=config["dbname"],
-                    user=config["username"],
-                    password=token,
-                    sslmode="require",
-                    options=f"-c search_path={self.SCHEMA_NAME},public",
-                ),
-            )
-            # Set autocommit when available (psycopg2)
-            conn.autocommit = True
-            self._conn = conn
-
-            # Ensure the target schema exists to avoid UndefinedTable on qualified ops
-            try:
-                with conn.cursor() as cur:
-                    cur.execute(f"CREATE SCHEMA IF NOT EXISTS {self.SCHEMA_NAME}")
-            except Exception as schema_exc:
-                # Non-fatal: we'll surface later if DDL/DML fails, but log for visibility
-                traceback.print_exc()
-                self._debug_message(f"Failed to ensure schema '{self.SCHEMA_NAME}': {schema_exc}")
-
-            # Debug connection/session state
-            try:
-                with conn.cursor() as cur:
-                    cur.execute(
-                        "SELECT current_user, current_schema, current_setting('search_path')"
-                    )
-                    row = cur.fetchone()
-                    if row:
-                        row_t = cast(Tuple[object, ...], row)
-                        self._debug_message(
-                            f"PG session user={row_t[0]}, schema={row_t[1]}, search_path={row_t[2]}"
-                        )
-            except Exception as sess_exc:
-                self._debug_message(f"Failed to read PG session state: {sess_exc}")
-                traceback.print_exc()
-
+            self._conn = self._open_aurora_connection(config=config)
+            # IAM auth tokens expire, so every pooled connection generates a fresh one
+            self._connection_factory = lambda: self._open_aurora_connection(config=config)
             self.is_postgres = True
         except Exception as e:
             traceback.print_exc()
             self._debug_message(f"Aurora connection failed: {e}")
             raise DBConnectionError(f"Failed to connect to AWS Aurora database: {e}") from e
 
+    def _open_aurora_connection(self, *, config: Dict[str, str]) -> ConnectionProtocol:
+        """Open and configure a new Aurora connection using a fresh IAM auth token.
+
+        Args:
+            config: Connection settings loaded from Secrets Manager.
+
+        Returns:
+            A connection with autocommit enabled and the schema search_path applied.
+        """
+        # Generate auth token for Aurora serverless
+        rds_client = _create_rds_client(self.AWS_REGION)
+        token = rds_client.generate_db_auth_token(
+            DBHostname=config["host"],
+            Port=int(config["port"]),
+            DBUsername=config["username"],
+            Region=self.AWS_REGION,
+        )
+
+        # Connect to Aurora
+        conn = cast(
+            ConnectionProtocol,
+            psycopg2.connect(
+                host=config["host"],
+                port=int(config["port"]),
+                database=config["dbname"],
+                user=config["username"],
+                password=token,
+                sslmode="require",
+                options=f"-c search_path={self.SCHEMA_NAME},public",
+            ),
+        )
+        # Set autocommit when available (psycopg2)
+        conn.autocommit = True
+
+        # Ensure the target schema exists to avoid UndefinedTable on qualified ops
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"CREATE SCHEMA IF NOT EXISTS {self.SCHEMA_NAME}")
+        except Exception as schema_exc:
+            # Non-fatal: we'll surface later if DDL/DML fails, but log for visibility
+            traceback.print_exc()
+            self._debug_message(f"Failed to ensure schema '{self.SCHEMA_NAME}': {schema_exc}")
+
+        # Debug connection/session state
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT current_user, current_schema, current_setting('search_path')")
+                row = cur.fetchone()
+                if row:
+                    row_t = cast(Tuple[object, ...], row)
+                    self._debug_message(
+                        f"PG session user={row_t[0]}, schema={row_t[1]}, search_path={row_t[2]}"
+                    )
+        except Exception as sess_exc:
+            self._debug_message(f"Failed to read PG session state: {sess_exc}")
+            traceback.print_exc()
+
+        return conn
+
     # --- Docker-based Postgres support ---
     POSTGRES_IMAGE = "postgres:16-alpine"
     POSTGRES_USER = "postgres"
@@ -494,41 +634,72 @@ class DatabaseManager:
             pass
 
         try:
-            self._conn = cast(
-                ConnectionProtocol,
-                psycopg2.connect(
-                    host=host,
-                    port=port,
-                    database=database,
-                    user=username,
-                    password=password,
-                ),
+            self._conn = self._open_postgres_connection(
+                host=host,
+                port=port,
+                database=database,
+                username=username,
+                password=password,
+                context_label=context_label,
+            )
+            self._connection_factory = lambda: self._open_postgres_connection(
+                host=host,
+                port=port,
+                database=database,
+                username=username,
+                password=password,
+                context_label=context_label,
             )
-            self._conn.autocommit = True
-
-            try:
-                with self._conn.cursor() as cur:
-                    cur.execute(f"CREATE SCHEMA IF NOT EXISTS {self.SCHEMA_NAME}")
-                    cur.execute("SELECT current_setting('search_path')")
-            except Exception as schema_exc:
-                traceback.print_exc()
-                self._debug_message(
-                    f"{context_label}: schema/search_path check failed: {schema_exc}"
-                )
-
-            try:
-                with self._conn.cursor() as cur:
-                    cur.execute(f"SET search_path TO {self.SCHEMA_NAME},public")
-            except Exception as sp_exc:
-                traceback.print_exc()
-                self._debug_message(f"{context_label}: failed to set search_path: {sp_exc}")
-
             self.is_postgres = True
         except Exception as exc:
             traceback.print_exc()
             self._debug_message(f"{context_label} failed: {exc}")
             raise DBConnectionError(f"Failed to establish PostgreSQL connection: {exc}") from exc
 
+    def _open_postgres_connection(
+        self,
+        *,
+        host: str,
+        port: int,
+        database: str,
+        username: str,
+        password: str,
+        context_label: str,
+    ) -> ConnectionProtocol:
+        """Open and configure a new PostgreSQL connection using explicit credentials.
+
+        Returns:
+            A connection with autocommit enabled and the schema search_path applied.
+        """
+        conn = cast(
+            ConnectionProtocol,
+            psycopg2.connect(
+                host=host,
+                port=port,
+                database=database,
+                user=username,
+                password=password,
+            ),
+        )
+        conn.autocommit = True
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"CREATE SCHEMA IF NOT EXISTS {self.SCHEMA_NAME}")
+                cur.execute("SELECT current_setting('search_path')")
+        except Exception as schema_exc:
+            traceback.print_exc()
+            self._debug_message(f"{context_label}: schema/search_path check failed: {schema_exc}")
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"SET search_path TO {self.SCHEMA_NAME},public")
+        except Exception as sp_exc:
+            traceback.print_exc()
+            self._debug_message(f"{context_label}: failed to set search_path: {sp_exc}")
+
+        return conn
+
     def _connect_postgres_docker(self) -> None:
         port = self.POSTGRES_PORT
         try:
@@ -566,13 +737,23 @@ class DatabaseManager:
         return True
 
     def close(self) -> None:
-        """Close the database connection.
+        """Close the database connection and any pooled connections.
 
         Raises:
             DBConnectionError: If closing the connection fails.
         """
         self._debug_message("Database Manager: Closing database connection")
+        report_path = os.environ.get(QUERY_STATS_FILE_ENV)
+        if report_path:
+            try:
+                self.write_query_stats(path=Path(report_path))
+            except Exception as report_exc:
+                traceback.print_exc()
+                self._debug_message(f"Failed to write query stats to {report_path}: {report_exc}")
         try:
+            pool = getattr(self, "_pool", None)
+            if pool is not None:
+                pool.close_all()
             if self._conn is not None:
                 self._conn.close()
         except Exception as e:
@@ -582,11 +763,220 @@ class DatabaseManager:
             raise
 
     def _require_connection(self) -> ConnectionProtocol:
-        """Return the active connection or raise if none is available."""
+        """Return the active connection or raise if none is available.
+
+        Inside a ``connection()`` scope this is the connection pinned to the
+        calling thread; otherwise it is the shared primary connection.
+        """
+        pinned = cast(Optional[ConnectionProtocol], getattr(self._local, "conn", None))
+        if pinned is not None:
+            return pinned
         if self._conn is None:
             raise DBConnectionError("Database connection is not established")
         return self._conn
 
+    @contextmanager
+    def connection(self, *, dedicated: bool = False) -> Iterator[ConnectionProtocol]:
+        """Pin a dedicated connection to the current thread for the enclosed block.
+
+        When pooling is enabled (``pool_size > 0``) a connection is checked out of
+        the pool on entry and returned on exit; every DatabaseManager call made by
+        this thread inside the block uses it. Nested scopes on the same thread
+        reuse the pinned connection. Without a pool the shared connection is used,
+        unless ``dedicated`` is set: then a new connection is opened for the block
+        and closed on exit. Background threads must pass ``dedicated=True`` so they
+        never run on the UI thread's shared connection.
+
+        Example:
+            with db.connection(dedicated=True):
+                db.execute(query="INSERT ...", params=(...))
+
+        Args:
+            dedicated: Never fall back to the shared connection.
+
+        Yields:
+            The connection serving the current thread.
+
+        Raises:
+            DBConnectionError: If no connection can be obtained.
+        """
+        pinned = cast(Optional[ConnectionProtocol], getattr(self._local, "conn", None))
+        if pinned is not None:
+            self._local.depth += 1
+            try:
+                yield pinned
+            finally:
+                self._local.depth -= 1
+            return
+
+        if self._pool is None and not dedicated:
+            yield self._require_connection()
+            return
+
+        if self._pool is None:
+            if self._connection_factory is None:
+                raise DBConnectionError("Dedicated connections require a reconnectable backend")
+            conn = self._connection_factory()
+            self._local.conn = conn
+            self._local.depth = 1
+            try:
+                yield conn
+            finally:
+                self._local.conn = None
+                self._local.depth = 0
+                try:
+                    conn.close()
+                except Exception as e:
+                    traceback.print_exc()
+                    self._debug_message(f"Error closing dedicated connection: {e}")
+            return
+
+        conn = self._pool.acquire()
+        self._local.conn = conn
+        self._local.depth = 1
+        discard = False
+        try:
+            yield conn
+        except DBConnectionError:
+            discard = True
+            raise
+        finally:
+            self._local.conn = None
+            self._local.depth = 0
+            self._pool.release(conn, discard=discard)
+
+    def pool_stats(self) -> Optional[PoolStats]:
+        """Return connection pool counters, or None when pooling is disabled."""
+        if self._pool is None:
+            return None
+        return self._pool.stats()
+
+    def reap_idle_connections(self) -> int:
+        """Close pooled connections idle longer than the configured timeout.
+
+        Returns:
+            Number of connections closed (0 when pooling is disabled).
+        """
+        if self._pool is None:
+            return 0
+        return self._pool.reap_idle()
+
+    def _in_transaction(self, conn: ConnectionProtocol) -> bool:
+        """Return True when a ``transaction()`` scope is open on the connection."""
+        return self._tx_depths.get(id(conn), 0) > 0
+
+    def _commit_unless_in_transaction(self, conn: ConnectionProtocol) -> None:
+        """Commit a single statement unless a unit of work is open on the connection."""
+        if not self._in_transaction(conn):
+            conn.commit()
+
+    @contextmanager
+    def transaction(self) -> Iterator[TransactionHandle]:
+        """Run the enclosed statements as a single unit of work.
+
+        The outermost scope switches the connection out of autocommit so that
+        ``execute``/``execute_many`` no longer commit per statement, then commits
+        once on success or rolls back on any exception. Nested scopes create a
+        SAVEPOINT and only roll back to it on failure, leaving the outer unit of
+        work usable. With pooling enabled the scope also pins a pooled connection
+        to the calling thread for its whole duration.
+
+        Example:
+            with db.transaction() as tx:
+                db.execute(query="INSERT ...", params=(...))
+            print(tx.commit_ms)
+
+        Yields:
+            TransactionHandle describing the scope; ``commit_ms`` is filled in once
+            the outermost scope commits.
+
+        Raises:
+            DBConnectionError: If no connection is available.
+            DatabaseError: If BEGIN/SAVEPOINT/COMMIT fails.
+        """
+        with self.connection() as conn:
+            key = id(conn)
+            depth = self._tx_depths.get(key, 0) + 1
+            handle = TransactionHandle(connection=conn, depth=depth)
+
+            try:
+                if depth == 1:
+                    conn.autocommit = False
+                else:
+                    handle.savepoint = f"uow_sp_{depth}"
+                    self._run_transaction_control(conn, f"SAVEPOINT {handle.savepoint}")
+            except Exception as e:
+                traceback.print_exc()
+                self._translate_and_raise(e=e)
+            self._tx_depths[key] = depth
+
+            try:
+                try:
+                    yield handle
+                except BaseException:
+                    self._rollback_scope(conn, handle)
+                    raise
+                self._commit_scope(conn, handle)
+            finally:
+                if depth == 1:
+                    self._tx_depths.pop(key, None)
+                    try:
+                        conn.autocommit = True
+                    except Exception as reset_exc:
+                        traceback.print_exc()
+                        self._debug_message(f"Failed to restore autocommit: {reset_exc}")
+                else:
+                    self._tx_depths[key] = depth - 1
+
+    def _run_transaction_control(self, conn: ConnectionProtocol, statement: str) -> None:
+        """Execute a SAVEPOINT/RELEASE/ROLLBACK TO statement on the connection."""
+        cursor = conn.cursor()
+        try:
+            cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    def _commit_scope(self, conn: ConnectionProtocol, handle: TransactionHandle) -> None:
+        """Commit the outermost scope or release a nested savepoint."""
+        try:
+            if handle.savepoint is not None:
+                self._run_transaction_control(conn, f"RELEASE SAVEPOINT {handle.savepoint}")
+                return
+            started = time.perf_counter()
+            conn.commit()
+            handle.commit_ms = (time.perf_counter() - started) * 1000.0
+        except Exception as e:
+            traceback.print_exc()
+            self._debug_message(f"Transaction commit failed: {e}")
+            self._rollback_scope(conn, handle)
+            self._translate_and_raise(e=e)
+
+        self._tx_stats.commits += 1
+        self._tx_stats.last_commit_ms = handle.commit_ms
+        self._tx_stats.total_commit_ms += handle.commit_ms
+        self._debug_message(f"Transaction committed in {handle.commit_ms:.2f} ms")
+
+    def _rollback_scope(self, conn: ConnectionProtocol, handle: TransactionHandle) -> None:
+        """Roll back the outermost scope or to a nested savepoint, logging failures."""
+        try:
+            if handle.savepoint is not None:
+                self._run_transaction_control(conn, f"ROLLBACK TO SAVEPOINT {handle.savepoint}")
+            else:
+                conn.rollback()
+                self._tx_stats.rollbacks += 1
+        except Exception as rollback_exc:
+            traceback.print_exc()
+            self._debug_message(f"Transaction rollback failed: {rollback_exc}")
+
+    def transaction_stats(self) -> TransactionStats:
+        """Return a copy of the cumulative commit/rollback counters."""
+        return TransactionStats(
+            commits=self._tx_stats.commits,
+            rollbacks=self._tx_stats.rollbacks,
+            total_commit_ms=self._tx_stats.total_commit_ms,
+            last_commit_ms=self._tx_stats.last_commit_ms,
+        )
+
     def _get_cursor(self) -> CursorProtocol:
         """Get a cursor from the database connection.
 
@@ -614,47 +1004,131 @@ class DatabaseManager:
         conn = self._require_connection()
         cursor = conn.cursor()
         cursor.execute(query)
-        conn.commit()
+        self._commit_unless_in_transaction(conn)
         cursor.close()
 
+    def _statement(self, *, query: str) -> Statement:
+        """Return the cached translation of ``query`` (see ``db.statement_cache``)."""
+        if self._statements.schema != self.SCHEMA_NAME:
+            # SCHEMA_NAME was overridden on the instance; cached DDL is stale
+            self._statements = StatementCache(schema=self.SCHEMA_NAME, max_size=self._statements.max_size)
+        return self._statements.get(query)
+
+    def statement_cache_stats(self) -> StatementCacheStats:
+        """Return statement cache counters (size, hits, misses, evictions)."""
+        return self._statements.stats()
+
+    # Statement kinds EXPLAIN accepts; only SELECTs are EXPLAIN ANALYZEd (ANALYZE re-executes)
+    _EXPLAINABLE_KINDS = frozenset({"SELECT", "WITH", "INSERT", "UPDATE", "DELETE"})
+
+    def _record_query(
+        self,
+        *,
+        stmt: Statement,
+        params: Optional[Tuple[object, ...]],
+        elapsed_ms: float,
+        rows: int = -1,
+        error: bool = False,
+        conn: Optional[ConnectionProtocol] = None,
+    ) -> None:
+        """Add one execution to the query counters and the slow-query log."""
+        recorder = self._query_recorder
+        if recorder is None:
+            return
+        explain_now = recorder.record(
+            fingerprint=stmt.fingerprint, kind=stmt.kind, elapsed_ms=elapsed_ms, rows=rows, error=error
+        )
+        if error or not recorder.is_slow(elapsed_ms):
+            return
+        plan: Optional[str] = None
+        if explain_now and self.explain_slow_queries and conn is not None and params is not None:
+            plan = self._explain(stmt=stmt, params=params, conn=conn)
+        recorder.add_slow_query(
+            fingerprint=stmt.fingerprint, sql=stmt.sql, params=params, elapsed_ms=elapsed_ms, rows=rows, plan=plan
+        )
+        self._debug_message(f"Slow query ({elapsed_ms:.1f} ms): {stmt.debug_sql}")
+
+    def _explain(self, *, stmt: Statement, params: Tuple[object, ...], conn: ConnectionProtocol) -> Optional[str]:
+        """Return the EXPLAIN output for a slow statement, or None if it cannot be explained.
+
+        Inside ``transaction()`` the EXPLAIN runs under a savepoint so a failure
+        cannot abort the unit of work.
+        """
+        if stmt.kind not in self._EXPLAINABLE_KINDS:
+            return None
+        options = "ANALYZE, BUFFERS" if stmt.kind == "SELECT" else "COSTS"
+        in_tx = self._in_transaction(conn)
+        cursor = conn.cursor()
+        try:
+            if in_tx:
+                cursor.execute("SAVEPOINT aitt_explain")
+            cursor.execute(f"EXPLAIN ({options}) {stmt.sql}", params)
+            plan = "\n".join(str(cast(Tuple[object, ...], row)[0]) for row in cursor.fetchall())
+            if in_tx:
+                cursor.execute("RELEASE SAVEPOINT aitt_explain")
+            return plan
+        except Exception as e:
+            self._debug_message(f"EXPLAIN of slow query failed: {e}")
+            if in_tx:
+                try:
+                    cursor.execute("ROLLBACK TO SAVEPOINT aitt_explain")
+                except Exception as rollback_exc:
+                    self._debug_message(f"Rollback to explain savepoint failed: {rollback_exc}")
+            return None
+        finally:
+            cursor.close()
+
+    def query_stats(self, *, order_by: str = "total_ms", top: Optional[int] = None) -> List[QueryStat]:
+        """Return per-statement counters, largest ``order_by`` first.
+
+        Each ``QueryStat`` groups executions by statement fingerprint (literals
+        and ``IN`` list lengths normalized) with calls, errors, rows, latency
+        totals and a latency histogram (``p95_ms``). Empty when recording is off.
+
+        Args:
+            order_by: One of total_ms, mean_ms, max_ms, p95_ms, calls, rows, errors.
+            top: Keep only the first ``top`` statements.
+        """
+        if self._query_recorder is None:
+            return []
+        return self._query_recorder.stats(order_by=order_by, top=top)
+
+    def slow_queries(self) -> List[SlowQuery]:
+        """Return the slow-query log (with captured plans), oldest first."""
+        if self._query_recorder is None:
+            return []
+        return self._query_recorder.slow_queries()
+
+    def reset_query_stats(self) -> None:
+        """Clear the query counters and the slow-query log."""
+        if self._query_recorder is not None:
+            self._query_recorder.reset()
+
+    def query_stats_report(self, *, order_by: str = "total_ms", top: int = 20, plans: bool = False) -> str:
+        """Render the query counters and slow-query log as a text table."""
+        if self._query_recorder is None:
+            return "Query recording is disabled"
+        return format_report(self._query_recorder.to_dict(), order_by=order_by, top=top, plans=plans)
+
+    def write_query_stats(self, *, path: Path) -> None:
+        """Write the query counters and slow-query log to ``path`` as JSON.
+
+        ``scripts/dump_query_stats.py`` prints the file. ``close()`` writes it
+        automatically when ``AITT_QUERY_STATS_FILE`` is set.
+        """
+        if self._query_recorder is not None:
+            self._query_recorder.write_report(path)
+
     def _qualify_schema_in_query(self, *, query: str) -> str:
         """Prepare queries for PostgreSQL execution.
 
         Since the connection is configured with search_path=typing,public,
         unqualified table names will automatically resolve to the typing schema.
         This method only handles placeholder conversion and minimal DDL qualification
-        where explicit schema specification is required.
+        where explicit schema specification is required. Translations are memoized
+        in the statement cache.
         """
-        # Convert SQLite-style placeholders to PostgreSQL-style
-        if "?" in query:
-            query = query.replace("?", "%s")
-
-        # Only qualify CREATE TABLE and DROP TABLE statements to ensure they
-        # create/drop tables in the correct schema. Other operations (SELECT, INSERT,
-        # UPDATE, DELETE) rely on the search_path configuration.
-        try:
-            # Qualify CREATE TABLE <name>
-            # CREATE TABLE [IF NOT EXISTS] <table>
-            m = re.search(r"(?i)^\s*CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?([^\s;(]+)", query)
-            if m:
-                tbl = m.group(1)
-                if "." not in tbl:
-                    start, end = m.span(1)
-                    query = f"{query[:start]}{self.SCHEMA_NAME}.{tbl}{query[end:]}"
-
-            # Qualify DROP TABLE [IF EXISTS] <name>
-            m2 = re.search(r"(?i)^\s*DROP\s+TABLE\s+(?:IF\s+EXISTS\s+)?([^\s;]+)", query)
-            if m2:
-                tbl2 = m2.group(1)
-                if "." not in tbl2:
-                    s2, e2 = m2.span(1)
-                    query = f"{query[:s2]}{self.SCHEMA_NAME}.{tbl2}{query[e2:]}"
-
-        except Exception:
-            # Best-effort; non-fatal if qualification fails
-            pass
-
-        return query
+        return self._statement(query=query).sql
 
     def _translate_and_raise(self, *, e: Exception) -> NoReturn:
         """Translate backend-specific exceptions to our custom exceptions and raise.
@@ -708,27 +1182,34 @@ class DatabaseManager:
             ForeignKeyError, ConstraintError, IntegrityError, DatabaseTypeError
         """
         conn: Optional[ConnectionProtocol] = None
+        stmt: Optional[Statement] = None
+        start = 0.0
+        succeeded = False
         try:
             conn = self._require_connection()
             cursor: CursorProtocol = conn.cursor()
 
-            # Apply schema qualification and placeholder conversion for PostgreSQL
-            query = self._qualify_schema_in_query(query=query)
+            # Schema qualification and placeholder conversion, memoized per raw SQL
+            stmt = self._statement(query=query)
             # Debug the final SQL being executed on Postgres
             try:
-                dbg_sql = query.replace("\n", " ").strip()
-                self._debug_message(f"Executing SQL (PG): {dbg_sql}; params={params}")
+                self._debug_message(f"Executing SQL (PG): {stmt.debug_sql}; params={params}")
             except Exception:
                 pass
 
             # Execute the query
-            cursor.execute(query, params)
+            start = time.perf_counter()
+            cursor.execute(stmt.sql, params)
 
-            # Commit the transaction
+            # Commit the statement unless a unit of work is open on this connection
             conn = self._require_connection()
-            if not query.strip().upper().startswith("SELECT"):
-                conn.commit()
+            if stmt.commits:
+                self._commit_unless_in_transaction(conn)
 
+            succeeded = True
+            self._record_query(
+                stmt=stmt, params=params, elapsed_ms=_ms_since(start), rows=getattr(cursor, "rowcount", -1), conn=conn
+            )
             return cursor
         except psycopg2.errors.ForeignKeyViolation as e:
             raise ForeignKeyError(f"Foreign key constraint failed: {e}") from e
@@ -741,7 +1222,8 @@ class DatabaseManager:
         except Exception as e:
             traceback.print_exc()
             self._debug_message(f"Exception during query: {e}. Rolling back transaction.")
-            if conn is not None:
+            # Inside transaction() the scope owns rollback (or savepoint rollback)
+            if conn is not None and not self._in_transaction(conn):
                 try:
                     conn.rollback()
                 except Exception as rollback_exc:
@@ -749,6 +1231,9 @@ class DatabaseManager:
                     self._debug_message(f" Rollback failed: {rollback_exc}")
             self._translate_and_raise(e=e)
             raise AssertionError("unreachable") from e
+        finally:
+            if stmt is not None and start and not succeeded:
+                self._record_query(stmt=stmt, params=params, elapsed_ms=_ms_since(start), error=True)
 
     def execute_many(
         self,
@@ -771,6 +1256,28 @@ class DatabaseManager:
         Returns:
             Database cursor after execution.
         """
+        params_list: List[Tuple[object, ...]] = list(params_seq)
+        stmt = self._statement(query=query)
+        start = time.perf_counter()
+        try:
+            cursor = self._execute_many(
+                query=query, params_list=params_list, method=method, page_size=page_size
+            )
+        except Exception:
+            self._record_query(stmt=stmt, params=None, elapsed_ms=_ms_since(start), error=True)
+            raise
+        self._record_query(stmt=stmt, params=None, elapsed_ms=_ms_since(start), rows=len(params_list))
+        return cursor
+
+    def _execute_many(
+        self,
+        *,
+        query: str,
+        params_list: List[Tuple[object, ...]],
+        method: Union[BulkMethod, str],
+        page_size: int,
+    ) -> CursorProtocol:
+        """Run ``execute_many`` with the chosen bulk strategy (timing is done by the caller)."""
         conn: Optional[ConnectionProtocol] = None
         try:
             conn = self._require_connection()
@@ -784,9 +1291,6 @@ class DatabaseManager:
             if self.is_postgres:
                 query = self._qualify_schema_in_query(query=query)
 
-            # Bulk strategies selection
-            params_list: List[Tuple[object, ...]] = list(params_seq)
-
             # Normalize method to enum
             method_enum: BulkMethod
             if isinstance(method, BulkMethod):
@@ -816,18 +1320,25 @@ class DatabaseManager:
             if method_enum is BulkMethod.COPY:
                 return self._bulk_copy_from(cursor, query, params_list)
 
-            # AUTO: prefer VALUES, fallback to COPY, then EXECUTEMANY
+            # AUTO: prefer VALUES, fallback to COPY, then EXECUTEMANY.
+            # Inside a transaction a server-side failure aborts the transaction, so
+            # only statement-shape incompatibilities (DatabaseTypeError) fall back.
+            in_tx = self._in_transaction(conn)
             try:
                 return self._bulk_execute_values(cursor, query, params_list, page_size)
-            except Exception:
+            except Exception as values_exc:
+                if in_tx and not isinstance(values_exc, DatabaseTypeError):
+                    raise
                 try:
                     return self._bulk_copy_from(cursor, query, params_list)
-                except Exception:
+                except Exception as copy_exc:
+                    if in_tx and not isinstance(copy_exc, DatabaseTypeError):
+                        raise
                     return self._bulk_executemany(cursor, query, params_list)
         except Exception as e:
             traceback.print_exc()
             self._debug_message(f" Exception during execute_many: {e}. Rolling back transaction.")
-            if conn is not None:
+            if conn is not None and not self._in_transaction(conn):
                 try:
                     conn.rollback()
                 except Exception as rollback_exc:
@@ -853,9 +1364,8 @@ class DatabaseManager:
         - Errors: any backend errors are handled by caller via ``_translate_and_raise``.
         """
         cursor.executemany(query, params_list)
-        if not query.strip().upper().startswith("SELECT"):
-            conn = self._require_connection()
-            conn.commit()
+        if self._statement(query=query).commits:
+            self._commit_unless_in_transaction(self._require_connection())
         return cursor
 
     def _bulk_execute_values(
@@ -877,20 +1387,13 @@ class DatabaseManager:
         - Commit: commits when the statement is non-SELECT.
         - Errors: any backend errors are handled by caller via ``_translate_and_raise``.
         """
-        pattern = r"VALUES\s*\((?:\s*%s\s*,?\s*)+\)"
-        if re.search(pattern, query, flags=re.IGNORECASE):
-            query_for_values = re.sub(pattern, "VALUES %s", query, count=1, flags=re.IGNORECASE)
-        else:
-            # If user already provided VALUES %s, keep as-is; otherwise not compatible
-            if re.search(r"VALUES\s*%s", query, flags=re.IGNORECASE):
-                query_for_values = query
-            else:
-                raise DatabaseTypeError("Query not compatible with execute_values")
+        stmt = self._statement(query=query)
+        if stmt.values_sql is None:
+            raise DatabaseTypeError("Query not compatible with execute_values")
 
-        psycopg2_extras.execute_values(cursor, query_for_values, params_list, page_size=page_size)
-        if not query.strip().upper().startswith("SELECT"):
-            conn = self._require_connection()
-            conn.commit()
+        psycopg2_extras.execute_values(cursor, stmt.values_sql, params_list, page_size=page_size)
+        if stmt.commits:
+            self._commit_unless_in_transaction(self._require_connection())
         return cursor
 
     def _bulk_copy_from(
@@ -912,12 +1415,11 @@ class DatabaseManager:
         - Errors: raises ``DatabaseTypeError`` for incompatible statements or length
           mismatches; backend errors are handled by caller via ``_translate_and_raise``.
         """
-        m = re.search(r"INSERT\s+INTO\s+([^\s(]+)\s*\(([^)]+)\)", query, flags=re.IGNORECASE)
-        if not m:
+        stmt = self._statement(query=query)
+        if stmt.table is None:
             raise DatabaseTypeError("COPY method requires INSERT ... (cols) VALUES ... form")
-        table_name = cast(str, m.group(1))
-        cols_raw = cast(str, m.group(2))
-        cols: List[str] = [c.strip() for c in cols_raw.split(",")]
+        table_name = stmt.table
+        cols: List[str] = list(stmt.columns)
         # Build both qualified and unqualified identifiers.
         # Unit tests using a FakeCursor expect a schema-qualified value, but on real
         # PostgreSQL cursors passing a dotted identifier to copy_from can fail due to
@@ -974,28 +1476,121 @@ class DatabaseManager:
 
         # Use copy_from for direct COPY FROM STDIN operation
         cursor.copy_from(buf, target_for_copy, columns=cols, sep="\t", null="\\N")
-        if not query.strip().upper().startswith("SELECT"):
-            conn = self._require_connection()
-            conn.commit()
+        if stmt.commits:
+            self._commit_unless_in_transaction(self._require_connection())
         return cursor
 
+    _IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+    def copy_rows(
+        self,
+        *,
+        table: str,
+        columns: Sequence[str],
+        rows: Iterable[Sequence[object]],
+        chunk_rows: int = 5000,
+    ) -> CopyResult:
+        """Stream rows into a table with ``COPY ... FROM STDIN`` (PostgreSQL).
+
+        Rows are consumed lazily and encoded in chunks of ``chunk_rows`` as the
+        driver reads, so a generator or columnar batch is written without building
+        the whole payload in memory. Commits unless inside ``transaction()``.
+
+        Args:
+            table: Unqualified table name in the configured schema.
+            columns: Target column names, in row order.
+            rows: Iterable of row tuples matching ``columns``.
+            chunk_rows: Rows encoded per chunk handed to the driver.
+
+        Returns:
+            CopyResult with row/chunk counts, elapsed time and rows per second.
+
+        Raises:
+            DatabaseTypeError: If identifiers are invalid or a row has the wrong width.
+            DatabaseError: (or subclass) for backend failures.
+        """
+        for name in (table, *columns):
+            if not self._IDENTIFIER_RE.match(name):
+                raise DatabaseTypeError(f"Invalid identifier for COPY: {name!r}")
+        if not columns:
+            raise DatabaseTypeError("COPY requires at least one column")
+
+        conn: Optional[ConnectionProtocol] = None
+        statement = copy_statement(table=f"{self.SCHEMA_NAME}.{table}", columns=columns)
+        stmt = self._statement(query=statement)
+        start = time.perf_counter()
+        try:
+            conn = self._require_connection()
+            cursor: CursorProtocol = conn.cursor()
+            try:
+                stream = CopyRowStream(rows=rows, column_count=len(columns), chunk_rows=chunk_rows)
+                cursor.copy_expert(statement, stream)
+            except ValueError as shape_exc:
+                raise DatabaseTypeError(str(shape_exc)) from shape_exc
+            self._commit_unless_in_transaction(conn)
+            result = CopyResult(
+                table=table,
+                rows=stream.rows,
+                chunks=stream.chunks,
+                bytes_sent=stream.bytes_sent,
+                elapsed_ms=(time.perf_counter() - start) * 1000.0,
+            )
+            self._debug_message(
+                f" COPY {table}: {result.rows} rows in {result.chunks} chunks, "
+                f"{result.elapsed_ms:.1f} ms ({result.rows_per_sec:,.0f} rows/s)"
+            )
+            self._record_query(stmt=stmt, params=None, elapsed_ms=_ms_since(start), rows=result.rows)
+            return result
+        except Exception as e:
+            self._record_query(stmt=stmt, params=None, elapsed_ms=_ms_since(start), error=True)
+            traceback.print_exc()
+            self._debug_message(f" Exception during copy_rows into {table}: {e}. Rolling back transaction.")
+            if conn is not None and not self._in_transaction(conn):
+                try:
+                    conn.rollback()
+                except Exception as rollback_exc:
+                    traceback.print_exc()
+                    self._debug_message(f" Rollback failed: {rollback_exc}")
+            if isinstance(e, DatabaseTypeError):
+                raise
+            self._translate_and_raise(e=e)
+            raise AssertionError("unreachable") from e
+
+    @overload
+    def fetchone(
+        self, *, query: str, params: Tuple[object, ...] = (), row_format: Literal[RowFormat.DICT] = ...
+    ) -> Optional[Dict[str, object]]: ...
+
+    @overload
+    def fetchone(
+        self, *, query: str, params: Tuple[object, ...] = (), row_format: Literal[RowFormat.TUPLE]
+    ) -> Optional[Tuple[object, ...]]: ...
+
+    @overload
+    def fetchone(
+        self, *, query: str, params: Tuple[object, ...] = (), row_format: Literal[RowFormat.NAMEDTUPLE]
+    ) -> Optional[Any]: ...
+
     def fetchone(
-        self, *, query: str, params: Tuple[object, ...] = ()
-    ) -> Optional[Dict[str, object]]:
+        self, *, query: str, params: Tuple[object, ...] = (), row_format: RowFormat = RowFormat.DICT
+    ) -> Optional[object]:
         """Execute a SQL query and fetch a single result.
 
         Args:
             query: SQL query string (parameterized)
             params: Query parameters
+            row_format: Shape of the row (DICT, TUPLE or NAMEDTUPLE; see ``RowFormat``)
 
         Returns:
-            Dict representing fetched row, or None if no results
-            Both SQLite and PostgreSQL results are returned as dictionaries with col names as keys
+            The fetched row, or None if no results. By default a dictionary
+            with column names as keys
 
         Raises:
+            ValueError: If ``row_format`` is a whole-result format (COLUMNS, RECORDS)
             DBConnectionError, TableNotFoundError, SchemaError, DatabaseError,
             ForeignKeyError, ConstraintError, IntegrityError, DatabaseTypeError
         """
+        self._check_row_shaped(row_format=row_format)
         cursor = self.execute(query=query, params=params)
         result = cursor.fetchone()
 
@@ -1003,69 +1598,379 @@ class DatabaseManager:
         if result is None:
             return None
 
-        # Convert tuple to dict using column names
         assert cursor.description is not None
-        result_t = cast(Tuple[object, ...], result)
-        col_names = [cast(str, desc[0]) for desc in cursor.description]
-        return {col_names[i]: result_t[i] for i in range(len(col_names))}
+        return shape_row(cast(Tuple[object, ...], result), column_names(cursor.description), row_format)
 
+    @overload
     def fetchmany(
-        self, query: str, params: Tuple[object, ...] = (), size: int = 1
-    ) -> List[Dict[str, object]]:
+        self,
+        query: str,
+        params: Tuple[object, ...] = (),
+        size: int = 1,
+        *,
+        row_format: Literal[RowFormat.DICT] = ...,
+    ) -> List[Dict[str, object]]: ...
+
+    @overload
+    def fetchmany(
+        self,
+        query: str,
+        params: Tuple[object, ...] = (),
+        size: int = 1,
+        *,
+        row_format: Literal[RowFormat.TUPLE],
+    ) -> List[Tuple[object, ...]]: ...
+
+    @overload
+    def fetchmany(
+        self,
+        query: str,
+        params: Tuple[object, ...] = (),
+        size: int = 1,
+        *,
+        row_format: Literal[RowFormat.NAMEDTUPLE],
+    ) -> List[Any]: ...
+
+    def fetchmany(
+        self,
+        query: str,
+        params: Tuple[object, ...] = (),
+        size: int = 1,
+        *,
+        row_format: RowFormat = RowFormat.DICT,
+    ) -> Sequence[object]:
         """Execute a SQL query and fetch multiple results.
 
         Args:
             query: SQL query string (parameterized)
             params: Query parameters
             size: Number of rows to fetch
+            row_format: Shape of each row (DICT, TUPLE or NAMEDTUPLE; see ``RowFormat``)
 
         Returns:
-            List of Dict representing fetched rows
-            Both SQLite and PostgreSQL results are returned as dictionaries with col names as keys
+            List of fetched rows; by default dictionaries with column names as keys
 
         Raises:
+            ValueError: If ``row_format`` is a whole-result format (COLUMNS, RECORDS)
             DBConnectionError, TableNotFoundError, SchemaError, DatabaseError,
             ForeignKeyError, ConstraintError, IntegrityError, DatabaseTypeError
         """
+        self._check_row_shaped(row_format=row_format)
         cursor = self.execute(query=query, params=params)
         results = cursor.fetchmany(size)
 
-        # Convert tuples to dicts using column names
         if not results:
             return []
         assert cursor.description is not None
         results_t = cast(List[Tuple[object, ...]], results)
-        col_names = [cast(str, desc[0]) for desc in cursor.description]
-        return [{col_names[i]: row[i] for i in range(len(col_names))} for row in results_t]
-
-    def fetchall(self, *, query: str, params: Tuple[object, ...] = ()) -> List[Dict[str, object]]:
-        """Execute a query and return all rows as a list.
+        return cast(List[object], shape_rows(results_t, column_names(cursor.description), row_format))
+
+    @overload
+    def fetchall(
+        self, *, query: str, params: Tuple[object, ...] = (), row_format: Literal[RowFormat.DICT] = ...
+    ) -> List[Dict[str, object]]: ...
+
+    @overload
+    def fetchall(
+        self, *, query: str, params: Tuple[object, ...] = (), row_format: Literal[RowFormat.TUPLE]
+    ) -> List[Tuple[object, ...]]: ...
+
+    @overload
+    def fetchall(
+        self, *, query: str, params: Tuple[object, ...] = (), row_format: Literal[RowFormat.NAMEDTUPLE]
+    ) -> List[Any]: ...
+
+    @overload
+    def fetchall(
+        self, *, query: str, params: Tuple[object, ...] = (), row_format: Literal[RowFormat.COLUMNS]
+    ) -> Dict[str, List[object]]: ...
+
+    @overload
+    def fetchall(
+        self, *, query: str, params: Tuple[object, ...] = (), row_format: Literal[RowFormat.RECORDS]
+    ) -> Any: ...
+
+    def fetchall(
+        self, *, query: str, params: Tuple[object, ...] = (), row_format: RowFormat = RowFormat.DICT
+    ) -> object:
+        """Execute a query and return all rows.
+
+        Example:
+            cols = db.fetchall(query="SELECT ngram_text, decaying_average_ms FROM ...",
+                               row_format=RowFormat.COLUMNS)
+            cols["decaying_average_ms"]  # list of every value in that column
 
         Args:
             query: SQL query string (parameterized)
             params: Query parameters
+            row_format: Shape of the result (see ``RowFormat``). COLUMNS returns
+                a dict of column lists and RECORDS a NumPy record array; the
+                other formats return a list of rows
 
         Returns:
-            A list of dictionaries, with each dictionary representing a row
-            Both SQLite and PostgreSQL results are returned as dictionaries with col names as keys
+            The rows in the requested shape; by default a list of dictionaries
+            with column names as keys
 
         Raises:
+            ImportError: If RECORDS is requested and numpy is not installed
             DBConnectionError, TableNotFoundError, SchemaError, DatabaseError,
             ForeignKeyError, ConstraintError, IntegrityError, DatabaseTypeError
         """
+        require_numpy(row_format)
         cursor = self.execute(query=query, params=params)
         results = cursor.fetchall()
 
-        # For PostgreSQL, convert tuples to dicts using column names
-        if self.is_postgres and results:
+        # For PostgreSQL, shape the driver tuples using the column names
+        if self.is_postgres:
             assert cursor.description is not None
             results_t = cast(List[Tuple[object, ...]], results)
-            col_names = [cast(str, desc[0]) for desc in cursor.description]
-            return [{col_names[i]: row[i] for i in range(len(col_names))} for row in results_t]
+            return shape_rows(results_t, column_names(cursor.description), row_format)
 
         # SQLite's Row objects can be used as dictionaries but let's normalize to dict
         return [cast(Dict[str, object], dict(cast(Dict[str, object], row))) for row in results]
 
+    @staticmethod
+    def _check_row_shaped(*, row_format: RowFormat) -> None:
+        """Reject whole-result formats where rows are returned one at a time."""
+        if row_format not in ROW_SHAPED_FORMATS:
+            raise ValueError(f"{row_format} is only supported by fetchall()")
+
+    @overload
+    def iter_rows(
+        self,
+        *,
+        query: str,
+        params: Tuple[object, ...] = (),
+        batch_size: int = 2000,
+        row_format: Literal[RowFormat.DICT] = ...,
+    ) -> Iterator[Dict[str, object]]: ...
+
+    @overload
+    def iter_rows(
+        self,
+        *,
+        query: str,
+        params: Tuple[object, ...] = (),
+        batch_size: int = 2000,
+        row_format: Literal[RowFormat.TUPLE],
+    ) -> Iterator[Tuple[object, ...]]: ...
+
+    @overload
+    def iter_rows(
+        self,
+        *,
+        query: str,
+        params: Tuple[object, ...] = (),
+        batch_size: int = 2000,
+        row_format: Literal[RowFormat.NAMEDTUPLE],
+    ) -> Iterator[Any]: ...
+
+    def iter_rows(
+        self,
+        *,
+        query: str,
+        params: Tuple[object, ...] = (),
+        batch_size: int = 2000,
+        row_format: RowFormat = RowFormat.DICT,
+    ) -> Iterator[object]:
+        """Stream the rows of a SELECT through a named server-side cursor.
+
+        Rows are fetched ``batch_size`` at a time, so client memory stays
+        constant however large the result is. Stop iterating (``break`` or
+        ``close()`` the generator) to cancel early; the cursor is closed either
+        way. Inside ``transaction()`` the cursor belongs to that unit of work;
+        outside it is declared WITH HOLD so statements executed (and committed)
+        while iterating do not invalidate it.
+
+        Example:
+            for row in db.iter_rows(query="SELECT * FROM session_keystrokes", batch_size=5000):
+                ...
+
+        Args:
+            query: SQL SELECT statement (parameterized)
+            params: Query parameters
+            batch_size: Rows fetched from the server per round trip
+            row_format: Shape of each row (DICT, TUPLE or NAMEDTUPLE; see ``RowFormat``)
+
+        Yields:
+            One row per result row; by default a dictionary keyed by column name
+
+        Raises:
+            ValueError: If ``row_format`` is a whole-result format (COLUMNS, RECORDS)
+            DBConnectionError, TableNotFoundError, SchemaError, DatabaseError,
+            ForeignKeyError, ConstraintError, IntegrityError, DatabaseTypeError
+        """
+        self._check_row_shaped(row_format=row_format)
+        with self.connection() as conn:
+            cursor = conn.cursor(
+                name=f"iter_rows_{uuid.uuid4().hex}", withhold=not self._in_transaction(conn)
+            )
+            stmt = self._statement(query=query)
+            # Only time spent in the database counts, not the consumer's work between batches
+            db_ms = 0.0
+            row_count = 0
+            failed = False
+            try:
+                start = time.perf_counter()
+                try:
+                    cursor.execute(stmt.sql, params)
+                except Exception as e:
+                    failed = True
+                    traceback.print_exc()
+                    self._translate_and_raise(e=e)
+                db_ms += _ms_since(start)
+                col_names: Tuple[str, ...] = ()
+                while True:
+                    start = time.perf_counter()
+                    try:
+                        batch = cast(List[Tuple[object, ...]], cursor.fetchmany(batch_size))
+                    except Exception as e:
+                        failed = True
+                        traceback.print_exc()
+                        self._translate_and_raise(e=e)
+                    db_ms += _ms_since(start)
+                    if not batch:
+                        return
+                    row_count += len(batch)
+                    if not col_names:
+                        # Named cursors only describe their columns after the first fetch
+                        assert cursor.description is not None
+                        col_names = column_names(cursor.description)
+                    yield from cast(List[object], shape_rows(batch, col_names, row_format))
+            finally:
+                try:
+                    cursor.close()
+                except Exception as close_exc:
+                    self._debug_message(f"Closing server-side cursor failed: {close_exc}")
+                self._record_query(stmt=stmt, params=params, elapsed_ms=db_ms, rows=row_count, error=failed)
+
+    # Secondary indexes of the application tables. The baseline ones are created
+    # with their tables by migration 1, which must stay frozen; indexes added
+    # since are declared in INDEXES only and built online by an index migration
+    # (see ``ensure_indexes``).
+    BASELINE_INDEXES: Tuple[IndexSpec, ...] = (
+        IndexSpec(
+            name="idx_ngram_speed_session_ngram",
+            table="session_ngram_speed",
+            columns=("session_id", "ngram_text", "ngram_size"),
+        ),
+        IndexSpec(
+            name="idx_ngram_errors_session_ngram",
+            table="session_ngram_errors",
+            columns=("session_id", "ngram_text", "ngram_size"),
+        ),
+        IndexSpec(
+            name="idx_ngram_summary_curr_user_keyboard",
+            table="ngram_speed_summary_curr",
+            columns=("user_id", "keyboard_id"),
+        ),
+        IndexSpec(
+            name="idx_ngram_summary_curr_performance",
+            table="ngram_speed_summary_curr",
+            columns=("target_performance_pct", "meets_target"),
+        ),
+        IndexSpec(
+            name="idx_ngram_summary_hist_user_keyboard",
+            table="ngram_speed_summary_hist",
+            columns=("user_id", "keyboard_id"),
+        ),
+        IndexSpec(
+            name="idx_ngram_summary_hist_ngram",
+            table="ngram_speed_summary_hist",
+            columns=("ngram_text", "ngram_size"),
+        ),
+        IndexSpec(
+            name="idx_ngram_summary_hist_date",
+            table="ngram_speed_summary_hist",
+            columns=("updated_dt",),
+        ),
+        IndexSpec(
+            name="idx_session_ngram_summary_session",
+            table="session_ngram_summary",
+            columns=("session_id",),
+        ),
+        IndexSpec(
+            name="idx_session_ngram_summary_user_keyboard",
+            table="session_ngram_summary",
+            columns=("user_id", "keyboard_id"),
+        ),
+        IndexSpec(
+            name="idx_session_ngram_summary_ngram",
+            table="session_ngram_summary",
+            columns=("ngram_text", "ngram_size"),
+        ),
+        # Per-user history of one n-gram, newest first (speed state rebuilds)
+        IndexSpec(
+            name="idx_session_ngram_summary_user_ngram_dt",
+            table="session_ngram_summary",
+            columns=("user_id", "keyboard_id", "ngram_text", "session_dt"),
+        ),
+        IndexSpec(name="idx_keysets_hist_current", table="keysets_history", columns=("keyset_id", "is_current")),
+        IndexSpec(name="idx_keysets_hist_version", table="keysets_history", columns=("keyset_id", "version_no")),
+        IndexSpec(name="idx_keyset_keys_hist_current", table="keyset_keys_history", columns=("key_id", "is_current")),
+        IndexSpec(name="idx_keyset_keys_hist_version", table="keyset_keys_history", columns=("key_id", "version_no")),
+    )
+
+    INDEXES: Tuple[IndexSpec, ...] = BASELINE_INDEXES + (
+        # Migration 2. Per-user session lists, newest first (target counts, starting index)
+        IndexSpec(
+            name="idx_practice_sessions_user_keyboard_start",
+            table="practice_sessions",
+            columns=("user_id", "keyboard_id", "start_time"),
+        ),
+        # Migration 2. Keystrokes of one session in replay order (get_for_session, deletes)
+        IndexSpec(
+            name="idx_session_keystrokes_session",
+            table="session_keystrokes",
+            columns=("session_id", "keystroke_time", "key_index"),
+        ),
+        # Migration 2. Latest history row per n-gram at a point in time (speed heatmap, slowest_n)
+        IndexSpec(
+            name="idx_ngram_summary_hist_keyboard_ngram_dt",
+            table="ngram_speed_summary_hist",
+            columns=("keyboard_id", "ngram_text", "updated_dt"),
+        ),
+        # Migration 2. History rows of one session (missed-target counts, refresh checks)
+        IndexSpec(
+            name="idx_ngram_summary_hist_session",
+            table="ngram_speed_summary_hist",
+            columns=("session_id",),
+        ),
+        # Migration 4. Key-set filters: ngram_charset <@ allowed keys (ad-hoc queries; the
+        # service filters its cached summary)
+        IndexSpec(
+            name="idx_ngram_summary_curr_charset",
+            table="ngram_speed_summary_curr",
+            columns=("ngram_charset",),
+            method="gin",
+        ),
+    )
+
+    def _create_table_indexes(self, *, table: str) -> None:
+        """Create the baseline indexes of ``table`` that do not exist yet (migration 1)."""
+        for spec in self.BASELINE_INDEXES:
+            if spec.table == table:
+                self._execute_ddl(query=spec.create_sql())
+
+    def ensure_indexes(self, *, concurrently: bool = True) -> List[str]:
+        """Build every declared index that is missing or invalid.
+
+        Outside a ``transaction()`` scope the builds use CREATE INDEX
+        CONCURRENTLY, so reads and writes continue while large tables are
+        indexed; inside one they fall back to plain CREATE INDEX.
+
+        Args:
+            concurrently: Build online when possible.
+
+        Returns:
+            Names of the indexes built.
+        """
+        online = concurrently and not self._in_transaction(self._require_connection())
+        built = IndexManager(db=self).ensure(specs=self.INDEXES, concurrently=online)
+        if built:
+            self._debug_message(f"Built indexes ({'concurrently' if online else 'in transaction'}): {built}")
+        return built
+
     def _create_categories_table(self) -> None:
         """Create the categories table with UUID primary key if it does not exist."""
         self._execute_ddl(
@@ -1161,6 +2066,58 @@ class DatabaseManager:
             """
         )
 
+    def _create_session_keystroke_blobs_table(self) -> None:
+        """Create the session_keystroke_blobs table for the packed keystroke layout.
+
+        One row per session; ``payload`` holds the session's keystrokes encoded
+        by ``models.keystroke_manager.encode_keystroke_blob``.
+        """
+        self._execute_ddl(
+            query="""
+            CREATE TABLE IF NOT EXISTS session_keystroke_blobs (
+                session_id TEXT PRIMARY KEY,
+                format_version INTEGER NOT NULL,
+                keystroke_count INTEGER NOT NULL,
+                payload BYTEA NOT NULL,
+                packed_dt TIMESTAMP(6) NOT NULL,
+                FOREIGN KEY (session_id) REFERENCES practice_sessions(session_id) ON DELETE CASCADE
+            );
+            """
+        )
+
+    def _create_ngram_charset_function(self) -> None:
+        """Create ngram_charset(text): the distinct characters of an n-gram, sorted.
+
+        Backs the generated ``ngram_charset`` columns, so key-set filters become
+        the array containment test ``ngram_charset <@ allowed_keys``.
+        """
+        self._execute_ddl(
+            query="""
+            CREATE OR REPLACE FUNCTION ngram_charset(ngram TEXT) RETURNS TEXT[]
+            LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE
+            AS $$ SELECT ARRAY(SELECT DISTINCT unnest(string_to_array(ngram, NULL)) ORDER BY 1) $$;
+            """
+        )
+
+    def _add_ngram_charset_column(self, *, table: str) -> None:
+        """Add the generated ngram_charset column to ``table`` if it is missing.
+
+        On an existing table this rewrites it once, computing the signature of
+        every row; later writes maintain it.
+        """
+        self._execute_ddl(
+            query=(
+                f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS ngram_charset TEXT[] "
+                "GENERATED ALWAYS AS (ngram_charset(ngram_text)) STORED"
+            )
+        )
+
+    def _add_ngram_charset_columns(self) -> None:
+        """Migration 3: add the ngram_charset columns to databases created before them."""
+        self._create_ngram_charset_function()
+        self._add_ngram_charset_column(table="ngram_speed_summary_curr")
+        self._add_ngram_charset_column(table="session_ngram_errors")
+
     def _create_session_ngram_tables(self) -> None:
         """Create the session_ngram_speed and session_ngram_errors tables with UUID PKs."""
         self._execute_ddl(
@@ -1188,22 +2145,8 @@ class DatabaseManager:
             );
             """
         )
-
-        self._execute_ddl(
-            query="""
-            CREATE INDEX IF NOT EXISTS idx_ngram_speed_session_ngram ON session_ngram_speed (
-                session_id, ngram_text, ngram_size
-            );
-            """
-        )
-
-        self._execute_ddl(
-            query="""
-            CREATE INDEX IF NOT EXISTS idx_ngram_errors_session_ngram ON session_ngram_errors (
-                session_id, ngram_text, ngram_size
-            );
-            """
-        )
+        self._create_table_indexes(table="session_ngram_speed")
+        self._create_table_indexes(table="session_ngram_errors")
 
     def _create_ngram_speed_summary_curr_table(self) -> None:
         """Create the ngram_speed_summary_curr table for current performance summaries."""
@@ -1230,21 +2173,7 @@ class DatabaseManager:
             );
             """
         )
-
-        # Create indexes for better query performance
-        self._execute_ddl(
-            query="""
-            CREATE INDEX IF NOT EXISTS idx_ngram_summary_curr_user_keyboard 
-            ON ngram_speed_summary_curr(user_id, keyboard_id);
-            """
-        )
-
-        self._execute_ddl(
-            query="""
-            CREATE INDEX IF NOT EXISTS idx_ngram_summary_curr_performance 
-            ON ngram_speed_summary_curr(target_performance_pct, meets_target);
-            """
-        )
+        self._create_table_indexes(table="ngram_speed_summary_curr")
 
     def _create_ngram_speed_summary_hist_table(self) -> None:
         """Create the ngram_speed_summary_hist table for tracking performance over time."""
@@ -1274,26 +2203,75 @@ class DatabaseManager:
             );
             """
         )
+        self._create_table_indexes(table="ngram_speed_summary_hist")
+
+    def _add_hist_previous_columns(self) -> None:
+        """Add the prev_* columns of ngram_speed_summary_hist if they are missing.
+
+        Each history row carries the values of the row before it for the same
+        user, keyboard and n-gram, so a session comparison reads one row instead
+        of searching the n-gram's history.
+        """
+        for column, sql_type in (
+            ("prev_decaying_average_ms", "REAL"),
+            ("prev_sample_count", "INTEGER"),
+            ("prev_meets_target", "INT"),
+            ("prev_updated_dt", "TIMESTAMP(6)"),
+        ):
+            self._execute_ddl(
+                query=f"ALTER TABLE ngram_speed_summary_hist ADD COLUMN IF NOT EXISTS {column} {sql_type}"
+            )
+
+    def _add_hist_resolution_columns(self) -> None:
+        """Add the downsampling columns of ngram_speed_summary_hist if they are missing.
 
-        # Create indexes for better query performance
+        ``resolution`` is ``'session'`` for rows written by the speed summary
+        pipeline and ``'day'`` or ``'week'`` for rows that
+        ``NGramAnalyticsService.compact_speed_hist`` folded a bucket of older
+        rows into; ``compacted_rows`` counts the session rows a row stands for.
+        """
         self._execute_ddl(
-            query="""
-            CREATE INDEX IF NOT EXISTS idx_ngram_summary_hist_user_keyboard 
-            ON ngram_speed_summary_hist(user_id, keyboard_id);
-            """
+            query=(
+                "ALTER TABLE ngram_speed_summary_hist ADD COLUMN IF NOT EXISTS resolution TEXT NOT NULL "
+                "DEFAULT 'session' CHECK (resolution IN ('session', 'day', 'week'))"
+            )
         )
-
         self._execute_ddl(
-            query="""
-            CREATE INDEX IF NOT EXISTS idx_ngram_summary_hist_ngram 
-            ON ngram_speed_summary_hist(ngram_text, ngram_size);
-            """
+            query=(
+                "ALTER TABLE ngram_speed_summary_hist ADD COLUMN IF NOT EXISTS compacted_rows INTEGER NOT NULL "
+                "DEFAULT 1"
+            )
         )
 
+    def _backfill_hist_previous_values(self) -> None:
+        """Migration 5: add the prev_* history columns and fill them for existing rows.
+
+        One window pass links every row to its predecessor ordered by
+        (updated_dt, history_id); the writers keep the links afterwards.
+        """
+        self._add_hist_previous_columns()
         self._execute_ddl(
             query="""
-            CREATE INDEX IF NOT EXISTS idx_ngram_summary_hist_date 
-            ON ngram_speed_summary_hist(updated_dt);
+            UPDATE ngram_speed_summary_hist AS h
+            SET prev_decaying_average_ms = p.prev_decaying_average_ms,
+                prev_sample_count = p.prev_sample_count,
+                prev_meets_target = p.prev_meets_target,
+                prev_updated_dt = p.prev_updated_dt
+            FROM (
+                SELECT
+                    history_id,
+                    LAG(decaying_average_ms) OVER w AS prev_decaying_average_ms,
+                    LAG(sample_count) OVER w AS prev_sample_count,
+                    LAG(meets_target) OVER w AS prev_meets_target,
+                    LAG(updated_dt) OVER w AS prev_updated_dt
+                FROM ngram_speed_summary_hist
+                WINDOW w AS (
+                    PARTITION BY user_id, keyboard_id, ngram_text, ngram_size
+                    ORDER BY updated_dt, history_id
+                )
+            ) AS p
+            WHERE h.history_id = p.history_id
+              AND p.prev_updated_dt IS NOT NULL
             """
         )
 
@@ -1323,26 +2301,75 @@ class DatabaseManager:
             );
             """
         )
+        self._create_table_indexes(table="session_ngram_summary")
+
+    def _create_session_summary_ledger_table(self) -> None:
+        """Create the session_summary_ledger table recording summarized sessions.
 
-        # Create indexes for better query performance
+        NGramAnalyticsService.summarize_session_ngrams only reads n-gram rows of
+        sessions missing from this ledger. Each row also records how many
+        summary rows were inserted and how many n-gram rows were read.
+        """
         self._execute_ddl(
             query="""
-            CREATE INDEX IF NOT EXISTS idx_session_ngram_summary_session 
-            ON session_ngram_summary(session_id);
+            CREATE TABLE IF NOT EXISTS session_summary_ledger (
+                session_id TEXT PRIMARY KEY,
+                summary_rows INTEGER NOT NULL,
+                speed_rows_scanned INTEGER NOT NULL,
+                error_rows_scanned INTEGER NOT NULL,
+                summarized_dt TIMESTAMP(6) NOT NULL,
+                FOREIGN KEY (session_id) REFERENCES practice_sessions(session_id) ON DELETE CASCADE
+            );
             """
         )
 
+    def _create_ngram_speed_state_table(self) -> None:
+        """Create the ngram_speed_state table holding rolling per-ngram speed state.
+
+        One row per (user, keyboard, ngram) with the most recent per-session
+        averages (newest first, capped at 20) and the running instance count, so
+        speed summaries can be updated without rescanning session_ngram_summary.
+        """
         self._execute_ddl(
             query="""
-            CREATE INDEX IF NOT EXISTS idx_session_ngram_summary_user_keyboard 
-            ON session_ngram_summary(user_id, keyboard_id);
+            CREATE TABLE IF NOT EXISTS ngram_speed_state (
+                user_id TEXT NOT NULL,
+                keyboard_id TEXT NOT NULL,
+                ngram_text TEXT NOT NULL,
+                ngram_size INTEGER NOT NULL,
+                samples_ms REAL[] NOT NULL,
+                instance_count BIGINT NOT NULL,
+                last_session_id TEXT NOT NULL,
+                last_session_dt TIMESTAMP(6) NOT NULL,
+                updated_dt TIMESTAMP(6) NOT NULL,
+                PRIMARY KEY (user_id, keyboard_id, ngram_text, ngram_size),
+                FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
+                FOREIGN KEY (keyboard_id) REFERENCES keyboards(keyboard_id) ON DELETE CASCADE
+            );
             """
         )
 
+    def _create_session_target_rollup_table(self) -> None:
+        """Create the session_target_rollup table of per-session missed-target counts.
+
+        One row per (session, ngram_size, meets_target) with the number of
+        distinct n-grams of the session's history rows in that state, written
+        by the speed summary pipeline so trend charts read N rows per chart.
+        """
         self._execute_ddl(
             query="""
-            CREATE INDEX IF NOT EXISTS idx_session_ngram_summary_ngram 
-            ON session_ngram_summary(ngram_text, ngram_size);
+            CREATE TABLE IF NOT EXISTS session_target_rollup (
+                session_id TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                keyboard_id TEXT NOT NULL,
+                ngram_size INTEGER NOT NULL,
+                meets_target INT NOT NULL,
+                ngram_count INTEGER NOT NULL,
+                PRIMARY KEY (session_id, ngram_size, meets_target),
+                FOREIGN KEY (session_id) REFERENCES practice_sessions(session_id) ON DELETE CASCADE,
+                FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
+                FOREIGN KEY (keyboard_id) REFERENCES keyboards(keyboard_id) ON DELETE CASCADE
+            );
             """
         )
 
@@ -1460,19 +2487,7 @@ class DatabaseManager:
             );
             """
         )
-        # Lightweight indexes for common queries
-        self._execute_ddl(
-            query="""
-            CREATE INDEX IF NOT EXISTS idx_keysets_hist_current 
-            ON keysets_history(keyset_id, is_current);
-            """
-        )
-        self._execute_ddl(
-            query="""
-            CREATE INDEX IF NOT EXISTS idx_keysets_hist_version 
-            ON keysets_history(keyset_id, version_no);
-            """
-        )
+        self._create_table_indexes(table="keysets_history")
 
     def _create_keyset_keys_table(self) -> None:
         """Create keyset_keys table for per-character membership with emphasis flag."""
@@ -1514,24 +2529,163 @@ class DatabaseManager:
             );
             """
         )
-        self._execute_ddl(
-            query="""
-            CREATE INDEX IF NOT EXISTS idx_keyset_keys_hist_current 
-            ON keyset_keys_history(key_id, is_current);
-            """
+        self._create_table_indexes(table="keyset_keys_history")
+
+    SCHEMA_VERSION_TABLE = "schema_migrations"
+
+    def _migrations(self) -> List[Migration]:
+        """Return the schema migrations in version order.
+
+        Append new steps at the end with the next version number; never edit
+        or renumber a released migration.
+        """
+        return [
+            Migration(version=1, description="Baseline application schema", apply=self._create_baseline_schema),
+            Migration(
+                version=2,
+                description="Hot-path indexes for sessions, keystrokes and n-gram history",
+                apply=self._build_declared_indexes,
+                online=True,
+            ),
+            Migration(
+                version=3,
+                description="Generated ngram_charset columns for key-set filters",
+                apply=self._add_ngram_charset_columns,
+            ),
+            Migration(
+                version=4,
+                description="GIN index on ngram_speed_summary_curr.ngram_charset",
+                apply=self._build_declared_indexes,
+                online=True,
+            ),
+            Migration(
+                version=5,
+                description="Previous-value columns on ngram_speed_summary_hist",
+                apply=self._backfill_hist_previous_values,
+            ),
+            Migration(
+                version=6,
+                description="Per-session missed-target rollup",
+                apply=self._create_session_target_rollup_table,
+            ),
+            Migration(
+                version=7,
+                description="Downsampling columns on ngram_speed_summary_hist",
+                apply=self._add_hist_resolution_columns,
+            ),
+        ]
+
+    def latest_schema_version(self) -> int:
+        """Return the version the application schema is migrated to by ``init_tables``."""
+        return self._migrations()[-1].version
+
+    def schema_version(self) -> int:
+        """Return the highest applied migration version (0 for an unversioned database)."""
+        return max(self._applied_versions(), default=0)
+
+    def _applied_versions(self) -> Set[int]:
+        """Return the migration versions recorded in schema_migrations (empty if it does not exist)."""
+        conn = self._require_connection()
+        cursor = conn.cursor()
+        try:
+            if self._in_transaction(conn):
+                # A failing SELECT would abort the open unit of work, so probe first
+                cursor.execute("SELECT to_regclass(%s)", (f"{self.SCHEMA_NAME}.{self.SCHEMA_VERSION_TABLE}",))
+                found = cursor.fetchone()
+                if found is None or cast(Tuple[object, ...], found)[0] is None:
+                    return set()
+            cursor.execute(f"SELECT version FROM {self.SCHEMA_NAME}.{self.SCHEMA_VERSION_TABLE}")
+            return {int(cast(int, cast(Tuple[object, ...], row)[0])) for row in cursor.fetchall()}
+        except psycopg2.errors.UndefinedTable:
+            return set()
+        except Exception as e:
+            traceback.print_exc()
+            self._translate_and_raise(e=e)
+        finally:
+            cursor.close()
+
+    def migrate(self, *, force: bool = False) -> List[int]:
+        """Apply the migrations not yet recorded in schema_migrations.
+
+        The up-to-date case costs a single version query. Otherwise the
+        schema_migrations table is locked (so concurrent starts apply each step
+        once), every pending migration runs, and its version is recorded; any
+        failure rolls the whole run back. Pending ``online`` migrations then run
+        one by one after that transaction commits, each recorded once it
+        succeeds, so an interrupted online step is retried on the next start.
+
+        Args:
+            force: Replay every migration even if recorded (repairs dropped tables).
+
+        Returns:
+            Versions applied by this call, in the order they ran.
+        """
+        migrations = self._migrations()
+        if not force and {m.version for m in migrations} <= self._applied_versions():
+            return []
+        start = time.perf_counter()
+        applied: List[int] = []
+        with self.transaction():
+            self._create_schema_migrations_table()
+            self._execute_ddl(query=f"LOCK TABLE {self.SCHEMA_VERSION_TABLE} IN EXCLUSIVE MODE")
+            done = set() if force else self._applied_versions()
+            pending = [m for m in migrations if m.version not in done]
+            for migration in pending:
+                if not migration.online:
+                    migration.apply()
+                    self._record_migration(migration=migration)
+                    applied.append(migration.version)
+        for migration in pending:
+            if migration.online:
+                migration.apply()
+                self._record_migration(migration=migration)
+                applied.append(migration.version)
+        self._debug_message(
+            f"Schema migrations applied: {applied} in {_ms_since(start):.1f} ms "
+            f"(now at version {migrations[-1].version})"
         )
+        return applied
+
+    def _record_migration(self, *, migration: Migration) -> None:
+        """Record ``migration`` as applied (a no-op when already recorded)."""
+        self.execute(
+            query=(
+                f"INSERT INTO {self.SCHEMA_VERSION_TABLE} (version, description, applied_dt) "
+                "VALUES (?, ?, ?) ON CONFLICT (version) DO NOTHING"
+            ),
+            params=(migration.version, migration.description, datetime.now()),
+        )
+
+    def _create_schema_migrations_table(self) -> None:
+        """Create the table recording applied schema migrations."""
         self._execute_ddl(
-            query="""
-            CREATE INDEX IF NOT EXISTS idx_keyset_keys_hist_version 
-            ON keyset_keys_history(key_id, version_no);
+            query=f"""
+            CREATE TABLE IF NOT EXISTS {self.SCHEMA_VERSION_TABLE} (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_dt TIMESTAMP NOT NULL
+            );
             """
         )
 
-    def init_tables(self) -> None:
-        """Initialize all database tables by creating them if they do not exist.
+    def init_tables(self, *, force: bool = False) -> None:
+        """Bring the application schema up to date.
+
+        Startup cost is one version query when the schema is current; otherwise
+        only the missing migrations run, together in a single transaction (see
+        ``migrate``).
 
-        This includes core tables for categories, snippets, session data, users,
-        keyboards, and settings.
+        Args:
+            force: Replay every migration, e.g. to recreate a table dropped by hand.
+        """
+        self.migrate(force=force)
+
+    def _create_baseline_schema(self) -> None:
+        """Migration 1: create the core tables if they do not exist.
+
+        Covers categories, snippets, session data, users, keyboards, n-gram
+        analytics, settings and keysets. Being idempotent, it also adopts
+        databases created before schema versioning existed.
         """
         self._create_categories_table()
         self._create_words_table()
@@ -1541,10 +2695,13 @@ class DatabaseManager:
         self._create_snippet_parts_table()
         self._create_practice_sessions_table()
         self._create_session_keystrokes_table()
+        self._create_session_keystroke_blobs_table()
         self._create_session_ngram_tables()
         self._create_ngram_speed_summary_curr_table()
         self._create_ngram_speed_summary_hist_table()
         self._create_session_ngram_summary_table()
+        self._create_session_summary_ledger_table()
+        self._create_ngram_speed_state_table()
         self._create_settings_table()
         self._create_settings_history_table()
         # Keysets feature
@@ -1553,6 +2710,14 @@ class DatabaseManager:
         self._create_keyset_keys_table()
         self._create_keyset_keys_history_table()
 
+    def _build_declared_indexes(self) -> None:
+        """Online index migrations: build the declared indexes migration 1 does not create.
+
+        Runs after the migration transaction commits, so both fresh and existing
+        databases are indexed without blocking writers (see ``ensure_indexes``).
+        """
+        self.ensure_indexes()
+
     def __enter__(self) -> "DatabaseManager":
         """Context manager protocol support.
 
@@ -0,0 +1,427 @@
+"""Declared indexes, online index builds and the index advisor.
+
+DatabaseManager declares every secondary index as an ``IndexSpec`` next to
+its table definitions (``DatabaseManager.INDEXES``). ``IndexManager`` creates
+the declared indexes that are missing, with ``CREATE INDEX CONCURRENTLY`` when
+no unit of work is open so writers are never blocked, and rebuilds indexes
+left invalid by an interrupted concurrent build.
+
+``advise_indexes`` compares the catalog and the ``pg_stat_user_indexes`` /
+``pg_stat_user_tables`` counters against a recorded workload (a
+``QueryRecorder`` report, see ``db.query_stats``) and reports unused, invalid
+and missing indexes plus the predicates of recorded statements that no index
+supports. ``scripts/index_advisor.py`` prints that report.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple, cast
+
+from .row_formats import RowFormat
+
+if TYPE_CHECKING:
+    from .database_manager import DatabaseManager
+
+# FROM/JOIN/UPDATE/INTO <table> [AS] [alias]
+_TABLE_REF_RE = re.compile(r"(?i)\b(?:FROM|JOIN|UPDATE|INTO)\s+([A-Za-z_][\w.]*)(?:\s+(?:AS\s+)?([A-Za-z_]\w*))?")
+# [alias.]column <op> <bound value>; column-to-column comparisons (joins) do not match
+_PREDICATE_RE = re.compile(
+    r"(?i)(?<![\w.])(?:([A-Za-z_]\w*)\.)?([A-Za-z_]\w*)\s*(=\s*ANY\b|\bIN\b|<=|>=|=|<|>)\s*\(?\s*(?:%s|\?)"
+)
+# UPDATE ... SET assignments look like predicates; they end at WHERE
+_SET_CLAUSE_RE = re.compile(r"(?is)\bSET\b.*?(?=\bWHERE\b|$)")
+_EQUALITY_OPS = ("=", "IN", "=ANY")
+_NOT_ALIASES = frozenset(
+    {
+        "WHERE",
+        "ON",
+        "USING",
+        "JOIN",
+        "INNER",
+        "LEFT",
+        "RIGHT",
+        "FULL",
+        "CROSS",
+        "GROUP",
+        "ORDER",
+        "LIMIT",
+        "OFFSET",
+        "SET",
+        "VALUES",
+        "SELECT",
+        "UNION",
+        "HAVING",
+        "WINDOW",
+        "RETURNING",
+        "FOR",
+        "AND",
+        "OR",
+        "NOT",
+    }
+)
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """A secondary index the application schema declares.
+
+    Attributes:
+        name: Index name, unique within the schema.
+        table: Table the index is built on (unqualified; resolved through the search path).
+        columns: Indexed columns, leading column first.
+        unique: Create a UNIQUE index.
+        method: Index access method (``btree``, or ``gin`` for array containment).
+    """
+
+    name: str
+    table: str
+    columns: Tuple[str, ...]
+    unique: bool = False
+    method: str = "btree"
+
+    def create_sql(self, *, concurrently: bool = False) -> str:
+        """Return the idempotent CREATE INDEX statement for this index."""
+        unique = "UNIQUE " if self.unique else ""
+        online = "CONCURRENTLY " if concurrently else ""
+        using = "" if self.method == "btree" else f" USING {self.method}"
+        return (
+            f"CREATE {unique}INDEX {online}IF NOT EXISTS {self.name} "
+            f"ON {self.table}{using} ({', '.join(self.columns)})"
+        )
+
+    def drop_sql(self, *, concurrently: bool = False) -> str:
+        """Return the idempotent DROP INDEX statement for this index."""
+        return f"DROP INDEX {'CONCURRENTLY ' if concurrently else ''}IF EXISTS {self.name}"
+
+
+@dataclass(frozen=True)
+class IndexUsage:
+    """One existing index and its ``pg_stat_user_indexes`` counters.
+
+    Attributes:
+        name: Index name.
+        table: Table the index belongs to.
+        columns: Indexed columns in order (expression columns are omitted).
+        scans: Index scans since the statistics were last reset.
+        size_bytes: On-disk size.
+        unique: Index enforces uniqueness (primary keys included).
+        primary: Index backs the primary key.
+        valid: False while a concurrent build is running or after it failed.
+    """
+
+    name: str
+    table: str
+    columns: Tuple[str, ...]
+    scans: int
+    size_bytes: int
+    unique: bool = False
+    primary: bool = False
+    valid: bool = True
+
+
+@dataclass(frozen=True)
+class TableUsage:
+    """Scan counters of one table from ``pg_stat_user_tables``."""
+
+    table: str
+    seq_scans: int
+    seq_rows_read: int
+    index_scans: int
+    live_rows: int
+
+
+@dataclass
+class IndexSuggestion:
+    """Recorded statements filtering a table on columns no index leads with.
+
+    Attributes:
+        table: Table the statements read.
+        columns: Suggested index columns: equality predicates first, then one range predicate.
+        calls: Executions of the matching statements in the workload.
+        total_ms: Their summed latency.
+        fingerprints: Normalized SQL of the matching statements, heaviest first.
+    """
+
+    table: str
+    columns: Tuple[str, ...]
+    calls: int = 0
+    total_ms: float = 0.0
+    fingerprints: List[str] = field(default_factory=list)
+
+
+@dataclass
+class IndexAdvice:
+    """Findings of ``advise_indexes``, each list worst first."""
+
+    unused: List[IndexUsage] = field(default_factory=list)
+    invalid: List[IndexUsage] = field(default_factory=list)
+    missing: List[IndexSpec] = field(default_factory=list)
+    seq_scanned: List[TableUsage] = field(default_factory=list)
+    suggestions: List[IndexSuggestion] = field(default_factory=list)
+
+
+def statement_predicates(sql: str) -> Dict[str, Tuple[str, ...]]:
+    """Return the filtered columns of ``sql`` per table, as a candidate index key.
+
+    Only comparisons against bound values (``%s``/``?``/literals) count.
+    Equality columns (``=``, ``IN``, ``= ANY``) come first in the order they
+    appear, followed by the first range column. Columns qualified with an
+    alias are attributed to the aliased table; unqualified columns only when
+    the statement reads a single table.
+    """
+    aliases: Dict[str, str] = {}
+    tables: List[str] = []
+    for m in _TABLE_REF_RE.finditer(sql):
+        table = m.group(1).split(".")[-1].lower()
+        if table not in tables:
+            tables.append(table)
+        aliases[table] = table
+        alias = m.group(2)
+        if alias and alias.upper() not in _NOT_ALIASES:
+            aliases[alias.lower()] = table
+
+    equality: Dict[str, List[str]] = {}
+    ranges: Dict[str, List[str]] = {}
+    for m in _PREDICATE_RE.finditer(_SET_CLAUSE_RE.sub(" ", sql)):
+        qualifier, column, op = m.group(1), m.group(2).lower(), "".join(m.group(3).upper().split())
+        if qualifier is not None:
+            owner = aliases.get(qualifier.lower())
+        else:
+            owner = tables[0] if len(tables) == 1 else None
+        if owner is None:
+            continue
+        bucket = equality if op in _EQUALITY_OPS else ranges
+        columns = bucket.setdefault(owner, [])
+        if column not in columns:
+            columns.append(column)
+
+    predicates: Dict[str, Tuple[str, ...]] = {}
+    for table in tables:
+        eq = equality.get(table, [])
+        rng = [c for c in ranges.get(table, []) if c not in eq][:1]
+        if eq or rng:
+            predicates[table] = tuple(eq + rng)
+    return predicates
+
+
+def advise_indexes(
+    *,
+    declared: Sequence[IndexSpec],
+    indexes: Sequence[IndexUsage],
+    tables: Sequence[TableUsage],
+    workload: Optional[Mapping[str, Any]] = None,
+    min_table_rows: int = 1000,
+) -> IndexAdvice:
+    """Compare the live indexes with the declared set and a recorded workload.
+
+    Args:
+        declared: Indexes the schema declares (``DatabaseManager.INDEXES``).
+        indexes: Existing indexes with their scan counters.
+        tables: Table scan counters; also the set of tables suggestions may name.
+        workload: ``QueryRecorder.to_dict()`` report of the recorded statements.
+        min_table_rows: Tables smaller than this are never reported as sequentially scanned.
+
+    Returns:
+        Unused non-unique indexes (largest first), invalid indexes, declared
+        indexes missing from the database, large tables read mostly by
+        sequential scans, and index suggestions for recorded statements
+        (heaviest first).
+    """
+    advice = IndexAdvice()
+    present = {ix.name for ix in indexes}
+    advice.unused = sorted(
+        (ix for ix in indexes if ix.scans == 0 and not ix.unique and ix.valid),
+        key=lambda ix: ix.size_bytes,
+        reverse=True,
+    )
+    advice.invalid = [ix for ix in indexes if not ix.valid]
+    advice.missing = [spec for spec in declared if spec.name not in present]
+    advice.seq_scanned = sorted(
+        (t for t in tables if t.live_rows >= min_table_rows and t.seq_scans > t.index_scans),
+        key=lambda t: t.seq_rows_read,
+        reverse=True,
+    )
+
+    leading: Dict[str, Set[str]] = {}
+    for ix in indexes:
+        if ix.valid and ix.columns:
+            leading.setdefault(ix.table, set()).add(ix.columns[0])
+    for spec in declared:
+        leading.setdefault(spec.table, set()).add(spec.columns[0])
+
+    known_tables = {t.table for t in tables}
+    suggestions: Dict[Tuple[str, Tuple[str, ...]], IndexSuggestion] = {}
+    statements = (workload or {}).get("statements") or []
+    for stat in statements:
+        if not isinstance(stat, Mapping):
+            continue
+        fingerprint = str(stat.get("fingerprint", ""))
+        for table, columns in statement_predicates(fingerprint).items():
+            if table not in known_tables or leading.get(table, set()) & set(columns):
+                continue
+            suggestion = suggestions.setdefault((table, columns), IndexSuggestion(table=table, columns=columns))
+            suggestion.calls += int(stat.get("calls", 0))
+            suggestion.total_ms += float(stat.get("total_ms", 0.0))
+            suggestion.fingerprints.append(fingerprint)
+    advice.suggestions = sorted(suggestions.values(), key=lambda s: s.total_ms, reverse=True)
+    return advice
+
+
+def format_advice(advice: IndexAdvice, *, top: int = 20) -> str:
+    """Render ``advise_indexes`` findings as text."""
+    lines: List[str] = []
+
+    def section(title: str, rows: Iterable[str]) -> None:
+        body = list(rows)[:top]
+        lines.append(f"{title}:")
+        lines.extend(f"  {row}" for row in body)
+        if not body:
+            lines.append("  none")
+        lines.append("")
+
+    section(
+        "Unused indexes (no scans since the last statistics reset)",
+        (f"{ix.name} on {ix.table}({', '.join(ix.columns)}) {ix.size_bytes // 1024} kB" for ix in advice.unused),
+    )
+    section("Invalid indexes (interrupted concurrent build)", (f"{ix.name} on {ix.table}" for ix in advice.invalid))
+    section(
+        "Declared indexes missing from the database",
+        (f"{spec.name} on {spec.table}({', '.join(spec.columns)})" for spec in advice.missing),
+    )
+    section(
+        "Tables read mostly by sequential scans",
+        (
+            f"{t.table}: {t.seq_scans} seq scans ({t.seq_rows_read} rows read) vs {t.index_scans} index scans, "
+            f"{t.live_rows} rows"
+            for t in advice.seq_scanned
+        ),
+    )
+    section(
+        "Suggested indexes for the recorded workload",
+        (
+            f"{s.table}({', '.join(s.columns)}): {s.calls} calls, {s.total_ms:.1f} ms  {s.fingerprints[0][:100]}"
+            for s in advice.suggestions
+        ),
+    )
+    return "\n".join(lines).rstrip()
+
+
+class IndexManager:
+    """Reads index metadata and creates declared indexes through a DatabaseManager."""
+
+    def __init__(self, *, db: DatabaseManager) -> None:
+        """Bind the manager to ``db`` (its ``SCHEMA_NAME`` scopes every catalog query)."""
+        self.db = db
+
+    def existing(self) -> Dict[str, bool]:
+        """Return ``{index name: valid}`` for every index in the schema."""
+        rows = self.db.fetchall(
+            query="""
+            SELECT c.relname, i.indisvalid
+            FROM pg_index AS i
+            JOIN pg_class AS c ON c.oid = i.indexrelid
+            JOIN pg_namespace AS n ON n.oid = c.relnamespace
+            WHERE n.nspname = ?
+            """,
+            params=(self.db.SCHEMA_NAME,),
+            row_format=RowFormat.TUPLE,
+        )
+        return {str(name): bool(valid) for name, valid in cast(List[Tuple[Any, ...]], rows)}
+
+    def ensure(self, *, specs: Sequence[IndexSpec], concurrently: bool = True) -> List[str]:
+        """Create the indexes of ``specs`` that are missing or invalid.
+
+        With ``concurrently`` the builds use ``CREATE INDEX CONCURRENTLY``,
+        which must run outside a transaction; an index left invalid by an
+        interrupted build is dropped and built again.
+
+        Returns:
+            Names of the indexes built by this call.
+        """
+        existing = self.existing()
+        built: List[str] = []
+        for spec in specs:
+            valid = existing.get(spec.name)
+            if valid:
+                continue
+            if valid is False:
+                self.db.execute(query=spec.drop_sql(concurrently=concurrently))
+            self.db.execute(query=spec.create_sql(concurrently=concurrently))
+            built.append(spec.name)
+        return built
+
+    def index_usage(self) -> List[IndexUsage]:
+        """Return every index of the schema's tables with its scan counters."""
+        rows = self.db.fetchall(
+            query="""
+            SELECT s.indexrelname, s.relname,
+                   ARRAY(
+                       SELECT a.attname::text
+                       FROM unnest(i.indkey::int2[]) WITH ORDINALITY AS k(attnum, ord)
+                       JOIN pg_attribute AS a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+                       ORDER BY k.ord
+                   ),
+                   s.idx_scan, pg_relation_size(s.indexrelid),
+                   i.indisunique, i.indisprimary, i.indisvalid
+            FROM pg_stat_user_indexes AS s
+            JOIN pg_index AS i ON i.indexrelid = s.indexrelid
+            WHERE s.schemaname = ?
+            ORDER BY s.relname, s.indexrelname
+            """,
+            params=(self.db.SCHEMA_NAME,),
+            row_format=RowFormat.TUPLE,
+        )
+        return [
+            IndexUsage(
+                name=str(name),
+                table=str(table),
+                columns=tuple(str(c) for c in columns),
+                scans=int(scans or 0),
+                size_bytes=int(size or 0),
+                unique=bool(unique),
+                primary=bool(primary),
+                valid=bool(valid),
+            )
+            for name, table, columns, scans, size, unique, primary, valid in cast(List[Tuple[Any, ...]], rows)
+        ]
+
+    def table_usage(self) -> List[TableUsage]:
+        """Return the scan counters of the schema's tables."""
+        rows = self.db.fetchall(
+            query="""
+            SELECT relname, seq_scan, seq_tup_read, COALESCE(idx_scan, 0), n_live_tup
+            FROM pg_stat_user_tables
+            WHERE schemaname = ?
+            ORDER BY relname
+            """,
+            params=(self.db.SCHEMA_NAME,),
+            row_format=RowFormat.TUPLE,
+        )
+        return [
+            TableUsage(
+                table=str(table),
+                seq_scans=int(seq_scans or 0),
+                seq_rows_read=int(seq_rows or 0),
+                index_scans=int(idx_scans or 0),
+                live_rows=int(live or 0),
+            )
+            for table, seq_scans, seq_rows, idx_scans, live in cast(List[Tuple[Any, ...]], rows)
+        ]
+
+    def advise(
+        self,
+        *,
+        declared: Sequence[IndexSpec],
+        workload: Optional[Mapping[str, Any]] = None,
+        min_table_rows: int = 1000,
+    ) -> IndexAdvice:
+        """Run ``advise_indexes`` against the live statistics of the schema."""
+        return advise_indexes(
+            declared=declared,
+            indexes=self.index_usage(),
+            tables=self.table_usage(),
+            workload=workload,
+            min_table_rows=min_table_rows,
+        )
@@ -0,0 +1,273 @@
+"""Query-level instrumentation for DatabaseManager.
+
+``QueryRecorder`` aggregates every statement DatabaseManager runs under its
+fingerprint (see ``db.statement_cache``): call and error counts, rows
+returned or affected, total/min/max latency and a fixed-bucket latency
+histogram. Statements slower than the configured threshold are also kept in a
+bounded slow-query log, with the plan DatabaseManager captured for them.
+
+Recording costs two ``perf_counter`` reads and one dict update under a lock,
+so it is cheap enough to leave on. Reports can be written to JSON (set
+``AITT_QUERY_STATS_FILE`` to have ``DatabaseManager.close`` do it) and
+printed with ``scripts/dump_query_stats.py``.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+# Write the report here on DatabaseManager.close() when set
+QUERY_STATS_FILE_ENV = "AITT_QUERY_STATS_FILE"
+# Slow-query threshold in milliseconds when not passed to DatabaseManager
+SLOW_QUERY_MS_ENV = "AITT_SLOW_QUERY_MS"
+
+# Upper bounds (ms) of the latency histogram buckets; one overflow bucket follows
+LATENCY_BUCKETS_MS = (0.5, 1.0, 2.0, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0, 2500.0)
+
+ORDER_BY_FIELDS = ("total_ms", "mean_ms", "max_ms", "p95_ms", "calls", "rows", "errors")
+
+
+@dataclass
+class QueryStat:
+    """Aggregated counters for one statement fingerprint.
+
+    Attributes:
+        fingerprint: Normalized SQL the counters are grouped under.
+        kind: Statement kind (SELECT, INSERT, COPY...).
+        calls: Executions recorded.
+        errors: Executions that raised.
+        rows: Rows returned or affected, summed (unknown counts are skipped).
+        total_ms: Summed latency in milliseconds.
+        min_ms: Fastest execution.
+        max_ms: Slowest execution.
+        buckets: Histogram counts per ``LATENCY_BUCKETS_MS`` bound plus overflow.
+    """
+
+    fingerprint: str
+    kind: str
+    calls: int = 0
+    errors: int = 0
+    rows: int = 0
+    total_ms: float = 0.0
+    min_ms: float = float("inf")
+    max_ms: float = 0.0
+    buckets: List[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1))
+
+    @property
+    def mean_ms(self) -> float:
+        """Average latency in milliseconds."""
+        return self.total_ms / self.calls if self.calls else 0.0
+
+    def percentile_ms(self, pct: float) -> float:
+        """Approximate latency percentile: the upper bound of the bucket it falls in.
+
+        The overflow bucket reports ``max_ms``.
+        """
+        if not self.calls:
+            return 0.0
+        target = pct / 100.0 * self.calls
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets, strict=False):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    @property
+    def p95_ms(self) -> float:
+        """Approximate 95th percentile latency."""
+        return self.percentile_ms(95.0)
+
+
+@dataclass(frozen=True)
+class SlowQuery:
+    """One execution that exceeded the slow-query threshold.
+
+    Attributes:
+        fingerprint: Normalized SQL of the statement.
+        sql: SQL as executed (``%s`` placeholders).
+        params: ``repr`` of the parameters, truncated.
+        elapsed_ms: Latency of the execution.
+        rows: Rows returned or affected (-1 when unknown).
+        captured_at: ISO timestamp of the execution.
+        plan: ``EXPLAIN`` output, or None when no plan was captured.
+    """
+
+    fingerprint: str
+    sql: str
+    params: str
+    elapsed_ms: float
+    rows: int
+    captured_at: str
+    plan: Optional[str] = None
+
+
+class QueryRecorder:
+    """Thread-safe per-fingerprint statement counters and slow-query log."""
+
+    def __init__(
+        self,
+        *,
+        slow_query_ms: Optional[float] = None,
+        max_slow_queries: int = 50,
+        explain_cooldown_s: float = 60.0,
+    ) -> None:
+        """Initialize an empty recorder.
+
+        Args:
+            slow_query_ms: Executions at least this slow are logged; None disables the log.
+            max_slow_queries: Slow-query entries kept (oldest dropped first).
+            explain_cooldown_s: Minimum seconds between plan captures for one fingerprint.
+        """
+        self.slow_query_ms = slow_query_ms
+        self.explain_cooldown_s = explain_cooldown_s
+        self._stats: Dict[str, QueryStat] = {}
+        self._slow: Deque[SlowQuery] = deque(maxlen=max_slow_queries)
+        self._last_explained: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def record(self, *, fingerprint: str, kind: str, elapsed_ms: float, rows: int = -1, error: bool = False) -> bool:
+        """Add one execution to the counters.
+
+        Returns:
+            True when the execution is slow and its plan should be captured now
+            (at most once per ``explain_cooldown_s`` per fingerprint).
+        """
+        with self._lock:
+            stat = self._stats.get(fingerprint)
+            if stat is None:
+                stat = self._stats[fingerprint] = QueryStat(fingerprint=fingerprint, kind=kind)
+            stat.calls += 1
+            if error:
+                stat.errors += 1
+            if rows > 0:
+                stat.rows += rows
+            stat.total_ms += elapsed_ms
+            stat.min_ms = min(stat.min_ms, elapsed_ms)
+            stat.max_ms = max(stat.max_ms, elapsed_ms)
+            stat.buckets[bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+            if error or self.slow_query_ms is None or elapsed_ms < self.slow_query_ms:
+                return False
+            now = time.monotonic()
+            last = self._last_explained.get(fingerprint)
+            if last is not None and now - last < self.explain_cooldown_s:
+                return False
+            self._last_explained[fingerprint] = now
+            return True
+
+    def is_slow(self, elapsed_ms: float) -> bool:
+        """Return True when ``elapsed_ms`` meets the slow-query threshold."""
+        return self.slow_query_ms is not None and elapsed_ms >= self.slow_query_ms
+
+    def add_slow_query(
+        self,
+        *,
+        fingerprint: str,
+        sql: str,
+        params: object,
+        elapsed_ms: float,
+        rows: int,
+        plan: Optional[str] = None,
+    ) -> None:
+        """Append an entry to the slow-query log."""
+        entry = SlowQuery(
+            fingerprint=fingerprint,
+            sql=sql,
+            params=repr(params)[:500],
+            elapsed_ms=elapsed_ms,
+            rows=rows,
+            captured_at=datetime.now().isoformat(timespec="seconds"),
+            plan=plan,
+        )
+        with self._lock:
+            self._slow.append(entry)
+
+    def stats(self, *, order_by: str = "total_ms", top: Optional[int] = None) -> List[QueryStat]:
+        """Return copies of the per-fingerprint counters, largest first.
+
+        Args:
+            order_by: One of ``ORDER_BY_FIELDS``.
+            top: Keep only the first ``top`` entries.
+
+        Raises:
+            ValueError: If ``order_by`` is not a known field.
+        """
+        if order_by not in ORDER_BY_FIELDS:
+            raise ValueError(f"order_by must be one of {ORDER_BY_FIELDS}, got {order_by!r}")
+        with self._lock:
+            stats = [replace(s, buckets=list(s.buckets)) for s in self._stats.values()]
+        stats.sort(key=lambda s: float(getattr(s, order_by)), reverse=True)
+        return stats if top is None else stats[:top]
+
+    def slow_queries(self) -> List[SlowQuery]:
+        """Return the slow-query log, oldest first."""
+        with self._lock:
+            return list(self._slow)
+
+    def reset(self) -> None:
+        """Clear every counter and the slow-query log."""
+        with self._lock:
+            self._stats.clear()
+            self._slow.clear()
+            self._last_explained.clear()
+
+    def to_dict(self) -> Dict[str, object]:
+        """Return a JSON-serializable snapshot of the counters and slow-query log."""
+        stats = []
+        for s in self.stats():
+            entry = asdict(s)
+            entry["min_ms"] = s.min_ms if s.calls else 0.0
+            entry["mean_ms"] = s.mean_ms
+            entry["p95_ms"] = s.p95_ms
+            stats.append(entry)
+        return {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "slow_query_ms": self.slow_query_ms,
+            "latency_buckets_ms": list(LATENCY_BUCKETS_MS),
+            "statements": stats,
+            "slow_queries": [asdict(q) for q in self.slow_queries()],
+        }
+
+    def write_report(self, path: Path) -> None:
+        """Write ``to_dict()`` as JSON to ``path`` (parent directories are created)."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2), encoding="utf-8")
+
+
+def format_report(report: Dict[str, Any], *, order_by: str = "total_ms", top: int = 20, plans: bool = False) -> str:
+    """Render a ``QueryRecorder.to_dict()`` snapshot as a fixed-width text table.
+
+    Raises:
+        ValueError: If ``order_by`` is not one of ``ORDER_BY_FIELDS``.
+    """
+    if order_by not in ORDER_BY_FIELDS:
+        raise ValueError(f"order_by must be one of {ORDER_BY_FIELDS}, got {order_by!r}")
+    statements = sorted(
+        (s for s in report.get("statements") or [] if isinstance(s, dict)),
+        key=lambda s: float(s.get(order_by, 0.0)),
+        reverse=True,
+    )[:top]
+    header = f"{'calls':>8} {'errors':>6} {'rows':>9} {'total ms':>11} {'mean ms':>9} {'p95 ms':>9} {'max ms':>9}"
+    lines = [f"{header}  statement"]
+    for s in statements:
+        lines.append(
+            f"{s['calls']:>8} {s['errors']:>6} {s['rows']:>9} {s['total_ms']:>11.1f} {s['mean_ms']:>9.2f} "
+            f"{s['p95_ms']:>9.2f} {s['max_ms']:>9.2f}  {str(s['fingerprint'])[:120]}"
+        )
+    slow = [q for q in report.get("slow_queries") or [] if isinstance(q, dict)]
+    if slow:
+        lines.append("")
+        lines.append(f"Slow queries (>= {report.get('slow_query_ms')} ms), newest last:")
+        for q in slow:
+            lines.append(f"  {q['captured_at']} {q['elapsed_ms']:.1f} ms rows={q['rows']}  {str(q['sql'])[:120]}")
+            if plans and q.get("plan"):
+                lines.extend(f"      {line}" for line in str(q["plan"]).splitlines())
+    return "\n".join(lines)
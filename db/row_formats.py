@@ -0,0 +1,109 @@
+"""Result shapes for DatabaseManager fetches.
+
+By default every fetched row becomes a ``dict`` keyed by column name. Hot
+read paths that touch thousands of rows can ask for a cheaper shape instead:
+
+* ``RowFormat.TUPLE`` hands back the driver's tuples untouched.
+* ``RowFormat.NAMEDTUPLE`` wraps each tuple in a namedtuple class that is
+  built once per distinct column list and cached, so rows support both
+  ``row.ngram_text`` and positional access without a dict per row.
+* ``RowFormat.COLUMNS`` transposes the result into one list per column.
+* ``RowFormat.RECORDS`` builds a NumPy record array (numpy is optional;
+  ``NUMPY_AVAILABLE`` reports whether it can be imported).
+"""
+
+from __future__ import annotations
+
+import enum
+from collections import namedtuple
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy installed
+    np = None  # type: ignore[assignment]
+
+NUMPY_AVAILABLE = np is not None
+
+
+class RowFormat(enum.Enum):
+    """Shape of the rows returned by DatabaseManager fetch methods."""
+
+    DICT = "dict"  # One dict per row keyed by column name (default)
+    TUPLE = "tuple"  # Plain driver tuples in SELECT column order
+    NAMEDTUPLE = "namedtuple"  # Cached namedtuple class per column list
+    COLUMNS = "columns"  # Dict of column name -> list of values (whole results only)
+    RECORDS = "records"  # NumPy record array (whole results only, requires numpy)
+
+
+# Formats that produce one object per row and can therefore be streamed
+ROW_SHAPED_FORMATS = frozenset({RowFormat.DICT, RowFormat.TUPLE, RowFormat.NAMEDTUPLE})
+
+
+def column_names(description: Sequence[Sequence[object]]) -> Tuple[str, ...]:
+    """Return the column names from a DB-API ``cursor.description``."""
+    return tuple(str(desc[0]) for desc in description)
+
+
+@lru_cache(maxsize=256)
+def row_class(columns: Tuple[str, ...]) -> Any:
+    """Return the namedtuple class for a column list, building it on first use.
+
+    Column names that are not valid identifiers (``count(*)``) or repeat are
+    renamed positionally (``_0``, ``_1``...) as ``collections.namedtuple``
+    does with ``rename=True``.
+    """
+    return namedtuple("Row", columns, rename=True)
+
+
+def require_numpy(row_format: RowFormat) -> None:
+    """Raise ImportError when ``row_format`` needs numpy and it is missing."""
+    if row_format is RowFormat.RECORDS and not NUMPY_AVAILABLE:
+        raise ImportError("RowFormat.RECORDS requires numpy to be installed")
+
+
+def shape_row(row: Tuple[object, ...], columns: Tuple[str, ...], row_format: RowFormat) -> object:
+    """Convert one driver tuple to a row-shaped format."""
+    if row_format is RowFormat.TUPLE:
+        return row
+    if row_format is RowFormat.NAMEDTUPLE:
+        return row_class(columns)._make(row)
+    if row_format is RowFormat.DICT:
+        return dict(zip(columns, row, strict=True))
+    raise ValueError(f"{row_format} describes a whole result, not a single row")
+
+
+def shape_rows(rows: List[Tuple[object, ...]], columns: Tuple[str, ...], row_format: RowFormat) -> object:
+    """Convert a list of driver tuples to ``row_format``.
+
+    Returns a list of rows for the row-shaped formats, a dict of column
+    lists for ``COLUMNS`` and a record array for ``RECORDS``.
+    """
+    if row_format is RowFormat.TUPLE:
+        return rows
+    if row_format is RowFormat.NAMEDTUPLE:
+        make = row_class(columns)._make
+        return [make(row) for row in rows]
+    if row_format is RowFormat.DICT:
+        return [dict(zip(columns, row, strict=True)) for row in rows]
+    if row_format is RowFormat.COLUMNS:
+        return to_columns(rows, columns)
+    return to_records(rows, columns)
+
+
+def to_columns(rows: List[Tuple[object, ...]], columns: Tuple[str, ...]) -> Dict[str, List[object]]:
+    """Transpose rows into one list per column (later duplicates win)."""
+    if not rows:
+        return {name: [] for name in columns}
+    return {name: list(values) for name, values in zip(columns, zip(*rows, strict=True), strict=True)}
+
+
+def to_records(rows: List[Tuple[object, ...]], columns: Tuple[str, ...]) -> Any:
+    """Build a NumPy record array; dtypes are inferred per column."""
+    require_numpy(RowFormat.RECORDS)
+    names = list(row_class(columns)._fields)
+    if not rows:
+        return np.rec.fromarrays([np.array([], dtype=object) for _ in names], names=names)
+    arrays = [np.array(values) for values in zip(*rows, strict=True)]
+    return np.rec.fromarrays(arrays, names=names)
@@ -0,0 +1,187 @@
+"""Memoized SQL translation for DatabaseManager.
+
+Every statement passed to ``execute``/``execute_many`` is translated once:
+``?`` placeholders become ``%s``, CREATE/DROP TABLE targets are qualified with
+the schema, and the facts the bulk paths need (statement kind, INSERT target
+table and columns, the ``execute_values`` form) are parsed up front. The
+result is a frozen ``Statement`` kept in a bounded, thread-safe LRU keyed by
+the raw SQL text, so hot statements skip all regex work on later calls.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+_CREATE_TABLE_RE = re.compile(r"(?i)^\s*CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?([^\s;(]+)")
+_DROP_TABLE_RE = re.compile(r"(?i)^\s*DROP\s+TABLE\s+(?:IF\s+EXISTS\s+)?([^\s;]+)")
+_INSERT_TARGET_RE = re.compile(r"INSERT\s+INTO\s+([^\s(]+)\s*\(([^)]+)\)", re.IGNORECASE)
+_VALUES_TUPLE_RE = re.compile(r"VALUES\s*\((?:\s*%s\s*,?\s*)+\)", re.IGNORECASE)
+_VALUES_TEMPLATE_RE = re.compile(r"VALUES\s*%s", re.IGNORECASE)
+_FIRST_WORD_RE = re.compile(r"\s*([A-Za-z]+)")
+# Fingerprinting: literals become ?, placeholder lists collapse, whitespace is normalized
+_STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL_RE = re.compile(r"(?<![\w.])\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST_RE = re.compile(r"%s(?:\s*,\s*%s)+")
+
+
+@dataclass(frozen=True)
+class Statement:
+    """A translated SQL statement and the facts parsed from it.
+
+    Attributes:
+        sql: SQL ready for psycopg2 (``%s`` placeholders, schema-qualified DDL).
+        kind: First keyword, upper-cased (``SELECT``, ``INSERT``, ``WITH``...).
+        commits: True when ``execute`` must commit after running it (anything
+            not starting with SELECT, matching the historical rule).
+        debug_sql: Single-line form used in debug output.
+        fingerprint: ``debug_sql`` with literals replaced by ``?`` and
+            placeholder lists collapsed, so statements differing only in
+            values (or ``IN`` list length) group together in query stats.
+        table: INSERT target table as written, or None.
+        columns: INSERT column list, empty for other statements.
+        values_sql: ``VALUES %s`` form for ``execute_values``, or None when the
+            statement cannot be batched that way.
+    """
+
+    sql: str
+    kind: str
+    commits: bool
+    debug_sql: str
+    fingerprint: str
+    table: Optional[str] = None
+    columns: Tuple[str, ...] = ()
+    values_sql: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class StatementCacheStats:
+    """Point-in-time snapshot of statement cache usage."""
+
+    max_size: int
+    size: int
+    hits: int
+    misses: int
+    evictions: int
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache (0.0 before any lookup)."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def _qualify_table(query: str, pattern: re.Pattern[str], schema: str) -> str:
+    """Prefix the table matched by ``pattern`` with ``schema`` unless already qualified."""
+    m = pattern.search(query)
+    if m and "." not in m.group(1):
+        start, end = m.span(1)
+        return f"{query[:start]}{schema}.{m.group(1)}{query[end:]}"
+    return query
+
+
+def fingerprint_sql(sql: str) -> str:
+    """Normalize SQL so statements that differ only in values share one key."""
+    text = _STRING_LITERAL_RE.sub("?", sql)
+    text = _NUMBER_LITERAL_RE.sub("?", text)
+    text = _PLACEHOLDER_LIST_RE.sub("%s, ...", text)
+    return " ".join(text.split())
+
+
+def translate_statement(query: str, *, schema: str) -> Statement:
+    """Translate raw SQL for PostgreSQL and parse the facts the bulk paths need.
+
+    Since connections use ``search_path=<schema>,public``, only CREATE TABLE and
+    DROP TABLE targets are qualified explicitly; other statements rely on the
+    search path. Translation is idempotent, so already translated SQL maps to
+    the same ``Statement``.
+    """
+    sql = query.replace("?", "%s") if "?" in query else query
+    sql = _qualify_table(sql, _CREATE_TABLE_RE, schema)
+    sql = _qualify_table(sql, _DROP_TABLE_RE, schema)
+
+    first = _FIRST_WORD_RE.match(sql)
+    kind = first.group(1).upper() if first else ""
+
+    table: Optional[str] = None
+    columns: Tuple[str, ...] = ()
+    values_sql: Optional[str] = None
+    target = _INSERT_TARGET_RE.search(sql)
+    if target:
+        table = target.group(1)
+        columns = tuple(c.strip() for c in target.group(2).split(","))
+    if _VALUES_TUPLE_RE.search(sql):
+        values_sql = _VALUES_TUPLE_RE.sub("VALUES %s", sql, count=1)
+    elif _VALUES_TEMPLATE_RE.search(sql):
+        values_sql = sql
+
+    debug_sql = sql.replace("\n", " ").strip()
+    return Statement(
+        sql=sql,
+        kind=kind,
+        commits=not sql.strip().upper().startswith("SELECT"),
+        debug_sql=debug_sql,
+        fingerprint=fingerprint_sql(debug_sql),
+        table=table,
+        columns=columns,
+        values_sql=values_sql,
+    )
+
+
+class StatementCache:
+    """Thread-safe LRU of translated statements keyed by raw SQL text.
+
+    ``max_size=0`` disables caching: every lookup translates afresh.
+    """
+
+    def __init__(self, *, schema: str, max_size: int = 512) -> None:
+        """Initialize an empty cache translating for ``schema``."""
+        self.schema = schema
+        self.max_size = max_size
+        self._entries: OrderedDict[str, Statement] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, query: str) -> Statement:
+        """Return the translated statement for ``query``, translating on a miss."""
+        with self._lock:
+            stmt = self._entries.get(query)
+            if stmt is not None:
+                self._entries.move_to_end(query)
+                self._hits += 1
+                return stmt
+            self._misses += 1
+        stmt = translate_statement(query, schema=self.schema)
+        if self.max_size <= 0:
+            return stmt
+        with self._lock:
+            self._entries[query] = stmt
+            self._entries.move_to_end(query)
+            if stmt.sql != query:
+                # Bulk helpers look statements up again by their translated SQL
+                self._entries[stmt.sql] = stmt
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        return stmt
+
+    def clear(self) -> None:
+        """Drop every cached statement (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> StatementCacheStats:
+        """Return a snapshot of the cache counters."""
+        with self._lock:
+            return StatementCacheStats(
+                max_size=self.max_size,
+                size=len(self._entries),
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+            )
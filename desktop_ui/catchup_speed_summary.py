@@ -38,19 +38,53 @@ class CatchupWorker(QThread):
     progress = Signal(str)  # Signal for progress updates
     session_processed = Signal(str, int, int)  # per-session progress (info, current, total)
 
-    def __init__(self, *, analytics_service: NGramAnalyticsService) -> None:
-        """Initialize the worker with the analytics service."""
+    def __init__(self, *, analytics_service: NGramAnalyticsService, bulk: bool = True) -> None:
+        """Initialize the worker with the analytics service.
+
+        Args:
+            analytics_service: Service used to build the summaries.
+            bulk: Use the set-based bulk catch-up (progress per chunk) instead of
+                processing sessions one at a time.
+        """
         super().__init__()
         self.analytics_service = analytics_service
+        self.bulk = bulk
 
     def run(self) -> None:
         """Execute the catchup process and emit results or errors."""
         try:
-            result = self.catchup_speed_summary_with_progress()
+            db = self.analytics_service.db
+            if db is None:
+                raise ValueError("Database manager is required")
+            with db.connection(dedicated=True):
+                if self.bulk:
+                    result = self.bulk_catchup_with_progress()
+                else:
+                    result = self.catchup_speed_summary_with_progress()
             self.finished.emit(result)
         except Exception as e:
             self.error.emit(str(e))
 
+    def bulk_catchup_with_progress(self) -> dict[str, int]:
+        """Run the set-based catch-up, emitting session_processed after each chunk."""
+        self.progress.emit("Running bulk catch-up...")
+        totals = self.analytics_service.bulk_catchup_speed_summary(
+            progress=lambda msg, done, total: self.session_processed.emit(msg, done, total)
+        )
+        if totals["total_sessions"] == 0:
+            self.progress.emit("No sessions found that need speed summary processing.")
+        summary = {
+            "sessions_processed": totals["processed_sessions"],
+            "curr_updated": totals["total_curr_updated"],
+            "hist_inserted": totals["total_hist_inserted"],
+        }
+        self.progress.emit(
+            f"Completed processing {summary['sessions_processed']} sessions. "
+            f"Updated {summary['curr_updated']} current records, "
+            f"inserted {summary['hist_inserted']} historical records."
+        )
+        return summary
+
     def catchup_speed_summary_with_progress(self) -> dict[str, int]:
         """Modified version of catchup_speed_summary that emits progress signals."""
         import logging
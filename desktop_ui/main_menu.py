@@ -80,8 +80,9 @@ class MainMenu(QWidget):
         self.debug_util = DebugUtil()
         if db_path is None:
             db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "typing_data.db")
+        # Background workers (recreate, catch-up, summarize) check out pooled connections
         self.db_manager = DatabaseManager(
-            connection_type=connection_type, debug_util=self.debug_util
+            connection_type=connection_type, debug_util=self.debug_util, pool_size=4
         )
         self.db_manager.init_tables()  # Ensure all tables are created/initialized
 
@@ -33,9 +33,10 @@ if ROOT_DIR not in sys.path:
 from db.database_manager import ConnectionType, DatabaseManager  # noqa: E402
 from models.keystroke import Keystroke  # noqa: E402
 from models.keystroke_collection import KeystrokeCollection  # noqa: E402
+from models.keystroke_manager import KeystrokeManager  # noqa: E402
 # Removed unused imports: MAX_NGRAM_SIZE, MIN_NGRAM_SIZE  # noqa: E402
 from models.ngram_analytics_service import NGramAnalyticsService  # noqa: E402
-from models.ngram_manager import NGramManager  # noqa: E402
+from models.ngram_manager import AnalysisBackend, NGramManager  # noqa: E402
 
 
 class RecreateNgramWorker(QThread):
@@ -56,12 +57,14 @@ class RecreateNgramWorker(QThread):
         super().__init__()
         self.db_manager = db_manager
         self.ngram_manager = ngram_manager
+        self.keystroke_manager = KeystrokeManager(db_manager=db_manager)
         self.logger = logging.getLogger(__name__)
 
     def run(self) -> None:
         """Execute the ngram recreation process and emit results or errors."""
         try:
-            result = self.recreate_ngram_data_with_progress()
+            with self.db_manager.connection(dedicated=True):
+                result = self.recreate_ngram_data_with_progress()
             self.finished.emit(result)
         except Exception as e:
             self.error.emit(str(e))
@@ -95,8 +98,12 @@ class RecreateNgramWorker(QThread):
         sessions_processed = 0
         total_ngrams_created = 0
 
-        for i, session in enumerate(sessions, 1):
-            session_id = str(session["session_id"])
+        # Stream keystrokes for all sessions (one query per chunk) instead of one query per session
+        sessions_by_id = {str(session["session_id"]): session for session in sessions}
+        loaded = self.keystroke_manager.iter_sessions_keystrokes(session_ids=list(sessions_by_id))
+
+        for i, (session_id, session_keystrokes) in enumerate(loaded, 1):
+            session = sessions_by_id[session_id]
             start_time = session["start_time"]
             content = session["content"] or ""  # Expected text for the session
 
@@ -105,29 +112,23 @@ class RecreateNgramWorker(QThread):
             self.session_processed.emit(progress_msg, i, total_sessions)
 
             try:
-                # Get keystrokes for this session
-                keystrokes_query = """
-                    SELECT keystroke_char, expected_char, keystroke_time, is_error, text_index
-                    FROM session_keystrokes
-                    WHERE session_id = %s
-                    ORDER BY text_index ASC
-                """
-                keystroke_rows = self.db_manager.fetchall(query=keystrokes_query, params=(session_id,))
+                # Keystrokes for this session (row or packed layout), in text order
+                stored = sorted(session_keystrokes, key=lambda k: k.text_index)
 
-                if not keystroke_rows:
+                if not stored:
                     self.progress.emit(f"No keystrokes found for session {session_id}")
                     continue
 
                 # Convert to Keystroke objects
                 keystrokes = []
-                for row in keystroke_rows:
+                for row in stored:
                     keystroke = Keystroke(
                         session_id=session_id,
-                        keystroke_char=str(row["keystroke_char"]),
-                        expected_char=str(row["expected_char"]),
-                        keystroke_time=row["keystroke_time"],  # Already datetime from DB
-                        is_error=bool(row["is_error"]),
-                        text_index=int(row["text_index"]),
+                        keystroke_char=row.keystroke_char,
+                        expected_char=row.expected_char,
+                        keystroke_time=row.keystroke_time,
+                        is_error=row.is_error,
+                        text_index=row.text_index,
                     )
                     keystrokes.append(keystroke)
 
@@ -140,7 +141,7 @@ class RecreateNgramWorker(QThread):
                 try:
                     # Use the high-level workflow API that handles all ngram sizes
                     from uuid import UUID
-                    speed_ngrams, error_ngrams = self.ngram_manager.analyze(
+                    speed_ngrams, error_ngrams = self.ngram_manager.analyze_batch(
                         session_id=UUID(session_id),
                         expected_text=content,
                         keystrokes=keystroke_collection
@@ -152,6 +153,12 @@ class RecreateNgramWorker(QThread):
                     )
                     session_ngrams_created = speed_count + error_count
 
+                    # Let the next summarize_session_ngrams pick the new n-grams up
+                    self.db_manager.execute(
+                        query="DELETE FROM session_summary_ledger WHERE session_id = %s",
+                        params=(session_id,),
+                    )
+
                 except Exception as ngram_error:
                     error_msg = f"Error processing ngrams for session {session_id}: {ngram_error}"
                     self.logger.warning(error_msg)
@@ -222,7 +229,8 @@ class RecreateNgramData(QDialog):
             self.db_manager.init_tables()
 
         # Initialize services
-        self.ngram_manager = NGramManager(db_manager=self.db_manager)
+        # Bulk re-processing is dominated by window analysis; vectorize when numpy is present
+        self.ngram_manager = NGramManager(db_manager=self.db_manager, backend=AnalysisBackend.AUTO)
         self.analytics_service = NGramAnalyticsService(db=self.db_manager, ngram_manager=self.ngram_manager)
 
         # Worker thread holder
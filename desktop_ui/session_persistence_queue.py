@@ -0,0 +1,268 @@
+"""Background end-of-session persistence for the typing drill.
+
+``SessionPersistenceQueue`` owns a single worker thread that runs
+``NGramAnalyticsService.process_end_of_session`` on its own connection (pooled,
+or opened for the job when the manager has no pool),
+so the drill window closes (and the next drill can start) while the previous
+session's keystrokes, n-grams and summaries are still being written. Jobs are
+processed in the order they were queued, which keeps the speed summaries in
+session order. Every job is journaled (``PersistenceJournal``) before it runs
+and removed only after it commits; failed jobs are retried with a backoff and
+any left over are replayed the next time the queue starts. When the queue has
+been idle for a while the same thread downsamples old n-gram history
+(``NGramAnalyticsService.compact_speed_hist``), at most once per interval, so
+compaction never runs concurrently with a session's writes.
+"""
+
+import logging
+import queue
+import threading
+import time
+import traceback
+from typing import Any, Dict, List, Optional
+
+from PySide6.QtCore import QCoreApplication, QObject, QThread, Signal
+
+from db.database_manager import DatabaseManager
+from models.keystroke_collection import KeystrokeCollection
+from models.ngram_analytics_service import HistRetentionPolicy, NGramAnalyticsService
+from models.ngram_manager import NGramManager
+from models.persistence_journal import PersistenceJournal, PersistJob
+from models.session import Session
+
+logger = logging.getLogger(__name__)
+
+
+def persist_results_from_orchestrator(
+    orch_res: Dict[str, Any], *, keystroke_count: int
+) -> Dict[str, Any]:
+    """Map process_end_of_session output to the PersistSummary result schema."""
+    results: Dict[str, Any] = {
+        "session_saved": bool(orch_res.get("session_saved", False)),
+        "session_error": None,
+        "keystroke_error": None,
+        "ngram_error": None,
+        "keystrokes_saved_raw": int(orch_res.get("keystrokes_saved_raw", 0)),
+        "keystrokes_saved_net": int(orch_res.get("keystrokes_saved_net", 0)),
+        "ngrams_saved": bool(orch_res.get("ngrams_saved", False)),
+        "ngram_count": int(orch_res.get("ngram_count", 0)),
+        "session_summary_rows": int(orch_res.get("session_summary_rows", 0)),
+        "curr_updated": int(orch_res.get("curr_updated", 0)),
+        "hist_inserted": int(orch_res.get("hist_inserted", 0)),
+        "commit_ms": float(orch_res.get("commit_ms", 0.0)),
+        "keystroke_count": keystroke_count,
+    }
+    results["keystrokes_saved"] = (
+        results["keystrokes_saved_net"] > 0 and results["keystrokes_saved_raw"] > 0
+    )
+    return results
+
+
+def failed_persist_results(error: str, *, session_saved: bool) -> Dict[str, Any]:
+    """PersistSummary results for a job whose transaction rolled back."""
+    return {
+        "session_saved": session_saved,
+        "session_error": None if session_saved else error,
+        "keystrokes_saved": False,
+        "keystroke_error": error if session_saved else None,
+        "keystroke_count": 0,
+        "ngrams_saved": False,
+        "ngram_error": None,
+        "ngram_count": 0,
+    }
+
+
+class PersistenceWorker(QThread):
+    """Worker thread draining the persistence queue one job at a time."""
+
+    progress = Signal(str, str)  # (session_id, message)
+    persisted = Signal(str, dict)  # (session_id, PersistSummary results)
+    failed = Signal(str, dict)  # (session_id, PersistSummary results) once retries are exhausted
+    compacted = Signal(dict)  # compact_speed_hist counts after an idle-time compaction
+
+    def __init__(
+        self,
+        *,
+        db_manager: DatabaseManager,
+        journal: PersistenceJournal,
+        max_attempts: int = 3,
+        retry_delay_s: float = 2.0,
+        retention: Optional[HistRetentionPolicy] = None,
+        compact_idle_s: float = 60.0,
+        compact_interval_s: float = 6 * 3600.0,
+    ) -> None:
+        """Initialize the worker.
+
+        Args:
+            db_manager: Database manager; jobs run inside
+                ``db_manager.connection(dedicated=True)``, never on the shared connection.
+            journal: Journal holding the queued jobs.
+            max_attempts: Attempts per job before it is left in the journal.
+            retry_delay_s: Base delay between attempts (doubled per retry).
+            retention: History retention policy; None disables compaction.
+            compact_idle_s: Idle time after which a due compaction runs.
+            compact_interval_s: Minimum time between compactions.
+        """
+        super().__init__()
+        self.db_manager = db_manager
+        self.journal = journal
+        self.max_attempts = max_attempts
+        self.retry_delay_s = retry_delay_s
+        self.retention = retention
+        self.compact_idle_s = compact_idle_s
+        self.compact_interval_s = compact_interval_s
+        self._last_compaction: Optional[float] = None
+        self.jobs: "queue.Queue[Optional[PersistJob]]" = queue.Queue()
+
+    def run(self) -> None:
+        """Process jobs until a ``None`` sentinel is received, compacting history when idle."""
+        idle_timeout = self.compact_idle_s if self.retention is not None else None
+        while True:
+            try:
+                job = self.jobs.get(timeout=idle_timeout)
+            except queue.Empty:
+                self._compact_if_due()
+                continue
+            if job is None:
+                return
+            self._process(job)
+
+    def _compact_if_due(self) -> None:
+        now = time.monotonic()
+        if self.retention is None or (
+            self._last_compaction is not None and now - self._last_compaction < self.compact_interval_s
+        ):
+            return
+        # A failed run is not retried before the next interval either
+        self._last_compaction = now
+        try:
+            with self.db_manager.connection(dedicated=True):
+                counts = NGramAnalyticsService(self.db_manager, None).compact_speed_hist(self.retention)
+        except Exception as e:
+            traceback.print_exc()
+            logger.error("Compacting n-gram history failed: %s", e)
+            return
+        self.compacted.emit(counts)
+
+    def _process(self, job: PersistJob) -> None:
+        sid = job.session_id
+        while True:
+            self.progress.emit(sid, f"Saving session {sid} (attempt {job.attempts + 1})")
+            try:
+                with self.db_manager.connection(dedicated=True):
+                    analytics = NGramAnalyticsService(
+                        self.db_manager, NGramManager(db_manager=self.db_manager)
+                    )
+                    orch_res = analytics.process_end_of_session(
+                        job.session, job.keystrokes, save_session_first=job.save_session_first
+                    )
+            except Exception as e:
+                traceback.print_exc()
+                logger.error("Persisting session %s failed: %s", sid, e)
+                self.journal.mark_failed(job, error=str(e))
+                if job.attempts >= self.max_attempts:
+                    self.failed.emit(
+                        sid, failed_persist_results(str(e), session_saved=not job.save_session_first)
+                    )
+                    return
+                time.sleep(self.retry_delay_s * 2 ** (job.attempts - 1))
+                continue
+            self.journal.complete(sid)
+            results = persist_results_from_orchestrator(
+                orch_res, keystroke_count=job.keystrokes.get_raw_count()
+            )
+            results["queue_pending"] = self.jobs.qsize()
+            self.persisted.emit(sid, results)
+            return
+
+
+class SessionPersistenceQueue(QObject):
+    """Application-wide queue persisting finished drill sessions in the background.
+
+    Use ``get_instance(db_manager=...)``; the first call starts the worker and
+    replays any jobs left in the journal by a previous run.
+    """
+
+    progress = Signal(str, str)  # (session_id, message)
+    persisted = Signal(str, dict)  # (session_id, PersistSummary results)
+    failed = Signal(str, dict)  # (session_id, PersistSummary results)
+    compacted = Signal(dict)  # compact_speed_hist counts
+
+    _instance: Optional["SessionPersistenceQueue"] = None
+    _lock = threading.Lock()
+
+    def __init__(
+        self,
+        *,
+        db_manager: DatabaseManager,
+        journal: Optional[PersistenceJournal] = None,
+        retention: Optional[HistRetentionPolicy] = None,
+    ) -> None:
+        """Create the queue and start its worker thread.
+
+        ``retention`` defaults to ``HistRetentionPolicy.from_env()``.
+        """
+        super().__init__()
+        self.journal = journal or PersistenceJournal()
+        self.worker = PersistenceWorker(
+            db_manager=db_manager,
+            journal=self.journal,
+            retention=retention or HistRetentionPolicy.from_env(),
+        )
+        self.worker.progress.connect(self.progress)
+        self.worker.persisted.connect(self.persisted)
+        self.worker.failed.connect(self.failed)
+        self.worker.compacted.connect(self.compacted)
+        self.worker.start()
+        for job in self.journal.pending():
+            logger.info("Retrying journaled session %s (%d earlier attempts)", job.session_id, job.attempts)
+            job.attempts = 0
+            self.worker.jobs.put(job)
+
+    @classmethod
+    def get_instance(cls, *, db_manager: DatabaseManager) -> "SessionPersistenceQueue":
+        """Return the shared queue, creating it on first use."""
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls(db_manager=db_manager)
+                    app = QCoreApplication.instance()
+                    if app is not None:
+                        # Stop the worker cleanly; unfinished jobs stay journaled
+                        app.aboutToQuit.connect(cls._instance.shutdown)
+        return cls._instance
+
+    def enqueue(
+        self, *, session: Session, keystrokes: KeystrokeCollection, save_session_first: bool
+    ) -> PersistJob:
+        """Journal a finished session and queue it for persistence.
+
+        The keystrokes are copied so the caller may reset its collection.
+        """
+        job = PersistJob(
+            session=session.model_copy(),
+            keystrokes=keystrokes.copy(),
+            save_session_first=save_session_first,
+        )
+        self.journal.record(job)
+        self.worker.jobs.put(job)
+        return job
+
+    def pending_count(self) -> int:
+        """Jobs not yet persisted (queued, running or awaiting retry)."""
+        return len(self.journal)
+
+    def shutdown(self, *, wait_ms: int = 5000) -> None:
+        """Stop the worker after the job in progress; queued jobs stay journaled."""
+        drained: List[PersistJob] = []
+        while not self.worker.jobs.empty():
+            item = self.worker.jobs.get_nowait()
+            if item is not None:
+                drained.append(item)
+        if drained:
+            logger.info("Leaving %d sessions in the persistence journal", len(drained))
+        self.worker.jobs.put(None)
+        self.worker.wait(wait_ms)
+        with SessionPersistenceQueue._lock:
+            if SessionPersistenceQueue._instance is self:
+                SessionPersistenceQueue._instance = None
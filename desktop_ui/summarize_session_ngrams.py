@@ -44,7 +44,11 @@ class SummarizeWorker(QThread):
     def run(self) -> None:
         """Execute the summarization and emit number of records inserted."""
         try:
-            result = self.analytics_service.summarize_session_ngrams()
+            db = self.analytics_service.db
+            if db is None:
+                raise ValueError("Database manager is required")
+            with db.connection(dedicated=True):
+                result = self.analytics_service.summarize_session_ngrams()
             self.finished.emit(result)
         except Exception as e:
             self.error.emit(str(e))
@@ -29,9 +29,13 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
+from desktop_ui.session_persistence_queue import (
+    SessionPersistenceQueue,
+    persist_results_from_orchestrator,
+)
 from helpers.debug_util import DebugUtil
+from models.drill_state import DrillState, KeystrokeLatencyProbe
 from models.keyboard_manager import KeyboardManager, KeyboardNotFound
-from models.keystroke import Keystroke
 from models.keystroke_collection import KeystrokeCollection
 from models.ngram import SpeedNGram
 from models.ngram_analytics_service import NGramAnalyticsService
@@ -43,6 +47,9 @@ from models.user_manager import UserManager, UserNotFound
 if TYPE_CHECKING:
     from db.database_manager import DatabaseManager
 
+# Background persistence summaries currently on screen (kept alive until closed)
+_open_persist_summaries: List["PersistSummary"] = []
+
 
 class PersistSummary(QDialog):
     """Dialog shown after persistence operations complete.
@@ -163,6 +170,17 @@ class PersistSummary(QDialog):
         )
         row += 1
 
+        # Sessions still waiting in the background persistence queue
+        if "queue_pending" in persist_results:
+            pending = int(persist_results.get("queue_pending", 0))
+            self._add_result_row(
+                results_grid,
+                row=row,
+                label="Queue:",
+                status=f"✓ {pending} sessions still saving" if pending else "✓ All sessions saved",
+            )
+            row += 1
+
         layout.addLayout(results_grid)
         layout.addItem(
             QSpacerItem(20, 20, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Expanding)
@@ -446,7 +464,10 @@ class TypingDrillScreen(QDialog):
 
         # Tracking keystroke collection and error records for session data
         self.keystroke_col: KeystrokeCollection = KeystrokeCollection()
-        self.error_records: List[Dict[str, Any]] = []
+        self.error_records: List[Dict[str, object]] = []
+        # Running drill figures updated per keystroke, and handler latency
+        self.drill_state = DrillState(content=self.content)
+        self.latency_probe = KeystrokeLatencyProbe()
         self.session_start_time: datetime.datetime = datetime.datetime.now()
         self.session_end_time: Optional[datetime.datetime] = None
 
@@ -757,8 +778,11 @@ class TypingDrillScreen(QDialog):
         Returns:
             None: This method does not return a value.
         """
-        # Normalize typed text line endings to "\n" for comparison
-        current_text = self.typing_input.toPlainText().replace("\r\n", "\n").replace("\r", "\n")
+        self.latency_probe.start()
+        # Normalize typed text line endings to "\n" for comparison (read the widget once)
+        current_text = self.typing_input.toPlainText()
+        if "\r" in current_text:
+            current_text = current_text.replace("\r\n", "\n").replace("\r", "\n")
 
         # Start timer on first keystroke
         if not self.timer_running and len(current_text) > 0:
@@ -769,17 +793,6 @@ class TypingDrillScreen(QDialog):
         cursor = self.typing_input.textCursor()
         current_pos = cursor.position()
 
-        # Record keystroke data for all changes, including backspaces
-        now = datetime.datetime.now()
-
-        # Calculate time since previous keystroke
-        time_since_previous = 0
-        if self.keystroke_col.get_raw_count() > 0:
-            last_keystroke = self.keystroke_col.raw_keystrokes[-1]
-            last_time = last_keystroke.keystroke_time
-            delta_ms = int((now - last_time).total_seconds() * 1000)
-            time_since_previous = delta_ms
-
         # Determine if this was a backspace or delete using previous text snapshot
         is_backspace = False
         prev_len = len(self.prev_text)
@@ -788,17 +801,17 @@ class TypingDrillScreen(QDialog):
             deleted_pos = current_pos  # Position where character was deleted
             is_backspace = True
 
-            # Create a keystroke record for the backspace
-            keystroke = Keystroke(
+            # Record the backspace straight into the keystroke buffer
+            time_since_previous = self.keystroke_col.record(
                 session_id=self.session.session_id,
                 keystroke_char="\b",  # Backspace character
                 expected_char=self.content[deleted_pos] if deleted_pos < len(self.content) else "",
-                keystroke_time=now,
                 is_error=True,  # Backspaces are always errors
                 text_index=deleted_pos,
-                key_index=self.keystroke_col.get_raw_count(),  # Sequential order
             )
-            self.keystroke_col.add_keystroke(keystroke=keystroke)
+            self.drill_state.record_keystroke(
+                is_error=True, is_backspace=True, interval_ms=time_since_previous
+            )
 
             # Log the backspace keystroke
             logging.debug(
@@ -817,17 +830,17 @@ class TypingDrillScreen(QDialog):
             if not is_backspace or new_char_pos >= prev_len:
                 is_correct = typed_char == expected_char
 
-                # Create keystroke using Keystroke model
-                keystroke = Keystroke(
+                # Record the keystroke; Keystroke models are built at persistence time
+                time_since_previous = self.keystroke_col.record(
                     session_id=self.session.session_id,
                     keystroke_char=typed_char,
                     expected_char=expected_char,
-                    keystroke_time=now,
                     is_error=not is_correct,
                     text_index=new_char_pos,
-                    key_index=self.keystroke_col.get_raw_count(),  # Sequential order
                 )
-                self.keystroke_col.add_keystroke(keystroke=keystroke)
+                self.drill_state.record_keystroke(
+                    is_error=not is_correct, is_backspace=False, interval_ms=time_since_previous
+                )
 
                 # Log keystroke for debugging
                 logging.debug(
@@ -839,15 +852,18 @@ class TypingDrillScreen(QDialog):
                     time_since_previous,
                 )
 
+        # Apply the edit to the running drill state
+        self.drill_state.apply_edit(current_text, cursor_pos=current_pos)
+
         # Update character count
-        # self.typed_chars = len(current_text)  # Remove this line
         self.session.actual_chars = len(current_text)
 
         # Process the typing input
-        self._process_typing_input()
+        self._process_typing_input(current_text)
 
         # Calculate and update stats
         self._update_stats()
+        self.latency_probe.stop()
 
         # Check for completion
         if self.session.actual_chars >= len(self.content):
@@ -858,15 +874,15 @@ class TypingDrillScreen(QDialog):
         # Update previous text snapshot for next change detection
         self.prev_text = current_text
 
-    def _process_typing_input(self) -> None:
+    def _process_typing_input(self, current_text: str) -> None:
         """Process the current typing input, check progress, and update UI highlighting and progress bar.
 
+        Args:
+            current_text (str): Typed text with line endings normalized.
+
         Returns:
             None: This method does not return a value.
         """
-        # Normalize typed text line endings for consistent indexing
-        current_text = self.typing_input.toPlainText().replace("\r\n", "\n").replace("\r", "\n")
-
         # Update completion progress bar (characters present vs expected)
         self.completion_bar.setMaximum(len(self.content))
         self.completion_bar.setValue(min(len(current_text), len(self.content)))
@@ -874,8 +890,8 @@ class TypingDrillScreen(QDialog):
         # Update text highlighting (only last 3 characters for performance)
         self._update_highlighting(current_text)
 
-        # Update error count efficiently
-        self._update_error_count(current_text)
+        # Update error count from the running drill state
+        self._update_error_count()
 
         # Note: Completion check moved exclusively to _on_text_changed to prevent duplicate dialog
 
@@ -991,38 +1007,11 @@ class TypingDrillScreen(QDialog):
         self.display_text.blockSignals(False)
         self.display_text.update()
 
-    def _update_error_count(self, current_text: str) -> None:
-        """Efficiently update error count and error positions.
-
-        This method calculates errors without reformatting the entire text,
-        focusing on performance for long texts.
-
-        Args:
-            current_text (str): Current text input by the user.
-        """
-        # Clear previous error tracking
-        self.error_positions = []
-        self.error_records = []
-
-        # Check each character for errors
-        for i, char in enumerate(current_text):
-            if i >= len(self.content):
-                break
-
-            expected_char = self.content[i]
-            if char != expected_char:
-                self.error_positions.append(i)
-
-                # Record error data for analysis
-                error_record = {
-                    "char_position": i,
-                    "expected_char": expected_char,
-                    "typed_char": char,
-                }
-                self.error_records.append(error_record)
-
-        # Update the error count
-        self.errors = len(self.error_positions)
+    def _update_error_count(self) -> None:
+        """Expose the current error positions and count kept by ``drill_state`` (O(1))."""
+        self.error_positions = self.drill_state.error_positions
+        self.error_records = self.drill_state.error_records
+        self.errors = self.drill_state.current_errors
 
     def _update_timer(self) -> None:
         """Update timer and stats display during the typing session.
@@ -1044,27 +1033,16 @@ class TypingDrillScreen(QDialog):
         if not self.timer_running or self.elapsed_time < 0.1:
             return
         minutes = self.elapsed_time / 60.0
-        typed_text = self.typing_input.toPlainText().replace("\r\n", "\n").replace("\r", "\n")
-        wpm = (len(typed_text) / 5.0) / minutes if minutes > 0 else 0
+        state = self.drill_state
+        typed_len = state.typed_length
+        wpm = (typed_len / 5.0) / minutes if minutes > 0 else 0
         # Accumulated errors: count all incorrect non-backspace keystrokes (spec excludes backspaces)
-        accumulated_errors = sum(
-            1 for k in self.keystroke_col.raw_keystrokes if k.is_error and k.keystroke_char != "\b"
-        )
-        correct_chars = max(0, len(typed_text) - len(self.error_positions))
-        accuracy = (
-            correct_chars / len(self.typing_input.toPlainText()) * 100
-            if len(self.typing_input.toPlainText()) > 0
-            else 100
-        )
+        accumulated_errors = state.accumulated_errors
+        accuracy = state.correct_chars / typed_len * 100 if typed_len > 0 else 100
         # Average ms per keystroke (ignore zero or missing intervals)
-        intervals = [
-            k.time_since_previous
-            for k in self.keystroke_col.raw_keystrokes
-            if k.time_since_previous is not None and k.time_since_previous > 0
-        ]
-        avg_ms_per_key = (sum(intervals) / len(intervals)) if intervals else 0.0
+        avg_ms_per_key = state.avg_ms_per_keystroke
         # Update session object fields
-        self.session.actual_chars = len(self.typing_input.toPlainText())
+        self.session.actual_chars = typed_len
         # Store accumulated errors in session to align with UI and summary
         self.session.errors = int(accumulated_errors)
         self.session.end_time = datetime.datetime.now()
@@ -1115,6 +1093,7 @@ class TypingDrillScreen(QDialog):
             return
         self.timer_running = False
         self.session.end_time = datetime.datetime.now()
+        logging.info("Keystroke handler latency (ms): %s", self.latency_probe.summary())
         self.typing_input.setReadOnly(True)
         palette = self.typing_input.palette()
         palette.setColor(QPalette.ColorRole.Base, QColor(230, 255, 230))
@@ -1196,21 +1175,9 @@ class TypingDrillScreen(QDialog):
                 self.keystroke_col,  # Use raw keystrokes from collection
                 save_session_first=False,  # session already saved in _check_completion
             )
-
-            # Map orchestrator results to UI summary schema
-            results["session_saved"] = bool(orch_res.get("session_saved", False))
-            results["keystrokes_saved_raw"] = int(orch_res.get("keystrokes_saved_raw", 0))
-            results["keystrokes_saved_net"] = int(orch_res.get("keystrokes_saved_net", 0))
-            results["keystrokes_saved"] = (
-                results["keystrokes_saved_net"] > 0 and results["keystrokes_saved_raw"] > 0
+            results = persist_results_from_orchestrator(
+                orch_res, keystroke_count=self.keystroke_col.get_raw_count()
             )
-            results["ngrams_saved"] = bool(orch_res.get("ngrams_saved", False))
-            results["ngram_count"] = int(orch_res.get("ngram_count", 0))
-            results["session_summary_rows"] = int(orch_res.get("session_summary_rows", 0))
-            results["curr_updated"] = int(orch_res.get("curr_updated", 0))
-            results["hist_inserted"] = int(orch_res.get("hist_inserted", 0))
-            # We can infer keystroke_count from keystroke collection
-            results["keystroke_count"] = self.keystroke_col.get_raw_count()
         except Exception as e:
             # Attribute error to the first failing stage based on partial flags
             if not results["session_saved"]:
@@ -1248,16 +1215,45 @@ class TypingDrillScreen(QDialog):
         if result == 2:  # Retry
             self._reset_session()
         elif result == QDialog.DialogCode.Accepted:  # Close
-            # Perform persistence operations
-            persist_results = self._persist_session_data(session)
-
-            # Show persistence summary
-            persist_summary = PersistSummary(persist_results, self)
-            persist_summary.exec_()
+            if self.db_manager is not None:
+                # Persist in the background; the summary opens when the job finishes
+                self._queue_session_persistence(session)
+            else:
+                persist_summary = PersistSummary(self._persist_session_data(session), self)
+                persist_summary.exec_()
 
             # Close the typing drill
             self.accept()
 
+    def _queue_session_persistence(self, session: Session) -> None:
+        """Hand the session to the background persistence queue.
+
+        PersistSummary is shown (non-modal, owned by this drill's parent) once the
+        queue reports the session as persisted or failed.
+        """
+        assert self.db_manager is not None
+        persistence = SessionPersistenceQueue.get_instance(db_manager=self.db_manager)
+        job = persistence.enqueue(
+            session=session,
+            keystrokes=self.keystroke_col,
+            save_session_first="successfully" not in self.session_save_status,
+        )
+        summary_parent = self.parentWidget()
+
+        def on_done(session_id: str, results: Dict[str, Any]) -> None:
+            if session_id != job.session_id:
+                return
+            persistence.persisted.disconnect(on_done)
+            persistence.failed.disconnect(on_done)
+            summary = PersistSummary(results, summary_parent)
+            summary.setModal(False)
+            _open_persist_summaries.append(summary)
+            summary.finished.connect(lambda _code: _open_persist_summaries.remove(summary))
+            summary.show()
+
+        persistence.persisted.connect(on_done)
+        persistence.failed.connect(on_done)
+
     def _reset_session(self) -> None:
         """Reset the typing session to its initial state."""
         self.session = self._create_new_session()
@@ -1265,7 +1261,10 @@ class TypingDrillScreen(QDialog):
         self.start_time = 0.0
         self.elapsed_time = 0.0
         self.keystroke_col.clear()
-        self.error_records.clear()
+        self.drill_state = DrillState(content=self.content)
+        self._update_error_count()
+        self.latency_probe.reset()
+        self.prev_text = ""
         self.session_start_time = datetime.datetime.now()
         self.session_end_time = None
         self.typing_input.clear()
@@ -1327,8 +1326,7 @@ class TypingDrillScreen(QDialog):
             "efficiency": efficiency,
             "correctness": correctness,
             "total_keystrokes": self.keystroke_col.get_raw_count(),
-            "backspace_count": sum(
-                1 for k in self.keystroke_col.raw_keystrokes if k.keystroke_char == "\b"
-            ),
+            "backspace_count": self.drill_state.backspace_count,
             "error_positions": self.error_positions,
+            "keystroke_handler_ms": self.latency_probe.summary(),
         }
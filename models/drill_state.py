@@ -0,0 +1,198 @@
+"""Incremental typing-drill state and per-keystroke latency probe.
+
+``DrillState`` keeps the running figures the typing drill displays (typed
+length, current error positions, accumulated errors, keystroke interval sums)
+and updates them in O(1) per keystroke, so a text change no longer rescans the
+typed text or the keystroke history. Edits away from the end of the typed text
+(cursor moved back, selection replaced, paste) fall back to ``resync``, which rebuilds the state
+from the full text.
+
+``KeystrokeLatencyProbe`` records how long the drill's text-change handler
+takes per keystroke.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+
+class DrillState:
+    """Running statistics for one typing drill.
+
+    Attributes:
+        content: Expected text.
+        typed: Characters currently in the typing box.
+        error_positions: Positions (ascending) where the typed character differs
+            from the expected one.
+        error_records: One dict per entry of ``error_positions`` with
+            char_position, expected_char and typed_char.
+        accumulated_errors: Incorrect non-backspace keystrokes so far (corrected
+            errors still count).
+        backspace_count: Backspace keystrokes so far.
+        interval_sum_ms: Sum of positive keystroke intervals.
+        interval_count: Number of positive keystroke intervals.
+    """
+
+    def __init__(self, *, content: str) -> None:
+        """Create an empty state for the given expected text."""
+        self.content = content
+        self.typed: List[str] = []
+        self.error_positions: List[int] = []
+        self.error_records: List[Dict[str, object]] = []
+        self.accumulated_errors = 0
+        self.backspace_count = 0
+        self.interval_sum_ms = 0
+        self.interval_count = 0
+
+    @property
+    def typed_length(self) -> int:
+        """Number of characters currently typed."""
+        return len(self.typed)
+
+    @property
+    def current_errors(self) -> int:
+        """Number of typed characters that are currently wrong."""
+        return len(self.error_positions)
+
+    @property
+    def correct_chars(self) -> int:
+        """Typed characters that currently match the expected text."""
+        return max(0, len(self.typed) - len(self.error_positions))
+
+    @property
+    def avg_ms_per_keystroke(self) -> float:
+        """Mean of the positive keystroke intervals (0.0 before the second keystroke)."""
+        return self.interval_sum_ms / self.interval_count if self.interval_count else 0.0
+
+    def append_char(self, char: str) -> bool:
+        """Type ``char`` at the end of the text; return True if it matches the expected one."""
+        pos = len(self.typed)
+        self.typed.append(char)
+        if pos >= len(self.content):
+            return False
+        expected = self.content[pos]
+        if char == expected:
+            return True
+        self.error_positions.append(pos)
+        self.error_records.append(
+            {"char_position": pos, "expected_char": expected, "typed_char": char}
+        )
+        return False
+
+    def truncate(self, length: int) -> None:
+        """Delete typed characters from ``length`` to the end (O(characters removed))."""
+        del self.typed[length:]
+        while self.error_positions and self.error_positions[-1] >= length:
+            self.error_positions.pop()
+            self.error_records.pop()
+
+    def apply_edit(self, text: str, *, cursor_pos: int) -> None:
+        """Bring the state in line with the typing box after one text change.
+
+        Typing or deleting with the cursor at the end of the text is applied in
+        O(1); any other edit (cursor moved back, selection replaced, paste)
+        rebuilds the state with ``resync``.
+
+        Args:
+            text: Full text of the typing box after the change.
+            cursor_pos: Cursor position after the change.
+        """
+        typed_len = len(self.typed)
+        new_len = len(text)
+        if cursor_pos == new_len and new_len == typed_len + 1:
+            self.append_char(text[-1])
+        elif cursor_pos == new_len and 0 < new_len < typed_len and text[-1] == self.typed[new_len - 1]:
+            self.truncate(new_len)
+        elif cursor_pos == new_len and new_len == 0:
+            self.truncate(0)
+        else:
+            # Includes same-length changes and shorter texts ending in a new
+            # character: a selection at the end was replaced, not deleted
+            self.resync(text)
+
+    def resync(self, text: str) -> None:
+        """Rebuild the typed text and error positions from ``text`` (O(len(text)))."""
+        self.typed = []
+        self.error_positions = []
+        self.error_records = []
+        for char in text:
+            self.append_char(char)
+
+    def record_keystroke(
+        self, *, is_error: bool, is_backspace: bool, interval_ms: Optional[int]
+    ) -> None:
+        """Fold one recorded keystroke into the running totals."""
+        if is_backspace:
+            self.backspace_count += 1
+        elif is_error:
+            self.accumulated_errors += 1
+        if interval_ms is not None and interval_ms > 0:
+            self.interval_sum_ms += interval_ms
+            self.interval_count += 1
+
+
+class KeystrokeLatencyProbe:
+    """Collects per-keystroke handler times in milliseconds.
+
+    Keeps exact count, mean and max over the whole drill plus the most recent
+    ``window`` samples for percentiles.
+    """
+
+    def __init__(self, *, window: int = 2000) -> None:
+        """Create an empty probe keeping at most ``window`` recent samples."""
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.recent: Deque[float] = deque(maxlen=window)
+        self._started: Optional[float] = None
+
+    def start(self) -> None:
+        """Mark the start of a handler call."""
+        self._started = time.perf_counter()
+
+    def stop(self) -> float:
+        """Record the time since ``start`` and return it in milliseconds."""
+        if self._started is None:
+            return 0.0
+        elapsed_ms = (time.perf_counter() - self._started) * 1000.0
+        self._started = None
+        self.record(elapsed_ms)
+        return elapsed_ms
+
+    def record(self, elapsed_ms: float) -> None:
+        """Add one handler time."""
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.recent.append(elapsed_ms)
+
+    def percentile(self, pct: float) -> float:
+        """Nearest-rank percentile of the recent samples (0.0 when empty)."""
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        rank = max(1, min(len(ordered), int(round(pct / 100.0 * len(ordered)))))
+        return ordered[rank - 1]
+
+    def summary(self) -> Dict[str, float]:
+        """Return count, mean, p50, p95 and max handler time in milliseconds."""
+        return {
+            "count": float(self.count),
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "max_ms": self.max_ms,
+        }
+
+    def reset(self) -> None:
+        """Discard all samples."""
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.recent.clear()
+        self._started = None
+
+
+__all__ = ["DrillState", "KeystrokeLatencyProbe"]
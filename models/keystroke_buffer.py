@@ -0,0 +1,269 @@
+"""Compact columnar recording buffer for live keystroke capture.
+
+``KeystrokeBuffer`` stores one keystroke per row in parallel ``array`` columns
+(monotonic nanosecond timestamps, character codes, text/key indices, error
+flags) plus a backspace-aware index of the net keystrokes. Recording a key
+appends a handful of machine integers instead of allocating and copying
+Pydantic ``Keystroke`` objects; ``Keystroke`` models are only built when a
+caller asks for them (normally at persistence time).
+
+Timestamps are kept relative to a wall-clock anchor taken at the first
+keystroke, so materialized ``keystroke_time`` values and the millisecond
+``time_since_previous`` intervals match what ``KeystrokeCollection`` computed
+from datetimes.
+"""
+
+from __future__ import annotations
+
+import time
+import unicodedata
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from models.keystroke import Keystroke
+
+# Character code markers: no character, or a multi-codepoint string kept in the overflow map
+_NO_CHAR = -1
+_OVERFLOW = -2
+_BACKSPACE = ord("\b")
+
+
+def _interval_ms(delta_us: int) -> int:
+    """Whole milliseconds between two keystrokes, truncated like the datetime version."""
+    return int(timedelta(microseconds=delta_us).total_seconds() * 1000)
+
+
+class KeystrokeBuffer:
+    """Array-backed raw keystroke log with a net (backspace-applied) view."""
+
+    __slots__ = (
+        "_anchor_wall",
+        "_anchor_ns",
+        "_time_ns",
+        "_char",
+        "_expected",
+        "_text_index",
+        "_key_index",
+        "_is_error",
+        "_session",
+        "_sessions",
+        "_net",
+        "_overflow",
+        "_keystroke_ids",
+    )
+
+    def __init__(self) -> None:
+        """Create an empty buffer."""
+        self._anchor_wall: Optional[datetime] = None
+        self._anchor_ns = 0
+        self._time_ns = array("q")
+        self._char = array("l")
+        self._expected = array("l")
+        self._text_index = array("l")
+        self._key_index = array("l")
+        self._is_error = array("b")
+        self._session = array("h")
+        self._sessions: List[Optional[str]] = []
+        self._net = array("l")
+        self._overflow: Dict[Tuple[int, int], str] = {}
+        self._keystroke_ids: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        """Number of raw keystrokes recorded."""
+        return len(self._time_ns)
+
+    @property
+    def net_count(self) -> int:
+        """Number of keystrokes left after applying backspaces."""
+        return len(self._net)
+
+    def _encode_char(self, row: int, column: int, value: str) -> int:
+        if not value:
+            return _NO_CHAR
+        if len(value) == 1:
+            return ord(value)
+        self._overflow[(row, column)] = value
+        return _OVERFLOW
+
+    def _decode_char(self, row: int, column: int, code: int) -> str:
+        if code == _NO_CHAR:
+            return ""
+        if code == _OVERFLOW:
+            return self._overflow[(row, column)]
+        return chr(code)
+
+    def _session_code(self, session_id: Optional[str]) -> int:
+        # Sessions per buffer are almost always exactly one; a linear scan is fine
+        for i, known in enumerate(self._sessions):
+            if known == session_id:
+                return i
+        self._sessions.append(session_id)
+        return len(self._sessions) - 1
+
+    def _append(
+        self,
+        *,
+        time_ns: int,
+        session_id: Optional[str],
+        keystroke_char: str,
+        expected_char: str,
+        is_error: bool,
+        text_index: int,
+        key_index: int,
+        keystroke_id: Optional[str] = None,
+    ) -> int:
+        row = len(self._time_ns)
+        self._time_ns.append(time_ns)
+        self._char.append(self._encode_char(row, 0, keystroke_char))
+        self._expected.append(self._encode_char(row, 1, expected_char))
+        self._text_index.append(text_index)
+        self._key_index.append(key_index)
+        self._is_error.append(1 if is_error else 0)
+        self._session.append(self._session_code(session_id))
+        if keystroke_id:
+            self._keystroke_ids[row] = keystroke_id
+        if keystroke_char == "\b":
+            if self._net:
+                self._net.pop()
+        else:
+            self._net.append(row)
+        return row
+
+    def record(
+        self,
+        *,
+        session_id: Optional[str],
+        keystroke_char: str,
+        expected_char: str,
+        is_error: bool,
+        text_index: int,
+        key_index: int,
+        time_ns: Optional[int] = None,
+    ) -> int:
+        """Record a keystroke happening now (or at monotonic ``time_ns``).
+
+        Characters are NFC-normalized like ``Keystroke``. Returns the raw row index.
+        """
+        now_ns = time.monotonic_ns() if time_ns is None else time_ns
+        if self._anchor_wall is None:
+            self._anchor_wall = datetime.now()
+            self._anchor_ns = now_ns
+        if keystroke_char > "\x7f":
+            keystroke_char = unicodedata.normalize("NFC", keystroke_char)
+        if expected_char > "\x7f":
+            expected_char = unicodedata.normalize("NFC", expected_char)
+        return self._append(
+            time_ns=now_ns,
+            session_id=session_id,
+            keystroke_char=keystroke_char,
+            expected_char=expected_char,
+            is_error=is_error,
+            text_index=text_index,
+            key_index=key_index,
+        )
+
+    def append_keystroke(self, keystroke: Keystroke) -> int:
+        """Record an existing ``Keystroke`` (its own keystroke_time is kept)."""
+        if self._anchor_wall is None:
+            self._anchor_wall = keystroke.keystroke_time
+            self._anchor_ns = 0
+        delta = keystroke.keystroke_time - self._anchor_wall
+        return self._append(
+            time_ns=self._anchor_ns + (delta // timedelta(microseconds=1)) * 1000,
+            session_id=keystroke.session_id,
+            keystroke_char=keystroke.keystroke_char,
+            expected_char=keystroke.expected_char,
+            is_error=keystroke.is_error,
+            text_index=keystroke.text_index,
+            key_index=keystroke.key_index,
+            keystroke_id=keystroke.keystroke_id,
+        )
+
+    def _offset_us(self, row: int) -> int:
+        return (self._time_ns[row] - self._anchor_ns) // 1000
+
+    def keystroke_time(self, row: int) -> datetime:
+        """Wall-clock time of a raw keystroke."""
+        assert self._anchor_wall is not None
+        return self._anchor_wall + timedelta(microseconds=self._offset_us(row))
+
+    def interval_ms(self, row: int) -> int:
+        """time_since_previous of a raw keystroke (-1 for the first)."""
+        if row <= 0:
+            return -1
+        return _interval_ms(self._offset_us(row) - self._offset_us(row - 1))
+
+    def is_backspace(self, row: int) -> bool:
+        """Whether a raw keystroke is a backspace."""
+        return self._char[row] == _BACKSPACE
+
+    def _build(self, row: int, time_since_previous: int) -> Keystroke:
+        return Keystroke(
+            session_id=self._sessions[self._session[row]],
+            keystroke_id=self._keystroke_ids.get(row),
+            keystroke_time=self.keystroke_time(row),
+            keystroke_char=self._decode_char(row, 0, self._char[row]),
+            expected_char=self._decode_char(row, 1, self._expected[row]),
+            is_error=bool(self._is_error[row]),
+            time_since_previous=time_since_previous,
+            text_index=self._text_index[row],
+            key_index=self._key_index[row],
+        )
+
+    def raw_keystrokes(self) -> List[Keystroke]:
+        """Build ``Keystroke`` models for every raw keystroke."""
+        return [self._build(row, self.interval_ms(row)) for row in range(len(self._time_ns))]
+
+    def net_keystrokes(self) -> List[Keystroke]:
+        """Build ``Keystroke`` models for the net keystrokes.
+
+        ``time_since_previous`` is measured from the previous net keystroke.
+        """
+        result: List[Keystroke] = []
+        prev_us: Optional[int] = None
+        for row in self._net:
+            offset = self._offset_us(row)
+            interval = -1 if prev_us is None else _interval_ms(offset - prev_us)
+            result.append(self._build(row, interval))
+            prev_us = offset
+        return result
+
+    def copy(self) -> "KeystrokeBuffer":
+        """Return an independent copy (array columns are copied in C)."""
+        other = KeystrokeBuffer()
+        other._anchor_wall = self._anchor_wall
+        other._anchor_ns = self._anchor_ns
+        other._time_ns = array("q", self._time_ns)
+        other._char = array("l", self._char)
+        other._expected = array("l", self._expected)
+        other._text_index = array("l", self._text_index)
+        other._key_index = array("l", self._key_index)
+        other._is_error = array("b", self._is_error)
+        other._session = array("h", self._session)
+        other._sessions = list(self._sessions)
+        other._net = array("l", self._net)
+        other._overflow = dict(self._overflow)
+        other._keystroke_ids = dict(self._keystroke_ids)
+        return other
+
+    def clear(self) -> None:
+        """Remove every keystroke and reset the time anchor."""
+        self.__init__()  # type: ignore[misc]
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the array columns."""
+        columns = (
+            self._time_ns,
+            self._char,
+            self._expected,
+            self._text_index,
+            self._key_index,
+            self._is_error,
+            self._session,
+            self._net,
+        )
+        return sum(c.itemsize * len(c) for c in columns)
+
+
+__all__ = ["KeystrokeBuffer"]
@@ -1,17 +1,86 @@
 """Keystroke collection for managing keystroke data."""
 
-from typing import List
+from typing import List, Optional
 
 from models.keystroke import Keystroke
+from models.keystroke_buffer import KeystrokeBuffer
 
 
 class KeystrokeCollection:
-    """Collection class for managing raw and net keystrokes."""
+    """Collection class for managing raw and net keystrokes.
+
+    Keystrokes are recorded in an array-backed ``KeystrokeBuffer``; the
+    ``raw_keystrokes`` and ``net_keystrokes`` lists of ``Keystroke`` models are
+    built the first time they are read and then kept up to date, so objects
+    taken from them (and changes made to them) stay valid. Assigning either
+    list replaces that view outright.
+    """
 
     def __init__(self) -> None:
-        """Initialize the collection with empty lists for raw and net keystrokes."""
-        self.raw_keystrokes: List[Keystroke] = []
-        self.net_keystrokes: List[Keystroke] = []
+        """Initialize the collection with an empty keystroke buffer."""
+        self.buffer = KeystrokeBuffer()
+        self._raw: Optional[List[Keystroke]] = None
+        self._net: Optional[List[Keystroke]] = None
+
+    @property
+    def raw_keystrokes(self) -> List[Keystroke]:
+        """Every keystroke in the order typed, backspaces included."""
+        if self._raw is None:
+            self._raw = self.buffer.raw_keystrokes()
+        return self._raw
+
+    @raw_keystrokes.setter
+    def raw_keystrokes(self, value: List[Keystroke]) -> None:
+        self._raw = value
+
+    @property
+    def net_keystrokes(self) -> List[Keystroke]:
+        """Keystrokes left after applying backspaces."""
+        if self._net is None:
+            self._net = self.buffer.net_keystrokes()
+        return self._net
+
+    @net_keystrokes.setter
+    def net_keystrokes(self, value: List[Keystroke]) -> None:
+        self._net = value
+
+    def record(
+        self,
+        *,
+        session_id: Optional[str],
+        keystroke_char: str,
+        expected_char: str,
+        is_error: bool,
+        text_index: int,
+    ) -> int:
+        """Record a keystroke typed now without building a ``Keystroke`` model.
+
+        This is the live-capture path used by the typing drill. Returns the
+        keystroke's time_since_previous in milliseconds (-1 for the first).
+        """
+        if self._raw is not None or self._net is not None:
+            # A list view is already in use; keep it in step via the model path
+            self.add_keystroke(
+                keystroke=Keystroke(
+                    session_id=session_id,
+                    keystroke_char=keystroke_char,
+                    expected_char=expected_char,
+                    is_error=is_error,
+                    text_index=text_index,
+                    key_index=self.get_raw_count(),
+                )
+            )
+            interval = self.raw_keystrokes[-1].time_since_previous
+            return -1 if interval is None else interval
+        row = self.buffer.record(
+            session_id=session_id,
+            keystroke_char=keystroke_char,
+            expected_char=expected_char,
+            is_error=is_error,
+            text_index=text_index,
+            key_index=len(self.buffer),
+        )
+        return self.buffer.interval_ms(row)
 
     def add_keystroke(self, *, keystroke: Keystroke) -> None:
         """Add a single keystroke to the raw keystrokes list.
@@ -19,50 +88,48 @@ class KeystrokeCollection:
         Args:
             keystroke: The keystroke to add to the collection
         """
-        self.raw_keystrokes.append(keystroke.model_copy())
+        self.buffer.append_keystroke(keystroke)
+        if self._raw is not None:
+            self._append_to_view(self._raw, keystroke)
+        if self._net is not None:
+            # Handle net keystrokes: backspace removes last character, otherwise append
+            if keystroke.keystroke_char == "\b":  # backspace character
+                if self._net:  # only remove if there are keystrokes to remove
+                    self._net.pop()
+            else:
+                self._append_to_view(self._net, keystroke)
+
+    @staticmethod
+    def _append_to_view(view: List[Keystroke], keystroke: Keystroke) -> None:
+        view.append(keystroke.model_copy())
         # set the time_since_previous for the newly added keystroke
-        if len(self.raw_keystrokes) > 1:
-            previous_keystroke = self.raw_keystrokes[-2]
-            current_keystroke = self.raw_keystrokes[-1]
-            current_keystroke.time_since_previous = int(
-                (
-                    current_keystroke.keystroke_time - previous_keystroke.keystroke_time
-                ).total_seconds()
-                * 1000
+        if len(view) > 1:
+            view[-1].time_since_previous = int(
+                (view[-1].keystroke_time - view[-2].keystroke_time).total_seconds() * 1000
             )
         else:
-            self.raw_keystrokes[-1].time_since_previous = -1  # No previous keystroke
-
-        # Handle net keystrokes: backspace removes last character, otherwise append
-        if keystroke.keystroke_char == "\b":  # backspace character
-            if self.net_keystrokes:  # only remove if there are keystrokes to remove
-                self.net_keystrokes.pop()
-        else:
-            self.net_keystrokes.append(keystroke.model_copy())
+            view[-1].time_since_previous = -1  # No previous keystroke
 
-        # set the time_since_previous for the newly added keystroke
-        if self.net_keystrokes:  # Only process timing if there are keystrokes in net list
-            if len(self.net_keystrokes) > 1:
-                previous_keystroke = self.net_keystrokes[-2]
-                current_keystroke = self.net_keystrokes[-1]
-                current_keystroke.time_since_previous = int(
-                    (
-                        current_keystroke.keystroke_time - previous_keystroke.keystroke_time
-                    ).total_seconds()
-                    * 1000
-                )
-            else:
-                self.net_keystrokes[-1].time_since_previous = -1  # No previous keystroke
+    def copy(self) -> "KeystrokeCollection":
+        """Return an independent copy of the collection."""
+        other = KeystrokeCollection()
+        other.buffer = self.buffer.copy()
+        if self._raw is not None:
+            other._raw = [k.model_copy() for k in self._raw]
+        if self._net is not None:
+            other._net = [k.model_copy() for k in self._net]
+        return other
 
     def clear(self) -> None:
         """Clear both keystroke lists."""
-        self.raw_keystrokes.clear()
-        self.net_keystrokes.clear()
+        self.buffer.clear()
+        self._raw = None
+        self._net = None
 
     def get_raw_count(self) -> int:
         """Get the count of raw keystrokes."""
-        return len(self.raw_keystrokes)
+        return len(self._raw) if self._raw is not None else len(self.buffer)
 
     def get_net_count(self) -> int:
         """Get the count of net keystrokes."""
-        return len(self.net_keystrokes)
+        return len(self._net) if self._net is not None else self.buffer.net_count
@@ -1,20 +1,349 @@
-"""Keystroke manager for database-backed keystroke operations."""
+"""Keystroke manager for database-backed keystroke operations.
 
+Keystrokes are stored in one of two layouts:
+
+* ``rows`` - one ``session_keystrokes`` row per keystroke (the original layout);
+* ``packed`` - one ``session_keystroke_blobs`` row per session holding the
+  keystrokes encoded by ``encode_keystroke_blob``.
+
+Reads (``get_for_session``, counts, deletes) handle both layouts, so sessions
+can be converted with ``pack_sessions`` (see ``scripts/pack_keystrokes.py``)
+while the application keeps running. New sessions use the layout selected by
+the ``storage`` argument or the ``AITT_KEYSTROKE_STORAGE`` environment variable.
+"""
+
+import logging
+import os
+import time
 import uuid
-from typing import Any, List, Tuple
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 
 from db.database_manager import DatabaseManager
+from db.row_formats import RowFormat
 from models.keystroke import Keystroke
 from models.keystroke_collection import KeystrokeCollection
 
+logger = logging.getLogger(__name__)
+
+KEYSTROKE_STORAGE_ROWS = "rows"
+KEYSTROKE_STORAGE_PACKED = "packed"
+KEYSTROKE_STORAGE_ENV = "AITT_KEYSTROKE_STORAGE"
+
+# Packed blob layout: magic + format version, then a zlib-compressed body
+_BLOB_MAGIC = b"KSB"
+KEYSTROKE_BLOB_VERSION = 1
+
+# Per-keystroke flag bits
+_FLAG_ERROR = 0x01
+_FLAG_NO_INTERVAL = 0x02
+_FLAG_UUID_ID = 0x04
+_FLAG_TEXT_ID = 0x08
+
+_ONE_US = timedelta(microseconds=1)
+
+
+def _put_varint(out: bytearray, value: int) -> None:
+    """Append an unsigned LEB128 varint."""
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _put_signed(out: bytearray, value: int) -> None:
+    """Append a zigzag-encoded signed varint."""
+    _put_varint(out, (value << 1) if value >= 0 else ((-value << 1) - 1))
+
+
+def _put_bytes(out: bytearray, data: bytes) -> None:
+    _put_varint(out, len(data))
+    out += data
+
+
+def _put_char(out: bytearray, value: str) -> None:
+    """Single code points as ``ord + 1``; anything else as 0 + length-prefixed UTF-8."""
+    if len(value) == 1:
+        _put_varint(out, ord(value) + 1)
+    else:
+        out.append(0)
+        _put_bytes(out, value.encode("utf-8"))
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    """Read an unsigned varint at ``pos``; return (value, next position)."""
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _read_bytes(data: bytes, pos: int) -> Tuple[bytes, int]:
+    size, pos = _read_varint(data, pos)
+    return data[pos : pos + size], pos + size
+
+
+def _signed_column(data: bytes, count: int) -> List[int]:
+    """Decode ``count`` zigzag varints (the inner loop of blob decoding)."""
+    values: List[int] = []
+    append = values.append
+    pos = 0
+    for _ in range(count):
+        byte = data[pos]
+        pos += 1
+        if byte < 0x80:
+            value = byte
+        else:
+            value = byte & 0x7F
+            shift = 7
+            while True:
+                byte = data[pos]
+                pos += 1
+                value |= (byte & 0x7F) << shift
+                if byte < 0x80:
+                    break
+                shift += 7
+        append((value >> 1) if not value & 1 else -((value + 1) >> 1))
+    return values
+
+
+def _char_column(data: bytes, count: int) -> List[str]:
+    values: List[str] = []
+    pos = 0
+    for _ in range(count):
+        code, pos = _read_varint(data, pos)
+        if code:
+            values.append(chr(code - 1))
+        else:
+            text, pos = _read_bytes(data, pos)
+            values.append(text.decode("utf-8"))
+    return values
+
+
+def encode_keystroke_blob(keystrokes: List[Keystroke]) -> bytes:
+    """Encode a session's keystrokes into the packed blob format.
+
+    The body is column-oriented (flags, time deltas, characters, intervals,
+    indices, ids), each column a length-prefixed run of zigzag varints, and the
+    whole body is zlib-compressed. Times are microsecond deltas from the first
+    keystroke, whose ISO timestamp is stored once; decoded times carry that
+    keystroke's UTC offset. ``session_id`` is not stored.
+    """
+    flags = bytearray()
+    times = bytearray()
+    chars = bytearray()
+    expected = bytearray()
+    intervals = bytearray()
+    text_idx = bytearray()
+    key_idx = bytearray()
+    ids = bytearray()
+
+    base = keystrokes[0].keystroke_time if keystrokes else datetime(1970, 1, 1)
+    prev_time = base
+    prev_text = 0
+    prev_key = -1
+    for ks in keystrokes:
+        flag = _FLAG_ERROR if ks.is_error else 0
+        if ks.time_since_previous is None:
+            flag |= _FLAG_NO_INTERVAL
+        else:
+            _put_signed(intervals, ks.time_since_previous)
+        if ks.keystroke_id:
+            try:
+                ids += uuid.UUID(ks.keystroke_id).bytes
+                flag |= _FLAG_UUID_ID
+            except ValueError:
+                _put_bytes(ids, ks.keystroke_id.encode("utf-8"))
+                flag |= _FLAG_TEXT_ID
+        flags.append(flag)
+        _put_signed(times, (ks.keystroke_time - prev_time) // _ONE_US)
+        prev_time = ks.keystroke_time
+        _put_char(chars, ks.keystroke_char)
+        _put_char(expected, ks.expected_char)
+        _put_signed(text_idx, ks.text_index - prev_text)
+        prev_text = ks.text_index
+        # Key indices are normally sequential, so store the step minus one
+        _put_signed(key_idx, ks.key_index - prev_key - 1)
+        prev_key = ks.key_index
+
+    body = bytearray()
+    _put_varint(body, len(keystrokes))
+    _put_bytes(body, base.isoformat().encode("ascii"))
+    for column in (flags, times, chars, expected, intervals, text_idx, key_idx, ids):
+        _put_bytes(body, bytes(column))
+    return _BLOB_MAGIC + bytes([KEYSTROKE_BLOB_VERSION]) + zlib.compress(bytes(body))
+
+
+def decode_keystroke_blob(*, session_id: Optional[str], payload: bytes) -> List[Keystroke]:
+    """Decode a blob written by ``encode_keystroke_blob``.
+
+    Raises:
+        ValueError: If the payload is not a packed keystroke blob of a known version.
+    """
+    payload = bytes(payload)
+    if payload[:3] != _BLOB_MAGIC or payload[3:4] != bytes([KEYSTROKE_BLOB_VERSION]):
+        raise ValueError("Not a packed keystroke blob (or unsupported format version)")
+    body = zlib.decompress(payload[4:])
+    count, pos = _read_varint(body, 0)
+    base_iso, pos = _read_bytes(body, pos)
+    columns: List[bytes] = []
+    for _ in range(8):
+        column, pos = _read_bytes(body, pos)
+        columns.append(column)
+    flags, times_col, chars_col, expected_col, intervals_col, text_col, key_col, ids = columns
+
+    base = datetime.fromisoformat(base_iso.decode("ascii"))
+    deltas_us = _signed_column(times_col, count)
+    chars = _char_column(chars_col, count)
+    expected = _char_column(expected_col, count)
+    intervals = iter(_signed_column(intervals_col, count - sum(f & _FLAG_NO_INTERVAL != 0 for f in flags)))
+    text_steps = _signed_column(text_col, count)
+    key_steps = _signed_column(key_col, count)
+
+    result: List[Keystroke] = []
+    offset_us = 0
+    text_index = 0
+    key_index = -1
+    id_pos = 0
+    for i in range(count):
+        flag = flags[i]
+        offset_us += deltas_us[i]
+        text_index += text_steps[i]
+        key_index += key_steps[i] + 1
+        keystroke_id: Optional[str] = None
+        if flag & _FLAG_UUID_ID:
+            h = ids[id_pos : id_pos + 16].hex()
+            id_pos += 16
+            keystroke_id = f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+        elif flag & _FLAG_TEXT_ID:
+            raw_id, id_pos = _read_bytes(ids, id_pos)
+            keystroke_id = raw_id.decode("utf-8")
+        result.append(
+            Keystroke(
+                session_id=session_id,
+                keystroke_id=keystroke_id,
+                keystroke_time=base + timedelta(microseconds=offset_us),
+                keystroke_char=chars[i],
+                expected_char=expected[i],
+                is_error=bool(flag & _FLAG_ERROR),
+                time_since_previous=None if flag & _FLAG_NO_INTERVAL else next(intervals),
+                text_index=text_index,
+                key_index=key_index,
+            )
+        )
+    return result
+
+
+def _parse_keystroke_time(value: object) -> datetime:
+    """Parse a stored keystroke_time (ISO text), like ``Keystroke.from_dict``."""
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return datetime.now()
+
+
+def _keystrokes_from_rows(rows: Sequence[Sequence[Any]]) -> List[Keystroke]:
+    """Build Keystrokes from ``session_keystrokes`` tuples in ``_KEYSTROKE_COLUMNS`` order.
+
+    Each column is converted in one pass (keystroke_time parsed once per
+    value, the other columns already typed by the driver) instead of running
+    every row through ``Keystroke.from_dict``.
+    """
+    if not rows:
+        return []
+    session_ids, keystroke_ids, times, chars, expected, errors, intervals, text_idx, key_idx = zip(*rows, strict=True)
+    parsed_times = [_parse_keystroke_time(v) for v in times]
+    return [
+        Keystroke(
+            session_id=None if session_ids[i] is None else str(session_ids[i]),
+            keystroke_id=None if keystroke_ids[i] is None else str(keystroke_ids[i]),
+            keystroke_time=parsed_times[i],
+            keystroke_char=chars[i],
+            expected_char=expected[i],
+            is_error=bool(errors[i]),
+            time_since_previous=intervals[i],
+            text_index=text_idx[i],
+            key_index=key_idx[i],
+        )
+        for i in range(len(rows))
+    ]
+
+
+def _rowless_sessions(
+    pending: Iterator[str], packed: Dict[str, bytes], *, stop: Optional[str]
+) -> Iterator[Tuple[str, List[Keystroke]]]:
+    """Yield sessions from ``pending`` up to ``stop``: their packed keystrokes, or []."""
+    for session_id in pending:
+        if session_id == stop:
+            return
+        payload = packed.get(session_id)
+        yield session_id, (
+            decode_keystroke_blob(session_id=session_id, payload=payload) if payload else []
+        )
+
+
+def _stored_order(keystroke: Keystroke) -> Tuple[float, int]:
+    """Sort key matching ``ORDER BY keystroke_time, key_index``."""
+    return (keystroke.keystroke_time.timestamp(), keystroke.key_index)
+
+
+@dataclass
+class KeystrokePackStats:
+    """Result of converting sessions between keystroke storage layouts.
+
+    Attributes:
+        sessions: Sessions converted.
+        keystrokes: Keystrokes converted.
+        row_bytes: Heap bytes of the converted ``session_keystrokes`` rows.
+        packed_bytes: Bytes of the packed payloads written.
+        row_load_ms: Time spent loading the sessions from rows.
+        packed_load_ms: Time spent loading the same sessions from their blobs.
+    """
+
+    sessions: int = 0
+    keystrokes: int = 0
+    row_bytes: int = 0
+    packed_bytes: int = 0
+    row_load_ms: float = 0.0
+    packed_load_ms: float = 0.0
+
+    @property
+    def size_reduction(self) -> float:
+        """Fraction of row storage saved (0.75 means a quarter of the size)."""
+        return 1.0 - self.packed_bytes / self.row_bytes if self.row_bytes else 0.0
+
+    @property
+    def load_speedup(self) -> float:
+        """How many times faster a packed session loads than its rows."""
+        return self.row_load_ms / self.packed_load_ms if self.packed_load_ms else 0.0
+
 
 class KeystrokeManager:
     """Manager class for handling keystroke operations in the database."""
 
-    def __init__(self, *, db_manager: DatabaseManager) -> None:
-        """Initialize the manager with an optional DatabaseManager instance."""
+    def __init__(self, *, db_manager: DatabaseManager, storage: Optional[str] = None) -> None:
+        """Initialize the manager.
+
+        Args:
+            db_manager: Database manager used for all queries.
+            storage: Layout for saved keystrokes, ``"rows"`` or ``"packed"``.
+                Defaults to the ``AITT_KEYSTROKE_STORAGE`` environment variable,
+                then ``"rows"``.
+        """
         self.db_manager = db_manager
         self.keystrokes = KeystrokeCollection()
+        self.storage = storage or os.environ.get(KEYSTROKE_STORAGE_ENV) or KEYSTROKE_STORAGE_ROWS
+        if self.storage not in (KEYSTROKE_STORAGE_ROWS, KEYSTROKE_STORAGE_PACKED):
+            raise ValueError(f"Unknown keystroke storage layout: {self.storage}")
 
     def get_keystrokes_for_session(self, *, session_id: str) -> List[Keystroke]:
         """Populate keystrokes collection with all keystrokes for a session from the DB."""
@@ -31,20 +360,207 @@ class KeystrokeManager:
     def get_for_session(self, *, session_id: str) -> List[Keystroke]:
         """Get all keystrokes for a practice session ID.
 
+        Reads ``session_keystrokes`` rows, or the session's packed blob when it
+        has no rows.
+
         Args:
             session_id: The ID of the session to get keystrokes for
 
         Returns:
             List[Keystroke]: List of Keystroke objects for the session
         """
-        query = """
-            SELECT *
+        rows = self._get_rows_for_session(session_id=session_id)
+        if rows:
+            return rows
+        return self._get_packed_for_session(session_id=session_id)
+
+    def _get_rows_for_session(self, *, session_id: str) -> List[Keystroke]:
+        query = f"""
+            SELECT {", ".join(self._KEYSTROKE_COLUMNS)}
             FROM session_keystrokes
             WHERE session_id = ?
             ORDER BY keystroke_time ASC, key_index ASC
         """
-        results = self.db_manager.fetchall(query=query, params=(session_id,))
-        return [Keystroke.from_dict(data=dict(row)) for row in results] if results else []
+        cursor = self.db_manager.execute(query=query, params=(session_id,))
+        return _keystrokes_from_rows(cursor.fetchall())  # type: ignore[arg-type]
+
+    def iter_sessions_keystrokes(
+        self,
+        *,
+        session_ids: Sequence[str],
+        chunk_sessions: int = 200,
+        fetch_size: int = 5000,
+    ) -> Iterator[Tuple[str, List[Keystroke]]]:
+        """Yield ``(session_id, keystrokes)`` for many sessions, in the order given.
+
+        Keystrokes of ``chunk_sessions`` sessions are read with one ordered
+        query, streamed ``fetch_size`` rows at a time through a server-side
+        cursor (``DatabaseManager.iter_rows``); each session is yielded as soon
+        as its last row has arrived. Packed sessions are read
+        with one query per chunk. Sessions without keystrokes yield an empty
+        list. Keystrokes are ordered as in ``get_for_session``.
+
+        Args:
+            session_ids: Sessions to load.
+            chunk_sessions: Sessions per query.
+            fetch_size: Rows fetched from the server per round trip.
+        """
+        query = f"""
+            SELECT {", ".join(self._KEYSTROKE_COLUMNS)}
+            FROM session_keystrokes
+            WHERE session_id = ANY(?::text[])
+            ORDER BY array_position(?::text[], session_id), keystroke_time ASC, key_index ASC
+        """
+        ids = [str(s) for s in session_ids]
+        for start in range(0, len(ids), chunk_sessions):
+            chunk = ids[start : start + chunk_sessions]
+            blobs = self.db_manager.fetchall(
+                query="SELECT session_id, payload FROM session_keystroke_blobs WHERE session_id = ANY(?::text[])",
+                params=(chunk,),
+                row_format=RowFormat.TUPLE,
+            )
+            packed = {str(sid): bytes(payload) for sid, payload in blobs}  # type: ignore[call-overload]
+            pending = iter(chunk)
+            current: Optional[str] = None
+            rows: List[Sequence[Any]] = []
+            for row in self.db_manager.iter_rows(
+                query=query, params=(chunk, chunk), batch_size=fetch_size, row_format=RowFormat.TUPLE
+            ):
+                sid = str(row[0])
+                if sid != current:
+                    if current is not None:
+                        yield current, _keystrokes_from_rows(rows)
+                    yield from _rowless_sessions(pending, packed, stop=sid)
+                    current, rows = sid, []
+                rows.append(row)
+            if current is not None:
+                yield current, _keystrokes_from_rows(rows)
+            yield from _rowless_sessions(pending, packed, stop=None)
+
+    def _get_packed_for_session(self, *, session_id: str) -> List[Keystroke]:
+        row = self.db_manager.fetchone(
+            query="SELECT payload FROM session_keystroke_blobs WHERE session_id = ?",
+            params=(session_id,),
+        )
+        if not row:
+            return []
+        payload = row["payload"]
+        assert isinstance(payload, (bytes, memoryview))
+        return decode_keystroke_blob(session_id=session_id, payload=bytes(payload))
+
+    def _save_packed(self, keystrokes: List[Keystroke]) -> int:
+        """Merge keystrokes into their sessions' packed blobs; return payload bytes written."""
+        by_session: Dict[str, List[Keystroke]] = {}
+        for ks in keystrokes:
+            by_session.setdefault(str(ks.session_id), []).append(ks)
+
+        written = 0
+        for session_id, new in by_session.items():
+            merged = sorted(
+                self._get_packed_for_session(session_id=session_id) + new, key=_stored_order
+            )
+            payload = encode_keystroke_blob(merged)
+            self.db_manager.execute(
+                query=(
+                    "INSERT INTO session_keystroke_blobs "
+                    "(session_id, format_version, keystroke_count, payload, packed_dt) "
+                    "VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (session_id) DO UPDATE SET "
+                    "format_version = EXCLUDED.format_version, "
+                    "keystroke_count = EXCLUDED.keystroke_count, "
+                    "payload = EXCLUDED.payload, packed_dt = EXCLUDED.packed_dt"
+                ),
+                params=(session_id, KEYSTROKE_BLOB_VERSION, len(merged), payload, datetime.now()),
+            )
+            written += len(payload)
+        return written
+
+    def pack_sessions(
+        self,
+        *,
+        session_ids: Optional[List[str]] = None,
+        measure_load: bool = True,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> KeystrokePackStats:
+        """Convert sessions from ``session_keystrokes`` rows to packed blobs.
+
+        Each session is converted in its own transaction (blob written, rows
+        deleted), so an interrupted run can simply be restarted.
+
+        Args:
+            session_ids: Sessions to convert; defaults to every session that has rows.
+            measure_load: Also time loading each converted session back from its blob.
+            progress: Called with (sessions done, total) after each session.
+
+        Returns:
+            KeystrokePackStats with the size and load-time comparison.
+        """
+        if session_ids is None:
+            rows = self.db_manager.fetchall(
+                query="SELECT DISTINCT session_id FROM session_keystrokes ORDER BY session_id"
+            )
+            session_ids = [str(r["session_id"]) for r in rows]
+
+        stats = KeystrokePackStats()
+        for done, session_id in enumerate(session_ids, 1):
+            with self.db_manager.transaction():
+                size_row = self.db_manager.fetchone(
+                    query=(
+                        "SELECT COALESCE(SUM(pg_column_size(sk.*)), 0) AS row_bytes "
+                        "FROM session_keystrokes sk WHERE sk.session_id = ?"
+                    ),
+                    params=(session_id,),
+                )
+                started = time.perf_counter()
+                keystrokes = self._get_rows_for_session(session_id=session_id)
+                stats.row_load_ms += (time.perf_counter() - started) * 1000.0
+                if keystrokes:
+                    stats.packed_bytes += self._save_packed(keystrokes)
+                    self.db_manager.execute(
+                        query="DELETE FROM session_keystrokes WHERE session_id = ?",
+                        params=(session_id,),
+                    )
+                    stats.sessions += 1
+                    stats.keystrokes += len(keystrokes)
+                    stats.row_bytes += int(str(size_row["row_bytes"])) if size_row else 0
+            if measure_load and keystrokes:
+                started = time.perf_counter()
+                self._get_packed_for_session(session_id=session_id)
+                stats.packed_load_ms += (time.perf_counter() - started) * 1000.0
+            if progress is not None:
+                progress(done, len(session_ids))
+        return stats
+
+    def unpack_sessions(self, *, session_ids: Optional[List[str]] = None) -> int:
+        """Convert packed sessions back to ``session_keystrokes`` rows.
+
+        Returns:
+            Number of sessions converted.
+        """
+        if session_ids is None:
+            rows = self.db_manager.fetchall(
+                query="SELECT session_id FROM session_keystroke_blobs ORDER BY session_id"
+            )
+            session_ids = [str(r["session_id"]) for r in rows]
+
+        converted = 0
+        for session_id in session_ids:
+            with self.db_manager.transaction():
+                keystrokes = self._get_packed_for_session(session_id=session_id)
+                if not keystrokes:
+                    continue
+                rows_manager = KeystrokeManager(
+                    db_manager=self.db_manager, storage=KEYSTROKE_STORAGE_ROWS
+                )
+                rows_manager.keystrokes.raw_keystrokes = keystrokes
+                if not rows_manager.save_keystrokes():
+                    raise RuntimeError(f"Could not write keystroke rows for session {session_id}")
+                self.db_manager.execute(
+                    query="DELETE FROM session_keystroke_blobs WHERE session_id = ?",
+                    params=(session_id,),
+                )
+                converted += 1
+        return converted
 
     def save_keystrokes(self) -> bool:
         """Save all keystrokes in the in-memory list to the database.
@@ -55,6 +571,30 @@ class KeystrokeManager:
             if not self.keystrokes.raw_keystrokes:
                 return True
 
+            # Assign ids up front so the rows streamed below and the in-memory
+            # collection agree even if COPY falls back to INSERTs
+            for ks in self.keystrokes.raw_keystrokes:
+                if not ks.keystroke_id:
+                    ks.keystroke_id = str(uuid.uuid4())
+
+            if self.storage == KEYSTROKE_STORAGE_PACKED:
+                self._save_packed(self.keystrokes.raw_keystrokes)
+                return True
+
+            copy_rows = getattr(self.db_manager, "copy_rows", None)
+            if callable(copy_rows):
+                try:
+                    # Savepoint: a failed COPY must not abort an enclosing unit of work
+                    with self.db_manager.transaction():
+                        copy_rows(
+                            table="session_keystrokes",
+                            columns=self._KEYSTROKE_COLUMNS,
+                            rows=self._keystroke_rows(),
+                        )
+                    return True
+                except Exception as copy_exc:
+                    logger.warning("COPY of keystrokes failed, falling back to INSERT: %s", copy_exc)
+
             # Standard query for session_keystrokes table with all columns
             query = (
                 "INSERT INTO session_keystrokes "
@@ -65,23 +605,7 @@ class KeystrokeManager:
             )
 
             # Prepare parameter tuples for bulk insert
-            params: List[Tuple[Any, ...]] = []
-            for idx, ks in enumerate(self.keystrokes.raw_keystrokes):
-                if not ks.keystroke_id:
-                    ks.keystroke_id = str(uuid.uuid4())
-                params.append(
-                    (
-                        ks.session_id,
-                        ks.keystroke_id,
-                        ks.keystroke_time.isoformat(),
-                        ks.keystroke_char,
-                        ks.expected_char,
-                        int(ks.is_error),
-                        ks.time_since_previous,
-                        getattr(ks, "text_index", idx),  # Use text_index or idx as fallback
-                        getattr(ks, "key_index", idx),  # Use key_index or idx as fallback
-                    )
-                )
+            params: List[Tuple[Any, ...]] = list(self._keystroke_rows())
 
             # Execute the bulk insert
             self._execute_bulk_insert(query=query, params=params)
@@ -95,6 +619,33 @@ class KeystrokeManager:
             traceback.print_exc(file=sys.stderr)
             return False
 
+    _KEYSTROKE_COLUMNS = (
+        "session_id",
+        "keystroke_id",
+        "keystroke_time",
+        "keystroke_char",
+        "expected_char",
+        "is_error",
+        "time_since_previous",
+        "text_index",
+        "key_index",
+    )
+
+    def _keystroke_rows(self) -> Iterator[Tuple[Any, ...]]:
+        """Yield `session_keystrokes` rows for the in-memory keystrokes, in column order."""
+        for idx, ks in enumerate(self.keystrokes.raw_keystrokes):
+            yield (
+                ks.session_id,
+                ks.keystroke_id,
+                ks.keystroke_time.isoformat(),
+                ks.keystroke_char,
+                ks.expected_char,
+                int(ks.is_error),
+                ks.time_since_previous,
+                getattr(ks, "text_index", idx),  # Use text_index or idx as fallback
+                getattr(ks, "key_index", idx),  # Use key_index or idx as fallback
+            )
+
     def delete_keystrokes_by_session(self, *, session_id: str) -> bool:
         """Delete all keystrokes for a given session ID.
 
@@ -108,6 +659,10 @@ class KeystrokeManager:
             self.db_manager.execute(
                 query="DELETE FROM session_keystrokes WHERE session_id = ?", params=(session_id,)
             )
+            self.db_manager.execute(
+                query="DELETE FROM session_keystroke_blobs WHERE session_id = ?",
+                params=(session_id,),
+            )
             return True
         except Exception as e:
             import sys
@@ -127,6 +682,7 @@ class KeystrokeManager:
         """
         try:
             self.db_manager.execute(query="DELETE FROM session_keystrokes")
+            self.db_manager.execute(query="DELETE FROM session_keystroke_blobs")
             return True
         except Exception as e:
             print(f"Error deleting all keystrokes: {e}")
@@ -143,8 +699,12 @@ class KeystrokeManager:
         """
         try:
             result = self.db_manager.fetchone(
-                query="SELECT COUNT(*) as keystroke_count FROM session_keystrokes WHERE session_id = ?",
-                params=(session_id,)
+                query=(
+                    "SELECT (SELECT COUNT(*) FROM session_keystrokes WHERE session_id = ?) "
+                    "+ COALESCE((SELECT keystroke_count FROM session_keystroke_blobs "
+                    "WHERE session_id = ?), 0) AS keystroke_count"
+                ),
+                params=(session_id, session_id),
             )
             # Support both Row (dict-like) and tuple/list return types
             if result is not None:
@@ -177,7 +737,10 @@ class KeystrokeManager:
             "ORDER BY keystroke_id"
         )
         results = self.db_manager.fetchall(query=query, params=(session_id,))
-        return [Keystroke.from_dict(data=dict(row)) for row in results] if results else []
+        if results:
+            return [Keystroke.from_dict(data=dict(row)) for row in results]
+        packed = self._get_packed_for_session(session_id=session_id)
+        return sorted((k for k in packed if k.is_error), key=lambda k: str(k.keystroke_id))
 
     def _execute_bulk_insert(self, *, query: str, params: List[Tuple[Any, ...]]) -> None:
         """Execute bulk insert operation with fallback to individual inserts.
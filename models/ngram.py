@@ -8,9 +8,10 @@ from __future__ import annotations
 
 import unicodedata
 import uuid
+from array import array
 from datetime import datetime, timezone
 from enum import Enum
-from typing import Optional
+from typing import Iterable, Iterator, Optional, Tuple
 
 from pydantic import BaseModel, Field, ValidationInfo, field_validator, model_validator
 
@@ -92,6 +93,147 @@ class SpeedNGram(BaseModel):
         return self
 
 
+class NGramBatch:
+    """Columnar batch of speed n-grams produced by one analysis pass.
+
+    Stores windows of a single session as parallel arrays (size, text offset,
+    duration, ms per keystroke) instead of one ``SpeedNGram`` model per window.
+    Text is sliced from ``expected_text`` on demand. The batch is validated once
+    via ``validate``; ``SpeedNGram`` models are only built when iterating.
+    """
+
+    __slots__ = (
+        "session_id",
+        "expected_text",
+        "speed_mode",
+        "created_at",
+        "sizes",
+        "offsets",
+        "durations_ms",
+        "ms_per_keystroke",
+    )
+
+    def __init__(
+        self,
+        *,
+        session_id: uuid.UUID,
+        expected_text: str,
+        speed_mode: SpeedMode,
+        created_at: Optional[datetime] = None,
+    ) -> None:
+        """Create an empty batch for one session."""
+        self.session_id = session_id
+        self.expected_text = expected_text
+        self.speed_mode = speed_mode
+        self.created_at = created_at or datetime.now(timezone.utc)
+        self.sizes: array[int] = array("h")
+        self.offsets: array[int] = array("q")
+        self.durations_ms: array[float] = array("d")
+        self.ms_per_keystroke: array[float] = array("d")
+
+    @classmethod
+    def from_columns(
+        cls,
+        *,
+        session_id: uuid.UUID,
+        expected_text: str,
+        speed_mode: SpeedMode,
+        offsets: Iterable[int],
+        sizes: Iterable[int],
+        durations_ms: Iterable[float],
+    ) -> "NGramBatch":
+        """Build and validate a batch from parallel columns.
+
+        Raises:
+            ValueError: If the columns differ in length or any window is invalid.
+        """
+        batch = cls(session_id=session_id, expected_text=expected_text, speed_mode=speed_mode)
+        batch.offsets.extend(offsets)
+        batch.sizes.extend(sizes)
+        batch.durations_ms.extend(durations_ms)
+        if not len(batch.offsets) == len(batch.sizes) == len(batch.durations_ms):
+            raise ValueError("NGramBatch columns must have equal length")
+        batch.validate()
+        batch.ms_per_keystroke.extend(d / n for d, n in zip(batch.durations_ms, batch.sizes, strict=True))
+        return batch
+
+    def append(self, *, offset: int, size: int, duration_ms: float) -> None:
+        """Append one window; call ``validate`` once the batch is complete."""
+        self.offsets.append(offset)
+        self.sizes.append(size)
+        self.durations_ms.append(duration_ms)
+        self.ms_per_keystroke.append(float(duration_ms) / float(size))
+
+    def validate(self) -> None:
+        """Check every window in one pass over the batch.
+
+        Applies the same rules as ``SpeedNGram``: size within bounds, text free of
+        sequence separators, and a positive duration.
+
+        Raises:
+            ValueError: If any window violates those rules.
+        """
+        text = self.expected_text
+        length = len(text)
+        sep_prefix = [0] * (length + 1)
+        count = 0
+        for i, ch in enumerate(text):
+            if ch in SEQUENCE_SEPARATORS:
+                count += 1
+            sep_prefix[i + 1] = count
+        for i, (offset, size, duration) in enumerate(
+            zip(self.offsets, self.sizes, self.durations_ms, strict=True)
+        ):
+            if size < MIN_NGRAM_SIZE or size > MAX_NGRAM_SIZE:
+                raise ValueError(f"invalid n-gram size at row {i}")
+            if offset < 0 or offset + size > length:
+                raise ValueError(f"n-gram window out of range at row {i}")
+            if sep_prefix[offset + size] != sep_prefix[offset]:
+                raise ValueError(f"n-gram text contains a sequence separator at row {i}")
+            if not duration > 0:
+                raise ValueError(f"n-gram duration must be positive at row {i}")
+
+    def __len__(self) -> int:
+        """Return the number of windows in the batch."""
+        return len(self.sizes)
+
+    def text_at(self, i: int) -> str:
+        """Return the NFC-normalized text of window ``i``."""
+        offset = self.offsets[i]
+        return nfc(self.expected_text[offset : offset + self.sizes[i]])
+
+    def __iter__(self) -> Iterator[SpeedNGram]:
+        """Yield each window as a ``SpeedNGram`` model."""
+        for i in range(len(self)):
+            yield SpeedNGram(
+                id=uuid.uuid4(),
+                session_id=self.session_id,
+                size=self.sizes[i],
+                text=self.text_at(i),
+                duration_ms=self.durations_ms[i],
+                ms_per_keystroke=self.ms_per_keystroke[i],
+                speed_mode=self.speed_mode,
+                created_at=self.created_at,
+            )
+
+    def iter_rows(self) -> Iterator[Tuple[str, str, int, str, float, float]]:
+        """Yield ``session_ngram_speed`` insert tuples without building models.
+
+        Columns: ngram_speed_id, session_id, ngram_size, ngram_text,
+        ngram_time_ms, ms_per_keystroke.
+        """
+        session_id = str(self.session_id)
+        for i in range(len(self)):
+            yield (
+                str(uuid.uuid4()),
+                session_id,
+                self.sizes[i],
+                self.text_at(i),
+                self.durations_ms[i],
+                self.ms_per_keystroke[i],
+            )
+
+
 class ErrorNGram(BaseModel):
     """Error n-gram capturing a last-character mistake pattern.
 
@@ -164,6 +306,7 @@ __all__ = [
     "SpeedMode",
     "NGramType",
     "SpeedNGram",
+    "NGramBatch",
     "ErrorNGram",
     "validate_ngram_size",
     "is_valid_ngram_text",
@@ -16,19 +16,27 @@ Requirements summary (as implemented):
 
 - Historical table `ngram_speed_summary_hist` is append-only; each row uses a freshly generated
   UUID `history_id`. Columns mirror the current summary with the associated `session_id` and
-  `updated_dt` timestamp.
+  `updated_dt` timestamp. `compact_speed_hist()` folds rows older than the retention window
+  (`HistRetentionPolicy`) into one row per n-gram per day or week.
 
-- Decaying average is computed in-SQL over the most recent 20 session summaries per n-gram,
-  weighting newer rows higher. Specifically, within CTE `avg_calc`, `decaying_average_ms` is
-  computed as a weighted average using `SUM(avg_ms_per_keystroke * (1/row_num)) / SUM(1/row_num)`,
-  where `row_num` is ordered by `session_dt DESC`.
+- Decaying average is computed over the most recent 20 session summaries per n-gram for the
+  same user and keyboard, weighting newer rows higher: the k-th most recent session has weight
+  1/k (`SQL/ngram_speed_summary.sql` is the equivalent set-based query).
 
 - `add_speed_summary_for_session(session_id)` pipeline:
-  1) Builds a CTE to scope the requested session/user/keyboard and gather per-ngram aggregates.
-  2) Calculates decaying averages and sample counts per n-gram.
+  1) Loads the session's rows from `session_ngram_summary` and the matching rolling state from
+     `ngram_speed_state` (last 20 samples plus running instance count per user/keyboard/ngram).
+  2) Advances each state by this session's sample (rebuilding from history only when the state
+     is missing or stale) and derives decaying averages and sample counts.
   3) Upserts results into `ngram_speed_summary_curr` (conflict on user/keyboard/ngram/size).
   4) Inserts corresponding rows into `ngram_speed_summary_hist` (append-only).
   Both steps use bulk operations via `DatabaseManager.execute_many()`.
+  `backfill_speed_state()` rebuilds all rolling state from existing data.
+
+- `summarize_session_ngrams()` only reads n-gram rows of sessions missing from
+  `session_summary_ledger`; each session with summary rows gets a ledger row with the rows
+  inserted and read (`last_summarize_stats` holds the totals of the latest run). Sessions whose
+  n-grams are not written yet get no ledger row, so a later run picks them up.
 
 - All IDs (`summary_id`, `history_id`) are random UUIDs (string form) for uniqueness.
 
@@ -38,18 +46,47 @@ Requirements summary (as implemented):
 """
 
 import logging
+import os
 import re
+import time
 import traceback
 import uuid
 from dataclasses import dataclass
-from datetime import datetime
-from typing import TYPE_CHECKING, Dict, List, Mapping, Optional, Tuple, TypedDict, Union, cast
+from datetime import datetime, timedelta
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypedDict,
+    Union,
+    cast,
+)
 
 from pydantic import BaseModel, Field
 
 from db.database_manager import DatabaseManager
+from db.row_formats import RowFormat
 from helpers.debug_util import DebugUtil
 from models.ngram_manager import NGramManager
+from models.ngram_speed_state import (
+    DEFAULT_TARGET_SPEED_MS,
+    SPEED_STATE_WINDOW,
+    NGramSpeedState,
+    target_metrics,
+)
+from models.ngram_summary_cache import (
+    SUMMARY_COLUMNS,
+    NGramSummaryCache,
+    SummaryCacheStats,
+    SummaryColumns,
+    summary_cache_for,
+)
 
 if TYPE_CHECKING:  # Only for type hints to avoid circular imports at runtime
     from models.keystroke_collection import KeystrokeCollection
@@ -57,6 +94,355 @@ if TYPE_CHECKING:  # Only for type hints to avoid circular imports at runtime
 
 logger = logging.getLogger(__name__)
 
+HIST_KEEP_SESSIONS_ENV = "AITT_HIST_KEEP_SESSIONS"
+HIST_WEEKLY_AFTER_DAYS_ENV = "AITT_HIST_WEEKLY_AFTER_DAYS"
+
+
+# Summarize a set of sessions (params: the session id list three times) and record
+# each session that has summary rows in session_summary_ledger with the rows it
+# inserted and read.
+_SUMMARIZE_SESSIONS_SQL = """
+    WITH speed AS (
+    SELECT
+        ps.session_id,
+        ps.user_id,
+        ps.keyboard_id,
+        s.ngram_text,
+        s.ngram_size,
+        AVG(
+        CASE
+            WHEN s.ms_per_keystroke > 0 THEN s.ms_per_keystroke
+            ELSE NULL
+        END
+        ) AS avg_ms_per_keystroke,
+        COUNT(1) AS instance_count,
+        ps.start_time AS session_dt
+    FROM session_ngram_speed s
+    INNER JOIN practice_sessions ps
+        ON ps.session_id = s.session_id
+    LEFT OUTER JOIN session_ngram_summary sns
+        ON sns.session_id = s.session_id
+        AND sns.ngram_text = s.ngram_text
+        AND sns.ngram_size = s.ngram_size
+    WHERE s.session_id = ANY(?::text[])
+        AND sns.session_id IS NULL  -- i.e. this summary line does not exist yet
+    GROUP BY ps.session_id, ps.user_id, ps.keyboard_id, s.ngram_text, s.ngram_size
+    ),
+
+    errs AS (
+    SELECT
+        e.session_id,
+        e.ngram_text,
+        e.ngram_size,
+        COUNT(1) AS error_count
+    FROM session_ngram_errors e
+    LEFT OUTER JOIN session_ngram_summary sns
+        ON sns.session_id = e.session_id
+        AND sns.ngram_text = e.ngram_text
+        AND sns.ngram_size = e.ngram_size
+    WHERE e.session_id = ANY(?::text[])
+        AND sns.session_id IS NULL  -- only bring back ones that are not in there already
+    GROUP BY e.session_id, e.ngram_text, e.ngram_size
+    ),
+
+    k AS (
+    SELECT
+        keyboard_id,
+        COALESCE(target_ms_per_keystroke, 600) AS target_speed_ms
+    FROM keyboards
+    ),
+
+    to_insert AS (
+    SELECT
+        sp.session_id,
+        sp.ngram_text,
+        sp.user_id,
+        sp.keyboard_id,
+        sp.ngram_size,
+        COALESCE(sp.avg_ms_per_keystroke, 0) AS avg_ms_per_keystroke,
+        (
+        COALESCE(sp.instance_count, 0) +
+        COALESCE(er.error_count, 0)
+        ) AS instance_count,
+        COALESCE(er.error_count, 0) AS error_count,
+        COALESCE(kk.target_speed_ms, 600) AS target_speed_ms,
+        sp.session_dt
+    FROM speed sp
+    LEFT JOIN errs er
+        ON er.session_id = sp.session_id
+        AND er.ngram_text = sp.ngram_text
+        AND er.ngram_size = sp.ngram_size
+    LEFT JOIN k kk
+        ON kk.keyboard_id = sp.keyboard_id
+    ),
+
+    ins AS (
+    INSERT INTO session_ngram_summary (
+        session_id,
+        ngram_text,
+        user_id,
+        keyboard_id,
+        ngram_size,
+        avg_ms_per_keystroke,
+        target_speed_ms,
+        instance_count,
+        error_count,
+        updated_dt,
+        session_dt
+    )
+    SELECT
+        session_id,
+        ngram_text,
+        user_id,
+        keyboard_id,
+        ngram_size,
+        avg_ms_per_keystroke,
+        target_speed_ms,
+        instance_count,
+        error_count,
+        CURRENT_TIMESTAMP,
+        session_dt
+        FROM to_insert
+    RETURNING session_id
+    )
+
+    INSERT INTO session_summary_ledger (
+        session_id,
+        summary_rows,
+        speed_rows_scanned,
+        error_rows_scanned,
+        summarized_dt
+    )
+    SELECT
+        p.session_id,
+        COALESCE(i.cnt, 0),
+        COALESCE(sp.cnt, 0),
+        COALESCE(er.cnt, 0),
+        CURRENT_TIMESTAMP
+    FROM practice_sessions p
+    LEFT JOIN (SELECT session_id, COUNT(1) AS cnt FROM ins GROUP BY session_id) i
+        ON i.session_id = p.session_id
+    LEFT JOIN (SELECT session_id, SUM(instance_count) AS cnt FROM speed GROUP BY session_id) sp
+        ON sp.session_id = p.session_id
+    LEFT JOIN (SELECT session_id, SUM(error_count) AS cnt FROM errs GROUP BY session_id) er
+        ON er.session_id = p.session_id
+    WHERE p.session_id = ANY(?::text[])
+        -- Sessions with no summary rows yet (n-grams not persisted) stay pending
+        AND (
+            i.cnt IS NOT NULL
+            OR EXISTS (SELECT 1 FROM session_ngram_summary AS x WHERE x.session_id = p.session_id)
+        )
+    ON CONFLICT(session_id) DO UPDATE SET
+        summary_rows = excluded.summary_rows,
+        speed_rows_scanned = excluded.speed_rows_scanned,
+        error_rows_scanned = excluded.error_rows_scanned,
+        summarized_dt = excluded.summarized_dt
+    RETURNING session_id, summary_rows, speed_rows_scanned, error_rows_scanned
+"""
+
+
+# Predicate on practice_sessions AS ps: the session has no speed summary yet.
+# compact_speed_hist deletes the history rows of the sessions it folds into day
+# and week rows but keeps their session_target_rollup rows.
+_SPEED_SUMMARY_PENDING_SQL = """
+    NOT EXISTS (SELECT 1 FROM session_target_rollup AS r WHERE r.session_id = ps.session_id)
+    AND NOT EXISTS (SELECT 1 FROM ngram_speed_summary_hist AS h WHERE h.session_id = ps.session_id)
+"""
+
+
+def _speed_state_rebuild_sql(*, scoped: bool) -> str:
+    """Return INSERT ... SELECT rebuilding ngram_speed_state from session_ngram_summary.
+
+    Parameters: window size, then (user_id, keyboard_id) when ``scoped``.
+    """
+    where = "WHERE sns.user_id = ? AND sns.keyboard_id = ?" if scoped else ""
+    return f"""
+        INSERT INTO ngram_speed_state (
+            user_id, keyboard_id, ngram_text, ngram_size, samples_ms,
+            instance_count, last_session_id, last_session_dt, updated_dt
+        )
+        SELECT
+            sns.user_id,
+            sns.keyboard_id,
+            sns.ngram_text,
+            sns.ngram_size,
+            (ARRAY_AGG(sns.avg_ms_per_keystroke ORDER BY sns.session_dt DESC, sns.session_id DESC))[1:?],
+            SUM(sns.instance_count),
+            (ARRAY_AGG(sns.session_id ORDER BY sns.session_dt DESC, sns.session_id DESC))[1],
+            MAX(sns.session_dt),
+            CURRENT_TIMESTAMP
+        FROM session_ngram_summary AS sns
+        {where}
+        GROUP BY sns.user_id, sns.keyboard_id, sns.ngram_text, sns.ngram_size
+        ON CONFLICT(user_id, keyboard_id, ngram_text, ngram_size) DO UPDATE SET
+            samples_ms = excluded.samples_ms,
+            instance_count = excluded.instance_count,
+            last_session_id = excluded.last_session_id,
+            last_session_dt = excluded.last_session_dt,
+            updated_dt = excluded.updated_dt
+        """
+
+
+def _target_rollup_sql(*, scoped: bool) -> str:
+    """Return INSERT ... SELECT filling session_target_rollup from ngram_speed_summary_hist.
+
+    Parameters: the session ids (a text array) when ``scoped``.
+    """
+    scope = "AND h.session_id = ANY(?::text[])" if scoped else ""
+    return f"""
+        INSERT INTO session_target_rollup (
+            session_id, user_id, keyboard_id, ngram_size, meets_target, ngram_count
+        )
+        SELECT
+            ps.session_id,
+            ps.user_id,
+            ps.keyboard_id,
+            h.ngram_size,
+            h.meets_target,
+            COUNT(DISTINCT h.ngram_text)
+        FROM ngram_speed_summary_hist AS h
+        INNER JOIN practice_sessions AS ps
+            ON ps.session_id = h.session_id
+        WHERE h.resolution = 'session' {scope}
+        GROUP BY ps.session_id, ps.user_id, ps.keyboard_id, h.ngram_size, h.meets_target
+        """
+
+
+def _hist_compaction_sql(*, scoped: bool) -> str:
+    """Return the statement downsampling ngram_speed_summary_hist (see compact_speed_hist).
+
+    Rows older than the user/keyboard's Nth newest session are grouped per
+    n-gram into whole days, or whole weeks before the weekly cutoff; week rows
+    are never split back into days. The newest row of each bucket with more
+    than one row is kept as the bucket's row: it takes the prev_* values of the
+    bucket's oldest row and the summed compacted_rows; the other rows are
+    deleted. Returns one row (buckets_written, rows_removed).
+    Parameters: (user_id, keyboard_id) when ``scoped``, then the number of
+    sessions kept at full resolution and the weekly cutoff (NULL: never).
+    """
+    where = "WHERE user_id = ? AND keyboard_id = ?" if scoped else ""
+    return f"""
+        WITH cutoffs AS (
+            SELECT user_id, keyboard_id, start_time AS cutoff_dt
+            FROM (
+                SELECT
+                    user_id,
+                    keyboard_id,
+                    start_time,
+                    ROW_NUMBER() OVER (PARTITION BY user_id, keyboard_id ORDER BY start_time DESC) AS rn
+                FROM practice_sessions
+                {where}
+            ) AS ranked_sessions
+            WHERE rn = ?
+        ),
+        tagged AS (
+            SELECT
+                h.*,
+                CASE
+                    WHEN h.resolution = 'week'
+                        OR date_trunc('week', h.updated_dt) + INTERVAL '1 week'
+                            <= LEAST(c.cutoff_dt, COALESCE(?::timestamp, '-infinity'::timestamp))
+                        THEN 'week'
+                    WHEN date_trunc('day', h.updated_dt) + INTERVAL '1 day' <= c.cutoff_dt THEN 'day'
+                END AS target_resolution
+            FROM ngram_speed_summary_hist AS h
+            INNER JOIN cutoffs AS c
+                ON c.user_id = h.user_id AND c.keyboard_id = h.keyboard_id
+            WHERE h.updated_dt < c.cutoff_dt
+        ),
+        buckets AS (
+            SELECT
+                history_id,
+                target_resolution,
+                ROW_NUMBER() OVER newest_first AS rn_last,
+                COUNT(*) OVER bucket AS bucket_size,
+                SUM(compacted_rows) OVER bucket AS bucket_rows,
+                FIRST_VALUE(prev_decaying_average_ms) OVER oldest_first AS first_prev_decaying_average_ms,
+                FIRST_VALUE(prev_sample_count) OVER oldest_first AS first_prev_sample_count,
+                FIRST_VALUE(prev_meets_target) OVER oldest_first AS first_prev_meets_target,
+                FIRST_VALUE(prev_updated_dt) OVER oldest_first AS first_prev_updated_dt
+            FROM tagged
+            WHERE target_resolution IS NOT NULL
+            WINDOW
+                bucket AS (
+                    PARTITION BY user_id, keyboard_id, ngram_text, ngram_size,
+                        target_resolution, date_trunc(target_resolution, updated_dt)
+                ),
+                newest_first AS (bucket ORDER BY updated_dt DESC, history_id DESC),
+                oldest_first AS (bucket ORDER BY updated_dt, history_id)
+        ),
+        kept AS (
+            UPDATE ngram_speed_summary_hist AS h
+            SET resolution = b.target_resolution,
+                compacted_rows = b.bucket_rows,
+                prev_decaying_average_ms = b.first_prev_decaying_average_ms,
+                prev_sample_count = b.first_prev_sample_count,
+                prev_meets_target = b.first_prev_meets_target,
+                prev_updated_dt = b.first_prev_updated_dt
+            FROM buckets AS b
+            WHERE h.history_id = b.history_id
+              AND b.rn_last = 1
+              AND b.bucket_size > 1
+            RETURNING h.history_id
+        ),
+        removed AS (
+            DELETE FROM ngram_speed_summary_hist AS h
+            USING buckets AS b
+            WHERE h.history_id = b.history_id
+              AND b.rn_last > 1
+            RETURNING h.history_id
+        )
+        SELECT
+            (SELECT COUNT(*) FROM kept) AS buckets_written,
+            (SELECT COUNT(*) FROM removed) AS rows_removed
+        """
+
+
+def _windowed_speed_summary_cte(*, upto_filter: bool) -> str:
+    """Return a CTE computing speed summary rows for every session of one user/keyboard.
+
+    One window pass over session_ngram_summary: the decaying average of each row
+    is built from LAG(0..19) over the n-gram's sessions in time order (weight
+    1/k for the k-th most recent), and sample_count is the running instance
+    count. Parameters: (user_id, keyboard_id) then, with ``upto_filter``, the
+    latest session_dt to include.
+    """
+    lags = [f"LAG(sns.avg_ms_per_keystroke, {j}) OVER w" for j in range(SPEED_STATE_WINDOW)]
+    numerator = " + ".join(f"COALESCE({lag} / {j + 1}.0, 0)" for j, lag in enumerate(lags))
+    denominator = " + ".join(
+        f"(CASE WHEN {lag} IS NULL THEN 0 ELSE 1.0 / {j + 1} END)" for j, lag in enumerate(lags)
+    )
+    upto = "AND sns.session_dt <= ?" if upto_filter else ""
+    return f"""
+        WITH windowed AS (
+            SELECT
+                sns.session_id,
+                sns.ngram_text,
+                sns.ngram_size,
+                sns.session_dt,
+                ({numerator}) / ({denominator}) AS decaying_average_ms,
+                SUM(sns.instance_count) OVER (w ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)
+                    AS sample_count
+            FROM session_ngram_summary AS sns
+            WHERE sns.user_id = ? AND sns.keyboard_id = ? {upto}
+            WINDOW w AS (
+                PARTITION BY sns.ngram_text, sns.ngram_size
+                ORDER BY sns.session_dt, sns.session_id
+            )
+        )
+        """
+
+
+def _key_charset(keys: Iterable[str]) -> List[str]:
+    """Return the allowed keys as a sorted, de-duplicated character list.
+
+    Entries that are not a single non-whitespace character are dropped. The
+    result is bound as ``?::text[]`` and compared with the generated
+    ``ngram_charset`` columns: ``ngram_charset <@ ?::text[]`` holds when every
+    character of the n-gram is an allowed key.
+    """
+    return sorted({ch for ch in keys if ch and len(ch) == 1 and not ch.isspace()})
+
 
 class DecayingAverageCalculator:
     """Calculator for decaying average with exponential weighting.
@@ -118,27 +504,32 @@ class DecayingAverageCalculator:
         return weighted_sum / weight_sum if weight_sum > 0 else 0.0
 
 
-class _HistRow(TypedDict):
-    """Typed row for historical speed summary records from `ngram_speed_summary_hist`."""
+class _HistRow(NamedTuple):
+    """Typed NAMEDTUPLE row (SELECT order) for speed summary records.
+
+    Used for `ngram_speed_summary_hist` history.
+    """
 
     ngram_text: str
     ngram_size: int
     decaying_average_ms: float
     sample_count: int
     updated_dt: str
+    resolution: str
 
 
-class _CurrRow(TypedDict):
-    """Typed row for current speed summary records from `ngram_speed_summary_curr`."""
+class _SpeedSummaryUpdate(NamedTuple):
+    """What one session's speed summary update wrote.
 
-    ngram_text: str
-    ngram_size: int
-    decaying_average_ms: float
-    target_speed_ms: float
-    target_performance_pct: float
-    meets_target: Union[int, bool]
-    sample_count: int
-    updated_dt: Union[str, datetime]
+    ``curr_rows`` are the upserted ngram_speed_summary_curr rows from
+    ``session_id`` on (the columns ``NGramSummaryCache.patch`` takes), and
+    ``cache_key`` the user/keyboard whose cached summary they change.
+    """
+
+    curr_updated: int
+    hist_inserted: int
+    curr_rows: List[Tuple[object, ...]]
+    cache_key: Optional[Tuple[str, str]]
 
 
 class _TrendRow(TypedDict):
@@ -189,6 +580,7 @@ class NGramHistoricalData(BaseModel):
     measurement_date: datetime
     decaying_average_ms: float = Field(..., ge=0.0)
     sample_count: int = Field(..., ge=0)
+    resolution: str = Field(default="session", pattern="^(session|day|week)$")
 
     model_config = {"extra": "forbid"}
 
@@ -230,6 +622,67 @@ class NGramSessionComparisonData(BaseModel):
     model_config = {"extra": "forbid"}
 
 
+@dataclass
+class SummarizeStats:
+    """Work done by the last session summarization run.
+
+    Attributes:
+        sessions: Sessions summarized (and recorded in session_summary_ledger).
+        summary_rows: Rows inserted into session_ngram_summary.
+        speed_rows_scanned: session_ngram_speed rows read.
+        error_rows_scanned: session_ngram_errors rows read.
+        elapsed_ms: Wall time of the run.
+    """
+
+    sessions: int = 0
+    summary_rows: int = 0
+    speed_rows_scanned: int = 0
+    error_rows_scanned: int = 0
+    elapsed_ms: float = 0.0
+
+
+@dataclass(frozen=True)
+class HistRetentionPolicy:
+    """How much of ngram_speed_summary_hist ``compact_speed_hist`` keeps at full resolution.
+
+    Attributes:
+        keep_sessions: Newest sessions per user/keyboard whose history rows are
+            never compacted (at least 1, so the latest session comparison is exact).
+        weekly_after_days: History older than this many days is kept as one row
+            per n-gram per week instead of per day (None: daily only; 0: weekly only).
+    """
+
+    keep_sessions: int = 200
+    weekly_after_days: Optional[int] = 90
+
+    def __post_init__(self) -> None:
+        """Validate the policy."""
+        if self.keep_sessions < 1:
+            raise ValueError("keep_sessions must be at least 1")
+        if self.weekly_after_days is not None and self.weekly_after_days < 0:
+            raise ValueError("weekly_after_days must not be negative")
+
+    @classmethod
+    def from_env(cls) -> "HistRetentionPolicy":
+        """Build the policy from ``AITT_HIST_KEEP_SESSIONS`` and ``AITT_HIST_WEEKLY_AFTER_DAYS``.
+
+        Unset variables keep the defaults; ``AITT_HIST_WEEKLY_AFTER_DAYS=none``
+        disables weekly buckets.
+        """
+        keep = os.environ.get(HIST_KEEP_SESSIONS_ENV)
+        weekly = os.environ.get(HIST_WEEKLY_AFTER_DAYS_ENV)
+        if weekly is None:
+            weekly_after_days = cls.weekly_after_days
+        elif weekly.strip().lower() == "none":
+            weekly_after_days = None
+        else:
+            weekly_after_days = int(weekly)
+        return cls(
+            keep_sessions=int(keep) if keep else cls.keep_sessions,
+            weekly_after_days=weekly_after_days,
+        )
+
+
 @dataclass
 class NGramStats:
     """Data class to hold n-gram statistics for compatibility."""
@@ -262,6 +715,10 @@ class NGramAnalyticsService:
         # Backward-compatibility alias expected by some tests
         self.decaying_average_calculator = self.calculator
         self.debug_util = DebugUtil()
+        # Metrics from the most recent summarize_session_ngrams* call
+        self.last_summarize_stats = SummarizeStats()
+        # Current summaries per (user, keyboard), shared by every service on this database
+        self.summary_cache = summary_cache_for(db) if db is not None else NGramSummaryCache(max_entries=0)
         return
 
     def process_end_of_session(
@@ -269,23 +726,26 @@ class NGramAnalyticsService:
         session: "Session",
         keystrokes_input: "KeystrokeCollection",
         save_session_first: bool = True,
-    ) -> Dict[str, Union[int, bool, str]]:
+    ) -> Dict[str, Union[int, float, bool, str]]:
         """Orchestrate end-of-session persistence and analytics in strict order.
 
         Steps:
         1) Save session
         2) Save keystrokes
         3) Generate and persist n-grams
-        4) Summarize session n-grams (populate session_ngram_summary)
+        4) Summarize this session's n-grams (populate session_ngram_summary)
         5) Update speed summaries for the specific session (curr and hist)
 
+        All steps run inside a single ``db.transaction()`` so the session is
+        committed once; any failure rolls back every step.
+
         Args:
             session: Session model instance with populated fields
             keystrokes_input: KeystrokeCollection instance containing keystrokes to persist
             save_session_first: If True, call SessionManager.save_session before downstream steps
 
         Returns:
-            Dict summary with counts and success flags
+            Dict summary with counts, success flags, and commit latency (commit_ms)
 
         Raises:
             Exception: If any step fails, the exception is propagated
@@ -302,56 +762,74 @@ class NGramAnalyticsService:
         if not isinstance(keystrokes_input, KeystrokeCollection):
             raise TypeError("keystrokes_input must be an instance of KeystrokeCollection")
 
-        results: Dict[str, Union[int, bool, str]] = {
+        results: Dict[str, Union[int, float, bool, str]] = {
             "session_saved": False,
             "keystrokes_saved_raw": 0,
             "keystrokes_saved_net": 0,
             "ngrams_saved": False,
             "session_summary_rows": 0,
+            "summary_rows_scanned": 0,
             "curr_updated": 0,
             "hist_inserted": 0,
             "ngram_count": 0,
+            "commit_ms": 0.0,
         }
 
-        # 1) Save session (optional if caller already did)
-        if save_session_first:
-            sm = SessionManager(self.db)
-            if not sm.save_session(session):
-                raise RuntimeError("SessionManager.save_session returned False")
-            results["session_saved"] = True
-        else:
-            results["session_saved"] = True
-
-        # 2) Save keystrokes using KeystrokeCollection
-        km = KeystrokeManager(db_manager=self.db)
-        km.keystrokes = keystrokes_input
-        if not km.save_keystrokes():
-            raise RuntimeError("KeystrokeManager.save_keystrokes returned False")
-        results["keystrokes_saved_raw"] = km.keystrokes.get_raw_count()
-        results["keystrokes_saved_net"] = km.keystrokes.get_net_count()
-
-        # 3) Generate and persist n-grams
-        if self.ngram_manager is None:
-            raise ValueError("NGramManager is required for orchestration")
-        speed_cnt, error_cnt = self.ngram_manager.generate_ngrams_from_keystrokes(
-            session_id=session.session_id,
-            expected_text=session.content,
-            keystrokes=keystrokes_input,
-        )
+        # The cached summary is patched with this session's rows once they commit
+        cache_key = (str(session.user_id), str(session.keyboard_id))
+        cached, cache_version = self.summary_cache.peek(cache_key)
+
+        # All steps run as one unit of work: a single commit, or nothing on failure
+        with self.db.transaction() as tx:
+            # 1) Save session (optional if caller already did)
+            if save_session_first:
+                sm = SessionManager(self.db)
+                if not sm.save_session(session):
+                    raise RuntimeError("SessionManager.save_session returned False")
+                results["session_saved"] = True
+            else:
+                results["session_saved"] = True
+
+            # 2) Save keystrokes using KeystrokeCollection
+            km = KeystrokeManager(db_manager=self.db)
+            km.keystrokes = keystrokes_input
+            if not km.save_keystrokes():
+                raise RuntimeError("KeystrokeManager.save_keystrokes returned False")
+            results["keystrokes_saved_raw"] = km.keystrokes.get_raw_count()
+            results["keystrokes_saved_net"] = km.keystrokes.get_net_count()
+
+            # 3) Generate and persist n-grams
+            if self.ngram_manager is None:
+                raise ValueError("NGramManager is required for orchestration")
+            speed_cnt, error_cnt = self.ngram_manager.generate_ngrams_from_keystrokes(
+                session_id=session.session_id,
+                expected_text=session.content,
+                keystrokes=keystrokes_input,
+            )
 
-        results["ngrams_saved"] = True
-        results["ngram_count"] = int(speed_cnt) + int(error_cnt)
+            results["ngrams_saved"] = True
+            results["ngram_count"] = int(speed_cnt) + int(error_cnt)
 
-        # 4) Summarize session n-grams (populate session_ngram_summary)
-        inserted = self.summarize_session_ngrams()
+            # 4) Summarize this session's n-grams (populate session_ngram_summary)
+            inserted = self.summarize_session_ngrams_for_session_id(str(session.session_id))
 
-        results["session_summary_rows"] = int(inserted)
+            results["session_summary_rows"] = int(inserted)
+            results["summary_rows_scanned"] = (
+                self.last_summarize_stats.speed_rows_scanned
+                + self.last_summarize_stats.error_rows_scanned
+            )
 
-        # 5) Update speed summaries for the specific session
-        summary_res = self.add_speed_summary_for_session(session_id=str(session.session_id))
-        results["curr_updated"] = int(summary_res.get("curr_updated", 0))
-        results["hist_inserted"] = int(summary_res.get("hist_inserted", 0))
+            # 5) Update speed summaries for the specific session
+            update = self._update_speed_summary(session_id=str(session.session_id))
+            results["curr_updated"] = update.curr_updated
+            results["hist_inserted"] = update.hist_inserted
 
+        # Inside a caller's transaction the rows are not committed yet: just drop the entry
+        if cached is not None and tx.depth == 1:
+            self.summary_cache.patch(cache_key, cached, update.curr_rows, version=cache_version)
+        else:
+            self.summary_cache.invalidate(cache_key)
+        results["commit_ms"] = float(tx.commit_ms or 0.0)
         return results
 
     def refresh_speed_summaries(self, user_id: str, keyboard_id: str) -> int:
@@ -391,7 +869,9 @@ class NGramAnalyticsService:
             ngram_text: Optional filter for specific n-gram text
 
         Returns:
-            List of NGramHistoricalData objects sorted by measurement date
+            List of NGramHistoricalData objects sorted by measurement date.
+            Rows folded by ``compact_speed_hist`` have ``resolution`` "day" or
+            "week" and carry the state at the end of their bucket.
         """
         if not self.db:
             logger.warning("No database connection for history retrieval")
@@ -402,13 +882,12 @@ class NGramAnalyticsService:
             if ngram_text:
                 query = """
                     SELECT 
-                        user_id,
-                        keyboard_id,
                         ngram_text,
                         ngram_size,
                         decaying_average_ms,
                         sample_count,
-                        updated_dt
+                        updated_dt,
+                        resolution
                     FROM ngram_speed_summary_hist 
                     WHERE user_id = ? AND keyboard_id = ? AND ngram_text = ?
                     ORDER BY updated_dt DESC
@@ -417,36 +896,38 @@ class NGramAnalyticsService:
             else:
                 query = """
                     SELECT 
-                        user_id,
-                        keyboard_id,
                         ngram_text,
                         ngram_size,
                         decaying_average_ms,
                         sample_count,
-                        updated_dt
+                        updated_dt,
+                        resolution
                     FROM ngram_speed_summary_hist 
                     WHERE user_id = ? AND keyboard_id = ?
                     ORDER BY updated_dt DESC
                 """
                 params = (user_id, keyboard_id)
 
-            results = self.db.fetchall(query=query, params=params)
-            # Convert results to NGramHistoricalData objects
+            # Stream the history rows (server-side cursor) as namedtuples into NGramHistoricalData
             history_data: List[NGramHistoricalData] = []
-            for row in results:
-                r: _HistRow = cast(_HistRow, row)
-                parsed_dt = self._parse_datetime(r["updated_dt"])
+            rows = self.db.iter_rows(
+                query=query, params=params, batch_size=5000, row_format=RowFormat.NAMEDTUPLE
+            )
+            for row in rows:
+                r = cast(_HistRow, row)
+                parsed_dt = self._parse_datetime(r.updated_dt)
                 if parsed_dt is None:
                     # Skip records with invalid dates
                     continue
 
                 history_data.append(
                     NGramHistoricalData(
-                        ngram_text=str(r["ngram_text"]),
-                        ngram_size=int(r["ngram_size"]),
-                        decaying_average_ms=float(r["decaying_average_ms"]),
-                        sample_count=int(r["sample_count"]),
+                        ngram_text=r.ngram_text,
+                        ngram_size=r.ngram_size,
+                        decaying_average_ms=r.decaying_average_ms,
+                        sample_count=r.sample_count,
                         measurement_date=parsed_dt,
+                        resolution=r.resolution,
                     )
                 )
 
@@ -459,6 +940,30 @@ class NGramAnalyticsService:
             logger.error(f"Failed to retrieve n-gram history: {e}")
             return []
 
+    def _summary_columns(self, *, user_id: str, keyboard_id: str) -> SummaryColumns:
+        """Return the current summary of a user and keyboard, loading it on a cache miss."""
+        assert self.db is not None
+        key = (user_id, keyboard_id)
+        cached = self.summary_cache.get(key)
+        if cached is not None:
+            return cached
+        version = self.summary_cache.version()
+        rows = self.db.fetchall(
+            query=(
+                f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM ngram_speed_summary_curr "
+                "WHERE user_id = ? AND keyboard_id = ?"
+            ),
+            params=(user_id, keyboard_id),
+            row_format=RowFormat.TUPLE,
+        )
+        columns = SummaryColumns(rows)
+        self.summary_cache.put(key, columns, version=version)
+        return columns
+
+    def summary_cache_stats(self) -> SummaryCacheStats:
+        """Return hit/miss/eviction counters of the shared current-summary cache."""
+        return self.summary_cache.stats()
+
     def get_speed_heatmap_data(
         self,
         user_id: str,
@@ -485,71 +990,44 @@ class NGramAnalyticsService:
             return []
 
         try:
-            # Build query with filters
-            conditions = ["user_id = ?", "keyboard_id = ?"]
-            params: List[Union[str, int]] = [user_id, keyboard_id]
-
-            if ngram_size_filter:
-                conditions.append("ngram_size = ?")
-                params.append(ngram_size_filter)
-
-            if exclude_successful:
-                conditions.append("meets_target = 0")
-
-            where_clause = " AND ".join(conditions)
-
-            # Sort order
-            sort_clause = (
-                "decaying_average_ms DESC"
-                if sort_order == "worst_to_best"
-                else "decaying_average_ms desc"
+            # Filtered and sorted in memory from the cached current summary;
+            # both sort orders list the slowest n-grams first
+            columns = self._summary_columns(user_id=user_id, keyboard_id=keyboard_id)
+            positions = columns.select(
+                sizes=[ngram_size_filter] if ngram_size_filter else None,
+                missed_only=exclude_successful,
             )
 
-            query = f"""
-                SELECT 
-                    ngram_text,
-                    ngram_size,
-                    decaying_average_ms,
-                    target_speed_ms,
-                    target_performance_pct,
-                    meets_target,
-                    sample_count,
-                    updated_dt
-                FROM ngram_speed_summary_curr
-                WHERE {where_clause}
-                ORDER BY {sort_clause}
-            """
-
-            results = self.db.fetchall(query=query, params=tuple(params))
-
             heatmap_data: List[NGramHeatmapData] = []
-            for row in results:
-                r: _CurrRow = cast(_CurrRow, row)
+            for i in columns.slowest_first(positions):
                 # Calculate WPM (assuming 5 chars per word)
-                avg_ms = float(r["decaying_average_ms"])
+                avg_ms = columns.decaying_average_ms[i]
                 wpm = (60000 / avg_ms) / 5 if avg_ms > 0 else 0
+                pct = columns.target_performance_pct[i]
 
                 # Determine color category and code
-                if bool(r["meets_target"]):
+                if columns.meets_target[i]:
                     category = "green"
                     color_code = "#90EE90"  # Light green
-                elif r["target_performance_pct"] >= 75.0:
+                elif pct >= 75.0:
                     category = "amber"
                     color_code = "#FFD700"  # Light amber
                 else:
                     category = "grey"
                     color_code = "#D3D3D3"  # Light grey
 
-                if r["ngram_text"]:
+                if columns.ngram_text[i]:
                     heatmap_data.append(
                         NGramHeatmapData(
-                            ngram_text=r["ngram_text"],
-                            ngram_size=r["ngram_size"],
-                            decaying_average_ms=r["decaying_average_ms"],
+                            ngram_text=columns.ngram_text[i],
+                            ngram_size=columns.ngram_size[i],
+                            decaying_average_ms=avg_ms,
                             decaying_average_wpm=wpm,
-                            target_performance_pct=r["target_performance_pct"],
-                            sample_count=r["sample_count"],
-                            last_measured=self._parse_datetime(r["updated_dt"]),
+                            target_performance_pct=pct,
+                            sample_count=columns.sample_count[i],
+                            last_measured=self._parse_datetime(
+                                cast(Union[str, datetime, None], columns.updated_dt[i])
+                            ),
                             performance_category=category,
                             color_code=color_code,
                         )
@@ -619,102 +1097,81 @@ class NGramAnalyticsService:
             return []
 
         try:
-            # Construct regex pattern for keys filter
-            keys_pattern = f"^[{keys}]+$"
-
+            # The session's own history rows carry the previous values; the
+            # prev_updated_dt check skips rows linked to a same-session duplicate
             query = """
                 WITH last_session AS (
                     SELECT
                         session_id,
+                        user_id,
                         keyboard_id
                     FROM practice_sessions
                     WHERE keyboard_id = ?
                     ORDER BY start_time DESC
                     LIMIT 1
-                ),
-                recent_performance AS (
-                    SELECT
-                        nssc.updated_dt,
-                        nssc.keyboard_id,
-                        nssc.ngram_text,
-                        nssc.decaying_average_ms,
-                        nssc.sample_count
-                    FROM ngram_speed_summary_curr AS nssc
-                    INNER JOIN last_session AS ls
-                        ON nssc.keyboard_id = ls.keyboard_id
-                        and ls.session_id = nssc.session_id
-                    WHERE
-                        nssc.ngram_text ~ ?
-                        AND nssc.sample_count >= ?
-                ),
-                prev_ranked AS (
-                    SELECT
-                        rp.ngram_text,
-                        rp.decaying_average_ms AS latest_perf,
-                        rp.sample_count       AS latest_count,
-                        rp.updated_dt       AS latest_updated_dt,
-                        nssh.decaying_average_ms AS prev_perf,
-                        nssh.sample_count        AS prev_count,
-                        nssh.updated_dt          AS prev_updated_dt,
-                        ROW_NUMBER() OVER (
-                            PARTITION BY rp.keyboard_id, rp.ngram_text
-                            ORDER BY nssh.updated_dt DESC
-                        ) AS rn
-                    FROM recent_performance AS rp
-                    LEFT JOIN ngram_speed_summary_hist AS nssh
-                        ON nssh.keyboard_id = rp.keyboard_id
-                       AND nssh.ngram_text  = rp.ngram_text
-                       AND nssh.updated_dt  < rp.updated_dt
                 )
                 SELECT
-                    ngram_text,
-                    latest_perf,
-                    latest_count,
-                    latest_updated_dt,
-                    prev_perf,
-                    prev_count,
-                    prev_updated_dt,
-                    prev_perf - latest_perf as delta_perf,
-                    latest_count - prev_count as delta_count
-                FROM prev_ranked
-                WHERE rn = 1
-                ORDER BY prev_perf - latest_perf DESC
+                    ls.session_id,
+                    ls.user_id,
+                    nssh.ngram_text,
+                    nssh.ngram_size,
+                    nssh.prev_decaying_average_ms,
+                    nssh.prev_sample_count,
+                    nssh.prev_updated_dt
+                FROM last_session AS ls
+                LEFT JOIN ngram_speed_summary_hist AS nssh
+                    ON nssh.session_id = ls.session_id
+                   AND nssh.user_id = ls.user_id
+                   AND nssh.keyboard_id = ls.keyboard_id
+                   AND (nssh.prev_updated_dt IS NULL OR nssh.prev_updated_dt < nssh.updated_dt)
             """
+            rows = self.db.fetchall(query=query, params=(keyboard_id,), row_format=RowFormat.TUPLE)
+            if not rows:
+                return []
 
-            params = (keyboard_id, keys_pattern, occurrences)
-            results = self.db.fetchall(query=query, params=params)
+            session_id, user_id = str(rows[0][0]), str(rows[0][1])
+            previous: Dict[Tuple[str, int], Tuple[object, object, object]] = {
+                (str(r[2]), int(str(r[3]))): (r[4], r[5], r[6]) for r in rows if r[2] is not None
+            }
+
+            # The latest values come from the cached current summary
+            columns = self._summary_columns(user_id=user_id, keyboard_id=keyboard_id)
+            positions = columns.select(
+                session_id=session_id,
+                min_sample_count=occurrences,
+                allowed_keys=_key_charset(keys),
+            )
 
-            # Convert results to NGramSessionComparisonData objects
             comparisons = []
-            for row in results:
-                # Cast row values to proper types
-                ngram_text_val = row["ngram_text"]
-                latest_perf_val = row["latest_perf"]
-                latest_count_val = row["latest_count"]
-                latest_updated_dt_val = row["latest_updated_dt"]
-                prev_perf_val = row["prev_perf"]
-                prev_count_val = row["prev_count"]
-                prev_updated_dt_val = row["prev_updated_dt"]
-                delta_perf_val = row["delta_perf"]
-                delta_count_val = row["delta_count"]
+            for i in positions:
+                latest_perf = columns.decaying_average_ms[i]
+                latest_count = columns.sample_count[i]
+                prev_perf_val, prev_count_val, prev_updated_dt_val = previous.get(
+                    (columns.ngram_text[i], columns.ngram_size[i]), (None, None, None)
+                )
+                prev_perf = float(str(prev_perf_val)) if prev_perf_val is not None else None
+                prev_count = int(str(prev_count_val)) if prev_count_val is not None else None
 
                 comparison = NGramSessionComparisonData(
-                    ngram_text=str(ngram_text_val),
-                    latest_perf=float(str(latest_perf_val)),
-                    latest_count=int(str(latest_count_val)),
+                    ngram_text=columns.ngram_text[i],
+                    latest_perf=latest_perf,
+                    latest_count=latest_count,
                     latest_updated_dt=self._parse_datetime(
-                        str(latest_updated_dt_val) if latest_updated_dt_val is not None else None
+                        str(columns.updated_dt[i]) if columns.updated_dt[i] is not None else None
                     ),
-                    prev_perf=float(str(prev_perf_val)) if prev_perf_val is not None else None,
-                    prev_count=int(str(prev_count_val)) if prev_count_val is not None else None,
+                    prev_perf=prev_perf,
+                    prev_count=prev_count,
                     prev_updated_dt=self._parse_datetime(
                         str(prev_updated_dt_val) if prev_updated_dt_val is not None else None
                     ),
-                    delta_perf=float(str(delta_perf_val)) if delta_perf_val is not None else None,
-                    delta_count=int(str(delta_count_val)) if delta_count_val is not None else None,
+                    delta_perf=prev_perf - latest_perf if prev_perf is not None else None,
+                    delta_count=latest_count - prev_count if prev_count is not None else None,
                 )
                 comparisons.append(comparison)
 
+            # Same order as ORDER BY delta_perf DESC in PostgreSQL: NULLs first
+            comparisons.sort(key=lambda c: (c.delta_perf is not None, -(c.delta_perf or 0.0)))
+
             logger.info(
                 f"Retrieved session comparison for {len(comparisons)} n-grams "
                 f"with keys '{keys}' and min occurrences {occurrences}"
@@ -739,14 +1196,14 @@ class NGramAnalyticsService:
     ) -> List[NGramStats]:
         """Return the n slowest n-grams using current summary table.
 
-        Source table: `ngram_speed_summary_curr`.
+        Source: `ngram_speed_summary_curr` of the user and keyboard, read
+        through the shared summary cache.
 
-        SQL-side filters:
-        - user_id = ?, keyboard_id = ?
+        Filters:
         - sample_count >= min_occurrences
-        - optional size filter: ngram_size IN (...)
+        - optional size filter: ngram_size in ngram_sizes
         - optional meets_target filter: meets_target = 0 when focus_on_speed_target
-        - optional included_keys whitelist using nested REPLACE to strip allowed chars
+        - optional included_keys whitelist: every character of the n-gram is an allowed key
 
         Results are ordered by decaying_average_ms DESC (slowest first) and limited to n.
         """
@@ -758,74 +1215,25 @@ class NGramAnalyticsService:
             if n <= 0:
                 return []
 
-            where_clauses: List[str] = [
-                "user_id = ?",
-                "keyboard_id = ?",
-                "sample_count >= ?",
-            ]
-            params: List[object] = [user_id, keyboard_id, int(min_occurrences)]
-
-            # Optional sizes
-            if ngram_sizes:
-                size_placeholders = ",".join(["?"] * len(ngram_sizes))
-                where_clauses.append(f"ngram_size IN ({size_placeholders})")
-                params.extend(int(s) for s in ngram_sizes)
-
-            # Optional target filter
-            if focus_on_speed_target:
-                where_clauses.append("CAST(meets_target AS INTEGER) = 0")
-
-            # Optional included keys whitelist via nested REPLACE
-            if included_keys:
-                # Deduplicate and sanitize: keep 1-char, non-whitespace, preserve order
-                unique_keys: List[str] = []
-                for ch in included_keys:
-                    if not ch or len(ch) != 1 or ch.isspace():
-                        continue
-                    if ch not in unique_keys:
-                        unique_keys.append(ch)
-
-                if unique_keys:
-                    replace_expr = "ngram_text"
-                    for ch in unique_keys:
-                        replace_expr = f"REPLACE({replace_expr}, ?, '')"
-                        params.append(ch)
-                    where_clauses.append(f"LENGTH({replace_expr}) = 0")
-
-            where_sql = " AND ".join(where_clauses)
-            query = (
-                "SELECT ngram_text, ngram_size, decaying_average_ms, sample_count, updated_dt "
-                "FROM ngram_speed_summary_curr "
-                f"WHERE {where_sql} "
-                "ORDER BY decaying_average_ms DESC "
-                "LIMIT ?"
+            columns = self._summary_columns(user_id=user_id, keyboard_id=keyboard_id)
+            positions = columns.select(
+                min_sample_count=int(min_occurrences),
+                sizes=[int(s) for s in ngram_sizes] if ngram_sizes else None,
+                missed_only=focus_on_speed_target,
+                allowed_keys=_key_charset(included_keys or []) or None,
             )
-            params.append(int(n))
-
-            rows = self.db.fetchall(query=query, params=tuple(params))
 
             results: List[NGramStats] = []
-            for r in rows:
-                ngram_text_val = r["ngram_text"]
-                ngram_size_raw = r["ngram_size"]
-                dec_ms_raw = r["decaying_average_ms"]
-                samples_raw = r["sample_count"]
-                updated_raw = r["updated_dt"] if "updated_dt" in r.keys() else None
-
-                ngram_text = str(ngram_text_val)
-                ngram_size_val = int(ngram_size_raw) if ngram_size_raw is not None else 0
-                dec_ms = float(dec_ms_raw) if dec_ms_raw is not None else 0.0
-                samples = int(samples_raw) if samples_raw is not None else 0
-                updated_dt = self._parse_datetime(updated_raw) if updated_raw is not None else None
-
+            for i in columns.slowest_first(positions)[: int(n)]:
+                avg_ms = columns.decaying_average_ms[i]
                 results.append(
                     NGramStats(
-                        ngram=ngram_text,
-                        ngram_size=ngram_size_val,
-                        avg_speed=dec_ms,
-                        total_occurrences=samples,
-                        ngram_score=dec_ms,
-                        last_used=updated_dt,
+                        ngram=columns.ngram_text[i],
+                        ngram_size=columns.ngram_size[i],
+                        avg_speed=avg_ms,
+                        total_occurrences=columns.sample_count[i],
+                        ngram_score=avg_ms,
+                        last_used=self._parse_datetime(cast(Union[str, datetime, None], columns.updated_dt[i])),
                     )
                 )
 
@@ -856,7 +1264,8 @@ class NGramAnalyticsService:
             ngram_sizes: List of n-gram sizes to include (default is 2-20)
             lookback_distance: Number of most recent sessions to consider
             included_keys: List of characters to filter n-grams by (only n-grams
-                         containing exclusively these characters will be returned)
+                         containing exclusively these characters will be returned);
+                         applied in SQL before the limit as ``ngram_charset <@ keys``
 
         Returns:
             List of NGramStats objects sorted by error count (highest first)
@@ -868,6 +1277,8 @@ class NGramAnalyticsService:
         try:
             size_list: List[int] = ngram_sizes if ngram_sizes else list(range(2, 21))
             size_placeholders = ",".join(["?"] * len(size_list)) if size_list else "?"
+            allowed_keys = _key_charset(included_keys or [])
+            charset_filter = "  AND e.ngram_charset <@ ?::text[]\n" if allowed_keys else ""
 
             session_filter_cte = (
                 "WITH recent_sessions AS (\n"
@@ -890,20 +1301,22 @@ class NGramAnalyticsService:
                 + "JOIN recent_sessions rs ON rs.session_id = e.session_id\n"
                 + "JOIN practice_sessions ps ON ps.session_id = e.session_id\n"
                 + f"WHERE e.ngram_size IN ({size_placeholders})\n"
+                + charset_filter
                 + "GROUP BY e.ngram_text, e.ngram_size\n"
                 + "HAVING COUNT(1) > 0\n"
                 + "ORDER BY error_count DESC\n"
                 + "LIMIT ?\n"
             )
 
-            params: List[Union[str, int]] = [user_id, keyboard_id, int(lookback_distance)]
+            params: List[Union[str, int, List[str]]] = [user_id, keyboard_id, int(lookback_distance)]
             params.extend(size_list)
+            if allowed_keys:
+                params.append(allowed_keys)
             params.append(int(max(1, n)))
 
             rows = self.db.fetchall(query=query, params=tuple(params))
 
             results: List[NGramStats] = []
-            included_set = set(included_keys) if included_keys else None
             for row in rows:
                 ngram_text_raw = row.get("ngram_text")
                 ngram_size_raw = row.get("ngram_size", 0)
@@ -917,10 +1330,6 @@ class NGramAnalyticsService:
                     str(last_used_raw) if last_used_raw is not None else None
                 )
 
-                if included_set is not None and ngram_text:
-                    if not set(ngram_text).issubset(included_set):
-                        continue
-
                 results.append(
                     NGramStats(
                         ngram=ngram_text,
@@ -939,10 +1348,14 @@ class NGramAnalyticsService:
             return []
 
     def summarize_session_ngrams(self) -> int:
-        """Summarize session ngram performance for all sessions not yet in session_ngram_summary.
+        """Summarize session ngram performance for every session not yet summarized.
 
-        Uses complex CTEs to aggregate data from session_ngram_speed, session_ngram_errors,
-        and session_keystrokes tables, then inserts the results into session_ngram_summary.
+        Pending sessions are those without a row in session_summary_ledger, so
+        only new sessions' n-gram rows are read instead of anti-joining all of
+        session_ngram_speed and session_ngram_errors on every call. The first run
+        after the ledger is introduced processes every session once. A session is
+        only recorded once it has summary rows, so one whose n-grams are still
+        being persisted is summarized by a later call.
 
         Returns:
             Number of records inserted into session_ngram_summary
@@ -954,146 +1367,31 @@ class NGramAnalyticsService:
             if self.db is None:
                 logger.warning("summarize_session_ngrams called without database; returning 0")
                 return 0
-            # Insert summarized rows for sessions/ngrams that are not yet summarized
-            insert_sql = """
-                WITH speed AS (
-                SELECT
-                    ps.session_id,
-                    ps.user_id,
-                    ps.keyboard_id,
-                    s.ngram_text,
-                    s.ngram_size,
-                    AVG(
-                    CASE
-                        WHEN s.ms_per_keystroke > 0 THEN s.ms_per_keystroke
-                        ELSE NULL
-                    END
-                    ) AS avg_ms_per_keystroke,
-                    COUNT(1) AS instance_count,
-                    ps.start_time AS session_dt
-                FROM session_ngram_speed s
-                INNER JOIN practice_sessions ps
-                    ON ps.session_id = s.session_id
-                LEFT OUTER JOIN session_ngram_summary sns
-                    ON sns.session_id = s.session_id
-                    AND sns.ngram_text = s.ngram_text
-                    AND sns.ngram_size = s.ngram_size
-                WHERE sns.session_id IS NULL  -- i.e. this summary line does not exist yet
-                GROUP BY ps.session_id, ps.user_id, ps.keyboard_id, s.ngram_text, s.ngram_size
-                ),
-
-                errs AS (
-                SELECT
-                    e.session_id,
-                    e.ngram_text,
-                    e.ngram_size,
-                    COUNT(1) AS error_count
-                FROM session_ngram_errors e
-                LEFT OUTER JOIN session_ngram_summary sns
-                    ON sns.session_id = e.session_id
-                    AND sns.ngram_text = e.ngram_text
-                    AND sns.ngram_size = e.ngram_size
-                WHERE sns.session_id IS NULL  -- only bring back ones that are not in there already
-                GROUP BY e.session_id, e.ngram_text, e.ngram_size
-                ),
-
-                k AS (
-                SELECT
-                    keyboard_id,
-                    COALESCE(target_ms_per_keystroke, 600) AS target_speed_ms
-                FROM keyboards
-                ),
-
-                to_insert AS (
-                SELECT
-                    sp.session_id,
-                    sp.ngram_text,
-                    sp.user_id,
-                    sp.keyboard_id,
-                    sp.ngram_size,
-                    COALESCE(sp.avg_ms_per_keystroke, 0) AS avg_ms_per_keystroke,
-                    (
-                    COALESCE(sp.instance_count, 0) +
-                    COALESCE(er.error_count, 0)
-                    ) AS instance_count,
-                    COALESCE(er.error_count, 0) AS error_count,
-                    COALESCE(kk.target_speed_ms, 600) AS target_speed_ms,
-                    sp.session_dt
-                FROM speed sp
-                LEFT JOIN errs er
-                    ON er.session_id = sp.session_id
-                    AND er.ngram_text = sp.ngram_text
-                    AND er.ngram_size = sp.ngram_size
-                LEFT JOIN k kk
-                    ON kk.keyboard_id = sp.keyboard_id
-                )
-
-                INSERT INTO session_ngram_summary (
-                    session_id,
-                    ngram_text,
-                    user_id,
-                    keyboard_id,
-                    ngram_size,
-                    avg_ms_per_keystroke,
-                    target_speed_ms,
-                    instance_count,
-                    error_count,
-                    updated_dt,
-                    session_dt
+            pending = self.db.fetchall(
+                query="""
+                SELECT ps.session_id
+                FROM practice_sessions AS ps
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM session_summary_ledger AS l
+                    WHERE l.session_id = ps.session_id
                 )
-                SELECT
-                    session_id,
-                    ngram_text,
-                    user_id,
-                    keyboard_id,
-                    ngram_size,
-                    avg_ms_per_keystroke,
-                    target_speed_ms,
-                    instance_count,
-                    error_count,
-                    CURRENT_TIMESTAMP,
-                    session_dt
-                    FROM to_insert;
-            """
-
-            cursor = self.db.execute(query=insert_sql)
-            # Determine affected rows in a backend-safe way
-            # - Postgres: rely on cursor.rowcount
-            # - SQLite: prefer SELECT changes() when available; else fallback to rowcount
-            inserted_rows = 0
-            try:
-                if getattr(self.db, "is_postgres", False):
-                    # Some drivers may report -1 for rowcount on INSERT..SELECT before commit.
-                    rc = int(getattr(cursor, "rowcount", 0) or 0)
-                    inserted_rows = rc if rc >= 0 else 0
-                else:
-                    changes_row = self.db.fetchone(query="SELECT changes() AS cnt")
-                    if changes_row is not None:
-                        changes_dict = cast(Mapping[str, object], changes_row)
-                        cnt_value = changes_dict.get("cnt", 0)
-                        inserted_rows = int(str(cnt_value)) if cnt_value is not None else 0
-            except Exception:
-                try:
-                    rc = int(getattr(cursor, "rowcount", 0) or 0)
-                    inserted_rows = rc if rc >= 0 else 0
-                except Exception:
-                    inserted_rows = 0
+                """
+            )
+            stats = self._summarize_sessions(session_ids=[str(r["session_id"]) for r in pending])
+            inserted_rows = stats.summary_rows
 
             # After summarizing, update speed summaries only for the most recent session
             # to keep history count in sync with current for a single refresh.
             if inserted_rows > 0:
                 latest_row = self.db.fetchone(
-                    query="""
+                    query=f"""
                     SELECT ps.session_id
                     FROM practice_sessions ps
                     WHERE EXISTS (
                         SELECT 1 FROM session_ngram_summary sns
                         WHERE sns.session_id = ps.session_id
                     )
-                    AND NOT EXISTS (
-                        SELECT 1 FROM ngram_speed_summary_hist h
-                        WHERE h.session_id = ps.session_id
-                    )
+                    AND {_SPEED_SUMMARY_PENDING_SQL}
                     ORDER BY ps.start_time DESC
                     LIMIT 1
                     """
@@ -1102,7 +1400,9 @@ class NGramAnalyticsService:
                     sid = str(cast(Mapping[str, object], latest_row).get("session_id", ""))
                     if sid:
                         try:
-                            self.add_speed_summary_for_session(session_id=sid)
+                            # Savepoint keeps an enclosing unit of work usable on failure
+                            with self.db.transaction():
+                                self.add_speed_summary_for_session(session_id=sid)
                         except Exception:
                             # Continue; tests care about presence not strict atomicity
                             traceback.print_exc()
@@ -1119,7 +1419,9 @@ class NGramAnalyticsService:
         """Summarize session ngram performance for a specific session.
 
         Creates session_ngram_summary entries for the given session ID by aggregating
-        data from session_ngram_speed, session_ngram_errors, and keyboards tables.
+        data from session_ngram_speed, session_ngram_errors, and keyboards tables,
+        and records the session in session_summary_ledger. N-grams already
+        summarized for the session are skipped.
 
         Args:
             session_id: UUID string of the session to summarize
@@ -1150,125 +1452,7 @@ class NGramAnalyticsService:
                     "summarize_session_ngrams_for_session_id called without database; returning 0"
                 )
                 return 0
-
-            # Execute the query with session_id parameter
-            insert_sql = """
-                WITH speed AS (
-                SELECT                    
-                    ps.session_id,
-                    ps.user_id,
-                    ps.keyboard_id,
-                    s.ngram_text,
-                    s.ngram_size,
-                    AVG(
-                    CASE
-                        WHEN s.ms_per_keystroke > 0 THEN s.ms_per_keystroke
-                        ELSE NULL
-                    END
-                    ) AS avg_ms_per_keystroke,
-                    COUNT(1) AS instance_count,
-                    ps.start_time AS session_dt
-                FROM session_ngram_speed s
-                INNER JOIN practice_sessions ps
-                    ON ps.session_id = s.session_id
-                WHERE ps.session_id = ?
-                GROUP BY ps.session_id, ps.user_id, ps.keyboard_id, s.ngram_text, s.ngram_size),
-
-                errs AS (
-                SELECT
-                    e.session_id,
-                    e.ngram_text,
-                    e.ngram_size,
-                    COUNT(1) AS error_count
-                FROM session_ngram_errors e
-                WHERE e.session_id = ?
-                GROUP BY e.session_id, e.ngram_text, e.ngram_size
-                ),
-
-                k AS (
-                SELECT
-                    keyboard_id,
-                    COALESCE(target_ms_per_keystroke, 600) AS target_speed_ms
-                FROM keyboards
-                ),
-
-                to_insert AS (
-                SELECT
-                    sp.session_id,
-                    sp.ngram_text,
-                    sp.user_id,
-                    sp.keyboard_id,
-                    sp.ngram_size,
-                    COALESCE(sp.avg_ms_per_keystroke, 0) AS avg_ms_per_keystroke,
-                    (
-                    COALESCE(sp.instance_count, 0) +
-                    COALESCE(er.error_count, 0)
-                    ) AS instance_count,
-                    COALESCE(er.error_count, 0) AS error_count,
-                    COALESCE(kk.target_speed_ms, 600) AS target_speed_ms,
-                    sp.session_dt
-                FROM speed sp
-                LEFT JOIN errs er
-                    ON er.session_id = sp.session_id
-                    AND er.ngram_text = sp.ngram_text
-                    AND er.ngram_size = sp.ngram_size
-                LEFT JOIN k kk
-                    ON kk.keyboard_id = sp.keyboard_id
-                )
-
-                INSERT INTO session_ngram_summary (
-                    session_id,
-                    ngram_text,
-                    user_id,
-                    keyboard_id,
-                    ngram_size,
-                    avg_ms_per_keystroke,
-                    target_speed_ms,
-                    instance_count,
-                    error_count,
-                    updated_dt,
-                    session_dt
-                )
-                SELECT
-                    session_id,
-                    ngram_text,
-                    user_id,
-                    keyboard_id,
-                    ngram_size,
-                    avg_ms_per_keystroke,
-                    target_speed_ms,
-                    instance_count,
-                    error_count,
-                    CURRENT_TIMESTAMP,
-                    session_dt
-                    FROM to_insert;
-            """
-
-            cursor = self.db.execute(query=insert_sql, params=(session_id, session_id))
-
-            # Determine affected rows in a backend-safe way
-            # - Postgres: rely on cursor.rowcount
-            # - SQLite: prefer SELECT changes() when available; else fallback to rowcount
-            inserted_rows = 0
-            try:
-                if getattr(self.db, "is_postgres", False):
-                    # Some drivers may report -1 for rowcount on INSERT..SELECT before commit.
-                    rc = int(getattr(cursor, "rowcount", 0) or 0)
-                    inserted_rows = rc if rc >= 0 else 0
-                else:
-                    changes_row = self.db.fetchone(query="SELECT changes() AS cnt")
-                    if changes_row is not None:
-                        changes_dict = cast(Mapping[str, object], changes_row)
-                        cnt_value = changes_dict.get("cnt", 0)
-                        inserted_rows = int(str(cnt_value)) if cnt_value is not None else 0
-            except Exception:
-                try:
-                    rc = int(getattr(cursor, "rowcount", 0) or 0)
-                    inserted_rows = rc if rc >= 0 else 0
-                except Exception:
-                    inserted_rows = 0
-
-            return inserted_rows
+            return self._summarize_sessions(session_ids=[session_id]).summary_rows
         except Exception as e:
             traceback.print_exc()
             self.debug_util.debugMessage(
@@ -1277,11 +1461,49 @@ class NGramAnalyticsService:
             logger.error(f"Error in summarize_session_ngrams_for_session_id: {str(e)}")
             raise
 
+    def _summarize_sessions(self, *, session_ids: List[str]) -> SummarizeStats:
+        """Summarize the given sessions and record them in session_summary_ledger.
+
+        One statement inserts the session_ngram_summary rows and upserts one
+        ledger row per session that has summary rows, with the number inserted and the
+        session_ngram_speed / session_ngram_errors rows read. The result is also
+        kept in ``last_summarize_stats``.
+        """
+        assert self.db is not None
+        started = time.perf_counter()
+        stats = SummarizeStats()
+        if session_ids:
+            rows = self.db.fetchall(
+                query=_SUMMARIZE_SESSIONS_SQL, params=(session_ids, session_ids, session_ids)
+            )
+            for r in rows:
+                stats.sessions += 1
+                stats.summary_rows += int(str(r["summary_rows"]))
+                stats.speed_rows_scanned += int(str(r["speed_rows_scanned"]))
+                stats.error_rows_scanned += int(str(r["error_rows_scanned"]))
+        stats.elapsed_ms = (time.perf_counter() - started) * 1000.0
+        self.last_summarize_stats = stats
+        logger.debug(
+            "Summarized %d sessions: %d rows inserted, %d speed and %d error rows scanned",
+            stats.sessions,
+            stats.summary_rows,
+            stats.speed_rows_scanned,
+            stats.error_rows_scanned,
+        )
+        return stats
+
     def add_speed_summary_for_session(self, *, session_id: str) -> Dict[str, int]:
         """Update performance summary for a specific session using decaying average calculation.
 
-        Uses the last 20 sessions (including the given session) to calculate decaying averages
-        and updates both ngram_speed_summary_curr (merge) and ngram_speed_summary_hist (insert).
+        Uses the last 20 sessions (including the given session) of the same user and
+        keyboard to calculate decaying averages and updates both
+        ngram_speed_summary_curr (merge) and ngram_speed_summary_hist (insert).
+
+        The rolling inputs come from ``ngram_speed_state``: for each n-gram of the
+        session the stored state is advanced by one sample, so the cost depends on
+        the n-grams in this session rather than on the user's lifetime history.
+        N-grams without usable state (new, out of order, or with sessions that were
+        never folded in) are rebuilt from session_ngram_summary as of this session.
 
         Args:
             session_id: The session ID to process
@@ -1292,10 +1514,21 @@ class NGramAnalyticsService:
         Raises:
             DatabaseError: If the database operation fails
         """
+        update = self._update_speed_summary(session_id=session_id)
+        if update.cache_key is not None:
+            self.summary_cache.invalidate(update.cache_key)
+        return {"curr_updated": update.curr_updated, "hist_inserted": update.hist_inserted}
+
+    def _update_speed_summary(self, *, session_id: str) -> _SpeedSummaryUpdate:
+        """Write the speed summaries of ``session_id`` (see ``add_speed_summary_for_session``).
+
+        Leaves the summary cache alone: the caller patches or invalidates
+        the returned ``cache_key``.
+        """
         try:
             if self.db is None:
                 logger.warning("add_speed_summary_for_session: no DB; returning zeros")
-                return {"curr_updated": 0, "hist_inserted": 0}
+                return _SpeedSummaryUpdate(0, 0, [], None)
 
             # Determine user/keyboard for the session
             sess = self.db.fetchone(
@@ -1313,120 +1546,35 @@ class NGramAnalyticsService:
             user_id = str(cast(Mapping[str, object], sess)["user_id"])
             keyboard_id = str(cast(Mapping[str, object], sess)["keyboard_id"])
 
-            # Compute per-ngram rolling (up to 20) averages using session_ngram_summary
-            # Use a decaying average to weight newer rows higher
-
-            summary_cte = """
-                WITH vars AS (
-                    SELECT
-                        ?::text AS user_id,
-                        ?::text AS keyboard_id,
-                        ?::text AS session_id
-                ),
-                session_ngrams AS (
-                    SELECT DISTINCT
-                        sns.ngram_text,
-                        sns.ngram_size,
-                        sns.session_dt
-                    FROM session_ngram_summary AS sns
-                    INNER JOIN vars
-                        ON vars.session_id = sns.session_id
-                ),
-                total_instance_cnt AS (
-                    SELECT
-                        sns.ngram_text,
-                        sns.ngram_size,
-                        SUM(sns.instance_count) AS instances
-                    FROM 
-                        session_ngram_summary AS sns
-                        cross join vars 
-                    WHERE
-                        sns.session_dt <= (
-                            select start_time from practice_sessions 
-                            where session_id = vars.session_id
-                        )
-                    GROUP BY
-                        sns.ngram_text,
-                        sns.ngram_size
-                ),
-                keyboard_speed AS (
-                    SELECT
-                        COALESCE(k.target_ms_per_keystroke, 600) AS target_speed_ms
-                    FROM keyboards AS k
-                    INNER JOIN vars
-                        ON vars.keyboard_id = k.keyboard_id
-                    LIMIT 1
-                ),
-                in_scope_rows AS (
-                    SELECT
-                        sns.ngram_text,
-                        sns.ngram_size,
-                        ngr.session_dt,
-                        sns.avg_ms_per_keystroke,
-                        sns.instance_count,
-                        ROW_NUMBER() OVER (
-                            PARTITION BY sns.ngram_text, sns.ngram_size
-                            ORDER BY sns.session_dt DESC
-                        ) AS row_num
-                    FROM session_ngram_summary AS sns
-                        INNER JOIN session_ngrams AS ngr
-                            ON ngr.ngram_text = sns.ngram_text
-                        AND ngr.ngram_size = sns.ngram_size
-                            cross join vars 
-                    WHERE
-                        sns.session_dt <= 
-                        (select start_time 
-                        from practice_sessions 
-                        where session_id = vars.session_id)
-                ),
-                avg_calc AS (
-                    SELECT
-                        isr.ngram_text,
-                        isr.ngram_size,
-                        isr.session_dt,
-                        AVG(isr.avg_ms_per_keystroke) AS simple_avg_ms,
-                        SUM(isr.avg_ms_per_keystroke * (1 / row_num)) / 
-                        SUM(1 / row_num) AS decaying_average_ms
-                    FROM in_scope_rows AS isr
-                    WHERE isr.row_num <= 20
-                    GROUP BY
-                        isr.ngram_text,
-                        isr.ngram_size,
-                        isr.session_dt
-                )
-                SELECT
-                    v.user_id,
-                    v.keyboard_id,
-                    v.session_id,
-                    a.ngram_text,
-                    a.ngram_size,
-                    a.decaying_average_ms,
-                    k.target_speed_ms,
-                    CASE
-                        WHEN COALESCE(a.decaying_average_ms, 0) > 0
-                            THEN 100.0 * COALESCE(k.target_speed_ms, 600) / a.decaying_average_ms
-                        ELSE 0
-                    END AS target_performance_pct,
-                    CASE
-                        WHEN COALESCE(a.decaying_average_ms, 0) <= COALESCE(k.target_speed_ms, 600)
-                            THEN 1
-                        ELSE 0
-                    END AS meets_target,
-    COALESCE(tic.instances, 0) AS sample_count,
-                    CURRENT_TIMESTAMP AS updated_dt,
-                    a.session_dt
-                FROM avg_calc AS a
-                inner join Total_instance_cnt tic
-                    on a.ngram_text = tic.ngram_text
-                    and a.ngram_size = tic.ngram_size
-                CROSS JOIN vars AS v
-                CROSS JOIN keyboard_speed AS k;
-                """
-
-            rows = self.db.fetchall(query=summary_cte, params=(user_id, keyboard_id, session_id))
+            keyboard = self.db.fetchone(
+                query="""
+                SELECT COALESCE(target_ms_per_keystroke, ?) AS target_speed_ms
+                FROM keyboards
+                WHERE keyboard_id = ?
+                """,
+                params=(DEFAULT_TARGET_SPEED_MS, keyboard_id),
+            )
+            if not keyboard:
+                return _SpeedSummaryUpdate(0, 0, [], None)
+            target_speed_ms = float(str(cast(Mapping[str, object], keyboard)["target_speed_ms"]))
 
-            if not rows:
-                return {"curr_updated": 0, "hist_inserted": 0}
+            session_rows = self.db.fetchall(
+                query="""
+                SELECT ngram_text, ngram_size, avg_ms_per_keystroke, instance_count, session_dt
+                FROM session_ngram_summary
+                WHERE session_id = ?
+                """,
+                params=(session_id,),
+            )
+            if not session_rows:
+                return _SpeedSummaryUpdate(0, 0, [], None)
+
+            states = self._advance_speed_states(
+                user_id=user_id,
+                keyboard_id=keyboard_id,
+                session_id=session_id,
+                session_rows=[cast(Mapping[str, object], r) for r in session_rows],
+            )
 
             # Upsert into current summary
             upsert_sql = """
@@ -1452,46 +1600,458 @@ class NGramAnalyticsService:
                     session_id, ngram_text, ngram_size,
                     decaying_average_ms, target_speed_ms, 
                     target_performance_pct, meets_target, 
-                    sample_count, updated_dt
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    sample_count, updated_dt,
+                    prev_decaying_average_ms, prev_sample_count,
+                    prev_meets_target, prev_updated_dt
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
 
             """
 
+            # Latest history row before this session per n-gram (the new rows' prev_* values)
+            previous: Dict[Tuple[str, int], Tuple[object, ...]] = {}
+            for r in self.db.fetchall(
+                query="""
+                SELECT DISTINCT ON (ngram_text, ngram_size)
+                    ngram_text, ngram_size, decaying_average_ms, sample_count,
+                    meets_target, updated_dt
+                FROM ngram_speed_summary_hist
+                WHERE user_id = ? AND keyboard_id = ?
+                  AND ngram_text = ANY(?::text[])
+                  AND updated_dt < ?
+                ORDER BY ngram_text, ngram_size, updated_dt DESC, history_id DESC
+                """,
+                params=(
+                    user_id,
+                    keyboard_id,
+                    sorted({state.ngram_text for state in states}),
+                    cast(Mapping[str, object], session_rows[0])["session_dt"],
+                ),
+            ):
+                prev = cast(Mapping[str, object], r)
+                previous[(str(prev["ngram_text"]), int(str(prev["ngram_size"])))] = (
+                    prev["decaying_average_ms"],
+                    prev["sample_count"],
+                    prev["meets_target"],
+                    prev["updated_dt"],
+                )
+
             params_curr: List[Tuple[object, ...]] = []
-            for r in rows:
-                rec = cast(Mapping[str, object], r)
+            params_hist: List[Tuple[object, ...]] = []
+            for state in states:
+                decaying_average_ms = state.decaying_average_ms
+                pct, meets = target_metrics(
+                    decaying_average_ms=decaying_average_ms, target_speed_ms=target_speed_ms
+                )
                 summary_id = str(uuid.uuid4())
                 params_curr.append(
                     (
                         summary_id,
-                        rec["user_id"],
-                        rec["keyboard_id"],
-                        rec["session_id"],
-                        rec["ngram_text"],
-                        rec["ngram_size"],
-                        float(str(rec["decaying_average_ms"])),
-                        float(str(rec["target_speed_ms"])),
-                        float(str(rec["target_performance_pct"])),
-                        int(str(rec["meets_target"])),
-                        int(str(rec["sample_count"])),
-                        rec["session_dt"],
+                        user_id,
+                        keyboard_id,
+                        session_id,
+                        state.ngram_text,
+                        state.ngram_size,
+                        decaying_average_ms,
+                        target_speed_ms,
+                        pct,
+                        meets,
+                        state.instance_count,
+                        state.last_session_dt,
                     )
                 )
+                params_hist.append(
+                    params_curr[-1] + previous.get((state.ngram_text, state.ngram_size), (None, None, None, None))
+                )
 
             if params_curr:
-                self.db.execute_many(query=upsert_sql, params_seq=params_curr)
-                self.db.execute_many(query=insert_hist_sql, params_seq=params_curr)
-
-            # Insert into history summary (append-only)
-            # Build a backend-agnostic history_id using known values (no strftime/to_char)
+                with self.db.transaction():
+                    self.db.execute_many(query=upsert_sql, params_seq=params_curr)
+                    # Re-processing a session replaces its history rows rather than duplicating them
+                    self.db.execute(
+                        query="DELETE FROM ngram_speed_summary_hist WHERE session_id = ?",
+                        params=(session_id,),
+                    )
+                    self.db.execute_many(query=insert_hist_sql, params_seq=params_hist)
+                    self._link_speed_hist_successors(session_ids=[session_id])
+                    self._refresh_target_rollup(session_ids=[session_id])
 
             # Estimate counts from number of n-grams processed
-            count = len(rows)
-            return {"curr_updated": count, "hist_inserted": count}
+            count = len(params_curr)
+            cache_key = (user_id, keyboard_id) if params_curr else None
+            return _SpeedSummaryUpdate(count, count, [p[3:] for p in params_curr], cache_key)
         except Exception as e:
             logger.error(f"Error in AddSpeedSummaryForSession for session {session_id}: {str(e)}")
             raise
 
+    def _refresh_target_rollup(self, *, session_ids: List[str]) -> None:
+        """Rewrite the session_target_rollup rows of ``session_ids`` from their history rows."""
+        assert self.db is not None
+        self.db.execute(
+            query="DELETE FROM session_target_rollup WHERE session_id = ANY(?::text[])",
+            params=(session_ids,),
+        )
+        self.db.execute(query=_target_rollup_sql(scoped=True), params=(session_ids,))
+
+    def _link_speed_hist_successors(self, *, session_ids: List[str]) -> None:
+        """Point the next history row of each n-gram at the rows just written for ``session_ids``.
+
+        Only matters when a session is summarized out of time order (or
+        re-processed): a later row then still carries the values from before
+        the inserted one. Appending the newest session matches no rows. When
+        several of the sessions precede the same row, it is linked to the
+        newest of them.
+        """
+        assert self.db is not None
+        self.db.execute(
+            query="""
+            UPDATE ngram_speed_summary_hist AS nx
+            SET prev_decaying_average_ms = p.decaying_average_ms,
+                prev_sample_count = p.sample_count,
+                prev_meets_target = p.meets_target,
+                prev_updated_dt = p.updated_dt
+            FROM (
+                SELECT DISTINCT ON (later.history_id)
+                    later.history_id,
+                    h.decaying_average_ms,
+                    h.sample_count,
+                    h.meets_target,
+                    h.updated_dt
+                FROM ngram_speed_summary_hist AS h
+                JOIN ngram_speed_summary_hist AS later
+                    ON later.keyboard_id = h.keyboard_id
+                    AND later.ngram_text = h.ngram_text
+                    AND later.ngram_size = h.ngram_size
+                    AND later.user_id = h.user_id
+                    AND later.updated_dt > h.updated_dt
+                WHERE h.session_id = ANY(?::text[])
+                ORDER BY later.history_id, h.updated_dt DESC
+            ) AS p
+            WHERE nx.history_id = p.history_id
+              AND (nx.prev_updated_dt IS NULL OR nx.prev_updated_dt <= p.updated_dt)
+            """,
+            params=(session_ids,),
+        )
+
+    def _advance_speed_states(
+        self,
+        *,
+        user_id: str,
+        keyboard_id: str,
+        session_id: str,
+        session_rows: List[Mapping[str, object]],
+    ) -> List[NGramSpeedState]:
+        """Return the speed state of each session n-gram as of this session.
+
+        Stored states are advanced by this session's sample when they end at an
+        earlier session and no other session of the n-gram was summarized after
+        them. Everything else is rebuilt from session_ngram_summary. States that
+        are now the newest for their n-gram are written back to ngram_speed_state.
+        """
+        assert self.db is not None
+        texts = [str(r["ngram_text"]) for r in session_rows]
+        stored_rows = self.db.fetchall(
+            query="""
+            SELECT
+                st.ngram_text,
+                st.ngram_size,
+                st.samples_ms,
+                st.instance_count,
+                st.last_session_id,
+                st.last_session_dt,
+                EXISTS (
+                    SELECT 1
+                    FROM session_ngram_summary AS sns
+                    WHERE sns.user_id = st.user_id
+                        AND sns.keyboard_id = st.keyboard_id
+                        AND sns.ngram_text = st.ngram_text
+                        AND sns.session_dt > st.last_session_dt
+                        AND sns.session_id <> ?
+                ) AS has_unfolded
+            FROM ngram_speed_state AS st
+            WHERE st.user_id = ?
+                AND st.keyboard_id = ?
+                AND st.ngram_text = ANY(?::text[])
+            """,
+            params=(session_id, user_id, keyboard_id, texts),
+        )
+        stored: Dict[Tuple[str, int], Tuple[NGramSpeedState, bool]] = {}
+        for r in stored_rows:
+            rec = cast(Mapping[str, object], r)
+            state = NGramSpeedState(
+                ngram_text=str(rec["ngram_text"]),
+                ngram_size=int(str(rec["ngram_size"])),
+                samples_ms=[float(v) for v in cast(List[float], rec["samples_ms"])],
+                instance_count=int(str(rec["instance_count"])),
+                last_session_id=str(rec["last_session_id"]),
+                last_session_dt=cast(datetime, rec["last_session_dt"]),
+            )
+            stored[(state.ngram_text, state.ngram_size)] = (state, bool(rec["has_unfolded"]))
+
+        result: Dict[Tuple[str, int], NGramSpeedState] = {}
+        to_save: List[NGramSpeedState] = []
+        rebuild: List[Mapping[str, object]] = []
+        for row in session_rows:
+            key = (str(row["ngram_text"]), int(str(row["ngram_size"])))
+            session_dt = cast(datetime, row["session_dt"])
+            entry = stored.get(key)
+            if entry is None or entry[1]:
+                rebuild.append(row)
+                continue
+            state = entry[0]
+            if state.last_session_id == session_id:
+                # Already folded in (e.g. catch-up re-running a session)
+                result[key] = state
+            elif state.last_session_dt is not None and state.last_session_dt < session_dt:
+                advanced = state.push(
+                    session_id=session_id,
+                    session_dt=session_dt,
+                    avg_ms=float(str(row["avg_ms_per_keystroke"])),
+                    instance_count=int(str(row["instance_count"])),
+                )
+                result[key] = advanced
+                to_save.append(advanced)
+            else:
+                rebuild.append(row)
+
+        if rebuild:
+            rebuilt, latest = self._rebuild_speed_states(
+                user_id=user_id, keyboard_id=keyboard_id, session_id=session_id, session_rows=rebuild
+            )
+            for key, state in rebuilt.items():
+                result[key] = state
+                newest = latest.get(key)
+                if newest is None or (state.last_session_dt is not None and newest <= state.last_session_dt):
+                    to_save.append(state)
+
+        if to_save:
+            self._save_speed_states(user_id=user_id, keyboard_id=keyboard_id, states=to_save)
+
+        ordered: List[NGramSpeedState] = []
+        for row in session_rows:
+            key = (str(row["ngram_text"]), int(str(row["ngram_size"])))
+            if key in result:
+                ordered.append(result[key])
+        return ordered
+
+    def _rebuild_speed_states(
+        self,
+        *,
+        user_id: str,
+        keyboard_id: str,
+        session_id: str,
+        session_rows: List[Mapping[str, object]],
+    ) -> Tuple[Dict[Tuple[str, int], NGramSpeedState], Dict[Tuple[str, int], datetime]]:
+        """Build speed states as of this session from session_ngram_summary.
+
+        Returns:
+            Tuple (states, latest_session_dt) keyed by (ngram_text, ngram_size); the
+            second map holds the newest session_dt recorded for each n-gram so the
+            caller can tell whether the rebuilt state is also the current one.
+        """
+        assert self.db is not None
+        session_dt = cast(datetime, session_rows[0]["session_dt"])
+        texts = [str(r["ngram_text"]) for r in session_rows]
+        rows = self.db.fetchall(
+            query="""
+            SELECT
+                sns.ngram_text,
+                sns.ngram_size,
+                (
+                    ARRAY_AGG(sns.avg_ms_per_keystroke ORDER BY sns.session_dt DESC, sns.session_id DESC)
+                        FILTER (WHERE sns.session_dt <= ?)
+                )[1:?] AS samples_ms,
+                COALESCE(SUM(sns.instance_count) FILTER (WHERE sns.session_dt <= ?), 0)
+                    AS instance_count,
+                MAX(sns.session_dt) AS latest_dt
+            FROM session_ngram_summary AS sns
+            WHERE sns.user_id = ?
+                AND sns.keyboard_id = ?
+                AND sns.ngram_text = ANY(?::text[])
+            GROUP BY sns.ngram_text, sns.ngram_size
+            """,
+            params=(session_dt, SPEED_STATE_WINDOW, session_dt, user_id, keyboard_id, texts),
+        )
+        wanted = {(str(r["ngram_text"]), int(str(r["ngram_size"]))) for r in session_rows}
+        states: Dict[Tuple[str, int], NGramSpeedState] = {}
+        latest: Dict[Tuple[str, int], datetime] = {}
+        for r in rows:
+            rec = cast(Mapping[str, object], r)
+            key = (str(rec["ngram_text"]), int(str(rec["ngram_size"])))
+            samples = cast(Optional[List[float]], rec["samples_ms"])
+            if key not in wanted or not samples:
+                continue
+            states[key] = NGramSpeedState(
+                ngram_text=key[0],
+                ngram_size=key[1],
+                samples_ms=[float(v) for v in samples],
+                instance_count=int(str(rec["instance_count"])),
+                last_session_id=session_id,
+                last_session_dt=session_dt,
+            )
+            latest[key] = cast(datetime, rec["latest_dt"])
+        return states, latest
+
+    def _save_speed_states(
+        self, *, user_id: str, keyboard_id: str, states: List[NGramSpeedState]
+    ) -> None:
+        """Upsert rolling speed states into ngram_speed_state."""
+        assert self.db is not None
+        now = datetime.now()
+        self.db.execute_many(
+            query="""
+            INSERT INTO ngram_speed_state (
+                user_id, keyboard_id, ngram_text, ngram_size, samples_ms,
+                instance_count, last_session_id, last_session_dt, updated_dt
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(user_id, keyboard_id, ngram_text, ngram_size) DO UPDATE SET
+                samples_ms = excluded.samples_ms,
+                instance_count = excluded.instance_count,
+                last_session_id = excluded.last_session_id,
+                last_session_dt = excluded.last_session_dt,
+                updated_dt = excluded.updated_dt
+            """,
+            params_seq=[
+                (
+                    user_id,
+                    keyboard_id,
+                    st.ngram_text,
+                    st.ngram_size,
+                    st.samples_ms,
+                    st.instance_count,
+                    st.last_session_id,
+                    st.last_session_dt,
+                    now,
+                )
+                for st in states
+            ],
+        )
+
+    def backfill_speed_state(self) -> int:
+        """Rebuild ngram_speed_state from session_ngram_summary for all users.
+
+        Replaces any existing state with the latest 20 session averages and total
+        instance count of every (user, keyboard, ngram). Run once after upgrading,
+        or after bulk edits to session_ngram_summary.
+
+        Returns:
+            Number of state rows written.
+        """
+        if self.db is None:
+            logger.warning("backfill_speed_state called without database; returning 0")
+            return 0
+        try:
+            with self.db.transaction():
+                self.db.execute(query="DELETE FROM ngram_speed_state")
+                cursor = self.db.execute(
+                    query=_speed_state_rebuild_sql(scoped=False),
+                    params=(SPEED_STATE_WINDOW,),
+                )
+            written = int(getattr(cursor, "rowcount", 0) or 0)
+            logger.info("backfill_speed_state wrote %d rows", written)
+            return written
+        except Exception as e:
+            traceback.print_exc()
+            logger.error(f"Error in BackfillSpeedState: {str(e)}")
+            raise
+
+    def backfill_target_rollup(self) -> int:
+        """Rebuild session_target_rollup from ngram_speed_summary_hist for all sessions.
+
+        The speed summary pipeline keeps the rollup current; run this once after
+        upgrading, or after editing history rows directly. Only sessions with
+        full-resolution history rows are rebuilt; the rows of sessions folded
+        into day or week buckets by ``compact_speed_hist`` are kept.
+
+        Returns:
+            Number of rollup rows written.
+        """
+        if self.db is None:
+            logger.warning("backfill_target_rollup called without database; returning 0")
+            return 0
+        try:
+            with self.db.transaction():
+                # Sessions whose history was compacted keep the counts recorded before compaction
+                self.db.execute(
+                    query="""
+                    DELETE FROM session_target_rollup
+                    WHERE session_id IN (
+                        SELECT session_id FROM ngram_speed_summary_hist WHERE resolution = 'session'
+                    )
+                    """
+                )
+                cursor = self.db.execute(query=_target_rollup_sql(scoped=False))
+            written = int(getattr(cursor, "rowcount", 0) or 0)
+            logger.info("backfill_target_rollup wrote %d rows", written)
+            return written
+        except Exception as e:
+            traceback.print_exc()
+            logger.error(f"Error in BackfillTargetRollup: {str(e)}")
+            raise
+
+    def compact_speed_hist(
+        self,
+        policy: Optional[HistRetentionPolicy] = None,
+        *,
+        user_id: Optional[str] = None,
+        keyboard_id: Optional[str] = None,
+        now: Optional[datetime] = None,
+    ) -> Dict[str, int]:
+        """Downsample ngram_speed_summary_hist rows older than the retention window.
+
+        The newest ``policy.keep_sessions`` sessions of each user/keyboard keep
+        one history row per n-gram per session. Older rows are folded into one
+        row per n-gram per day, or per week once older than
+        ``policy.weekly_after_days``. A bucket's row is its newest row, so it
+        holds the state at the end of the bucket, and its prev_* columns hold
+        the state before the bucket: the prev_* chain, the trend's running sums
+        and the predecessor lookups of later sessions are unchanged. Only whole
+        buckets older than the kept sessions are compacted, and re-running is a
+        no-op until more sessions arrive. session_target_rollup and the current
+        summary are not touched. A bucket holding a single row is left as it is.
+
+        Args:
+            policy: Retention policy (defaults to ``HistRetentionPolicy.from_env()``).
+            user_id: Restrict to one user/keyboard (both or neither).
+            keyboard_id: Restrict to one user/keyboard (both or neither).
+            now: Reference time for the weekly cutoff (defaults to the current time).
+
+        Returns:
+            Dict with ``buckets_written`` (rows now standing for a bucket) and
+            ``rows_removed`` (rows folded into them).
+        """
+        if self.db is None:
+            logger.warning("compact_speed_hist called without database; returning zeros")
+            return {"buckets_written": 0, "rows_removed": 0}
+        if (user_id is None) != (keyboard_id is None):
+            raise ValueError("user_id and keyboard_id must be given together")
+        policy = policy or HistRetentionPolicy.from_env()
+        weekly_cutoff = (
+            (now or datetime.now()) - timedelta(days=policy.weekly_after_days)
+            if policy.weekly_after_days is not None
+            else None
+        )
+        scope: Tuple[object, ...] = (user_id, keyboard_id) if user_id is not None else ()
+        try:
+            start = time.perf_counter()
+            with self.db.transaction():
+                row = self.db.fetchone(
+                    query=_hist_compaction_sql(scoped=bool(scope)),
+                    params=scope + (policy.keep_sessions, weekly_cutoff),
+                    row_format=RowFormat.TUPLE,
+                )
+            buckets, removed = (int(str(row[0])), int(str(row[1]))) if row else (0, 0)
+            logger.info(
+                "compact_speed_hist wrote %d buckets from %d removed rows in %.1f ms",
+                buckets,
+                removed,
+                (time.perf_counter() - start) * 1000.0,
+            )
+            return {"buckets_written": buckets, "rows_removed": removed}
+        except Exception as e:
+            traceback.print_exc()
+            logger.error(f"Error in CompactSpeedHist: {str(e)}")
+            raise
+
     def catchup_speed_summary(self) -> Dict[str, int]:
         """Process all sessions oldest->newest and backfill speed summaries.
 
@@ -1555,6 +2115,227 @@ class NGramAnalyticsService:
             logger.error(f"Error in CatchupSpeedSummary: {str(e)}")
             raise
 
+    def bulk_catchup_speed_summary(
+        self,
+        *,
+        chunk_sessions: int = 250,
+        progress: Optional[Callable[[str, int, int], None]] = None,
+    ) -> Dict[str, int]:
+        """Set-based catch-up for every session that has no speed summary yet.
+
+        A session counts as summarized once it has history or
+        session_target_rollup rows, so sessions folded by ``compact_speed_hist``
+        are not processed again.
+
+        Instead of calling ``add_speed_summary_for_session`` once per session, each
+        (user, keyboard) is processed with one windowed pass over its
+        session_ngram_summary rows per chunk of pending sessions. History rows are
+        inserted with INSERT ... SELECT. Each n-gram's current row and its
+        ngram_speed_state are then refreshed once. Produces the same rows as
+        processing the sessions oldest to newest.
+
+        Args:
+            chunk_sessions: Pending sessions per history INSERT.
+            progress: Optional callback ``(message, sessions_done, total_sessions)``
+                invoked after each chunk.
+
+        Returns:
+            Dict with total_sessions, processed_sessions, total_hist_inserted and
+            total_curr_updated (same keys as ``catchup_speed_summary``).
+        """
+        totals = {
+            "total_sessions": 0,
+            "processed_sessions": 0,
+            "total_hist_inserted": 0,
+            "total_curr_updated": 0,
+        }
+        if self.db is None:
+            logger.warning("bulk_catchup_speed_summary called without database; returning zeros")
+            return totals
+        if chunk_sessions < 1:
+            raise ValueError("chunk_sessions must be at least 1")
+
+        try:
+            pending = self.db.fetchall(
+                query=f"""
+                SELECT ps.session_id, ps.user_id, ps.keyboard_id, ps.start_time,
+                    COALESCE(k.target_ms_per_keystroke, ?) AS target_speed_ms
+                FROM practice_sessions AS ps
+                LEFT OUTER JOIN keyboards AS k
+                    ON k.keyboard_id = ps.keyboard_id
+                WHERE {_SPEED_SUMMARY_PENDING_SQL}
+                ORDER BY ps.user_id, ps.keyboard_id, ps.start_time ASC
+                """,
+                params=(DEFAULT_TARGET_SPEED_MS,),
+            )
+            totals["total_sessions"] = len(pending)
+            groups: Dict[Tuple[str, str], List[Mapping[str, object]]] = {}
+            for r in pending:
+                rec = cast(Mapping[str, object], r)
+                groups.setdefault((str(rec["user_id"]), str(rec["keyboard_id"])), []).append(rec)
+
+            done = 0
+            for (user_id, keyboard_id), sessions in groups.items():
+                target = float(str(sessions[0]["target_speed_ms"]))
+                session_ids = [str(r["session_id"]) for r in sessions]
+                with self.db.transaction():
+                    for start in range(0, len(sessions), chunk_sessions):
+                        chunk = sessions[start : start + chunk_sessions]
+                        inserted = self._bulk_insert_speed_hist(
+                            user_id=user_id,
+                            keyboard_id=keyboard_id,
+                            target_speed_ms=target,
+                            session_ids=[str(r["session_id"]) for r in chunk],
+                            upto=chunk[-1]["start_time"],
+                        )
+                        totals["total_hist_inserted"] += inserted
+                        done += len(chunk)
+                        totals["processed_sessions"] = done
+                        if progress is not None:
+                            progress(
+                                f"User {user_id} / keyboard {keyboard_id}: "
+                                f"{len(chunk)} sessions, {inserted} history rows",
+                                done,
+                                len(pending),
+                            )
+                    totals["total_curr_updated"] += self._bulk_upsert_speed_curr(
+                        user_id=user_id,
+                        keyboard_id=keyboard_id,
+                        target_speed_ms=target,
+                        session_ids=session_ids,
+                    )
+                    self.db.execute(
+                        query=_speed_state_rebuild_sql(scoped=True),
+                        params=(SPEED_STATE_WINDOW, user_id, keyboard_id),
+                    )
+                self.summary_cache.invalidate((user_id, keyboard_id))
+            return totals
+        except Exception as e:
+            traceback.print_exc()
+            logger.error(f"Error in BulkCatchupSpeedSummary: {str(e)}")
+            raise
+
+    def _bulk_insert_speed_hist(
+        self,
+        *,
+        user_id: str,
+        keyboard_id: str,
+        target_speed_ms: float,
+        session_ids: List[str],
+        upto: object,
+    ) -> int:
+        """Insert ngram_speed_summary_hist rows for a chunk of sessions in one statement."""
+        assert self.db is not None
+        cursor = self.db.execute(
+            query=_windowed_speed_summary_cte(upto_filter=True)
+            + """
+            , linked AS (
+                SELECT
+                    wd.*,
+                    LAG(wd.decaying_average_ms) OVER p AS prev_decaying_average_ms,
+                    LAG(wd.sample_count) OVER p AS prev_sample_count,
+                    LAG(wd.session_dt) OVER p AS prev_updated_dt
+                FROM windowed AS wd
+                WINDOW p AS (PARTITION BY wd.ngram_text, wd.ngram_size ORDER BY wd.session_dt, wd.session_id)
+            )
+            INSERT INTO ngram_speed_summary_hist (
+                history_id, user_id, keyboard_id, session_id, ngram_text, ngram_size,
+                decaying_average_ms, target_speed_ms, target_performance_pct,
+                meets_target, sample_count, updated_dt,
+                prev_decaying_average_ms, prev_sample_count, prev_meets_target, prev_updated_dt
+            )
+            SELECT
+                gen_random_uuid()::text, ?, ?, lk.session_id, lk.ngram_text, lk.ngram_size,
+                lk.decaying_average_ms,
+                ?,
+                CASE WHEN lk.decaying_average_ms > 0
+                    THEN 100.0 * ? / lk.decaying_average_ms ELSE 0 END,
+                CASE WHEN lk.decaying_average_ms <= ? THEN 1 ELSE 0 END,
+                lk.sample_count,
+                lk.session_dt,
+                lk.prev_decaying_average_ms,
+                lk.prev_sample_count,
+                CASE WHEN lk.prev_decaying_average_ms <= ? THEN 1
+                    WHEN lk.prev_decaying_average_ms IS NOT NULL THEN 0 END,
+                lk.prev_updated_dt
+            FROM linked AS lk
+            WHERE lk.session_id = ANY(?::text[])
+            """,
+            params=(
+                user_id,
+                keyboard_id,
+                upto,
+                user_id,
+                keyboard_id,
+                target_speed_ms,
+                target_speed_ms,
+                target_speed_ms,
+                target_speed_ms,
+                session_ids,
+            ),
+        )
+        inserted = int(getattr(cursor, "rowcount", 0) or 0)
+        self._link_speed_hist_successors(session_ids=session_ids)
+        self._refresh_target_rollup(session_ids=session_ids)
+        return inserted
+
+    def _bulk_upsert_speed_curr(
+        self,
+        *,
+        user_id: str,
+        keyboard_id: str,
+        target_speed_ms: float,
+        session_ids: List[str],
+    ) -> int:
+        """Upsert ngram_speed_summary_curr for n-grams whose newest session was caught up."""
+        assert self.db is not None
+        cursor = self.db.execute(
+            query=_windowed_speed_summary_cte(upto_filter=False)
+            + """
+            , latest AS (
+                SELECT DISTINCT ON (wd.ngram_text, wd.ngram_size) wd.*
+                FROM windowed AS wd
+                ORDER BY wd.ngram_text, wd.ngram_size, wd.session_dt DESC, wd.session_id DESC
+            )
+            INSERT INTO ngram_speed_summary_curr (
+                summary_id, user_id, keyboard_id, session_id, ngram_text, ngram_size,
+                decaying_average_ms, target_speed_ms, target_performance_pct,
+                meets_target, sample_count, updated_dt
+            )
+            SELECT
+                gen_random_uuid()::text, ?, ?, lt.session_id, lt.ngram_text, lt.ngram_size,
+                lt.decaying_average_ms,
+                ?,
+                CASE WHEN lt.decaying_average_ms > 0
+                    THEN 100.0 * ? / lt.decaying_average_ms ELSE 0 END,
+                CASE WHEN lt.decaying_average_ms <= ? THEN 1 ELSE 0 END,
+                lt.sample_count,
+                lt.session_dt
+            FROM latest AS lt
+            WHERE lt.session_id = ANY(?::text[])
+            ON CONFLICT(user_id, keyboard_id, ngram_text, ngram_size) DO UPDATE SET
+                summary_id = excluded.summary_id,
+                session_id = excluded.session_id,
+                decaying_average_ms = excluded.decaying_average_ms,
+                target_speed_ms = excluded.target_speed_ms,
+                target_performance_pct = excluded.target_performance_pct,
+                meets_target = excluded.meets_target,
+                sample_count = excluded.sample_count,
+                updated_dt = excluded.updated_dt
+            """,
+            params=(
+                user_id,
+                keyboard_id,
+                user_id,
+                keyboard_id,
+                target_speed_ms,
+                target_speed_ms,
+                target_speed_ms,
+                session_ids,
+            ),
+        )
+        return int(getattr(cursor, "rowcount", 0) or 0)
+
     def get_not_meeting_target_counts_last_n_sessions(
         self,
         user_id: str,
@@ -1563,10 +2344,12 @@ class NGramAnalyticsService:
     ) -> List[Tuple[str, int]]:
         """Return counts of distinct n-grams not meeting target for the last N sessions.
 
-        For each of the last `n_sessions` for the given user/keyboard, counts the number of
-        distinct (ngram_text, ngram_size) rows from `ngram_speed_summary_hist` where
-        `meets_target = 0`. Results are ordered from oldest to newest by session start time
-        and returned as a list of (session_dt_iso, count).
+        For each of the last `n_sessions` for the given user/keyboard, sums the
+        `meets_target = 0` counts of `session_target_rollup`, i.e. the distinct
+        (ngram_text, ngram_size) of the session's history rows that missed the
+        target. Sessions without rollup rows count 0. Results are ordered from
+        oldest to newest by session start time and returned as a list of
+        (session_dt_iso, count).
 
         Args:
             user_id: The user scope
@@ -1581,68 +2364,31 @@ class NGramAnalyticsService:
 
         try:
             n_safe = max(1, min(int(n_sessions), 200))
-            sess_rows = self.db.fetchall(
+            rows = self.db.fetchall(
                 query="""
-                SELECT session_id, start_time
-                FROM practice_sessions
-                WHERE user_id = ? AND keyboard_id = ?
-                ORDER BY start_time DESC
-                LIMIT ?
+                WITH last_sessions AS (
+                    SELECT session_id, start_time
+                    FROM practice_sessions
+                    WHERE user_id = ? AND keyboard_id = ?
+                    ORDER BY start_time DESC
+                    LIMIT ?
+                )
+                SELECT
+                    ls.start_time,
+                    COALESCE(SUM(r.ngram_count), 0) AS cnt
+                FROM last_sessions AS ls
+                LEFT OUTER JOIN session_target_rollup AS r
+                    ON r.session_id = ls.session_id
+                   AND r.meets_target = 0
+                GROUP BY ls.session_id, ls.start_time
+                ORDER BY ls.start_time ASC, ls.session_id ASC
                 """,
                 params=(user_id, keyboard_id, n_safe),
             )
-            if not sess_rows:
-                return []
-
-            # Prepare mapping session_id -> start_time for label
-            sess_ids: List[str] = []
-            sess_dt_map: Dict[str, str] = {}
-            for r in sess_rows:
-                m = cast(Mapping[str, object], r)
-                sid = str(m.get("session_id", ""))
-                dt = str(m.get("start_time", ""))
-                if sid:
-                    sess_ids.append(sid)
-                    sess_dt_map[sid] = dt
-
-            if not sess_ids:
-                return []
-
-            # Fetch counts per session
-            placeholders = ",".join(["?"] * len(sess_ids))
-            query = (
-                "SELECT session_id, COUNT(DISTINCT ngram_text || '|' || ngram_size) AS cnt\n"
-                "FROM ngram_speed_summary_hist\n"
-                "WHERE user_id = ? AND keyboard_id = ? AND CAST(meets_target AS INTEGER) = 0\n"
-                f"AND session_id IN ({placeholders})\n"
-                "GROUP BY session_id\n"
-            )
-            params: List[object] = [user_id, keyboard_id]
-            params.extend(sess_ids)
-            rows = self.db.fetchall(query=query, params=tuple(params))
-
-            count_map: Dict[str, int] = {}
-            for r in rows:
-                m = cast(Mapping[str, object], r)
-                sid = str(m.get("session_id", ""))
-                cnt_raw = m.get("cnt", 0)
-                try:
-                    cnt_val = int(str(cnt_raw)) if cnt_raw is not None else 0
-                except Exception:
-                    cnt_val = 0
-                if sid:
-                    count_map[sid] = cnt_val
-
-            # Order by ascending time for chart friendliness
-            # sess_rows currently newest->oldest; reverse iterate
-            result: List[Tuple[str, int]] = []
-            for r in reversed(sess_rows):
-                m = cast(Mapping[str, object], r)
-                sid = str(m.get("session_id", ""))
-                dt = sess_dt_map.get(sid, str(m.get("start_time", "")))
-                result.append((dt, int(count_map.get(sid, 0))))
-
-            return result
+            return [
+                (str(cast(Mapping[str, object], r)["start_time"]), int(str(cast(Mapping[str, object], r)["cnt"])))
+                for r in rows
+            ]
         except Exception:
             traceback.print_exc()
             logger.exception("Failed to compute not-meeting-target counts")
@@ -1669,11 +2415,15 @@ class NGramAnalyticsService:
                 "ngram_speed_summary_curr",
                 "ngram_speed_summary_hist",
                 "session_ngram_summary",
+                "session_summary_ledger",
+                "ngram_speed_state",
+                "session_target_rollup",
             ):
                 try:
                     self.db.execute(query=f"DELETE FROM {table}")
                 except Exception as e:
                     logger.warning("Failed to delete from %s: %s", table, str(e))
+            self.summary_cache.clear()
             logger.info("Successfully attempted deletion of analytics tables")
             return True
         except Exception as e:
@@ -1688,10 +2438,18 @@ class NGramAnalyticsService:
         Analyzes the last N sessions for the given keyboard and returns the count
         of n-grams that did not meet their target performance for each session.
         Results are ordered chronologically (oldest first) for chart display.
+        Each n-gram is seeded from its latest history row before the oldest
+        in-scope session (one index probe per n-gram), then only the history
+        rows inside the window are applied through their prev_* columns, so the
+        cost follows the requested sessions rather than the lifetime history.
+        Sessions with no qualifying n-gram are omitted.
+        Compacted day/week rows take part like session rows: a session inside a
+        compacted bucket reports the counts as of the bucket's start, and the
+        bucket's last session its end.
 
         Args:
             keyboard_id: Keyboard identifier to filter by
-            keys: String of allowed characters for n-gram filtering (regex pattern)
+            keys: String of allowed characters for n-gram filtering
             min_occurrences: Minimum sample count threshold for inclusion
             n_sessions: Number of recent sessions to analyze (default 20)
 
@@ -1702,55 +2460,109 @@ class NGramAnalyticsService:
             return []
 
         try:
+            charset = _key_charset(keys)
+            # Each history row changes its n-gram's contribution from the values
+            # in its prev_* columns to its own, so the seeded state plus a running
+            # sum of the window's per-row deltas gives the counts at any session.
             sql = """
             WITH in_scope_sessions AS (
                 SELECT
                     ps.session_id,
-                    ps.start_time,
-                    ps.keyboard_id
+                    ps.start_time
                 FROM practice_sessions AS ps
                 WHERE ps.keyboard_id = ?
                 ORDER BY ps.start_time DESC
                 LIMIT ?
             ),
-            session_match AS (
+            bounds AS (
+                SELECT MIN(start_time) AS first_dt, MAX(start_time) AS last_dt
+                FROM in_scope_sessions
+            ),
+            seed AS (
                 SELECT
-                    ps.session_id,
-                    ps.start_time AS session_dt,
-                    nssh.history_id,
-                    nssh.ngram_text,
-                    nssh.updated_dt AS history_dt,
-                    nssh.meets_target,
-                    nssh.sample_count,
-                    ROW_NUMBER() OVER (
-                        PARTITION BY nssh.keyboard_id, nssh.ngram_text, ps.session_id
-                        ORDER BY nssh.updated_dt DESC
-                    ) AS rownum
+                    s.updated_dt,
+                    s.sample_count,
+                    s.meets_target
+                FROM ngram_speed_summary_curr AS c
+                CROSS JOIN bounds AS b
+                CROSS JOIN LATERAL (
+                    SELECT h.updated_dt, h.sample_count, h.meets_target
+                    FROM ngram_speed_summary_hist AS h
+                    WHERE h.keyboard_id = c.keyboard_id
+                      AND h.ngram_text = c.ngram_text
+                      AND h.ngram_size = c.ngram_size
+                      AND h.user_id = c.user_id
+                      AND h.updated_dt < b.first_dt
+                    ORDER BY h.updated_dt DESC, h.history_id DESC
+                    LIMIT 1
+                ) AS s
+                WHERE c.keyboard_id = ?
+                  AND c.ngram_charset <@ ?::text[]
+            ),
+            events AS (
+                SELECT
+                    seed.updated_dt AS event_dt,
+                    NULL AS session_id,
+                    CASE WHEN seed.sample_count >= ? THEN 1 ELSE 0 END AS qualifying_delta,
+                    CASE WHEN seed.sample_count >= ? AND seed.meets_target = 0 THEN 1 ELSE 0 END AS miss_delta
+                FROM seed
+                UNION ALL
+                SELECT
+                    nssh.updated_dt,
+                    NULL,
+                    (CASE WHEN nssh.sample_count >= ? THEN 1 ELSE 0 END)
+                        - (CASE WHEN nssh.prev_sample_count >= ? THEN 1 ELSE 0 END),
+                    (CASE WHEN nssh.sample_count >= ? AND nssh.meets_target = 0 THEN 1 ELSE 0 END)
+                        - (CASE WHEN nssh.prev_sample_count >= ? AND nssh.prev_meets_target = 0
+                            THEN 1 ELSE 0 END)
                 FROM ngram_speed_summary_hist AS nssh
-                INNER JOIN in_scope_sessions AS ps
-                    ON nssh.updated_dt <= ps.start_time
-                   AND nssh.keyboard_id = ps.keyboard_id
-                WHERE nssh.ngram_text ~ ?
-                ORDER BY
-                    ps.session_id,
-                    nssh.updated_dt DESC,
-                    ps.start_time
+                CROSS JOIN bounds AS b
+                WHERE nssh.keyboard_id = ?
+                  AND nssh.updated_dt >= b.first_dt
+                  AND nssh.updated_dt <= b.last_dt
+                  AND ngram_charset(nssh.ngram_text) <@ ?::text[]
+                UNION ALL
+                SELECT start_time, session_id, 0, 0
+                FROM in_scope_sessions
+            ),
+            running AS (
+                SELECT
+                    session_id,
+                    event_dt,
+                    SUM(qualifying_delta) OVER w AS qualifying_count,
+                    SUM(miss_delta) OVER w AS miss_count
+                FROM events
+                WINDOW w AS (
+                    ORDER BY event_dt, session_id NULLS FIRST
+                    ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+                )
             )
             SELECT
-                sm.session_id,
-                sm.session_dt,
-                SUM(1-sm.meets_target) AS miss_count
-            FROM session_match AS sm
-            WHERE 
-                sm.rownum = 1
-                and sample_count >= ?
-            GROUP BY sm.session_id, sm.session_dt
-            ORDER BY sm.session_dt DESC;
+                session_id,
+                event_dt AS session_dt,
+                miss_count
+            FROM running
+            WHERE session_id IS NOT NULL
+              AND qualifying_count > 0
+            ORDER BY event_dt DESC;
             """
 
-            regex = f"^[{keys}]+$"
             rows = self.db.fetchall(
-                query=sql, params=(keyboard_id, n_sessions, regex, min_occurrences)
+                query=sql,
+                params=(
+                    keyboard_id,
+                    n_sessions,
+                    keyboard_id,
+                    charset,
+                    min_occurrences,
+                    min_occurrences,
+                    min_occurrences,
+                    min_occurrences,
+                    min_occurrences,
+                    min_occurrences,
+                    keyboard_id,
+                    charset,
+                ),
             )
 
             # Convert to expected format and reverse order (oldest first for chart display)
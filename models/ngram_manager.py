@@ -7,13 +7,15 @@ persistence via a database executor.
 
 from __future__ import annotations
 
+import enum
 import logging
-from datetime import datetime, timezone
-from typing import Iterable, List, Optional, Tuple
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple, Union
 from uuid import UUID, uuid4
 
 from db.database_manager import DatabaseManager
 from db.interfaces import DBExecutor
+from models import ngram_numpy_backend
 from models.keystroke_collection import KeystrokeCollection
 from models.ngram import (
     MAX_NGRAM_SIZE,
@@ -21,6 +23,7 @@ from models.ngram import (
     SEQUENCE_SEPARATORS,
     ErrorNGram,
     Keystroke,
+    NGramBatch,
     SpeedMode,
     SpeedNGram,
     nfc,
@@ -32,6 +35,41 @@ logger = logging.getLogger(__name__)
 """NGramManager and helpers for analyzing keystrokes into n-grams."""
 
 
+class AnalysisBackend(enum.Enum):
+    """Window-evaluation engine used by ``NGramManager.analyze``."""
+
+    PYTHON = "python"  # Pure-Python loop over windows (always available)
+    NUMPY = "numpy"  # Vectorized NumPy backend (requires numpy)
+    AUTO = "auto"  # NumPy when installed, otherwise pure Python
+
+
+class _KeystrokeIndex:
+    """Per-session lookup arrays used by ``NGramManager.analyze``.
+
+    Attributes (all indexed by position in the expected text):
+        window_ks: Keystroke used for the position in the active speed mode, or None.
+        preceding_time: Time of the first raw keystroke typed at position - 1, or None.
+        missing_prefix: ``missing_prefix[i]`` counts positions < i without a keystroke.
+        mismatch_prefix: ``mismatch_prefix[i]`` counts positions < i whose keystroke
+            differs from the expected character after NFC normalization.
+    """
+
+    __slots__ = ("window_ks", "preceding_time", "missing_prefix", "mismatch_prefix")
+
+    def __init__(
+        self,
+        *,
+        window_ks: List[Optional[Keystroke]],
+        preceding_time: List[Optional[datetime]],
+        missing_prefix: List[int],
+        mismatch_prefix: List[int],
+    ) -> None:
+        self.window_ks = window_ks
+        self.preceding_time = preceding_time
+        self.missing_prefix = missing_prefix
+        self.mismatch_prefix = mismatch_prefix
+
+
 class NGramManager:
     """Implementation-agnostic n-gram extractor/classifier per Prompts/ngram.md.
 
@@ -43,15 +81,39 @@ class NGramManager:
     - Provide persistence helpers to store results to DB per Prompts/ngram.md
     """
 
-    def __init__(self, *, db_manager: Optional[DBExecutor] = None) -> None:
+    def __init__(
+        self,
+        *,
+        db_manager: Optional[DBExecutor] = None,
+        backend: AnalysisBackend = AnalysisBackend.PYTHON,
+    ) -> None:
         """Initialize with an optional database manager.
 
         If not provided, a default `DatabaseManager` is created. The stored
         manager implements the `DBExecutor` protocol and is used by the
         persistence helpers.
+
+        Args:
+            db_manager: Database executor used by the persistence helpers.
+            backend: Default window-evaluation engine for `analyze`.
+
+        Raises:
+            ImportError: If the NUMPY backend is requested but numpy is not installed.
         """
+        self.backend = self._resolve_backend(backend=backend)
         self.db: DBExecutor = db_manager or DatabaseManager()
 
+    @staticmethod
+    def _resolve_backend(*, backend: AnalysisBackend) -> AnalysisBackend:
+        """Resolve AUTO and verify the requested backend is available."""
+        if backend is AnalysisBackend.AUTO:
+            if ngram_numpy_backend.NUMPY_AVAILABLE:
+                return AnalysisBackend.NUMPY
+            return AnalysisBackend.PYTHON
+        if backend is AnalysisBackend.NUMPY and not ngram_numpy_backend.NUMPY_AVAILABLE:
+            raise ImportError("AnalysisBackend.NUMPY requires numpy to be installed")
+        return backend
+
     def analyze(
         self,
         *,
@@ -59,6 +121,7 @@ class NGramManager:
         expected_text: str,
         keystrokes: KeystrokeCollection,
         speed_mode: SpeedMode = SpeedMode.NET,
+        backend: Optional[AnalysisBackend] = None,
     ) -> Tuple[List[SpeedNGram], List[ErrorNGram]]:
         """Analyze keystrokes into speed and error n-grams.
 
@@ -68,30 +131,83 @@ class NGramManager:
             keystrokes: KeystrokeCollection containing keystrokes for the session.
             speed_mode: RAW uses raw keystroke timings; NET compacts to the last
                         occurrence for each text_index (per Prompts/ngram.md §4.2).
+            backend: Override of the manager's window-evaluation engine. Both
+                     engines produce identical n-grams.
 
         Returns:
             Tuple (speed_ngrams, error_ngrams), each a list of models to persist.
         """
+        batch, errors = self.analyze_batch(
+            session_id=session_id,
+            expected_text=expected_text,
+            keystrokes=keystrokes,
+            speed_mode=speed_mode,
+            backend=backend,
+        )
+        return list(batch), errors
+
+    def analyze_batch(
+        self,
+        *,
+        session_id: UUID,
+        expected_text: str,
+        keystrokes: KeystrokeCollection,
+        speed_mode: SpeedMode = SpeedMode.NET,
+        backend: Optional[AnalysisBackend] = None,
+    ) -> Tuple[NGramBatch, List[ErrorNGram]]:
+        """Analyze keystrokes into a columnar speed n-gram batch.
+
+        Same analysis as `analyze`, but speed n-grams are returned as one validated
+        `NGramBatch` instead of a `SpeedNGram` model per window. Pass the batch
+        straight to `persist_speed_ngrams` / `persist_all`.
+
+        Returns:
+            Tuple (speed_batch, error_ngrams).
+        """
         # Validate input is KeystrokeCollection
         if not isinstance(keystrokes, KeystrokeCollection):  # noqa: SIM101 # type: ignore[arg-type]
             raise TypeError("keystrokes must be an instance of KeystrokeCollection")
 
+        errors: List[ErrorNGram] = []
         if not expected_text:
-            return [], []
+            return (
+                NGramBatch(session_id=session_id, expected_text="", speed_mode=speed_mode),
+                errors,
+            )
 
-        # Preprocess keystrokes according to speed mode
-        # remove the first one because we don't know the duration
-        ks_by_index: dict[int, Keystroke]
-        if speed_mode == SpeedMode.NET:
-            ks_by_index = {k.text_index: k for k in keystrokes.net_keystrokes}
-            # ks_by_index = self._compact_keystrokes_net(keystrokes.raw_keystrokes)
-        else:
-            # RAW: use last-observed keystroke per text_index
-            # (timing still reflects the raw input stream)
-            ks_by_index = {k.key_index: k for k in keystrokes.raw_keystrokes}
+        # Build per-session lookup arrays once so every window below is O(1)
+        index = self._build_keystroke_index(
+            expected_text=expected_text, keystrokes=keystrokes, speed_mode=speed_mode
+        )
+        window_ks = index.window_ks
+        missing_prefix = index.missing_prefix
+        mismatch_prefix = index.mismatch_prefix
+        preceding_time = index.preceding_time
+        last_index = len(expected_text) - 1
+
+        active = self.backend if backend is None else self._resolve_backend(backend=backend)
+        if active is AnalysisBackend.NUMPY:
+            windows = ngram_numpy_backend.clean_windows(
+                index=index,
+                runs=list(self._iter_runs(expected_text=expected_text)),
+                text_length=len(expected_text),
+                min_size=MIN_NGRAM_SIZE,
+                max_size=MAX_NGRAM_SIZE,
+            )
+            # None means timestamps cannot be vectorized; use the Python loop below
+            if windows is not None:
+                starts, sizes, durations = windows
+                batch = NGramBatch.from_columns(
+                    session_id=session_id,
+                    expected_text=expected_text,
+                    speed_mode=speed_mode,
+                    offsets=starts.tolist(),
+                    sizes=sizes.tolist(),
+                    durations_ms=durations.tolist(),
+                )
+                return batch, errors
 
-        speed: List[SpeedNGram] = []
-        errors: List[ErrorNGram] = []
+        speed = NGramBatch(session_id=session_id, expected_text=expected_text, speed_mode=speed_mode)
 
         # Iterate contiguous runs (no separators) in expected text
         for run_start, run_len in self._iter_runs(expected_text=expected_text):
@@ -114,60 +230,98 @@ class NGramManager:
                 for offset in range(0, actual_run_len - n + 1):
                     # Slide over the run, starting in different places
                     start_index = actual_run_start + offset
-                    window_indices = [start_index + i for i in range(n)]
+                    end_index = start_index + n - 1
 
-                    # Collect keystrokes; if any missing, skip
-                    try:
-                        ks_window = [ks_by_index[i] for i in window_indices]
-                    except KeyError:
+                    # If any keystroke in the window is missing, skip
+                    if missing_prefix[end_index + 1] != missing_prefix[start_index]:
                         continue
 
-                    # Compute duration with gross-up when needed
-                    duration_ms = self._duration_ms_with_gross_up(
-                        expected_text=expected_text,
-                        start_index=start_index,
-                        ks_window=ks_window,
-                        keystrokes=keystrokes,
-                    )
+                    # Duration: timestamp[j] - timestamp[i-1] (Section 6.3.3); single
+                    # characters at the end of the text cannot be timed
+                    if start_index == 0 or (n == 1 and end_index >= last_index):
+                        continue
+                    prev_time = preceding_time[start_index]
+                    if prev_time is None:
+                        continue
+                    last_ks = window_ks[end_index]
+                    assert last_ks is not None
+                    try:
+                        time_diff = (last_ks.keystroke_time - prev_time).total_seconds()
+                    except (AttributeError, TypeError):
+                        continue
+                    duration_ms = max(0.0, time_diff * 1000.0)
                     if duration_ms <= 0:
                         continue
 
-                    # Classify
-                    classification = self._classify_window(ks_window=ks_window)
-                    if classification == "clean":
-                        speed.append(
-                            SpeedNGram(
-                                id=uuid4(),
-                                session_id=session_id,
-                                size=n,
-                                text=expected_text[start_index : start_index + n],
-                                duration_ms=duration_ms,
-                                ms_per_keystroke=None,  # computed by model
-                                speed_mode=speed_mode,
-                                created_at=datetime.now(timezone.utc),
-                            )
-                        )
-                    # elif classification == "error_last":
-                    #     # Error n-grams always based on RAW according to spec; speed_mode not stored
-                    #     exp = expected_text[start_index : start_index + n]
-                    #     act = "".join(k.keystroke_char for k in ks_window)
-                    #     errors.append(
-                    #         ErrorNGram(
-                    #             id=uuid4(),
-                    #             session_id=session_id,
-                    #             size=n,
-                    #             expected_text=exp,
-                    #             actual_text=act,
-                    #             duration_ms=duration_ms,
-                    #             created_at=datetime.now(timezone.utc),
-                    #         )
-                    #     )
-                    else:
-                        # ignored
-                        pass
+                    # Clean windows (no NFC mismatches) become speed n-grams; error
+                    # n-grams are currently not emitted
+                    if mismatch_prefix[end_index + 1] == mismatch_prefix[start_index]:
+                        speed.append(offset=start_index, size=n, duration_ms=duration_ms)
 
+        speed.validate()
         return speed, errors
 
+    def _build_keystroke_index(
+        self,
+        *,
+        expected_text: str,
+        keystrokes: KeystrokeCollection,
+        speed_mode: SpeedMode,
+    ) -> _KeystrokeIndex:
+        """Precompute per-position lookup arrays for window evaluation.
+
+        NET mode keys keystrokes by ``text_index`` over the net stream; RAW mode
+        keys them by ``key_index`` over the raw stream (last one wins in both).
+        The preceding-keystroke time always comes from the first raw keystroke
+        typed at ``text_index == i - 1``, matching ``_duration_ms_with_gross_up``.
+
+        Args:
+            expected_text: Expected text for the session.
+            keystrokes: Keystrokes for the session.
+            speed_mode: NET or RAW keystroke selection.
+
+        Returns:
+            _KeystrokeIndex covering positions ``0..len(expected_text) - 1``.
+        """
+        length = len(expected_text)
+        ks_by_index: dict[int, Keystroke]
+        if speed_mode == SpeedMode.NET:
+            ks_by_index = {k.text_index: k for k in keystrokes.net_keystrokes}
+        else:
+            # RAW: use last-observed keystroke per key_index
+            # (timing still reflects the raw input stream)
+            ks_by_index = {k.key_index: k for k in keystrokes.raw_keystrokes}
+
+        first_raw_time: dict[int, datetime] = {}
+        for k in keystrokes.raw_keystrokes:
+            if k.text_index not in first_raw_time:
+                first_raw_time[k.text_index] = k.keystroke_time
+
+        window_ks: List[Optional[Keystroke]] = [None] * length
+        preceding_time: List[Optional[datetime]] = [None] * length
+        missing_prefix = [0] * (length + 1)
+        mismatch_prefix = [0] * (length + 1)
+        missing = 0
+        mismatched = 0
+        for i in range(length):
+            ks = ks_by_index.get(i)
+            window_ks[i] = ks
+            if ks is None:
+                missing += 1
+            elif nfc(ks.expected_char) != nfc(ks.keystroke_char):
+                mismatched += 1
+            missing_prefix[i + 1] = missing
+            mismatch_prefix[i + 1] = mismatched
+            if i > 0:
+                preceding_time[i] = first_raw_time.get(i - 1)
+
+        return _KeystrokeIndex(
+            window_ks=window_ks,
+            preceding_time=preceding_time,
+            missing_prefix=missing_prefix,
+            mismatch_prefix=mismatch_prefix,
+        )
+
     def _compact_keystrokes_net(self, *, keystrokes: List[Keystroke]) -> dict[int, Keystroke]:
         """Compact keystrokes to the last occurrence per text_index (NET mode).
 
@@ -258,36 +412,6 @@ class NGramManager:
         except (AttributeError, TypeError):
             return 0.0
 
-    def _duration_ms_with_gross_up_prev(
-        self, *, expected_text: str, start_index: int, ks_window: List[Keystroke]
-    ) -> float:
-        """Compute window duration in ms with start-of-run gross-up when applicable.
-
-        Rules (Prompts/ngram.md §6):
-        - Actual duration = t_last - t_first
-        - If the window's start_index is the first character of a run (i.e., no i-1
-          or previous char is a separator), gross-up the duration: (actual/(n-1)) * n
-        - Duration must be strictly positive; otherwise treat as invalid (=0)
-        """
-        if not ks_window:
-            return 0.0
-
-        n = len(ks_window)
-        t0 = ks_window[0].keystroke_time
-        t1 = ks_window[-1].keystroke_time
-        actual = (t1 - t0).total_seconds() * 1000.0
-        if actual <= 0:
-            return 0.0
-
-        # Determine if start_index has no i-1 in same run
-        at_run_start = start_index == 0 or (
-            start_index > 0 and expected_text[start_index - 1] in SEQUENCE_SEPARATORS
-        )
-        if at_run_start:
-            # Only makes sense for n >= 2 (by invariant it is)
-            return (actual / float(n - 1)) * float(n)
-        return actual
-
     def _classify_window(self, *, ks_window: List[Keystroke]) -> str:
         """Classify a window: 'clean', 'error_last', or 'ignored'.
 
@@ -307,7 +431,16 @@ class NGramManager:
 
     # -------- persistence helpers --------
 
-    def persist_speed_ngrams(self, *, items: List[SpeedNGram]) -> int:
+    _SPEED_COLUMNS = (
+        "ngram_speed_id",
+        "session_id",
+        "ngram_size",
+        "ngram_text",
+        "ngram_time_ms",
+        "ms_per_keystroke",
+    )
+
+    def persist_speed_ngrams(self, *, items: Union[List[SpeedNGram], NGramBatch]) -> int:
         """Persist speed n-grams to `session_ngram_speed`.
 
         Table schema (authoritative):
@@ -321,25 +454,25 @@ class NGramManager:
         NOTE: Older code/Prompts mention additional columns (speed_mode, created_at). The
         current schema intentionally omits them; this method therefore only inserts the six
         allowed columns and ignores any extra attributes present on SpeedNGram objects.
+
+        An `NGramBatch` is written straight from its columns without building models.
+        When the executor offers `copy_rows` (DatabaseManager), rows are streamed with
+        COPY instead of being collected into a parameter list first.
         """
         if not items:
             return 0
-        params: List[Tuple[object, ...]] = []
-        for s in items:
-            ms_per_key = (
-                s.ms_per_keystroke if s.ms_per_keystroke is not None else (s.duration_ms / s.size)
-            )
-            params.append(
-                (
-                    str(s.id),
-                    str(s.session_id),
-                    int(s.size),
-                    s.text,
-                    float(s.duration_ms),
-                    float(ms_per_key),
-                )
-            )
+        rows: Iterable[Tuple[object, ...]]
+        if isinstance(items, NGramBatch):
+            rows = items.iter_rows()
+        else:
+            rows = self._speed_rows(items=items)
 
+        copy_rows = getattr(self.db, "copy_rows", None)
+        if callable(copy_rows):
+            result = copy_rows(table="session_ngram_speed", columns=self._SPEED_COLUMNS, rows=rows)
+            return int(result.rows)
+
+        params = list(rows)
         query = (
             "INSERT INTO session_ngram_speed ("
             "ngram_speed_id, session_id, ngram_size, ngram_text, ngram_time_ms, ms_per_keystroke"
@@ -355,6 +488,20 @@ class NGramManager:
             written += 1
         return written
 
+    @staticmethod
+    def _speed_rows(*, items: List[SpeedNGram]) -> Iterable[Tuple[object, ...]]:
+        """Yield `session_ngram_speed` insert tuples for SpeedNGram models."""
+        for s in items:
+            ms_per_key = s.ms_per_keystroke if s.ms_per_keystroke is not None else (s.duration_ms / s.size)
+            yield (
+                str(s.id),
+                str(s.session_id),
+                int(s.size),
+                s.text,
+                float(s.duration_ms),
+                float(ms_per_key),
+            )
+
     def persist_error_ngrams(self, *, items: List[ErrorNGram]) -> int:
         """Persist error n-grams to `session_ngram_errors`.
 
@@ -384,7 +531,9 @@ class NGramManager:
                 written += 1
             return written
 
-    def persist_all(self, *, speed: List[SpeedNGram], errors: List[ErrorNGram]) -> Tuple[int, int]:
+    def persist_all(
+        self, *, speed: Union[List[SpeedNGram], NGramBatch], errors: List[ErrorNGram]
+    ) -> Tuple[int, int]:
         """Persist both speed and error n-grams; returns (speed_count, error_count)."""
         return self.persist_speed_ngrams(items=speed), self.persist_error_ngrams(items=errors)
 
@@ -426,7 +575,7 @@ class NGramManager:
             # Fall back to random UUID if conversion fails (should not in normal flow)
             sid = uuid4()
 
-        speed, errors = self.analyze(
+        speed, errors = self.analyze_batch(
             session_id=sid,
             expected_text=expected_text,
             keystrokes=keystrokes,
@@ -0,0 +1,154 @@
+"""Vectorized NumPy backend for NGramManager.analyze.
+
+Evaluates every (size, offset) window of a session with cumulative sums and
+sliding-window array operations instead of Python loops. Timestamps are held as
+an int64 nanosecond array and correctness as a boolean array. The result is the
+list of clean, positively-timed windows in exactly the order produced by the
+pure-Python path, so both backends yield identical n-grams.
+
+NumPy is an optional dependency; ``NUMPY_AVAILABLE`` reports whether it can be
+imported.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy installed
+    np = None  # type: ignore[assignment]
+
+if TYPE_CHECKING:
+    from models.ngram_manager import _KeystrokeIndex
+
+NUMPY_AVAILABLE = np is not None
+
+_EPOCH_NAIVE = datetime(1970, 1, 1)
+_EPOCH_AWARE = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _to_ns(delta: timedelta) -> int:
+    """Return an exact integer nanosecond count for a timedelta."""
+    return ((delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds) * 1000
+
+
+def _epoch_ns(times: Sequence[Optional[datetime]]) -> Optional[List[int]]:
+    """Convert datetimes to nanoseconds so differences match datetime subtraction.
+
+    Python subtracts datetimes sharing one tzinfo object as naive wall-clock
+    values and otherwise via UTC; naive/aware mixes raise TypeError. The same
+    rules are mirrored here. Returns None for naive/aware mixes, which the
+    caller treats as "not vectorizable".
+    """
+    present = [t for t in times if t is not None]
+    if not present:
+        return [0] * len(times)
+    tzinfos = {id(t.tzinfo) for t in present}
+    if len(tzinfos) == 1:
+        return [0 if t is None else _to_ns(t.replace(tzinfo=None) - _EPOCH_NAIVE) for t in times]
+    if any(t.tzinfo is None or t.utcoffset() is None for t in present):
+        return None
+    return [0 if t is None else _to_ns(t - _EPOCH_AWARE) for t in times]
+
+
+def clean_windows(
+    *,
+    index: "_KeystrokeIndex",
+    runs: Sequence[Tuple[int, int]],
+    text_length: int,
+    min_size: int,
+    max_size: int,
+) -> Optional[Tuple[Any, Any, Any]]:
+    """Compute all clean, positively-timed windows for a session.
+
+    Args:
+        index: Per-position lookup arrays built by NGramManager.
+        runs: (start, length) of each separator-free run in the expected text.
+        text_length: Length of the expected text.
+        min_size: Smallest n-gram size.
+        max_size: Largest n-gram size.
+
+    Returns:
+        Tuple of NumPy arrays ``(starts, sizes, durations_ms)`` ordered by run,
+        then size, then offset; or None when timestamps mix naive and aware
+        datetimes and the caller should use the pure-Python path.
+
+    Raises:
+        ImportError: If NumPy is not installed.
+    """
+    if np is None:
+        raise ImportError("NumPy is required for the vectorized n-gram backend")
+
+    length = text_length
+    empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0))
+    if length == 0:
+        return empty
+
+    last_times: List[Optional[datetime]] = [
+        None if ks is None else ks.keystroke_time for ks in index.window_ks
+    ]
+    ns = _epoch_ns(last_times + list(index.preceding_time))
+    if ns is None:
+        return None
+    last_ns = np.asarray(ns[:length], dtype=np.int64)
+    prev_ns = np.asarray(ns[length:], dtype=np.int64)
+    has_prev = np.fromiter((t is not None for t in index.preceding_time), bool, count=length)
+
+    # A position is correct when its keystroke exists and matches the expected char
+    missing = np.diff(np.asarray(index.missing_prefix, dtype=np.int64)) != 0
+    mismatched = np.diff(np.asarray(index.mismatch_prefix, dtype=np.int64)) != 0
+    correct = ~(missing | mismatched)
+    bad_prefix = np.zeros(length + 1, dtype=np.int64)
+    np.cumsum(~correct, out=bad_prefix[1:])
+
+    # Run id per position; -1 for separators and the excluded first character
+    run_id = np.full(length, -1, dtype=np.int64)
+    for run_no, (start, run_len) in enumerate(runs):
+        run_id[start : start + run_len] = run_no
+    run_id[0] = -1
+
+    all_starts: List[Any] = []
+    all_sizes: List[Any] = []
+    all_runs: List[Any] = []
+    all_durations: List[Any] = []
+    positions = np.arange(length, dtype=np.int64)
+
+    for n in range(min_size, max_size + 1):
+        if n > length:
+            break
+        starts = positions[: length - n + 1]
+        ends = starts + (n - 1)
+        rid = run_id[starts]
+        ok = (rid >= 0) & (rid == run_id[ends])
+        ok &= bad_prefix[ends + 1] == bad_prefix[starts]
+        ok &= has_prev[starts]
+        if n == 1:
+            ok &= ends < length - 1
+        if not ok.any():
+            continue
+        s = starts[ok]
+        e = ends[ok]
+        diff_us = (last_ns[e] - prev_ns[s]) // 1000
+        positive = diff_us > 0
+        if not positive.any():
+            continue
+        s = s[positive]
+        # Same arithmetic as timedelta.total_seconds() * 1000.0
+        durations = (diff_us[positive].astype(np.float64) / 1e6) * 1000.0
+        all_starts.append(s)
+        all_sizes.append(np.full(s.shape[0], n, dtype=np.int64))
+        all_runs.append(rid[ok][positive])
+        all_durations.append(durations)
+
+    if not all_starts:
+        return empty
+
+    starts_arr = np.concatenate(all_starts)
+    sizes_arr = np.concatenate(all_sizes)
+    runs_arr = np.concatenate(all_runs)
+    durations_arr = np.concatenate(all_durations)
+    # Pure-Python order: run, then size, then offset (start)
+    order = np.lexsort((starts_arr, sizes_arr, runs_arr))
+    return starts_arr[order], sizes_arr[order], durations_arr[order]
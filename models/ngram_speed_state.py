@@ -0,0 +1,92 @@
+"""Rolling per-(user, keyboard, n-gram) state for speed summaries.
+
+``NGramAnalyticsService.add_speed_summary_for_session`` keeps one
+``NGramSpeedState`` per (user_id, keyboard_id, ngram_text, ngram_size) in the
+``ngram_speed_state`` table. Each state holds the most recent
+``SPEED_STATE_WINDOW`` per-session averages (newest first) and the running
+instance count, so a new session is folded in with O(1) work per n-gram instead
+of rescanning ``session_ngram_summary``.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Tuple
+
+# Number of most recent sessions contributing to the decaying average
+SPEED_STATE_WINDOW = 20
+# Target used when the keyboard has no target_ms_per_keystroke
+DEFAULT_TARGET_SPEED_MS = 600.0
+
+
+def decaying_average(samples_ms: List[float]) -> float:
+    """Return the 1/k-weighted average of samples ordered newest first.
+
+    The k-th most recent sample has weight 1/k, matching the summary SQL in
+    ``SQL/ngram_speed_summary.sql``.
+    """
+    if not samples_ms:
+        return 0.0
+    weighted = 0.0
+    weights = 0.0
+    for k, value in enumerate(samples_ms, start=1):
+        weighted += value / k
+        weights += 1.0 / k
+    return weighted / weights
+
+
+def target_metrics(*, decaying_average_ms: float, target_speed_ms: float) -> Tuple[float, int]:
+    """Return (target_performance_pct, meets_target) for a decaying average."""
+    pct = 100.0 * target_speed_ms / decaying_average_ms if decaying_average_ms > 0 else 0.0
+    meets = 1 if decaying_average_ms <= target_speed_ms else 0
+    return pct, meets
+
+
+@dataclass
+class NGramSpeedState:
+    """Rolling speed state for one n-gram of one user on one keyboard.
+
+    Attributes:
+        ngram_text: N-gram text.
+        ngram_size: N-gram length.
+        samples_ms: Per-session avg_ms_per_keystroke, newest first, at most
+            ``SPEED_STATE_WINDOW`` entries.
+        instance_count: Total instances across every session folded in so far.
+        last_session_id: Most recent session folded into the state.
+        last_session_dt: Start time of that session.
+    """
+
+    ngram_text: str
+    ngram_size: int
+    samples_ms: List[float] = field(default_factory=list)
+    instance_count: int = 0
+    last_session_id: str = ""
+    last_session_dt: datetime | None = None
+
+    def push(
+        self, *, session_id: str, session_dt: datetime, avg_ms: float, instance_count: int
+    ) -> "NGramSpeedState":
+        """Return a new state with one more (newer) session folded in."""
+        return NGramSpeedState(
+            ngram_text=self.ngram_text,
+            ngram_size=self.ngram_size,
+            samples_ms=([avg_ms] + self.samples_ms)[:SPEED_STATE_WINDOW],
+            instance_count=self.instance_count + instance_count,
+            last_session_id=session_id,
+            last_session_dt=session_dt,
+        )
+
+    @property
+    def decaying_average_ms(self) -> float:
+        """Decaying average over the retained samples."""
+        return decaying_average(self.samples_ms)
+
+
+__all__ = [
+    "SPEED_STATE_WINDOW",
+    "DEFAULT_TARGET_SPEED_MS",
+    "NGramSpeedState",
+    "decaying_average",
+    "target_metrics",
+]
@@ -0,0 +1,295 @@
+"""In-process cache of ngram_speed_summary_curr per (user, keyboard).
+
+The heatmap, Dynamic Config and session comparison screens all read the
+current summary of one user and keyboard. ``SummaryColumns`` holds those rows
+column by column (``array`` columns for the numbers, lists for text and
+timestamps) so filters and sorts run in memory, and ``NGramSummaryCache`` keeps
+a bounded LRU of them per database.
+
+Entries are immutable: a finished session produces a patched copy, installed
+only if nothing else changed the cache since the base entry was read. Every
+mutation bumps a version counter, so a slow load that started before a write
+cannot overwrite the newer entry. Writes that bypass ``NGramAnalyticsService``
+are not seen; call ``invalidate`` or ``clear`` after editing the table directly.
+"""
+
+from __future__ import annotations
+
+import threading
+import weakref
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Collection, Dict, Iterable, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from db.database_manager import DatabaseManager
+
+# SELECT order of ngram_speed_summary_curr rows accepted by SummaryColumns
+SUMMARY_COLUMNS: Tuple[str, ...] = (
+    "session_id",
+    "ngram_text",
+    "ngram_size",
+    "decaying_average_ms",
+    "target_speed_ms",
+    "target_performance_pct",
+    "meets_target",
+    "sample_count",
+    "updated_dt",
+)
+
+SummaryKey = Tuple[str, str]
+
+
+class SummaryColumns:
+    """Current speed summary of one user and keyboard in columnar form.
+
+    Row ``i`` is ``(session_id[i], ngram_text[i], ngram_size[i], ...)`` in
+    ``SUMMARY_COLUMNS`` order. Instances are not modified after construction.
+    """
+
+    def __init__(self, rows: Iterable[Sequence[object]] = ()) -> None:
+        """Build the columns from rows in ``SUMMARY_COLUMNS`` order."""
+        self.session_id: List[str] = []
+        self.ngram_text: List[str] = []
+        self.ngram_size = array("h")
+        self.decaying_average_ms = array("d")
+        self.target_speed_ms = array("d")
+        self.target_performance_pct = array("d")
+        self.meets_target = array("b")
+        self.sample_count = array("q")
+        self.updated_dt: List[object] = []
+        self._positions: Dict[Tuple[str, int], int] = {}
+        for row in rows:
+            self._append(row)
+
+    def _append(self, row: Sequence[object]) -> None:
+        session_id, text, size, avg, target, pct, meets, count, updated = row
+        self._positions[(str(text), int(str(size)))] = len(self.ngram_text)
+        self.session_id.append(str(session_id))
+        self.ngram_text.append(str(text))
+        self.ngram_size.append(int(str(size)))
+        self.decaying_average_ms.append(float(str(avg)))
+        self.target_speed_ms.append(float(str(target)))
+        self.target_performance_pct.append(float(str(pct)))
+        self.meets_target.append(1 if bool(meets) else 0)
+        self.sample_count.append(int(str(count)))
+        self.updated_dt.append(updated)
+
+    def __len__(self) -> int:
+        """Return the number of n-grams held."""
+        return len(self.ngram_text)
+
+    def row(self, i: int) -> Tuple[object, ...]:
+        """Return row ``i`` in ``SUMMARY_COLUMNS`` order."""
+        return (
+            self.session_id[i],
+            self.ngram_text[i],
+            self.ngram_size[i],
+            self.decaying_average_ms[i],
+            self.target_speed_ms[i],
+            self.target_performance_pct[i],
+            self.meets_target[i],
+            self.sample_count[i],
+            self.updated_dt[i],
+        )
+
+    def patched(self, rows: Iterable[Sequence[object]]) -> "SummaryColumns":
+        """Return a copy with ``rows`` upserted by (ngram_text, ngram_size)."""
+        merged = [self.row(i) for i in range(len(self))]
+        for row in rows:
+            pos = self._positions.get((str(row[1]), int(str(row[2]))))
+            if pos is None:
+                merged.append(tuple(row))
+            else:
+                merged[pos] = tuple(row)
+        return SummaryColumns(merged)
+
+    def select(
+        self,
+        *,
+        min_sample_count: int = 0,
+        sizes: Optional[Collection[int]] = None,
+        missed_only: bool = False,
+        allowed_keys: Optional[Collection[str]] = None,
+        session_id: Optional[str] = None,
+    ) -> List[int]:
+        """Return the positions of the rows passing every given filter.
+
+        Args:
+            min_sample_count: Minimum ``sample_count``.
+            sizes: Allowed ``ngram_size`` values (None: any).
+            missed_only: Keep only rows with ``meets_target = 0``.
+            allowed_keys: Every character of the n-gram must be one of these
+                (None: no key filter; empty: nothing passes).
+            session_id: Keep only rows last updated by this session.
+        """
+        size_set = set(sizes) if sizes is not None else None
+        key_set = set(allowed_keys) if allowed_keys is not None else None
+        out: List[int] = []
+        for i, text in enumerate(self.ngram_text):
+            if self.sample_count[i] < min_sample_count:
+                continue
+            if size_set is not None and self.ngram_size[i] not in size_set:
+                continue
+            if missed_only and self.meets_target[i]:
+                continue
+            if session_id is not None and self.session_id[i] != session_id:
+                continue
+            if key_set is not None and not key_set.issuperset(text):
+                continue
+            out.append(i)
+        return out
+
+    def slowest_first(self, positions: Iterable[int]) -> List[int]:
+        """Return ``positions`` ordered by decaying_average_ms, slowest first (stable)."""
+        averages = self.decaying_average_ms
+        return sorted(positions, key=lambda i: averages[i], reverse=True)
+
+
+@dataclass(frozen=True)
+class SummaryCacheStats:
+    """Point-in-time snapshot of summary cache usage."""
+
+    max_entries: int
+    max_rows: int
+    entries: int
+    rows: int
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+    patches: int
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache (0.0 before any lookup)."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class NGramSummaryCache:
+    """Thread-safe LRU of ``SummaryColumns`` keyed by (user_id, keyboard_id).
+
+    Bounded by entry count and by the total rows held; ``max_entries=0``
+    disables caching.
+    """
+
+    def __init__(self, *, max_entries: int = 16, max_rows: int = 200_000) -> None:
+        """Initialize an empty cache."""
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self._entries: OrderedDict[SummaryKey, SummaryColumns] = OrderedDict()
+        self._rows = 0
+        self._version = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+        self._patches = 0
+
+    def get(self, key: SummaryKey) -> Optional[SummaryColumns]:
+        """Return the cached summary for ``key``, counting a hit or a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry
+
+    def peek(self, key: SummaryKey) -> Tuple[Optional[SummaryColumns], int]:
+        """Return the entry for ``key`` (or None) and the current version, without counting."""
+        with self._lock:
+            return self._entries.get(key), self._version
+
+    def version(self) -> int:
+        """Return the version to pass to ``put`` for a load starting now."""
+        with self._lock:
+            return self._version
+
+    def put(self, key: SummaryKey, columns: SummaryColumns, *, version: int) -> bool:
+        """Store ``columns`` unless the cache changed since ``version`` was read.
+
+        Returns:
+            True if stored; False if it was stale, disabled or over ``max_rows``.
+        """
+        with self._lock:
+            if version != self._version or self.max_entries <= 0 or len(columns) > self.max_rows:
+                return False
+            self._version += 1
+            self._drop(key)
+            self._entries[key] = columns
+            self._rows += len(columns)
+            while len(self._entries) > self.max_entries or self._rows > self.max_rows:
+                _, evicted = self._entries.popitem(last=False)
+                self._rows -= len(evicted)
+                self._evictions += 1
+            return True
+
+    def patch(self, key: SummaryKey, base: SummaryColumns, rows: Sequence[Sequence[object]], *, version: int) -> bool:
+        """Install ``base`` with ``rows`` upserted; drop the entry if the cache moved on."""
+        if self.put(key, base.patched(rows), version=version):
+            with self._lock:
+                self._patches += 1
+            return True
+        self.invalidate(key)
+        return False
+
+    def invalidate(self, key: SummaryKey) -> None:
+        """Drop the entry for ``key`` and reject loads that started before this call."""
+        with self._lock:
+            self._version += 1
+            if self._drop(key):
+                self._invalidations += 1
+
+    def clear(self) -> None:
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            self._version += 1
+            self._invalidations += len(self._entries)
+            self._entries.clear()
+            self._rows = 0
+
+    def _drop(self, key: SummaryKey) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._rows -= len(entry)
+        return True
+
+    def stats(self) -> SummaryCacheStats:
+        """Return a snapshot of the cache counters."""
+        with self._lock:
+            return SummaryCacheStats(
+                max_entries=self.max_entries,
+                max_rows=self.max_rows,
+                entries=len(self._entries),
+                rows=self._rows,
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                invalidations=self._invalidations,
+                patches=self._patches,
+            )
+
+
+_caches: "weakref.WeakKeyDictionary[DatabaseManager, NGramSummaryCache]" = weakref.WeakKeyDictionary()
+_caches_lock = threading.Lock()
+
+
+def summary_cache_for(db: "DatabaseManager") -> NGramSummaryCache:
+    """Return the summary cache shared by every service using ``db``.
+
+    Screens and the session persistence worker each build their own
+    ``NGramAnalyticsService``; sharing the cache per database lets a session
+    saved by one patch what the others read.
+    """
+    with _caches_lock:
+        cache = _caches.get(db)
+        if cache is None:
+            cache = NGramSummaryCache()
+            _caches[db] = cache
+        return cache
@@ -0,0 +1,141 @@
+"""Durable journal of end-of-session persistence jobs.
+
+The typing drill hands each finished session to a background persistence queue.
+Before the job runs it is written to this journal (one JSON file per session),
+and the file is only removed once ``process_end_of_session`` has committed. A
+session whose save fails, or that was still queued when the app closed, is
+therefore retried on the next start instead of being lost.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from models.keystroke import Keystroke
+from models.keystroke_collection import KeystrokeCollection
+from models.session import Session
+
+logger = logging.getLogger(__name__)
+
+# Default journal location (override with the AITT_PERSIST_JOURNAL_DIR environment variable)
+DEFAULT_JOURNAL_DIR = Path.home() / ".aitypingtrainer" / "persist_journal"
+
+
+@dataclass
+class PersistJob:
+    """One session waiting for end-of-session persistence.
+
+    Attributes:
+        session: Completed session.
+        keystrokes: Keystrokes typed during the session.
+        save_session_first: Whether the session row still has to be saved.
+        attempts: Failed attempts so far.
+        last_error: Message of the most recent failure.
+        queued_at: When the job was first journaled.
+    """
+
+    session: Session
+    keystrokes: KeystrokeCollection
+    save_session_first: bool = False
+    attempts: int = 0
+    last_error: str = ""
+    queued_at: datetime = field(default_factory=datetime.now)
+
+    @property
+    def session_id(self) -> str:
+        """Id of the session being persisted."""
+        return str(self.session.session_id)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a JSON-serialisable representation of the job."""
+        return {
+            "session": self.session.model_dump(mode="json"),
+            "keystrokes": [k.model_dump(mode="json") for k in self.keystrokes.raw_keystrokes],
+            "save_session_first": self.save_session_first,
+            "attempts": self.attempts,
+            "last_error": self.last_error,
+            "queued_at": self.queued_at.isoformat(),
+        }
+
+    @classmethod
+    def from_dict(cls, *, data: Dict[str, Any]) -> "PersistJob":
+        """Rebuild a job written by ``to_dict``; net keystrokes are derived again."""
+        keystrokes = KeystrokeCollection()
+        for raw in data.get("keystrokes", []):
+            keystrokes.add_keystroke(keystroke=Keystroke.model_validate(raw))
+        return cls(
+            session=Session.model_validate(data["session"]),
+            keystrokes=keystrokes,
+            save_session_first=bool(data.get("save_session_first", False)),
+            attempts=int(data.get("attempts", 0)),
+            last_error=str(data.get("last_error", "")),
+            queued_at=datetime.fromisoformat(str(data["queued_at"])),
+        )
+
+
+class PersistenceJournal:
+    """Directory of pending persistence jobs, one ``<session_id>.json`` file each.
+
+    Writes go to a temporary file that is renamed into place, so a crash never
+    leaves a half-written job behind.
+    """
+
+    def __init__(self, *, directory: Optional[Path] = None) -> None:
+        """Open (and create if needed) the journal directory.
+
+        Args:
+            directory: Journal directory; defaults to ``AITT_PERSIST_JOURNAL_DIR``
+                or ``DEFAULT_JOURNAL_DIR``.
+        """
+        env_dir = os.environ.get("AITT_PERSIST_JOURNAL_DIR")
+        self.directory = directory or (Path(env_dir) if env_dir else DEFAULT_JOURNAL_DIR)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, session_id: str) -> Path:
+        return self.directory / f"{session_id}.json"
+
+    def record(self, job: PersistJob) -> Path:
+        """Write (or overwrite) the journal entry for a job."""
+        path = self._path(job.session_id)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(job.to_dict()), encoding="utf-8")
+        os.replace(tmp, path)
+        return path
+
+    def mark_failed(self, job: PersistJob, *, error: str) -> PersistJob:
+        """Count a failed attempt and keep the job journaled for retry."""
+        job.attempts += 1
+        job.last_error = error
+        self.record(job)
+        return job
+
+    def complete(self, session_id: str) -> None:
+        """Remove a job once its session has been persisted."""
+        self._path(session_id).unlink(missing_ok=True)
+
+    def pending(self) -> List[PersistJob]:
+        """Return journaled jobs, oldest session first.
+
+        Unreadable entries are logged and skipped (left on disk for inspection).
+        """
+        jobs: List[PersistJob] = []
+        for path in self.directory.glob("*.json"):
+            try:
+                jobs.append(PersistJob.from_dict(data=json.loads(path.read_text(encoding="utf-8"))))
+            except Exception as e:
+                logger.warning("Skipping unreadable persistence journal entry %s: %s", path, e)
+        jobs.sort(key=lambda j: j.session.start_time)
+        return jobs
+
+    def __len__(self) -> int:
+        """Number of journaled jobs."""
+        return sum(1 for _ in self.directory.glob("*.json"))
+
+
+__all__ = ["DEFAULT_JOURNAL_DIR", "PersistJob", "PersistenceJournal"]
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Build the ngram_speed_state table from existing session_ngram_summary data.
+
+Run once after upgrading so add_speed_summary_for_session can update speed
+summaries incrementally. Safe to re-run: existing state is replaced.
+
+Usage:
+    python scripts/backfill_speed_state.py [--local]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from db.database_manager import ConnectionType, DatabaseManager  # noqa: E402
+from models.ngram_analytics_service import NGramAnalyticsService  # noqa: E402
+
+
+def main() -> int:
+    """Parse arguments, run the backfill and print the number of state rows."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--local",
+        action="store_true",
+        help="Use the local Docker PostgreSQL instead of the cloud database",
+    )
+    args = parser.parse_args()
+
+    connection_type = ConnectionType.POSTGRESS_DOCKER if args.local else ConnectionType.CLOUD
+    with DatabaseManager(connection_type=connection_type) as db:
+        db.init_tables()
+        written = NGramAnalyticsService(db, None).backfill_speed_state()
+    print(f"ngram_speed_state rebuilt: {written} rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Downsample ngram_speed_summary_hist rows older than the retention window.
+
+The newest sessions of each user/keyboard keep one history row per n-gram per
+session; older rows are folded into one row per n-gram per day, or per week
+past the weekly cutoff. The typing app does this in the background while the
+persistence queue is idle; run this script for a one-off compaction (e.g. the
+first one after upgrading). Safe to re-run. Defaults come from
+AITT_HIST_KEEP_SESSIONS and AITT_HIST_WEEKLY_AFTER_DAYS.
+
+Usage:
+    python scripts/compact_speed_hist.py [--local] [--keep-sessions 200] [--weekly-after-days 90 | --daily-only]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from db.database_manager import ConnectionType, DatabaseManager  # noqa: E402
+from models.ngram_analytics_service import HistRetentionPolicy, NGramAnalyticsService  # noqa: E402
+
+
+def main() -> int:
+    """Parse arguments, run the compaction and print the counts."""
+    defaults = HistRetentionPolicy.from_env()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--local",
+        action="store_true",
+        help="Use the local Docker PostgreSQL instead of the cloud database",
+    )
+    parser.add_argument(
+        "--keep-sessions",
+        type=int,
+        default=defaults.keep_sessions,
+        help="Newest sessions per user/keyboard kept at full resolution",
+    )
+    parser.add_argument(
+        "--weekly-after-days",
+        type=int,
+        default=defaults.weekly_after_days,
+        help="Age in days after which history is kept per week instead of per day",
+    )
+    parser.add_argument("--daily-only", action="store_true", help="Never fold history into weekly buckets")
+    args = parser.parse_args()
+
+    policy = HistRetentionPolicy(
+        keep_sessions=args.keep_sessions,
+        weekly_after_days=None if args.daily_only else args.weekly_after_days,
+    )
+    connection_type = ConnectionType.POSTGRESS_DOCKER if args.local else ConnectionType.CLOUD
+    with DatabaseManager(connection_type=connection_type) as db:
+        db.init_tables()
+        counts = NGramAnalyticsService(db, None).compact_speed_hist(policy)
+    print(f"ngram_speed_summary_hist compacted: {counts['rows_removed']} rows folded into {counts['buckets_written']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Print a DatabaseManager query statistics report.
+
+Run the application with AITT_QUERY_STATS_FILE set (and optionally
+AITT_SLOW_QUERY_MS) and DatabaseManager.close() writes the per-statement
+counters, latency histograms and slow-query log there as JSON. This script
+prints that file as a table, heaviest statements first.
+
+Usage:
+    python scripts/dump_query_stats.py [--file PATH] [--order-by total_ms] [--top 20] [--plans] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from db.query_stats import ORDER_BY_FIELDS, QUERY_STATS_FILE_ENV, format_report  # noqa: E402
+
+
+def main() -> int:
+    """Parse arguments and print the report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--file",
+        default=os.environ.get(QUERY_STATS_FILE_ENV),
+        help=f"Report written by DatabaseManager (defaults to ${QUERY_STATS_FILE_ENV})",
+    )
+    parser.add_argument("--order-by", choices=ORDER_BY_FIELDS, default="total_ms", help="Sort statements by")
+    parser.add_argument("--top", type=int, default=20, help="Number of statements to show")
+    parser.add_argument("--plans", action="store_true", help="Include captured EXPLAIN plans of slow queries")
+    parser.add_argument("--json", action="store_true", help="Print the raw JSON report")
+    args = parser.parse_args()
+
+    if not args.file:
+        parser.error(f"pass --file or set {QUERY_STATS_FILE_ENV}")
+    path = Path(args.file)
+    if not path.exists():
+        print(f"No query stats report at {path}", file=sys.stderr)
+        return 1
+
+    report = json.loads(path.read_text(encoding="utf-8"))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    print(f"Query stats generated {report.get('generated_at')} ({path})")
+    print(format_report(report, order_by=args.order_by, top=args.top, plans=args.plans))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Report unused, invalid and missing indexes against a recorded workload.
+
+Reads index and table scan counters from pg_stat_user_indexes and
+pg_stat_user_tables and compares them with the indexes declared in
+DatabaseManager.INDEXES. When a query stats report is available (written by
+DatabaseManager.close() with AITT_QUERY_STATS_FILE set) the recorded
+statements are checked for filters no index supports. Counters accumulate
+since the last statistics reset, so run it after a representative session.
+
+Usage:
+    python scripts/index_advisor.py [--local] [--workload PATH] [--min-rows 1000] [--top 20] [--create]
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from db.database_manager import ConnectionType, DatabaseManager  # noqa: E402
+from db.index_manager import IndexManager, format_advice  # noqa: E402
+from db.query_stats import QUERY_STATS_FILE_ENV  # noqa: E402
+
+
+def main() -> int:
+    """Parse arguments, collect index statistics and print the advice."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--local",
+        action="store_true",
+        help="Use the local Docker PostgreSQL instead of the cloud database",
+    )
+    parser.add_argument(
+        "--workload",
+        default=os.environ.get(QUERY_STATS_FILE_ENV),
+        help=f"Query stats report of the recorded workload (defaults to ${QUERY_STATS_FILE_ENV})",
+    )
+    parser.add_argument("--min-rows", type=int, default=1000, help="Ignore sequential scans of smaller tables")
+    parser.add_argument("--top", type=int, default=20, help="Entries shown per section")
+    parser.add_argument(
+        "--create",
+        action="store_true",
+        help="Build the declared indexes that are missing or invalid (CREATE INDEX CONCURRENTLY)",
+    )
+    args = parser.parse_args()
+
+    workload = None
+    if args.workload:
+        path = Path(args.workload)
+        if path.exists():
+            workload = json.loads(path.read_text(encoding="utf-8"))
+        else:
+            print(f"No query stats report at {path}; skipping workload suggestions", file=sys.stderr)
+
+    connection_type = ConnectionType.POSTGRESS_DOCKER if args.local else ConnectionType.CLOUD
+    with DatabaseManager(connection_type=connection_type) as db:
+        if args.create:
+            built = db.ensure_indexes()
+            print(f"Indexes built: {', '.join(built) if built else 'none'}")
+            print()
+        advice = IndexManager(db=db).advise(declared=db.INDEXES, workload=workload, min_table_rows=args.min_rows)
+    print(format_advice(advice, top=args.top))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
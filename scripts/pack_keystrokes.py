@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Convert stored keystrokes between the row and packed blob layouts.
+
+By default every session with session_keystrokes rows is packed into
+session_keystroke_blobs and the size and reload-time difference is reported.
+Each session is converted in its own transaction, so the script is safe to
+re-run after an interruption. Use --unpack to convert back to rows.
+
+Usage:
+    python scripts/pack_keystrokes.py [--local] [--unpack] [--no-measure]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from db.database_manager import ConnectionType, DatabaseManager  # noqa: E402
+from models.keystroke_manager import KeystrokeManager  # noqa: E402
+
+
+def main() -> int:
+    """Parse arguments, convert the sessions and print a report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--local",
+        action="store_true",
+        help="Use the local Docker PostgreSQL instead of the cloud database",
+    )
+    parser.add_argument(
+        "--unpack",
+        action="store_true",
+        help="Convert packed sessions back to session_keystrokes rows",
+    )
+    parser.add_argument(
+        "--no-measure",
+        action="store_true",
+        help="Skip timing the reload of each packed session",
+    )
+    args = parser.parse_args()
+
+    connection_type = ConnectionType.POSTGRESS_DOCKER if args.local else ConnectionType.CLOUD
+    with DatabaseManager(connection_type=connection_type) as db:
+        db.init_tables()
+        manager = KeystrokeManager(db_manager=db)
+        if args.unpack:
+            print(f"Sessions unpacked to rows: {manager.unpack_sessions()}")
+            return 0
+
+        stats = manager.pack_sessions(
+            measure_load=not args.no_measure,
+            progress=lambda done, total: print(f"\r{done}/{total} sessions", end="", flush=True),
+        )
+    print()
+    print(f"Sessions packed: {stats.sessions} ({stats.keystrokes} keystrokes)")
+    print(
+        f"Storage: {stats.row_bytes} bytes of rows -> {stats.packed_bytes} bytes packed "
+        f"({stats.size_reduction:.0%} smaller)"
+    )
+    if not args.no_measure and stats.sessions:
+        print(
+            f"Reload: {stats.row_load_ms:.1f} ms from rows -> {stats.packed_load_ms:.1f} ms packed "
+            f"({stats.load_speedup:.1f}x faster)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,7 +9,7 @@ The service provides a read-only interface to access the database structure and
 
 import csv
 import math
-from typing import IO, Any, Dict, List, Optional, Union
+from typing import IO, Any, Dict, List, Optional, Tuple, Union
 
 from pydantic import BaseModel, Field
 
@@ -124,38 +124,24 @@ class DatabaseViewerService:
                 )
             return schema
 
-    def get_table_data(
+    def _build_table_query(
         self,
+        *,
         table_name: str,
-        page: int = 1,
-        page_size: int = 50,
-        sort_by: Optional[str] = None,
-        sort_order: str = "asc",
-        filter_column: Optional[str] = None,
-        filter_value: Optional[str] = None,
-    ) -> Dict[str, Any]:
-        """Fetch table data with pagination, sorting, and filtering.
-
-        Args:
-            table_name: Name of the table to query.
-            page: Page number (1-based).
-            page_size: Number of rows per page.
-            sort_by: Column to sort by.
-            sort_order: Sort direction ('asc' or 'desc').
-            filter_column: Column to filter on.
-            filter_value: Value to filter by (uses LIKE %value%).
+        sort_by: Optional[str],
+        sort_order: str,
+        filter_column: Optional[str],
+        filter_value: Optional[str],
+    ) -> Tuple[List[str], str, List[Any], str]:
+        """Validate the viewer parameters and build the unpaginated SELECT.
 
         Returns:
-            Dict containing columns, rows, pagination info, etc.
+            (columns, query, params, where_clause) for the filtered, sorted table.
 
         Raises:
             TableNotFoundError: If table doesn't exist.
             InvalidParameterError: If invalid parameters are provided.
         """
-        # Input validation
-        if page < 1:
-            raise InvalidParameterError("Page number must be at least 1")
-
         if sort_order not in ("asc", "desc"):
             raise InvalidParameterError("Sort order must be 'asc' or 'desc'")
 
@@ -180,7 +166,7 @@ class DatabaseViewerService:
             )
 
         # Build query
-        base_query = f"SELECT * FROM {table_name}"
+        query_parts = [f"SELECT * FROM {table_name}"]
         params: List[Any] = []
 
         # Add WHERE clause if filtering
@@ -188,25 +174,57 @@ class DatabaseViewerService:
         if filter_column and filter_value is not None:
             where_clause = f"WHERE {filter_column} LIKE ?"
             params.append(f"%{filter_value}%")
+            query_parts.append(where_clause)
 
         # Add ORDER BY clause if sorting
-        order_clause = ""
         if sort_by:
-            order_clause = f"ORDER BY {sort_by} {sort_order.upper()}"
+            query_parts.append(f"ORDER BY {sort_by} {sort_order.upper()}")
 
-        # Calculate pagination
-        offset = (page - 1) * page_size
-        limit_clause = "LIMIT ? OFFSET ?"
+        return columns, " ".join(query_parts), params, where_clause
 
-        # Construct full query with all clauses
-        query_parts = [base_query]
-        if where_clause:
-            query_parts.append(where_clause)
-        if order_clause:
-            query_parts.append(order_clause)
-        query_parts.append(limit_clause)
+    def get_table_data(
+        self,
+        table_name: str,
+        page: int = 1,
+        page_size: int = 50,
+        sort_by: Optional[str] = None,
+        sort_order: str = "asc",
+        filter_column: Optional[str] = None,
+        filter_value: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Fetch table data with pagination, sorting, and filtering.
+
+        Args:
+            table_name: Name of the table to query.
+            page: Page number (1-based).
+            page_size: Number of rows per page.
+            sort_by: Column to sort by.
+            sort_order: Sort direction ('asc' or 'desc').
+            filter_column: Column to filter on.
+            filter_value: Value to filter by (uses LIKE %value%).
+
+        Returns:
+            Dict containing columns, rows, pagination info, etc.
 
-        query = " ".join(query_parts)
+        Raises:
+            TableNotFoundError: If table doesn't exist.
+            InvalidParameterError: If invalid parameters are provided.
+        """
+        # Input validation
+        if page < 1:
+            raise InvalidParameterError("Page number must be at least 1")
+
+        columns, base_query, params, where_clause = self._build_table_query(
+            table_name=table_name,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            filter_column=filter_column,
+            filter_value=filter_value,
+        )
+
+        # Calculate pagination
+        offset = (page - 1) * page_size
+        query = f"{base_query} LIMIT ? OFFSET ?"
         params.extend([page_size, offset])
 
         # Execute query to get page data
@@ -260,17 +278,15 @@ class DatabaseViewerService:
             TableNotFoundError: If table doesn't exist.
             InvalidParameterError: If invalid parameters are provided.
         """
-        # Get table data without pagination to export all rows
-        table_data = self.get_table_data(
+        columns, query, params, _ = self._build_table_query(
             table_name=table_name,
-            page=1,
-            page_size=1000000,  # Large number to get all rows
+            sort_by=None,
+            sort_order="asc",
             filter_column=filter_column,
             filter_value=filter_value,
         )
-
-        columns = table_data["columns"]
-        rows = table_data["rows"]
+        # Stream rows through a server-side cursor instead of loading the whole table
+        rows = self.db_manager.iter_rows(query=query, params=tuple(params), batch_size=5000)
 
         # Determine if we need to open a file or use the provided file-like object
         close_file = False
@@ -0,0 +1,159 @@
+"""Tests for the ConnectionPool used by DatabaseManager.
+
+These tests exercise checkout, release, bounding, reaping, and statistics with
+lightweight fake connections, so they do not require a running PostgreSQL.
+"""
+
+import threading
+from typing import List
+
+import pytest
+
+from db.connection_pool import ConnectionPool
+from db.database_manager import ConnectionProtocol
+from db.exceptions import DBConnectionError
+
+
+class FakeConnection:
+    """Minimal connection double tracking close/rollback calls."""
+
+    def __init__(self) -> None:
+        self.closed = False
+        self.rollbacks = 0
+        self.autocommit = True
+
+    def rollback(self) -> None:
+        self.rollbacks += 1
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class FakeFactory:
+    """Factory producing FakeConnection instances and remembering them."""
+
+    def __init__(self) -> None:
+        self.created: List[FakeConnection] = []
+
+    def __call__(self) -> ConnectionProtocol:
+        conn = FakeConnection()
+        self.created.append(conn)
+        return conn  # type: ignore[return-value]
+
+
+class TestConnectionPool:
+    """Behavioral tests for ConnectionPool."""
+
+    def test_acquire_creates_lazily_and_reuses_released(self) -> None:
+        factory = FakeFactory()
+        pool = ConnectionPool(factory=factory, max_size=2)
+        assert factory.created == []
+
+        conn = pool.acquire()
+        pool.release(conn)
+        again = pool.acquire()
+
+        assert again is conn
+        assert len(factory.created) == 1
+        stats = pool.stats()
+        assert stats.total_checkouts == 2
+        assert stats.in_use_connections == 1
+        assert stats.idle_connections == 0
+
+    def test_pool_is_bounded_and_times_out(self) -> None:
+        factory = FakeFactory()
+        pool = ConnectionPool(factory=factory, max_size=1, acquire_timeout_s=0.05)
+        pool.acquire()
+
+        with pytest.raises(DBConnectionError):
+            pool.acquire()
+        assert len(factory.created) == 1
+
+    def test_waiting_thread_receives_released_connection(self) -> None:
+        factory = FakeFactory()
+        pool = ConnectionPool(factory=factory, max_size=1)
+        first = pool.acquire()
+        received: List[object] = []
+
+        def worker() -> None:
+            received.append(pool.acquire(timeout_s=5))
+
+        t = threading.Thread(target=worker)
+        t.start()
+        pool.release(first)
+        t.join(timeout=5)
+
+        assert received == [first]
+        assert pool.stats().total_waits == 1
+
+    def test_release_rolls_back_open_transaction(self) -> None:
+        factory = FakeFactory()
+        pool = ConnectionPool(factory=factory, max_size=1)
+        conn = pool.acquire()
+        conn.autocommit = False
+
+        pool.release(conn)
+
+        fake = factory.created[0]
+        assert fake.rollbacks == 1
+        assert fake.autocommit is True
+
+    def test_release_with_discard_closes_connection(self) -> None:
+        factory = FakeFactory()
+        pool = ConnectionPool(factory=factory, max_size=1)
+        conn = pool.acquire()
+
+        pool.release(conn, discard=True)
+
+        assert factory.created[0].closed
+        assert pool.stats().open_connections == 0
+
+    def test_reap_idle_closes_expired_connections(self) -> None:
+        factory = FakeFactory()
+        pool = ConnectionPool(factory=factory, max_size=2, idle_timeout_s=10.0)
+        a = pool.acquire()
+        b = pool.acquire()
+        pool.release(a)
+        pool.release(b)
+
+        assert pool.reap_idle() == 0
+        reaped = pool.reap_idle(now=1e12)
+
+        assert reaped == 2
+        assert all(c.closed for c in factory.created)
+        stats = pool.stats()
+        assert stats.total_reaped == 2
+        assert stats.open_connections == 0
+
+    def test_close_all_rejects_new_checkouts(self) -> None:
+        factory = FakeFactory()
+        pool = ConnectionPool(factory=factory, max_size=2)
+        idle = pool.acquire()
+        busy = pool.acquire()
+        pool.release(idle)
+
+        pool.close_all()
+
+        assert factory.created[0].closed
+        with pytest.raises(DBConnectionError):
+            pool.acquire()
+        pool.release(busy)
+        assert factory.created[1].closed
+
+    def test_factory_failure_frees_capacity(self) -> None:
+        calls = {"n": 0}
+
+        def flaky() -> ConnectionProtocol:
+            calls["n"] += 1
+            if calls["n"] == 1:
+                raise RuntimeError("boom")
+            return FakeConnection()  # type: ignore[return-value]
+
+        pool = ConnectionPool(factory=flaky, max_size=1)
+        with pytest.raises(DBConnectionError):
+            pool.acquire()
+        assert pool.acquire() is not None
+
+    def test_invalid_max_size(self) -> None:
+        with pytest.raises(ValueError):
+            ConnectionPool(factory=FakeFactory(), max_size=0)
@@ -4,19 +4,23 @@ This module contains comprehensive tests for the DatabaseManager class,
 verifying its functionality, error handling, and edge cases.
 """
 
+from datetime import datetime
 from typing import Any, Dict, Iterable, Optional, TextIO, cast
 
 import pytest
 
-from db.database_manager import BulkMethod, ConnectionType, DatabaseManager
+from db.database_manager import BulkMethod, ConnectionType, DatabaseManager, Migration
 from db.database_manager import CursorProtocol as DBCursorProtocol
 from db.exceptions import (
     ConstraintError,
+    DatabaseTypeError,
     DBConnectionError,
     ForeignKeyError,
     SchemaError,
     TableNotFoundError,
 )
+from db.index_manager import IndexManager
+from db.row_formats import RowFormat
 
 # Import test constants from global conftest
 from tests.conftest import TEST_DATA, TEST_TABLE_NAME
@@ -142,6 +146,327 @@ class TestDatabaseOperations:
         assert results == []
 
 
+class TestConnectionPooling:
+    """Test cases for pooled connections checked out via DatabaseManager.connection()."""
+
+    @staticmethod
+    def _pooled_manager(postgres_connection: Dict[str, str | int], pool_size: int) -> DatabaseManager:
+        return DatabaseManager(
+            host=str(postgres_connection["host"]),
+            port=int(postgres_connection["port"]),
+            database=str(postgres_connection["database"]),
+            username=str(postgres_connection["user"]),
+            password=str(postgres_connection["password"]),
+            connection_type=ConnectionType.POSTGRESS_DOCKER,
+            pool_size=pool_size,
+        )
+
+    def test_pooling_disabled_by_default(self, db_manager: DatabaseManager) -> None:
+        assert db_manager.pool_stats() is None
+        with db_manager.connection():
+            result = db_manager.fetchone(query="SELECT 1 AS v")
+        assert result is not None and result["v"] == 1
+
+    def test_dedicated_connection_without_pool(self, db_manager: DatabaseManager) -> None:
+        import threading
+
+        assert db_manager.pool_stats() is None
+        main_row = db_manager.fetchone(query="SELECT pg_backend_pid() AS pid")
+        assert main_row is not None
+        pids: list[object] = []
+        errors: list[BaseException] = []
+
+        def worker() -> None:
+            try:
+                with db_manager.connection(dedicated=True):
+                    with db_manager.transaction():
+                        row = db_manager.fetchone(query="SELECT pg_backend_pid() AS pid")
+                        assert row is not None
+                        pids.append(row["pid"])
+            except BaseException as exc:  # pragma: no cover - surfaced below
+                errors.append(exc)
+
+        t = threading.Thread(target=worker)
+        t.start()
+        t.join(timeout=30)
+
+        assert errors == []
+        assert pids and pids[0] != main_row["pid"]
+        # The shared connection was never touched by the worker's transaction
+        assert db_manager._require_connection().autocommit is True
+
+    def test_threads_use_distinct_pooled_connections(
+        self, postgres_connection: Dict[str, str | int]
+    ) -> None:
+        import threading
+
+        db = self._pooled_manager(postgres_connection, pool_size=2)
+        try:
+            barrier = threading.Barrier(2)
+            pids: list[object] = []
+            errors: list[BaseException] = []
+
+            def worker() -> None:
+                try:
+                    with db.connection():
+                        row = db.fetchone(query="SELECT pg_backend_pid() AS pid")
+                        assert row is not None
+                        pids.append(row["pid"])
+                        barrier.wait(timeout=10)
+                except BaseException as exc:  # pragma: no cover - surfaced below
+                    errors.append(exc)
+
+            threads = [threading.Thread(target=worker) for _ in range(2)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join(timeout=30)
+
+            assert errors == []
+            assert len(set(pids)) == 2
+            main_row = db.fetchone(query="SELECT pg_backend_pid() AS pid")
+            assert main_row is not None and main_row["pid"] not in pids
+
+            stats = db.pool_stats()
+            assert stats is not None
+            assert stats.total_created == 2
+            assert stats.in_use_connections == 0
+            assert stats.idle_connections == 2
+        finally:
+            db.close()
+
+    def test_nested_connection_scopes_reuse_pinned_connection(
+        self, postgres_connection: Dict[str, str | int]
+    ) -> None:
+        db = self._pooled_manager(postgres_connection, pool_size=1)
+        try:
+            with db.connection() as outer:
+                with db.connection() as inner:
+                    assert inner is outer
+            stats = db.pool_stats()
+            assert stats is not None
+            assert stats.total_checkouts == 1
+        finally:
+            db.close()
+
+
+class TestTransactions:
+    """Test cases for the DatabaseManager.transaction() unit of work."""
+
+    def _count(self, db: DatabaseManager) -> int:
+        row = db.fetchone(query=f"SELECT COUNT(*) AS c FROM {TEST_TABLE_NAME}")
+        assert row is not None
+        return int(cast(int, row["c"]))
+
+    def test_transaction_commits_once_on_success(self, initialized_db: DatabaseManager) -> None:
+        before = initialized_db.transaction_stats().commits
+        with initialized_db.transaction() as tx:
+            initialized_db.execute(
+                query=f"INSERT INTO {TEST_TABLE_NAME} (id, name) VALUES (?, ?)",
+                params=(10, "Tx1"),
+            )
+            initialized_db.execute_many(
+                query=f"INSERT INTO {TEST_TABLE_NAME} (id, name) VALUES (?, ?)",
+                params_seq=[(11, "Tx2"), (12, "Tx3")],
+            )
+        assert self._count(initialized_db) == len(TEST_DATA) + 3
+        assert tx.commit_ms is not None and tx.commit_ms >= 0.0
+        assert initialized_db.transaction_stats().commits == before + 1
+
+    def test_transaction_rolls_back_on_error(self, initialized_db: DatabaseManager) -> None:
+        with pytest.raises(RuntimeError):
+            with initialized_db.transaction():
+                initialized_db.execute(
+                    query=f"INSERT INTO {TEST_TABLE_NAME} (id, name) VALUES (?, ?)",
+                    params=(20, "Gone"),
+                )
+                raise RuntimeError("abort unit of work")
+        assert self._count(initialized_db) == len(TEST_DATA)
+        # Connection is back in autocommit mode afterwards
+        initialized_db.execute(
+            query=f"INSERT INTO {TEST_TABLE_NAME} (id, name) VALUES (?, ?)",
+            params=(21, "After"),
+        )
+        assert self._count(initialized_db) == len(TEST_DATA) + 1
+
+    def test_nested_savepoint_rollback_keeps_outer_work(
+        self, initialized_db: DatabaseManager
+    ) -> None:
+        with initialized_db.transaction():
+            initialized_db.execute(
+                query=f"INSERT INTO {TEST_TABLE_NAME} (id, name) VALUES (?, ?)",
+                params=(30, "Outer"),
+            )
+            with pytest.raises(ConstraintError):
+                with initialized_db.transaction() as inner:
+                    assert inner.savepoint is not None
+                    initialized_db.execute(
+                        query=f"INSERT INTO {TEST_TABLE_NAME} (id, name) VALUES (?, ?)",
+                        params=(31, None),
+                    )
+            initialized_db.execute(
+                query=f"INSERT INTO {TEST_TABLE_NAME} (id, name) VALUES (?, ?)",
+                params=(32, "Outer2"),
+            )
+        rows = initialized_db.fetchall(
+            query=f"SELECT id FROM {TEST_TABLE_NAME} WHERE id >= 30 ORDER BY id"
+        )
+        assert [r["id"] for r in rows] == [30, 32]
+
+
+class TestCopyRows:
+    """Test cases for the streaming DatabaseManager.copy_rows() writer."""
+
+    def test_copy_rows_streams_generator(self, initialized_db: DatabaseManager) -> None:
+        def rows() -> Iterable[tuple[object, ...]]:
+            for i in range(100, 350):
+                yield (i, f"copy\t{i}")
+
+        result = initialized_db.copy_rows(
+            table=TEST_TABLE_NAME, columns=["id", "name"], rows=rows(), chunk_rows=100
+        )
+
+        assert result.rows == 250
+        assert result.chunks == 3
+        assert result.rows_per_sec > 0
+        row = initialized_db.fetchone(
+            query=f"SELECT name FROM {TEST_TABLE_NAME} WHERE id = ?", params=(101,)
+        )
+        assert row is not None and row["name"] == "copy\t101"
+
+    def test_copy_rows_joins_transaction(self, initialized_db: DatabaseManager) -> None:
+        with pytest.raises(RuntimeError):
+            with initialized_db.transaction():
+                initialized_db.copy_rows(
+                    table=TEST_TABLE_NAME, columns=["id", "name"], rows=[(400, "Gone")]
+                )
+                raise RuntimeError("abort unit of work")
+        row = initialized_db.fetchone(
+            query=f"SELECT COUNT(*) AS c FROM {TEST_TABLE_NAME} WHERE id = ?", params=(400,)
+        )
+        assert row is not None and row["c"] == 0
+
+    def test_copy_rows_rejects_bad_input(self, initialized_db: DatabaseManager) -> None:
+        with pytest.raises(DatabaseTypeError):
+            initialized_db.copy_rows(table="bad;name", columns=["id"], rows=[(1,)])
+        with pytest.raises(DatabaseTypeError):
+            initialized_db.copy_rows(
+                table=TEST_TABLE_NAME, columns=["id", "name"], rows=[(500,)]
+            )
+
+
+class TestIterRows:
+    """Test cases for the server-side-cursor DatabaseManager.iter_rows() reader."""
+
+    def _open_cursors(self, db: DatabaseManager) -> int:
+        row = db.fetchone(query="SELECT COUNT(*) AS c FROM pg_cursors WHERE name LIKE 'iter_rows_%'")
+        assert row is not None
+        return int(cast(int, row["c"]))
+
+    def test_iter_rows_streams_in_batches(self, initialized_db: DatabaseManager) -> None:
+        initialized_db.copy_rows(
+            table=TEST_TABLE_NAME,
+            columns=["id", "name"],
+            rows=[(i, f"row{i}") for i in range(1000, 1250)],
+        )
+        rows = list(
+            initialized_db.iter_rows(
+                query=f"SELECT id, name FROM {TEST_TABLE_NAME} WHERE id >= ? ORDER BY id",
+                params=(1000,),
+                batch_size=64,
+            )
+        )
+        assert len(rows) == 250
+        assert rows[0] == {"id": 1000, "name": "row1000"}
+        assert self._open_cursors(initialized_db) == 0
+
+    def test_iter_rows_early_stop_closes_cursor(self, initialized_db: DatabaseManager) -> None:
+        rows = initialized_db.iter_rows(query=f"SELECT id FROM {TEST_TABLE_NAME} ORDER BY id", batch_size=1)
+        assert next(rows)["id"] == TEST_DATA[0][0]
+        assert self._open_cursors(initialized_db) == 1
+        rows.close()
+        assert self._open_cursors(initialized_db) == 0
+
+    def test_iter_rows_survives_writes_while_iterating(self, initialized_db: DatabaseManager) -> None:
+        seen = []
+        for row in initialized_db.iter_rows(
+            query=f"SELECT id FROM {TEST_TABLE_NAME} ORDER BY id", batch_size=1
+        ):
+            seen.append(row["id"])
+            initialized_db.execute(
+                query=f"INSERT INTO {TEST_TABLE_NAME} (id, name) VALUES (?, ?)",
+                params=(2000 + int(cast(int, row["id"])), "written"),
+            )
+        assert seen == [r[0] for r in sorted(TEST_DATA)]
+
+    def test_iter_rows_inside_transaction(self, initialized_db: DatabaseManager) -> None:
+        with initialized_db.transaction():
+            initialized_db.execute(
+                query=f"INSERT INTO {TEST_TABLE_NAME} (id, name) VALUES (?, ?)",
+                params=(3000, "Uncommitted"),
+            )
+            ids = [r["id"] for r in initialized_db.iter_rows(query=f"SELECT id FROM {TEST_TABLE_NAME}")]
+        assert 3000 in ids
+
+
+class TestRowFormats:
+    """Test cases for the row_format option of the fetch methods."""
+
+    QUERY = f"SELECT id, name FROM {TEST_TABLE_NAME} ORDER BY id"
+
+    def test_fetchall_tuples(self, initialized_db: DatabaseManager) -> None:
+        rows = initialized_db.fetchall(query=self.QUERY, row_format=RowFormat.TUPLE)
+        assert rows == [(r[0], r[1]) for r in TEST_DATA]
+
+    def test_fetchall_namedtuples(self, initialized_db: DatabaseManager) -> None:
+        rows = initialized_db.fetchall(query=self.QUERY, row_format=RowFormat.NAMEDTUPLE)
+        assert [(r.id, r.name) for r in rows] == [(r[0], r[1]) for r in TEST_DATA]
+
+    def test_fetchall_columns(self, initialized_db: DatabaseManager) -> None:
+        cols = initialized_db.fetchall(query=self.QUERY, row_format=RowFormat.COLUMNS)
+        assert cols == {"id": [r[0] for r in TEST_DATA], "name": [r[1] for r in TEST_DATA]}
+
+    def test_fetchone_and_fetchmany_formats(self, initialized_db: DatabaseManager) -> None:
+        assert initialized_db.fetchone(query=self.QUERY, row_format=RowFormat.TUPLE) == TEST_DATA[0][:2]
+        rows = initialized_db.fetchmany(self.QUERY, size=2, row_format=RowFormat.NAMEDTUPLE)
+        assert [r.name for r in rows] == [TEST_DATA[0][1], TEST_DATA[1][1]]
+        with pytest.raises(ValueError):
+            initialized_db.fetchone(query=self.QUERY, row_format=RowFormat.COLUMNS)
+
+    def test_iter_rows_tuples(self, initialized_db: DatabaseManager) -> None:
+        rows = list(initialized_db.iter_rows(query=self.QUERY, batch_size=2, row_format=RowFormat.TUPLE))
+        assert rows == [(r[0], r[1]) for r in TEST_DATA]
+
+
+class TestQueryStats:
+    """Test cases for query instrumentation and the slow-query log."""
+
+    def test_statements_are_counted_per_fingerprint(self, initialized_db: DatabaseManager) -> None:
+        initialized_db.reset_query_stats()
+        for i in range(3):
+            initialized_db.fetchall(query=f"SELECT id FROM {TEST_TABLE_NAME} WHERE id > {i}")
+        stats = initialized_db.query_stats(order_by="calls")
+        select = next(s for s in stats if s.fingerprint.startswith("SELECT id FROM"))
+        assert select.fingerprint == f"SELECT id FROM {TEST_TABLE_NAME} WHERE id > ?"
+        assert select.calls == 3
+        assert select.rows == 3 + 2 + 1
+        assert "SELECT id FROM" in initialized_db.query_stats_report()
+
+    def test_slow_select_captures_explain_analyze(self, initialized_db: DatabaseManager) -> None:
+        recorder = initialized_db._query_recorder  # pyright: ignore[reportPrivateUsage]
+        assert recorder is not None
+        recorder.slow_query_ms = 0.0
+        initialized_db.fetchone(query=f"SELECT name FROM {TEST_TABLE_NAME} WHERE id = ?", params=(1,))
+        slow = initialized_db.slow_queries()[-1]
+        assert slow.plan is not None and "actual time" in slow.plan
+
+    def test_failed_statements_count_as_errors(self, initialized_db: DatabaseManager) -> None:
+        with pytest.raises(TableNotFoundError):
+            initialized_db.execute(query="SELECT * FROM no_such_table_for_stats")
+        stat = next(s for s in initialized_db.query_stats() if "no_such_table_for_stats" in s.fingerprint)
+        assert stat.errors == 1
+
+
 class TestErrorHandling:
     """Test cases for error handling in DatabaseManager."""
 
@@ -430,11 +755,15 @@ class TestInitTables:
         "snippet_parts",
         "practice_sessions",
         "session_keystrokes",
+        "session_keystroke_blobs",
         "session_ngram_speed",
         "session_ngram_errors",
         "ngram_speed_summary_curr",
         "ngram_speed_summary_hist",
         "session_ngram_summary",
+        "session_summary_ledger",
+        "ngram_speed_state",
+        "session_target_rollup",
         "users",
         "keyboards",
         "settings",
@@ -443,6 +772,7 @@ class TestInitTables:
         "keysets_history",
         "keyset_keys",
         "keyset_keys_history",
+        "schema_migrations",
     }
 
     def test_init_tables_creates_all_expected_tables(self, db_manager: DatabaseManager) -> None:
@@ -610,6 +940,187 @@ class TestInitTables:
         assert db_manager.table_exists(table_name="table-with-dashes")
 
 
+class TestSchemaMigrations:
+    """Test cases for the versioned migration runner behind init_tables()."""
+
+    def test_init_records_latest_version(self, db_manager: DatabaseManager) -> None:
+        assert db_manager.schema_version() == 0
+        applied = db_manager.migrate()
+        assert sorted(applied) == list(range(1, db_manager.latest_schema_version() + 1))
+        # Online (index) migrations run after the transactional ones
+        online = [m.version for m in db_manager._migrations() if m.online]  # pyright: ignore[reportPrivateUsage]
+        assert applied[-len(online):] == online
+        assert db_manager.schema_version() == db_manager.latest_schema_version()
+
+    def test_current_schema_skips_ddl(self, db_manager: DatabaseManager) -> None:
+        db_manager.init_tables()
+        db_manager.execute(query="DROP TABLE words")
+        assert db_manager.migrate() == []
+        assert not db_manager.table_exists(table_name="words")
+
+        db_manager.init_tables(force=True)
+        assert db_manager.table_exists(table_name="words")
+
+    def test_only_pending_migrations_run(self, db_manager: DatabaseManager, monkeypatch: pytest.MonkeyPatch) -> None:
+        db_manager.init_tables()
+        latest = db_manager.latest_schema_version()
+        base = db_manager._migrations  # pyright: ignore[reportPrivateUsage]
+        extra = Migration(
+            version=latest + 1,
+            description="test step",
+            apply=lambda: db_manager._execute_ddl(  # pyright: ignore[reportPrivateUsage]
+                query="CREATE TABLE IF NOT EXISTS migration_probe (id INTEGER)"
+            ),
+        )
+        monkeypatch.setattr(db_manager, "_migrations", lambda: [*base(), extra])
+
+        assert db_manager.migrate() == [latest + 1]
+        assert db_manager.table_exists(table_name="migration_probe")
+        assert db_manager.migrate() == []
+
+    def test_failed_migration_rolls_back_the_run(
+        self, db_manager: DatabaseManager, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        def broken() -> None:
+            db_manager._execute_ddl(query="CREATE TABLE half_done (id INTEGER)")  # pyright: ignore[reportPrivateUsage]
+            raise RuntimeError("migration failed")
+
+        base = db_manager._migrations  # pyright: ignore[reportPrivateUsage]
+        monkeypatch.setattr(
+            db_manager, "_migrations", lambda: [*base(), Migration(version=999, description="broken", apply=broken)]
+        )
+        with pytest.raises(RuntimeError):
+            db_manager.init_tables()
+        assert db_manager.schema_version() == 0
+        assert db_manager.list_tables() == []
+
+    def test_online_migration_runs_after_the_transaction(
+        self, db_manager: DatabaseManager, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        seen: list[bool] = []
+
+        def online_step() -> None:
+            conn = db_manager._require_connection()  # pyright: ignore[reportPrivateUsage]
+            seen.append(db_manager._in_transaction(conn))  # pyright: ignore[reportPrivateUsage]
+
+        base = db_manager._migrations  # pyright: ignore[reportPrivateUsage]
+        online = Migration(version=900, description="online step", apply=online_step, online=True)
+        monkeypatch.setattr(db_manager, "_migrations", lambda: [*base(), online])
+
+        assert db_manager.migrate()[-1] == 900
+        assert seen == [False]
+        assert db_manager.migrate() == []
+
+    def test_hist_previous_values_are_backfilled(self, db_manager: DatabaseManager) -> None:
+        db_manager.init_tables()
+        db_manager.execute(
+            query="INSERT INTO users (user_id, first_name, surname, email_address) VALUES (?, ?, ?, ?)",
+            params=("u1", "Ada", "Lovelace", "ada@example.com"),
+        )
+        db_manager.execute(
+            query="INSERT INTO keyboards (keyboard_id, user_id, keyboard_name) VALUES (?, ?, ?)",
+            params=("k1", "u1", "Board"),
+        )
+        for i, avg in enumerate([300.0, 250.0, 200.0]):
+            db_manager.execute(
+                query="""
+                INSERT INTO ngram_speed_summary_hist (
+                    history_id, user_id, keyboard_id, session_id, ngram_text, ngram_size,
+                    decaying_average_ms, target_speed_ms, target_performance_pct,
+                    meets_target, sample_count, updated_dt
+                ) VALUES (?, 'u1', 'k1', ?, 'th', 2, ?, 250, 0, ?, ?, ?)
+                """,
+                params=(f"h{i}", f"s{i}", avg, int(avg <= 250), i + 1, datetime(2024, 1, 1 + i)),
+            )
+
+        db_manager._backfill_hist_previous_values()  # pyright: ignore[reportPrivateUsage]
+
+        rows = db_manager.fetchall(
+            query=(
+                "SELECT prev_decaying_average_ms, prev_sample_count, prev_meets_target "
+                "FROM ngram_speed_summary_hist ORDER BY updated_dt"
+            ),
+            row_format=RowFormat.TUPLE,
+        )
+        assert rows == [(None, None, None), (300.0, 1, 0), (250.0, 2, 1)]
+
+
+class TestDeclaredIndexes:
+    """Test cases for the declared index set and online index builds."""
+
+    HOT_PATH = (
+        "idx_practice_sessions_user_keyboard_start",
+        "idx_session_keystrokes_session",
+        "idx_ngram_summary_hist_keyboard_ngram_dt",
+        "idx_ngram_summary_hist_session",
+    )
+
+    def test_init_creates_every_declared_index(self, db_manager: DatabaseManager) -> None:
+        db_manager.init_tables()
+        existing = IndexManager(db=db_manager).existing()
+        assert all(existing.get(spec.name) for spec in db_manager.INDEXES)
+        assert db_manager.ensure_indexes() == []
+
+    def test_baseline_migration_creates_only_baseline_indexes(
+        self, db_manager: DatabaseManager, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        base = db_manager._migrations  # pyright: ignore[reportPrivateUsage]
+        monkeypatch.setattr(db_manager, "_migrations", lambda: base()[:1])
+        assert db_manager.migrate() == [1]
+        declared = {spec.name for spec in db_manager.INDEXES}
+        existing = set(IndexManager(db=db_manager).existing()) & declared
+        assert existing == {spec.name for spec in db_manager.BASELINE_INDEXES}
+
+        # An existing pre-versioning database gets the later indexes from the online steps
+        monkeypatch.setattr(db_manager, "_migrations", base)
+        db_manager.migrate()
+        assert declared <= set(IndexManager(db=db_manager).existing())
+
+    def test_dropped_index_is_rebuilt_concurrently(self, db_manager: DatabaseManager) -> None:
+        db_manager.init_tables()
+        for name in self.HOT_PATH:
+            db_manager.execute(query=f"DROP INDEX {name}")
+        assert sorted(db_manager.ensure_indexes()) == sorted(self.HOT_PATH)
+        assert set(self.HOT_PATH) <= set(IndexManager(db=db_manager).existing())
+
+    def test_ensure_inside_transaction_builds_in_place(self, db_manager: DatabaseManager) -> None:
+        db_manager.init_tables()
+        db_manager.execute(query="DROP INDEX idx_session_keystrokes_session")
+        with db_manager.transaction():
+            assert db_manager.ensure_indexes() == ["idx_session_keystrokes_session"]
+        assert IndexManager(db=db_manager).existing()["idx_session_keystrokes_session"]
+
+    def test_ngram_charset_supports_subset_filters(self, db_manager: DatabaseManager) -> None:
+        db_manager.init_tables()
+        row = db_manager.fetchone(
+            query="SELECT ngram_charset(?) AS chars, ngram_charset(?) <@ ?::text[] AS allowed",
+            params=("abca", "the", ["e", "h", "t", "x"]),
+        )
+        assert row is not None
+        assert (row["chars"], row["allowed"]) == (["a", "b", "c"], True)
+        columns = db_manager.fetchall(
+            query=(
+                "SELECT table_name FROM information_schema.columns "
+                "WHERE table_schema = ? AND column_name = 'ngram_charset' AND is_generated = 'ALWAYS' "
+                "ORDER BY table_name"
+            ),
+            params=(db_manager.SCHEMA_NAME,),
+        )
+        assert [c["table_name"] for c in columns] == ["ngram_speed_summary_curr", "session_ngram_errors"]
+
+    def test_advisor_reads_live_statistics(self, db_manager: DatabaseManager) -> None:
+        db_manager.init_tables()
+        manager = IndexManager(db=db_manager)
+        usage = {ix.name: ix for ix in manager.index_usage()}
+        assert usage["idx_session_keystrokes_session"].columns == ("session_id", "keystroke_time", "key_index")
+        assert "practice_sessions" in {t.table for t in manager.table_usage()}
+
+        workload = {"statements": [{"fingerprint": "SELECT * FROM snippet_parts WHERE part_number = %s", "calls": 3}]}
+        advice = manager.advise(declared=db_manager.INDEXES, workload=workload)
+        assert advice.missing == []
+        assert [(s.table, s.columns) for s in advice.suggestions] == [("snippet_parts", ("part_number",))]
+
+
 class TestExecuteManyHelpers:
     """Explicit unit tests for execute_many helper methods and schema qualifier."""
 
@@ -0,0 +1,95 @@
+"""Tests for the declared index specs and the index advisor.
+
+These tests exercise DDL rendering, predicate extraction and the advisor
+findings without a running PostgreSQL.
+"""
+
+from db.database_manager import DatabaseManager
+from db.index_manager import (
+    IndexSpec,
+    IndexUsage,
+    TableUsage,
+    advise_indexes,
+    format_advice,
+    statement_predicates,
+)
+
+SPEC = IndexSpec(name="idx_t_a_b", table="t", columns=("a", "b"))
+
+
+class TestIndexSpec:
+    """Rendering of the CREATE/DROP statements."""
+
+    def test_create_sql(self) -> None:
+        assert SPEC.create_sql() == "CREATE INDEX IF NOT EXISTS idx_t_a_b ON t (a, b)"
+        unique = IndexSpec(name="ux", table="t", columns=("a",), unique=True)
+        assert unique.create_sql(concurrently=True) == "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ux ON t (a)"
+        gin = IndexSpec(name="ix_chars", table="t", columns=("chars",), method="gin")
+        assert gin.create_sql() == "CREATE INDEX IF NOT EXISTS ix_chars ON t USING gin (chars)"
+
+    def test_drop_sql(self) -> None:
+        assert SPEC.drop_sql(concurrently=True) == "DROP INDEX CONCURRENTLY IF EXISTS idx_t_a_b"
+
+    def test_declared_names_are_unique(self) -> None:
+        names = [spec.name for spec in DatabaseManager.INDEXES]
+        assert len(names) == len(set(names))
+
+
+class TestStatementPredicates:
+    """Extraction of filtered columns from recorded statements."""
+
+    def test_equality_then_range(self) -> None:
+        sql = "SELECT * FROM practice_sessions WHERE start_time >= %s AND user_id = %s AND keyboard_id IN (%s, ...)"
+        assert statement_predicates(sql) == {"practice_sessions": ("user_id", "keyboard_id", "start_time")}
+
+    def test_aliases_and_joins(self) -> None:
+        sql = (
+            "SELECT 1 FROM ngram_speed_summary_hist AS h JOIN typing.practice_sessions ps "
+            "ON h.session_id = ps.session_id WHERE h.keyboard_id = %s AND ps.user_id = ANY(%s::text[])"
+        )
+        assert statement_predicates(sql) == {
+            "ngram_speed_summary_hist": ("keyboard_id",),
+            "practice_sessions": ("user_id",),
+        }
+
+    def test_update_assignments_are_not_predicates(self) -> None:
+        assert statement_predicates("UPDATE users SET name = %s WHERE user_id = %s") == {"users": ("user_id",)}
+
+
+class TestAdviseIndexes:
+    """Advisor findings from catalog counters and a recorded workload."""
+
+    def test_findings(self) -> None:
+        indexes = [
+            IndexUsage(name="t_pkey", table="t", columns=("id",), scans=0, size_bytes=8192, unique=True, primary=True),
+            IndexUsage(name="idx_t_c", table="t", columns=("c",), scans=0, size_bytes=16384),
+            IndexUsage(name="idx_t_d", table="t", columns=("d",), scans=3, size_bytes=8192, valid=False),
+        ]
+        tables = [
+            TableUsage(table="t", seq_scans=50, seq_rows_read=500_000, index_scans=2, live_rows=10_000),
+            TableUsage(table="small", seq_scans=50, seq_rows_read=500, index_scans=0, live_rows=10),
+        ]
+        workload = {
+            "statements": [
+                {"fingerprint": "SELECT * FROM t WHERE e = %s", "calls": 10, "total_ms": 120.0},
+                {"fingerprint": "SELECT * FROM t WHERE a = %s", "calls": 5, "total_ms": 9.0},
+                {"fingerprint": "SELECT * FROM t WHERE c = %s", "calls": 7, "total_ms": 300.0},
+                {"fingerprint": "SELECT * FROM cte WHERE e = %s", "calls": 7, "total_ms": 300.0},
+            ]
+        }
+
+        advice = advise_indexes(declared=[SPEC], indexes=indexes, tables=tables, workload=workload)
+
+        assert [ix.name for ix in advice.unused] == ["idx_t_c"]
+        assert [ix.name for ix in advice.invalid] == ["idx_t_d"]
+        assert advice.missing == [SPEC]
+        assert [t.table for t in advice.seq_scanned] == ["t"]
+        assert [(s.table, s.columns, s.calls) for s in advice.suggestions] == [("t", ("e",), 10)]
+        text = format_advice(advice)
+        assert "idx_t_c on t(c) 16 kB" in text
+        assert "t(e): 10 calls, 120.0 ms" in text
+
+    def test_no_workload(self) -> None:
+        advice = advise_indexes(declared=[], indexes=[], tables=[])
+        assert advice.suggestions == []
+        assert "Suggested indexes for the recorded workload:\n  none" in format_advice(advice)
@@ -0,0 +1,81 @@
+"""Tests for the query counters and slow-query log used by DatabaseManager.
+
+These tests exercise aggregation, the latency histogram and report rendering
+without a running PostgreSQL.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from db.query_stats import QueryRecorder, format_report
+from db.statement_cache import fingerprint_sql
+
+
+class TestFingerprint:
+    """Statements differing only in values share a fingerprint."""
+
+    def test_literals_and_in_lists_are_normalized(self) -> None:
+        a = fingerprint_sql("SELECT * FROM t WHERE size IN (%s, %s) AND name = 'x' LIMIT 5")
+        b = fingerprint_sql("SELECT *  FROM t WHERE size IN (%s,%s,%s) AND name = 'it''s' LIMIT 10")
+        assert a == b == "SELECT * FROM t WHERE size IN (%s, ...) AND name = ? LIMIT ?"
+
+    def test_identifiers_with_digits_are_kept(self) -> None:
+        assert fingerprint_sql("SELECT col2 FROM t1") == "SELECT col2 FROM t1"
+
+
+class TestQueryRecorder:
+    """Aggregation, histogram percentiles and the slow-query log."""
+
+    def test_counters_aggregate_per_fingerprint(self) -> None:
+        recorder = QueryRecorder()
+        for ms in (1.5, 3.0, 40.0):
+            recorder.record(fingerprint="SELECT ?", kind="SELECT", elapsed_ms=ms, rows=2)
+        recorder.record(fingerprint="SELECT ?", kind="SELECT", elapsed_ms=0.2, error=True)
+        recorder.record(fingerprint="INSERT", kind="INSERT", elapsed_ms=100.0, rows=10)
+
+        by_total = recorder.stats()
+        assert [s.fingerprint for s in by_total] == ["INSERT", "SELECT ?"]
+        select = recorder.stats(order_by="calls", top=1)[0]
+        assert (select.calls, select.errors, select.rows) == (4, 1, 6)
+        assert select.total_ms == pytest.approx(44.7)
+        assert (select.min_ms, select.max_ms) == (0.2, 40.0)
+        assert select.percentile_ms(50) == 2.0
+        assert select.p95_ms == 40.0
+
+    def test_unknown_order_by_is_rejected(self) -> None:
+        with pytest.raises(ValueError):
+            QueryRecorder().stats(order_by="nope")
+
+    def test_slow_queries_request_a_plan_once_per_cooldown(self) -> None:
+        recorder = QueryRecorder(slow_query_ms=10.0, explain_cooldown_s=60.0)
+        assert not recorder.record(fingerprint="q", kind="SELECT", elapsed_ms=5.0)
+        assert recorder.record(fingerprint="q", kind="SELECT", elapsed_ms=15.0)
+        assert not recorder.record(fingerprint="q", kind="SELECT", elapsed_ms=20.0)
+        assert recorder.is_slow(20.0)
+        assert not recorder.is_slow(5.0)
+
+    def test_slow_query_log_is_bounded(self) -> None:
+        recorder = QueryRecorder(slow_query_ms=1.0, max_slow_queries=2)
+        for i in range(3):
+            recorder.add_slow_query(fingerprint="q", sql=f"q{i}", params=(i,), elapsed_ms=5.0, rows=1)
+        assert [q.sql for q in recorder.slow_queries()] == ["q1", "q2"]
+        recorder.reset()
+        assert recorder.slow_queries() == [] and recorder.stats() == []
+
+    def test_report_round_trips_through_json(self, tmp_path: Path) -> None:
+        recorder = QueryRecorder(slow_query_ms=1.0)
+        recorder.record(fingerprint="SELECT 1", kind="SELECT", elapsed_ms=2.0, rows=1)
+        recorder.add_slow_query(
+            fingerprint="SELECT 1", sql="SELECT 1", params=(), elapsed_ms=2.0, rows=1, plan="Result"
+        )
+        path = tmp_path / "stats" / "query_stats.json"
+        recorder.write_report(path)
+
+        report = json.loads(path.read_text(encoding="utf-8"))
+        assert report["statements"][0]["calls"] == 1
+        text = format_report(report, plans=True)
+        assert "SELECT 1" in text
+        assert "Slow queries (>= 1.0 ms)" in text
+        assert "      Result" in text
@@ -0,0 +1,79 @@
+"""Tests for the result shapes DatabaseManager fetches can return.
+
+These tests exercise row shaping and the namedtuple class cache without a
+running PostgreSQL.
+"""
+
+from typing import List, Tuple
+
+import pytest
+
+from db.row_formats import (
+    NUMPY_AVAILABLE,
+    RowFormat,
+    column_names,
+    row_class,
+    shape_row,
+    shape_rows,
+)
+
+COLUMNS = ("ngram_text", "ngram_size", "decaying_average_ms")
+ROWS: List[Tuple[object, ...]] = [("th", 2, 120.5), ("the", 3, 180.0)]
+
+
+class TestShapeRows:
+    """Whole-result and per-row shaping."""
+
+    def test_column_names_from_description(self) -> None:
+        description = [("ngram_text", 25, None), ("ngram_size", 23, None)]
+        assert column_names(description) == ("ngram_text", "ngram_size")
+
+    def test_dict_rows(self) -> None:
+        assert shape_rows(ROWS, COLUMNS, RowFormat.DICT) == [
+            {"ngram_text": "th", "ngram_size": 2, "decaying_average_ms": 120.5},
+            {"ngram_text": "the", "ngram_size": 3, "decaying_average_ms": 180.0},
+        ]
+
+    def test_tuple_rows_are_returned_untouched(self) -> None:
+        assert shape_rows(ROWS, COLUMNS, RowFormat.TUPLE) is ROWS
+
+    def test_namedtuple_rows(self) -> None:
+        rows = shape_rows(ROWS, COLUMNS, RowFormat.NAMEDTUPLE)
+        assert isinstance(rows, list)
+        assert rows[1].ngram_text == "the"
+        assert rows[1][1] == 3
+        assert tuple(rows[0]) == ROWS[0]
+
+    def test_columns(self) -> None:
+        assert shape_rows(ROWS, COLUMNS, RowFormat.COLUMNS) == {
+            "ngram_text": ["th", "the"],
+            "ngram_size": [2, 3],
+            "decaying_average_ms": [120.5, 180.0],
+        }
+
+    def test_empty_columns_keep_every_name(self) -> None:
+        assert shape_rows([], COLUMNS, RowFormat.COLUMNS) == {name: [] for name in COLUMNS}
+
+    def test_shape_row_rejects_whole_result_formats(self) -> None:
+        with pytest.raises(ValueError):
+            shape_row(ROWS[0], COLUMNS, RowFormat.COLUMNS)
+
+    @pytest.mark.skipif(not NUMPY_AVAILABLE, reason="numpy not installed")
+    def test_records(self) -> None:
+        records = shape_rows(ROWS, COLUMNS, RowFormat.RECORDS)
+        assert len(records) == 2
+        assert list(records.ngram_size) == [2, 3]
+        assert records.decaying_average_ms.sum() == pytest.approx(300.5)
+        assert records[0].ngram_text == "th"
+
+
+class TestRowClassCache:
+    """Namedtuple classes are built once per column list."""
+
+    def test_same_columns_share_a_class(self) -> None:
+        assert row_class(COLUMNS) is row_class(tuple(COLUMNS))
+        assert row_class(COLUMNS) is not row_class(COLUMNS[:2])
+
+    def test_invalid_and_duplicate_names_are_renamed(self) -> None:
+        cls = row_class(("count(*)", "id", "id"))
+        assert cls._fields == ("_0", "id", "_2")
@@ -0,0 +1,75 @@
+"""Tests for the memoized SQL translation used by DatabaseManager.
+
+These tests exercise statement translation, parsing and LRU behaviour without
+a running PostgreSQL.
+"""
+
+from db.statement_cache import StatementCache, translate_statement
+
+INSERT_SQL = "INSERT INTO session_keystrokes (keystroke_id, session_id, key_index) VALUES (?, ?, ?)"
+
+
+class TestTranslateStatement:
+    """Placeholder conversion, DDL qualification and parsed facts."""
+
+    def test_insert_is_parsed(self) -> None:
+        stmt = translate_statement(INSERT_SQL, schema="typing")
+        assert stmt.sql == INSERT_SQL.replace("?", "%s")
+        assert stmt.kind == "INSERT"
+        assert stmt.commits
+        assert stmt.table == "session_keystrokes"
+        assert stmt.columns == ("keystroke_id", "session_id", "key_index")
+        assert stmt.values_sql == "INSERT INTO session_keystrokes (keystroke_id, session_id, key_index) VALUES %s"
+
+    def test_select_does_not_commit(self) -> None:
+        stmt = translate_statement("\n  SELECT *\n  FROM users WHERE user_id = ?", schema="typing")
+        assert stmt.kind == "SELECT"
+        assert not stmt.commits
+        assert stmt.table is None
+        assert stmt.values_sql is None
+        assert stmt.debug_sql == "SELECT *   FROM users WHERE user_id = %s"
+
+    def test_ddl_is_schema_qualified(self) -> None:
+        create = translate_statement("CREATE TABLE IF NOT EXISTS t (id INT)", schema="typing")
+        drop = translate_statement("DROP TABLE IF EXISTS t;", schema="typing")
+        qualified = translate_statement("CREATE TABLE other.t (id INT)", schema="typing")
+        assert create.sql == "CREATE TABLE IF NOT EXISTS typing.t (id INT)"
+        assert drop.sql == "DROP TABLE IF EXISTS typing.t;"
+        assert qualified.sql == "CREATE TABLE other.t (id INT)"
+
+    def test_translation_is_idempotent(self) -> None:
+        once = translate_statement("CREATE TABLE t (id INT); INSERT INTO t (id) VALUES (?)", schema="typing")
+        assert translate_statement(once.sql, schema="typing") == once
+
+
+class TestStatementCache:
+    """LRU lookups, eviction and counters."""
+
+    def test_repeated_lookups_hit(self) -> None:
+        cache = StatementCache(schema="typing")
+        first = cache.get(INSERT_SQL)
+        assert cache.get(INSERT_SQL) is first
+        # The translated SQL is registered too, so bulk helpers hit as well
+        assert cache.get(first.sql) is first
+        stats = cache.stats()
+        assert (stats.hits, stats.misses) == (2, 1)
+        assert stats.hit_rate == 2 / 3
+
+    def test_least_recently_used_is_evicted(self) -> None:
+        cache = StatementCache(schema="typing", max_size=2)
+        cache.get("SELECT 1")
+        cache.get("SELECT 2")
+        cache.get("SELECT 1")
+        cache.get("SELECT 3")
+        stats = cache.stats()
+        assert (stats.size, stats.evictions) == (2, 1)
+        cache.get("SELECT 1")
+        cache.get("SELECT 2")
+        assert cache.stats().misses == 4
+
+    def test_zero_size_disables_caching(self) -> None:
+        cache = StatementCache(schema="typing", max_size=0)
+        cache.get("SELECT 1")
+        cache.get("SELECT 1")
+        stats = cache.stats()
+        assert (stats.size, stats.hits, stats.misses) == (0, 0, 2)
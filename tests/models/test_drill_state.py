@@ -0,0 +1,99 @@
+"""Tests for the incremental typing drill state and latency probe."""
+
+import random
+
+import pytest
+
+from models.drill_state import DrillState, KeystrokeLatencyProbe
+
+
+def _errors(text: str, content: str) -> list[int]:
+    return [i for i, ch in enumerate(text) if i < len(content) and ch != content[i]]
+
+
+class TestDrillState:
+    """O(1) per-keystroke updates of the drill figures."""
+
+    def test_append_and_truncate_track_error_positions(self) -> None:
+        state = DrillState(content="hello")
+        for ch in "hxlp":
+            state.append_char(ch)
+        assert state.error_positions == [1, 3]
+        assert state.error_records[0] == {"char_position": 1, "expected_char": "e", "typed_char": "x"}
+        assert state.correct_chars == 2
+
+        state.truncate(2)
+        assert state.typed_length == 2
+        assert state.error_positions == [1]
+        assert len(state.error_records) == 1
+
+    def test_characters_past_content_are_not_errors(self) -> None:
+        state = DrillState(content="ab")
+        state.resync("abcd")
+        assert state.error_positions == []
+        assert state.typed_length == 4
+
+    def test_random_edits_match_full_rescan(self) -> None:
+        content = "the quick brown fox jumps over the lazy dog"
+        state = DrillState(content=content)
+        text = ""
+        rng = random.Random(7)
+        for _ in range(500):
+            if text and rng.random() < 0.2:
+                text = text[: rng.randrange(len(text))]
+                state.truncate(len(text))
+            else:
+                ch = content[len(text) % len(content)] if rng.random() > 0.2 else "#"
+                text += ch
+                state.append_char(ch)
+            assert state.error_positions == _errors(text, content)
+        state.resync(text)
+        assert state.error_positions == _errors(text, content)
+
+    def test_apply_edit_replacing_last_character(self) -> None:
+        state = DrillState(content="hello")
+        state.apply_edit("hellx", cursor_pos=5)
+        assert state.error_positions == [4]
+
+        # Select the last character and type its replacement: same length, cursor at the end
+        state.apply_edit("hello", cursor_pos=5)
+        assert state.typed == list("hello")
+        assert state.error_positions == []
+
+        # Select the last two characters and type one wrong one
+        state.apply_edit("helx", cursor_pos=4)
+        assert state.typed == list("helx")
+        assert state.error_positions == [3]
+
+        state.apply_edit("hel", cursor_pos=3)
+        state.apply_edit("", cursor_pos=0)
+        assert state.typed_length == 0 and state.error_positions == []
+
+    def test_record_keystroke_totals(self) -> None:
+        state = DrillState(content="abc")
+        state.record_keystroke(is_error=False, is_backspace=False, interval_ms=-1)
+        state.record_keystroke(is_error=True, is_backspace=False, interval_ms=200)
+        state.record_keystroke(is_error=True, is_backspace=True, interval_ms=100)
+        state.record_keystroke(is_error=False, is_backspace=False, interval_ms=None)
+        assert state.accumulated_errors == 1
+        assert state.backspace_count == 1
+        assert state.avg_ms_per_keystroke == pytest.approx(150.0)
+
+
+def test_latency_probe_summary() -> None:
+    probe = KeystrokeLatencyProbe(window=4)
+    for ms in (1.0, 2.0, 3.0, 4.0, 10.0):
+        probe.record(ms)
+    summary = probe.summary()
+    assert summary["count"] == 5
+    assert summary["mean_ms"] == pytest.approx(4.0)
+    assert summary["max_ms"] == 10.0
+    # Percentiles cover the most recent window only
+    assert summary["p50_ms"] == 3.0
+    assert summary["p95_ms"] == 10.0
+
+    probe.start()
+    assert probe.stop() >= 0.0
+    assert probe.count == 6
+    probe.reset()
+    assert probe.summary()["count"] == 0
@@ -0,0 +1,135 @@
+"""Tests for the array-backed keystroke buffer behind KeystrokeCollection."""
+
+from datetime import datetime, timedelta
+
+from models.keystroke import Keystroke
+from models.keystroke_buffer import KeystrokeBuffer
+from models.keystroke_collection import KeystrokeCollection
+
+
+def _reference(keystrokes: list[Keystroke]) -> tuple[list[Keystroke], list[Keystroke]]:
+    """Raw/net lists built the way KeystrokeCollection used to build them."""
+    raw: list[Keystroke] = []
+    net: list[Keystroke] = []
+    for k in keystrokes:
+        for view in ([raw] if k.keystroke_char == "\b" else [raw, net]):
+            view.append(k.model_copy())
+            if len(view) > 1:
+                delta = view[-1].keystroke_time - view[-2].keystroke_time
+                view[-1].time_since_previous = int(delta.total_seconds() * 1000)
+            else:
+                view[-1].time_since_previous = -1
+        if k.keystroke_char == "\b" and net:
+            net.pop()
+    return raw, net
+
+
+def _keystrokes(text: str) -> list[Keystroke]:
+    start = datetime(2025, 4, 1, 10, 0, 0)
+    offsets_us = [0, 123_456, 290_000, 290_999, 1_500_001, 1_700_000, 1_700_500, 2_000_000]
+    return [
+        Keystroke(
+            session_id="s1",
+            keystroke_time=start + timedelta(microseconds=offsets_us[i % len(offsets_us)] + 2_000_000 * (i // 8)),
+            keystroke_char=ch,
+            expected_char="x" if ch == "\b" else ch,
+            is_error=ch == "\b",
+            text_index=i,
+            key_index=i,
+        )
+        for i, ch in enumerate(text)
+    ]
+
+
+class TestKeystrokeBuffer:
+    """Columnar storage and lazy Keystroke materialization."""
+
+    def test_views_match_list_based_collection(self) -> None:
+        keystrokes = _keystrokes("ab\b\bcé\bd😊\b\b\bxyz")
+        collection = KeystrokeCollection()
+        for k in keystrokes:
+            collection.add_keystroke(keystroke=k)
+
+        raw, net = _reference(keystrokes)
+        assert collection.get_raw_count() == len(raw)
+        assert collection.get_net_count() == len(net)
+        assert collection.raw_keystrokes == raw
+        assert collection.net_keystrokes == net
+
+    def test_views_stay_in_step_after_materialization(self) -> None:
+        keystrokes = _keystrokes("abc\bd")
+        collection = KeystrokeCollection()
+        collection.add_keystroke(keystroke=keystrokes[0])
+        first = collection.raw_keystrokes[0]
+        first.keystroke_id = "kept"
+        for k in keystrokes[1:]:
+            collection.add_keystroke(keystroke=k)
+
+        raw, net = _reference(keystrokes)
+        assert collection.raw_keystrokes[0] is first
+        assert [k.time_since_previous for k in collection.raw_keystrokes] == [
+            k.time_since_previous for k in raw
+        ]
+        assert collection.net_keystrokes == net
+
+    def test_record_builds_keystrokes_lazily(self) -> None:
+        collection = KeystrokeCollection()
+        base = 5_000_000_000
+        for i, (ch, dt_ns) in enumerate([("a", 0), ("b", 150_400_000), ("\b", 260_000_000), ("c", 400_000_000)]):
+            interval = collection.buffer.record(
+                session_id="s2",
+                keystroke_char=ch,
+                expected_char="c" if ch == "\b" else ch,
+                is_error=ch == "\b",
+                text_index=i,
+                key_index=i,
+                time_ns=base + dt_ns,
+            )
+            assert interval == i
+        assert collection.buffer.interval_ms(1) == 150
+        assert collection.get_raw_count() == 4
+        assert collection.get_net_count() == 2
+
+        raw = collection.raw_keystrokes
+        assert [k.time_since_previous for k in raw] == [-1, 150, 109, 140]
+        assert raw[3].keystroke_time - raw[0].keystroke_time == timedelta(milliseconds=400)
+        assert [(k.keystroke_char, k.time_since_previous) for k in collection.net_keystrokes] == [
+            ("a", -1),
+            ("c", 400),
+        ]
+
+    def test_copy_and_clear(self) -> None:
+        collection = KeystrokeCollection()
+        for k in _keystrokes("ab\bc"):
+            collection.add_keystroke(keystroke=k)
+        snapshot = collection.copy()
+        collection.clear()
+
+        assert collection.get_raw_count() == 0
+        assert collection.raw_keystrokes == []
+        assert [k.keystroke_char for k in snapshot.net_keystrokes] == ["a", "c"]
+        assert snapshot.buffer.nbytes() > 0
+
+    def test_multi_character_values_round_trip(self) -> None:
+        buffer = KeystrokeBuffer()
+        buffer.record(
+            session_id=None,
+            keystroke_char="e\u0301",
+            expected_char="",
+            is_error=True,
+            text_index=0,
+            key_index=0,
+        )
+        buffer.record(
+            session_id=None,
+            keystroke_char="\U0001f1fa\U0001f1f8",
+            expected_char="a",
+            is_error=True,
+            text_index=1,
+            key_index=1,
+        )
+        first, flag = buffer.raw_keystrokes()
+        assert first.keystroke_char == "\u00e9"  # NFC-normalized on record
+        assert first.expected_char == ""
+        assert first.session_id is None
+        assert flag.keystroke_char == "\U0001f1fa\U0001f1f8"
@@ -14,7 +14,13 @@ import pytest
 from db.database_manager import ConnectionType, DatabaseManager
 from models.keystroke import Keystroke
 from models.keystroke_collection import KeystrokeCollection
-from models.keystroke_manager import KeystrokeManager
+from models.keystroke_manager import (
+    KEYSTROKE_STORAGE_PACKED,
+    KeystrokeManager,
+    _keystrokes_from_rows,
+    decode_keystroke_blob,
+    encode_keystroke_blob,
+)
 
 
 def _build_keystroke_collection(
@@ -249,6 +255,37 @@ class TestKeystrokeManagerSaveKeystrokes:
         assert len(error_keystrokes) == 1
         assert error_keystrokes[0].keystroke_char == "b"
 
+    def test_failed_copy_falls_back_inside_transaction(
+        self,
+        db_with_tables: DatabaseManager,
+        keystroke_manager: KeystrokeManager,
+        setup_session_dependencies: str,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """A failed COPY inside a unit of work must leave it usable for the INSERT fallback."""
+        session_id = setup_session_dependencies
+        keystroke_manager.keystrokes.raw_keystrokes = [
+            Keystroke(
+                session_id=session_id,
+                keystroke_time=datetime.now(timezone.utc),
+                keystroke_char=ch,
+                expected_char=ch,
+                text_index=i,
+                key_index=i,
+            )
+            for i, ch in enumerate("abc")
+        ]
+
+        def broken_copy(**_kwargs: object) -> None:
+            # Fails on the server, aborting the current (sub)transaction
+            db_with_tables.execute(query="SELECT 1 / 0")
+
+        monkeypatch.setattr(db_with_tables, "copy_rows", broken_copy)
+        with db_with_tables.transaction():
+            assert keystroke_manager.save_keystrokes() is True
+
+        assert keystroke_manager.count_keystrokes_per_session(session_id=session_id) == 3
+
     def test_save_keystrokes_empty_collection(self, keystroke_manager: KeystrokeManager) -> None:
         """Test saving when keystroke collection is empty."""
         result = keystroke_manager.save_keystrokes()
@@ -648,6 +685,196 @@ class TestKeystrokeManagerIntegration:
         assert integration_manager.count_keystrokes_per_session(session_id=sessions[2]) == 3
 
 
+class TestKeystrokeBlobCodec:
+    """Round trips of the packed keystroke blob format (no database)."""
+
+    def test_round_trip_preserves_every_field(self) -> None:
+        base = datetime(2024, 5, 1, 8, 30, 0, 123456, tzinfo=timezone.utc)
+        keystrokes = [
+            Keystroke(
+                session_id="s",
+                keystroke_id=str(uuid.uuid4()),
+                keystroke_time=base,
+                keystroke_char="T",
+                expected_char="T",
+                time_since_previous=-1,
+                text_index=0,
+                key_index=0,
+            ),
+            Keystroke(
+                session_id="s",
+                keystroke_id="legacy-id",
+                keystroke_time=base + timedelta(microseconds=187_001),
+                keystroke_char="\u00e9",
+                expected_char="e",
+                is_error=True,
+                time_since_previous=187,
+                text_index=1,
+                key_index=1,
+            ),
+            Keystroke(
+                session_id="s",
+                keystroke_time=base + timedelta(milliseconds=90),  # out of order
+                keystroke_char="\b",
+                expected_char="",
+                is_error=True,
+                text_index=1,
+                key_index=7,
+            ),
+            Keystroke(
+                session_id="s",
+                keystroke_id=str(uuid.uuid4()),
+                keystroke_time=base + timedelta(seconds=3),
+                keystroke_char="\U0001f1fa\U0001f1f8",
+                expected_char="\U0001f600",
+                time_since_previous=2910,
+                text_index=0,
+                key_index=3,
+            ),
+        ]
+        payload = encode_keystroke_blob(keystrokes)
+        assert decode_keystroke_blob(session_id="s", payload=payload) == keystrokes
+
+    def test_packed_session_is_much_smaller_than_rows(self) -> None:
+        start = datetime(2024, 5, 1, 8, 30, 0)
+        session_id = str(uuid.uuid4())
+        text = "the quick brown fox jumps over the lazy dog " * 10
+        collection = _build_keystroke_collection(session_id, tuple(text), start)
+        keystrokes = collection.raw_keystrokes
+        for ks in keystrokes:
+            ks.keystroke_id = str(uuid.uuid4())
+
+        payload = encode_keystroke_blob(keystrokes)
+        row_text_bytes = sum(
+            len(ks.session_id or "") + len(ks.keystroke_id or "") + len(ks.keystroke_time.isoformat()) + 2
+            for ks in keystrokes
+        )
+        assert len(payload) < row_text_bytes / 3
+        assert decode_keystroke_blob(session_id=session_id, payload=payload) == keystrokes
+
+    def test_empty_and_invalid_payloads(self) -> None:
+        assert decode_keystroke_blob(session_id="s", payload=encode_keystroke_blob([])) == []
+        with pytest.raises(ValueError):
+            decode_keystroke_blob(session_id="s", payload=b"not a blob")
+
+
+class TestKeystrokeManagerPackedStorage:
+    """Packed storage layout and row-to-blob migration."""
+
+    def test_packed_save_reads_back_transparently(
+        self, db_with_tables: DatabaseManager, test_session: str
+    ) -> None:
+        collection = _build_keystroke_collection(test_session, ("a", "b", "c"), datetime(2024, 1, 1, 12))
+        manager = KeystrokeManager(db_manager=db_with_tables, storage=KEYSTROKE_STORAGE_PACKED)
+        manager.keystrokes = collection
+        assert manager.save_keystrokes() is True
+
+        reader = KeystrokeManager(db_manager=db_with_tables)
+        assert reader.get_for_session(session_id=test_session) == collection.raw_keystrokes
+        assert reader.count_keystrokes_per_session(session_id=test_session) == 3
+        assert reader.delete_keystrokes_by_session(session_id=test_session) is True
+        assert reader.get_for_session(session_id=test_session) == []
+
+    def test_pack_and_unpack_sessions(self, db_with_tables: DatabaseManager, test_session: str) -> None:
+        collection = _build_keystroke_collection(test_session, tuple("hello world"), datetime(2024, 1, 1, 12))
+        _persist_collection(db_with_tables, collection)
+        manager = KeystrokeManager(db_manager=db_with_tables)
+        before = manager.get_for_session(session_id=test_session)
+
+        stats = manager.pack_sessions(session_ids=[test_session])
+        assert stats.sessions == 1
+        assert stats.keystrokes == 11
+        assert 0 < stats.packed_bytes < stats.row_bytes
+        assert manager.count_keystrokes_per_session(session_id=test_session) == 11
+        assert manager.get_for_session(session_id=test_session) == before
+
+        assert manager.unpack_sessions(session_ids=[test_session]) == 1
+        assert manager.get_for_session(session_id=test_session) == before
+
+
+def _create_sessions(db: DatabaseManager, count: int) -> List[str]:
+    """Insert ``count`` practice sessions for one user/keyboard and return their ids."""
+    user_id = str(uuid.uuid4())
+    keyboard_id = str(uuid.uuid4())
+    category_id = str(uuid.uuid4())
+    snippet_id = str(uuid.uuid4())
+    db.execute(
+        query="INSERT INTO users (user_id, first_name, surname, email_address) VALUES (?, ?, ?, ?)",
+        params=(user_id, "Bulk", "User", f"bulk_{user_id[:8]}@example.com"),
+    )
+    db.execute(
+        query="INSERT INTO keyboards (keyboard_id, user_id, keyboard_name) VALUES (?, ?, ?)",
+        params=(keyboard_id, user_id, "Bulk Keyboard"),
+    )
+    db.execute(
+        query="INSERT INTO categories (category_id, category_name) VALUES (?, ?)",
+        params=(category_id, f"BulkCat-{category_id[:8]}"),
+    )
+    db.execute(
+        query="INSERT INTO snippets (snippet_id, category_id, snippet_name) VALUES (?, ?, ?)",
+        params=(snippet_id, category_id, f"BulkSnippet-{snippet_id[:8]}"),
+    )
+    session_ids = []
+    start = datetime.now(timezone.utc)
+    for _ in range(count):
+        session_id = str(uuid.uuid4())
+        db.execute(
+            query="INSERT INTO practice_sessions (session_id, snippet_id, user_id, keyboard_id, "
+            "snippet_index_start, snippet_index_end, content, start_time, end_time, "
+            "actual_chars, errors, ms_per_keystroke) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            params=(
+                session_id,
+                snippet_id,
+                user_id,
+                keyboard_id,
+                0,
+                5,
+                "abcde",
+                start.isoformat(),
+                (start + timedelta(minutes=1)).isoformat(),
+                5,
+                0,
+                100.0,
+            ),
+        )
+        session_ids.append(session_id)
+    return session_ids
+
+
+class TestKeystrokeManagerBulkLoad:
+    """Loading keystrokes for many sessions at once."""
+
+    def test_row_decoding_matches_from_dict(self) -> None:
+        columns = KeystrokeManager._KEYSTROKE_COLUMNS
+        rows = [
+            ("s1", str(uuid.uuid4()), "2024-01-01T12:00:00.250000", "a", "a", 0, -1, 0, 0),
+            ("s1", str(uuid.uuid4()), "2024-01-01T12:00:00.500000+00:00", "\b", "b", 1, 250, 1, 1),
+            ("s1", str(uuid.uuid4()), "2024-01-01T12:00:01Z", "e\u0301", "e", 1, None, 1, 2),
+        ]
+        expected = [Keystroke.from_dict(data=dict(zip(columns, row, strict=True))) for row in rows]
+        assert _keystrokes_from_rows(rows) == expected
+
+    def test_iter_sessions_keystrokes_mixes_layouts_in_request_order(
+        self, db_with_tables: DatabaseManager
+    ) -> None:
+        row_session, packed_session, empty_session = _create_sessions(db_with_tables, 3)
+        start = datetime(2024, 1, 1, 12, 0, 0)
+        _persist_collection(db_with_tables, _build_keystroke_collection(row_session, ("a", "b"), start))
+        packed = KeystrokeManager(db_manager=db_with_tables, storage=KEYSTROKE_STORAGE_PACKED)
+        packed.keystrokes = _build_keystroke_collection(packed_session, ("x", "y", "z"), start)
+        assert packed.save_keystrokes() is True
+
+        manager = KeystrokeManager(db_manager=db_with_tables)
+        order = [empty_session, row_session, packed_session]
+        loaded = list(manager.iter_sessions_keystrokes(session_ids=order, chunk_sessions=2, fetch_size=1))
+
+        assert [sid for sid, _ in loaded] == order
+        by_id = dict(loaded)
+        assert by_id[empty_session] == []
+        assert by_id[row_session] == manager.get_for_session(session_id=row_session)
+        assert [k.keystroke_char for k in by_id[packed_session]] == ["x", "y", "z"]
+
+
 @pytest.fixture()
 def test_session(db_with_tables: DatabaseManager) -> str:
     """Create a fully-related practice session in the Postgres test database."""
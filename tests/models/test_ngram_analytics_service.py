@@ -23,6 +23,7 @@ from models.ngram_analytics_service import (
     NGramHistoricalData,
     NGramPerformanceData,
     NGramSessionComparisonData,
+    _key_charset,  # pyright: ignore[reportPrivateUsage]
 )
 from models.ngram_manager import NGramManager
 
@@ -111,6 +112,16 @@ class TestDecayingAverageCalculator:
         assert result < 500.0
 
 
+class TestKeyCharset:
+    """Test cases for the allowed-key list bound against ngram_charset."""
+
+    def test_keys_are_sorted_and_deduplicated(self) -> None:
+        assert _key_charset("uoetnsu") == ["e", "n", "o", "s", "t", "u"]
+
+    def test_invalid_entries_are_dropped(self) -> None:
+        assert _key_charset(["a", "", " ", "ab", "]", "^"]) == ["]", "^", "a"]
+
+
 class TestNGramAnalyticsService:
     """Test the NGramAnalyticsService class."""
 
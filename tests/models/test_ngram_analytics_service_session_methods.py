@@ -11,13 +11,14 @@ as per the requirement to test database pushdown functionality.
 
 import uuid
 from datetime import datetime, timedelta
-from typing import Any, Dict, cast
+from typing import Any, Dict, List, Tuple, cast
 
 import pytest
 
 from db.database_manager import DatabaseManager
 from models.keyboard import Keyboard
-from models.ngram_analytics_service import NGramAnalyticsService
+from models.ngram_analytics_service import HistRetentionPolicy, NGramAnalyticsService
+from models.ngram_speed_state import decaying_average
 from models.user import User
 from tests.models.conftest import TestSessionMethodsFixtures
 
@@ -305,6 +306,45 @@ class TestSummarizeSessionNgrams:
         # Should return 0 since no valid data to summarize
         assert result == 0
 
+    def test_ledger_skips_summarized_sessions(
+        self, analytics_service: NGramAnalyticsService, test_data_setup: Dict[str, Any]
+    ) -> None:
+        """Summarized sessions are recorded in the ledger and not read again."""
+        db = cast(DatabaseManager, analytics_service.db)
+        s0, s1 = test_data_setup["sessions"][:2]
+        speed = [{"ngram_size": 2, "ngram_text": "th", "ngram_time_ms": 180.0, "ms_per_keystroke": 90.0}]
+        TestSessionMethodsFixtures.create_session_ngram_speed(db, s0, speed)
+
+        assert analytics_service.summarize_session_ngrams() == 1
+        first = analytics_service.last_summarize_stats
+        assert first.sessions == 1
+        assert first.speed_rows_scanned == 1
+
+        ledger = db.fetchone(
+            query="SELECT summary_rows, speed_rows_scanned FROM session_summary_ledger WHERE session_id = ?",
+            params=(s0,),
+        )
+        assert ledger is not None
+        assert int(str(ledger["summary_rows"])) == 1
+
+        # Nothing pending: no n-gram rows are read
+        assert analytics_service.summarize_session_ngrams() == 0
+        assert analytics_service.last_summarize_stats.sessions == 0
+        assert analytics_service.last_summarize_stats.speed_rows_scanned == 0
+
+        # A session without n-gram rows yet is not recorded, so it is summarized
+        # once its n-grams are persisted
+        unrecorded = db.fetchone(
+            query="SELECT 1 AS found FROM session_summary_ledger WHERE session_id = ?",
+            params=(s1,),
+        )
+        assert unrecorded is None
+        TestSessionMethodsFixtures.create_session_ngram_speed(db, s1, speed)
+        assert analytics_service.summarize_session_ngrams() == 1
+        assert analytics_service.last_summarize_stats.sessions == 1
+        # Re-running a recorded session inserts nothing
+        assert analytics_service.summarize_session_ngrams_for_session_id(s1) == 0
+
 
 class TestAddSpeedSummaryForSession:
     """Test cases for AddSpeedSummaryForSession method."""
@@ -404,6 +444,332 @@ class TestAddSpeedSummaryForSession:
         assert curr_count >= len(ngrams)
 
 
+class TestSpeedSummaryState:
+    """Incremental ngram_speed_state updates behind AddSpeedSummaryForSession."""
+
+    def _session_start(self, db: DatabaseManager, session_id: str) -> datetime:
+        row = db.fetchone(
+            query="SELECT start_time FROM practice_sessions WHERE session_id = ?",
+            params=(session_id,),
+        )
+        assert row is not None
+        return cast(datetime, row["start_time"])
+
+    def _add_summary_row(
+        self, db: DatabaseManager, setup: Dict[str, Any], session_id: str, avg_ms: float, count: int
+    ) -> None:
+        start = self._session_start(db, session_id)
+        db.execute(
+            query="""
+            INSERT INTO session_ngram_summary (
+                session_id, ngram_text, user_id, keyboard_id, ngram_size,
+                avg_ms_per_keystroke, target_speed_ms, instance_count,
+                error_count, updated_dt, session_dt
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            params=(
+                session_id, "th", setup["user_id"], setup["keyboard_id"], 2,
+                avg_ms, 600, count, 0, start, start,
+            ),
+        )
+
+    def _curr(self, db: DatabaseManager, setup: Dict[str, Any]) -> Dict[str, Any]:
+        row = db.fetchone(
+            query="""
+            SELECT decaying_average_ms, sample_count, session_id
+            FROM ngram_speed_summary_curr
+            WHERE user_id = ? AND keyboard_id = ? AND ngram_text = 'th'
+            """,
+            params=(setup["user_id"], setup["keyboard_id"]),
+        )
+        assert row is not None
+        return dict(row)
+
+    def test_incremental_state_matches_backfill(
+        self, analytics_service: NGramAnalyticsService, test_data_setup: Dict[str, Any]
+    ) -> None:
+        db = cast(DatabaseManager, analytics_service.db)
+        sessions = test_data_setup["sessions"][:3]
+        samples = [120.0, 100.0, 80.0]
+        for sid, avg in zip(sessions, samples, strict=True):
+            self._add_summary_row(db, test_data_setup, sid, avg, 4)
+            analytics_service.add_speed_summary_for_session(session_id=sid)
+
+        curr = self._curr(db, test_data_setup)
+        assert curr["session_id"] == sessions[-1]
+        assert float(curr["decaying_average_ms"]) == pytest.approx(
+            decaying_average([80.0, 100.0, 120.0]), rel=1e-5
+        )
+        assert int(curr["sample_count"]) == 12
+
+        before = db.fetchall(query="SELECT * FROM ngram_speed_state ORDER BY ngram_text")
+        assert analytics_service.backfill_speed_state() == len(before) == 1
+        after = db.fetchall(query="SELECT * FROM ngram_speed_state ORDER BY ngram_text")
+        keep = ("samples_ms", "instance_count", "last_session_id", "last_session_dt")
+        assert [{k: r[k] for k in keep} for r in after] == [{k: r[k] for k in keep} for r in before]
+
+    def test_unfolded_sessions_trigger_rebuild(
+        self, analytics_service: NGramAnalyticsService, test_data_setup: Dict[str, Any]
+    ) -> None:
+        db = cast(DatabaseManager, analytics_service.db)
+        s0, s1, s2 = test_data_setup["sessions"][:3]
+        self._add_summary_row(db, test_data_setup, s0, 120.0, 1)
+        analytics_service.add_speed_summary_for_session(session_id=s0)
+        # s1 is summarized but never folded into the state
+        self._add_summary_row(db, test_data_setup, s1, 100.0, 2)
+        self._add_summary_row(db, test_data_setup, s2, 80.0, 3)
+
+        analytics_service.add_speed_summary_for_session(session_id=s2)
+        # Re-running a session already folded in is a no-op for the state
+        analytics_service.add_speed_summary_for_session(session_id=s2)
+
+        curr = self._curr(db, test_data_setup)
+        assert float(curr["decaying_average_ms"]) == pytest.approx(
+            decaying_average([80.0, 100.0, 120.0]), rel=1e-5
+        )
+        assert int(curr["sample_count"]) == 6
+
+    def test_history_rows_link_to_previous_row(
+        self, analytics_service: NGramAnalyticsService, test_data_setup: Dict[str, Any]
+    ) -> None:
+        db = cast(DatabaseManager, analytics_service.db)
+        s0, s1, s2 = test_data_setup["sessions"][:3]
+        for sid, avg in zip((s0, s1, s2), [120.0, 100.0, 80.0], strict=True):
+            self._add_summary_row(db, test_data_setup, sid, avg, 2)
+        # s1 is summarized last and re-processed: s2 must be relinked, no duplicates
+        for sid in (s0, s2, s1, s1):
+            analytics_service.add_speed_summary_for_session(session_id=sid)
+
+        rows = db.fetchall(
+            query="""
+            SELECT session_id, decaying_average_ms, sample_count, updated_dt,
+                prev_decaying_average_ms, prev_sample_count, prev_updated_dt
+            FROM ngram_speed_summary_hist ORDER BY updated_dt
+            """
+        )
+        assert [r["session_id"] for r in rows] == [s0, s1, s2]
+        assert rows[0]["prev_updated_dt"] is None
+        for prev, row in zip(rows, rows[1:], strict=False):
+            assert row["prev_updated_dt"] == prev["updated_dt"]
+            assert int(row["prev_sample_count"]) == int(prev["sample_count"])
+            assert float(row["prev_decaying_average_ms"]) == pytest.approx(
+                float(prev["decaying_average_ms"]), rel=1e-5
+            )
+
+    def test_bulk_catchup_links_newer_row_to_latest_inserted(
+        self, analytics_service: NGramAnalyticsService, test_data_setup: Dict[str, Any]
+    ) -> None:
+        db = cast(DatabaseManager, analytics_service.db)
+        s0, s1, s2 = test_data_setup["sessions"][:3]
+        for sid, avg in zip((s0, s1, s2), [120.0, 100.0, 80.0], strict=True):
+            self._add_summary_row(db, test_data_setup, sid, avg, 2)
+        # s2 is summarized first; the two older sessions are then caught up in one chunk
+        analytics_service.add_speed_summary_for_session(session_id=s2)
+        analytics_service.bulk_catchup_speed_summary(chunk_sessions=2)
+
+        rows = db.fetchall(
+            query="""
+            SELECT session_id, sample_count, updated_dt, prev_sample_count, prev_updated_dt
+            FROM ngram_speed_summary_hist ORDER BY updated_dt
+            """
+        )
+        assert [r["session_id"] for r in rows] == [s0, s1, s2]
+        assert rows[0]["prev_updated_dt"] is None
+        for prev, row in zip(rows, rows[1:], strict=False):
+            assert row["prev_updated_dt"] == prev["updated_dt"]
+            assert row["prev_sample_count"] == prev["sample_count"]
+
+    def test_target_rollup_matches_history(
+        self, analytics_service: NGramAnalyticsService, test_data_setup: Dict[str, Any]
+    ) -> None:
+        db = cast(DatabaseManager, analytics_service.db)
+        sessions = test_data_setup["sessions"][:3]
+        for sid, avg in zip(sessions, [900.0, 700.0, 100.0], strict=True):
+            self._add_summary_row(db, test_data_setup, sid, avg, 2)
+            analytics_service.add_speed_summary_for_session(session_id=sid)
+        analytics_service.add_speed_summary_for_session(session_id=sessions[1])
+
+        rollup_query = """
+            SELECT session_id, ngram_size, meets_target, ngram_count
+            FROM session_target_rollup ORDER BY session_id, ngram_size, meets_target
+        """
+        expected = db.fetchall(
+            query="""
+            SELECT session_id, ngram_size, meets_target, COUNT(DISTINCT ngram_text) AS ngram_count
+            FROM ngram_speed_summary_hist
+            GROUP BY session_id, ngram_size, meets_target
+            ORDER BY session_id, ngram_size, meets_target
+            """
+        )
+        assert db.fetchall(query=rollup_query) == expected
+        assert analytics_service.backfill_target_rollup() == len(expected) == 3
+        assert db.fetchall(query=rollup_query) == expected
+
+        series = analytics_service.get_not_meeting_target_counts_last_n_sessions(
+            user_id=test_data_setup["user_id"], keyboard_id=test_data_setup["keyboard_id"], n_sessions=5
+        )
+        missed = {str(r["session_id"]): int(r["ngram_count"]) for r in expected if int(r["meets_target"]) == 0}
+        assert [count for _, count in series] == [missed.get(sid, 0) for sid in test_data_setup["sessions"]]
+
+    def test_missed_targets_trend_window_matches_full_history(
+        self, analytics_service: NGramAnalyticsService, test_data_setup: Dict[str, Any]
+    ) -> None:
+        db = cast(DatabaseManager, analytics_service.db)
+        keyboard_id = test_data_setup["keyboard_id"]
+        sessions = test_data_setup["sessions"]
+        for sid, avg in zip(sessions, [900.0, 700.0, 100.0, 800.0, 200.0], strict=True):
+            self._add_summary_row(db, test_data_setup, sid, avg, 2)
+            analytics_service.add_speed_summary_for_session(session_id=sid)
+
+        full = analytics_service.get_missed_targets_trend(keyboard_id, "th", 1, n_sessions=len(sessions))
+        assert len(full) == len(sessions)
+        # Older sessions only seed the state of the requested window
+        for n in (1, 2, 3):
+            assert analytics_service.get_missed_targets_trend(keyboard_id, "th", 1, n_sessions=n) == full[-n:]
+
+    def test_summary_cache_follows_session_writes(
+        self, analytics_service: NGramAnalyticsService, test_data_setup: Dict[str, Any]
+    ) -> None:
+        db = cast(DatabaseManager, analytics_service.db)
+        user_id, keyboard_id = test_data_setup["user_id"], test_data_setup["keyboard_id"]
+        s0, s1 = test_data_setup["sessions"][:2]
+        self._add_summary_row(db, test_data_setup, s0, 120.0, 2)
+        analytics_service.add_speed_summary_for_session(session_id=s0)
+
+        # A second service on the same database shares the cache
+        other = NGramAnalyticsService(db, analytics_service.ngram_manager)
+        first = other.slowest_n(n=5, keyboard_id=keyboard_id, user_id=user_id, min_occurrences=1)
+        again = analytics_service.slowest_n(n=5, keyboard_id=keyboard_id, user_id=user_id, min_occurrences=1)
+        assert [s.avg_speed for s in again] == [s.avg_speed for s in first] == [pytest.approx(120.0)]
+        stats = analytics_service.summary_cache_stats()
+        assert (stats.entries, stats.hits, stats.misses) == (1, 1, 1)
+
+        self._add_summary_row(db, test_data_setup, s1, 60.0, 2)
+        analytics_service.add_speed_summary_for_session(session_id=s1)
+        assert other.summary_cache_stats().entries == 0
+
+        after = other.slowest_n(n=5, keyboard_id=keyboard_id, user_id=user_id, min_occurrences=1)
+        assert after[0].avg_speed == pytest.approx(self._curr(db, test_data_setup)["decaying_average_ms"])
+        assert after[0].total_occurrences == 4
+
+    def test_compaction_folds_old_sessions_into_day_rows(
+        self, analytics_service: NGramAnalyticsService, test_data_setup: Dict[str, Any]
+    ) -> None:
+        db = cast(DatabaseManager, analytics_service.db)
+        keyboard_id = test_data_setup["keyboard_id"]
+        sessions = test_data_setup["sessions"]
+        # s0-s2 on one day, s3 two days later, s4 unchanged (recent)
+        for i, sid in enumerate(sessions[:4]):
+            db.execute(
+                query="UPDATE practice_sessions SET start_time = ? WHERE session_id = ?",
+                params=(datetime(2024, 1, 1 + 2 * (i // 3), 9 + i), sid),
+            )
+        for sid, avg in zip(sessions, [900.0, 700.0, 500.0, 300.0, 100.0], strict=True):
+            self._add_summary_row(db, test_data_setup, sid, avg, 2)
+            analytics_service.add_speed_summary_for_session(session_id=sid)
+        trend = analytics_service.get_missed_targets_trend(keyboard_id, "th", 1, n_sessions=2)
+        comparison = analytics_service.get_session_performance_comparison(keyboard_id, "th", 1)
+        rollup_query = "SELECT * FROM session_target_rollup ORDER BY session_id, ngram_size, meets_target"
+        rollup = db.fetchall(query=rollup_query)
+
+        policy = HistRetentionPolicy(keep_sessions=2, weekly_after_days=None)
+        assert analytics_service.compact_speed_hist(policy) == {"buckets_written": 1, "rows_removed": 2}
+        assert analytics_service.compact_speed_hist(policy) == {"buckets_written": 0, "rows_removed": 0}
+
+        rows = db.fetchall(
+            query="""
+            SELECT session_id, resolution, compacted_rows, decaying_average_ms, sample_count,
+                updated_dt, prev_decaying_average_ms, prev_sample_count, prev_updated_dt
+            FROM ngram_speed_summary_hist ORDER BY updated_dt
+            """
+        )
+        assert [(r["session_id"], r["resolution"], r["compacted_rows"]) for r in rows] == [
+            (sessions[2], "day", 3),
+            (sessions[3], "session", 1),
+            (sessions[4], "session", 1),
+        ]
+        assert rows[0]["prev_updated_dt"] is None
+        for prev, row in zip(rows, rows[1:], strict=False):
+            assert row["prev_updated_dt"] == prev["updated_dt"]
+            assert row["prev_sample_count"] == prev["sample_count"]
+
+        # Readers past the retention window see the same values
+        assert analytics_service.get_missed_targets_trend(keyboard_id, "th", 1, n_sessions=2) == trend
+        assert analytics_service.get_session_performance_comparison(keyboard_id, "th", 1) == comparison
+        history = analytics_service.get_ngram_history(test_data_setup["user_id"], keyboard_id, "th")
+        assert sorted(h.resolution for h in history) == ["day", "session", "session"]
+        analytics_service.backfill_target_rollup()
+        assert db.fetchall(query=rollup_query) == rollup
+
+    def test_catchup_skips_compacted_sessions(
+        self, analytics_service: NGramAnalyticsService, test_data_setup: Dict[str, Any]
+    ) -> None:
+        db = cast(DatabaseManager, analytics_service.db)
+        sessions = test_data_setup["sessions"]
+        for i, sid in enumerate(sessions[:3]):
+            db.execute(
+                query="UPDATE practice_sessions SET start_time = ? WHERE session_id = ?",
+                params=(datetime(2024, 1, 1, 9 + i), sid),
+            )
+        for sid, avg in zip(sessions, [900.0, 700.0, 500.0, 300.0, 100.0], strict=True):
+            self._add_summary_row(db, test_data_setup, sid, avg, 2)
+            analytics_service.add_speed_summary_for_session(session_id=sid)
+        policy = HistRetentionPolicy(keep_sessions=2, weekly_after_days=None)
+        assert analytics_service.compact_speed_hist(policy)["rows_removed"] == 2
+        hist_query = "SELECT session_id, resolution FROM ngram_speed_summary_hist ORDER BY updated_dt"
+        hist = db.fetchall(query=hist_query)
+        curr = self._curr(db, test_data_setup)
+
+        totals = analytics_service.bulk_catchup_speed_summary()
+
+        assert totals["total_sessions"] == 0
+        assert db.fetchall(query=hist_query) == hist
+        assert self._curr(db, test_data_setup)["session_id"] == curr["session_id"] == sessions[4]
+
+    def test_bulk_catchup_matches_per_session(
+        self, analytics_service: NGramAnalyticsService, test_data_setup: Dict[str, Any]
+    ) -> None:
+        db = cast(DatabaseManager, analytics_service.db)
+        sessions = test_data_setup["sessions"][:3]
+        for sid, avg in zip(sessions, [120.0, 100.0, 80.0], strict=True):
+            self._add_summary_row(db, test_data_setup, sid, avg, 2)
+
+        hist_query = """
+            SELECT session_id, decaying_average_ms, sample_count, meets_target, prev_sample_count
+            FROM ngram_speed_summary_hist ORDER BY updated_dt
+        """
+        for sid in sessions:
+            analytics_service.add_speed_summary_for_session(session_id=sid)
+        expected_hist = db.fetchall(query=hist_query)
+        expected_curr = self._curr(db, test_data_setup)
+        analytics_service.delete_all_analytics_data()
+        for sid, avg in zip(sessions, [120.0, 100.0, 80.0], strict=True):
+            self._add_summary_row(db, test_data_setup, sid, avg, 2)
+
+        progress: List[Tuple[int, int]] = []
+        totals = analytics_service.bulk_catchup_speed_summary(
+            chunk_sessions=2, progress=lambda _msg, done, total: progress.append((done, total))
+        )
+
+        assert totals["total_hist_inserted"] == len(expected_hist) == 3
+        assert progress[-1][0] == progress[-1][1] == totals["processed_sessions"]
+        actual_hist = db.fetchall(query=hist_query)
+        for got, want in zip(actual_hist, expected_hist, strict=True):
+            assert got["session_id"] == want["session_id"]
+            assert int(got["sample_count"]) == int(want["sample_count"])
+            assert got["prev_sample_count"] == want["prev_sample_count"]
+            assert float(got["decaying_average_ms"]) == pytest.approx(
+                float(want["decaying_average_ms"]), rel=1e-5
+            )
+        curr = self._curr(db, test_data_setup)
+        assert curr["session_id"] == expected_curr["session_id"]
+        assert float(curr["decaying_average_ms"]) == pytest.approx(
+            float(expected_curr["decaying_average_ms"]), rel=1e-5
+        )
+        state = db.fetchone(query="SELECT instance_count FROM ngram_speed_state")
+        assert state is not None and int(state["instance_count"]) == 6
+
+
 class TestCatchupSpeedSummary:
     """Test cases for CatchupSpeedSummary method."""
     
@@ -587,3 +953,21 @@ class TestIntegrationScenarios:
         assert summary_count >= 2
         assert hist_count >= 1
         assert curr_count >= 1
+
+
+class TestHistRetentionPolicy:
+    """Validation and environment defaults of the history retention policy."""
+
+    def test_rejects_empty_window(self) -> None:
+        with pytest.raises(ValueError):
+            HistRetentionPolicy(keep_sessions=0)
+        with pytest.raises(ValueError):
+            HistRetentionPolicy(weekly_after_days=-1)
+
+    def test_from_env(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.delenv("AITT_HIST_KEEP_SESSIONS", raising=False)
+        monkeypatch.delenv("AITT_HIST_WEEKLY_AFTER_DAYS", raising=False)
+        assert HistRetentionPolicy.from_env() == HistRetentionPolicy()
+        monkeypatch.setenv("AITT_HIST_KEEP_SESSIONS", "50")
+        monkeypatch.setenv("AITT_HIST_WEEKLY_AFTER_DAYS", "none")
+        assert HistRetentionPolicy.from_env() == HistRetentionPolicy(keep_sessions=50, weekly_after_days=None)
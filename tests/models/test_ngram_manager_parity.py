@@ -0,0 +1,434 @@
+"""Parity and performance tests for NGramManager.analyze.
+
+`analyze` evaluates every window in O(1) using per-session lookup arrays, with an
+optional vectorized NumPy backend. These tests compare both engines against the
+original per-window scan (kept here as a reference implementation) over
+randomized drills with errors, corrections, and separators, check the columnar
+NGramBatch result type, and benchmark analyze time against drill length. No
+database is required.
+"""
+
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+import pytest
+
+from models.keystroke_collection import KeystrokeCollection
+from models.ngram import (
+    MAX_NGRAM_SIZE,
+    MIN_NGRAM_SIZE,
+    Keystroke,
+    NGramBatch,
+    SpeedMode,
+    SpeedNGram,
+)
+from models.ngram_manager import AnalysisBackend, NGramManager
+from models.ngram_numpy_backend import NUMPY_AVAILABLE
+
+WORDS = ["the", "cat", "sat", "on", "mat", "über", "café", "typing", "quick", "fox", "a"]
+
+NGramKey = Tuple[int, str, float, Optional[float], SpeedMode]
+
+
+class _NullExecutor:
+    """DB executor stand-in; analyze never touches the database."""
+
+    execute_many_supported = True
+
+    def execute(self, *, query: str, params: Tuple[object, ...] = ()) -> object:
+        raise AssertionError("analyze must not hit the database")
+
+    def execute_many(self, *, query: str, params_seq: object) -> object:
+        raise AssertionError("analyze must not hit the database")
+
+
+class _RecordingExecutor:
+    """DB executor stand-in that records execute_many parameter rows."""
+
+    execute_many_supported = True
+
+    def __init__(self) -> None:
+        self.rows: List[Tuple[object, ...]] = []
+
+    def execute(self, *, query: str, params: Tuple[object, ...] = ()) -> object:
+        self.rows.append(params)
+        return None
+
+    def execute_many(self, *, query: str, params_seq: List[Tuple[object, ...]]) -> object:
+        self.rows.extend(params_seq)
+        return None
+
+
+@pytest.fixture
+def manager() -> NGramManager:
+    return NGramManager(db_manager=_NullExecutor())
+
+
+def make_text(rng: random.Random, length: int) -> str:
+    """Build drill text of roughly `length` characters from WORDS."""
+    parts: List[str] = []
+    size = 0
+    while size < length:
+        w = rng.choice(WORDS)
+        parts.append(w)
+        size += len(w) + 1
+    return " ".join(parts)[:length]
+
+
+def simulate_drill(
+    text: str, *, seed: int, error_rate: float = 0.05, correct_rate: float = 0.7
+) -> KeystrokeCollection:
+    """Simulate typing `text` with random errors, some corrected via backspace."""
+    rng = random.Random(seed)
+    collection = KeystrokeCollection()
+    t = datetime(2025, 1, 1, 8, 0, 0, tzinfo=timezone.utc)
+    key_index = 0
+
+    def press(char: str, text_index: int, expected: str) -> None:
+        nonlocal t, key_index
+        # Occasional zero/duplicate timestamps exercise the duration <= 0 rule
+        t += timedelta(milliseconds=rng.choice([0, 40, 85, 120, 200, 333]))
+        collection.add_keystroke(
+            keystroke=Keystroke(
+                keystroke_time=t,
+                keystroke_char=char,
+                expected_char=expected,
+                is_error=char != expected,
+                text_index=text_index,
+                key_index=key_index,
+            )
+        )
+        key_index += 1
+
+    for i, ch in enumerate(text):
+        if rng.random() < error_rate:
+            press("x" if ch != "x" else "y", i, ch)
+            if rng.random() < correct_rate:
+                press("\b", i, ch)
+                press(ch, i, ch)
+        else:
+            press(ch, i, ch)
+    return collection
+
+
+def reference_analyze(
+    manager: NGramManager,
+    *,
+    session_id: uuid.UUID,
+    expected_text: str,
+    keystrokes: KeystrokeCollection,
+    speed_mode: SpeedMode,
+) -> List[SpeedNGram]:
+    """Original window-by-window implementation (linear scan per window)."""
+    if not expected_text:
+        return []
+    if speed_mode == SpeedMode.NET:
+        ks_by_index = {k.text_index: k for k in keystrokes.net_keystrokes}
+    else:
+        ks_by_index = {k.key_index: k for k in keystrokes.raw_keystrokes}
+
+    speed: List[SpeedNGram] = []
+    for run_start, run_len in manager._iter_runs(expected_text=expected_text):
+        actual_run_start, actual_run_len = run_start, run_len
+        if run_start == 0:
+            actual_run_start, actual_run_len = 1, run_len - 1
+        if actual_run_len < MIN_NGRAM_SIZE:
+            continue
+        for n in range(MIN_NGRAM_SIZE, min(MAX_NGRAM_SIZE, actual_run_len) + 1):
+            for offset in range(0, actual_run_len - n + 1):
+                start_index = actual_run_start + offset
+                try:
+                    ks_window = [ks_by_index[start_index + i] for i in range(n)]
+                except KeyError:
+                    continue
+                duration_ms = manager._duration_ms_with_gross_up(
+                    expected_text=expected_text,
+                    start_index=start_index,
+                    ks_window=ks_window,
+                    keystrokes=keystrokes,
+                )
+                if duration_ms <= 0:
+                    continue
+                if manager._classify_window(ks_window=ks_window) == "clean":
+                    speed.append(
+                        SpeedNGram(
+                            id=uuid.uuid4(),
+                            session_id=session_id,
+                            size=n,
+                            text=expected_text[start_index : start_index + n],
+                            duration_ms=duration_ms,
+                            ms_per_keystroke=None,
+                            speed_mode=speed_mode,
+                            created_at=datetime.now(timezone.utc),
+                        )
+                    )
+    return speed
+
+
+def keys(items: List[SpeedNGram]) -> List[NGramKey]:
+    return [(s.size, s.text, s.duration_ms, s.ms_per_keystroke, s.speed_mode) for s in items]
+
+
+class TestAnalyzeParity:
+    """analyze() must produce exactly the reference output."""
+
+    @pytest.mark.parametrize("speed_mode", [SpeedMode.NET, SpeedMode.RAW])
+    @pytest.mark.parametrize("seed", range(12))
+    def test_randomized_drills_match_reference(
+        self, manager: NGramManager, seed: int, speed_mode: SpeedMode
+    ) -> None:
+        rng = random.Random(seed)
+        text = make_text(rng, rng.randint(1, 160))
+        ks = simulate_drill(text, seed=seed, error_rate=0.08)
+        sid = uuid.uuid4()
+
+        speed, errors = manager.analyze(
+            session_id=sid, expected_text=text, keystrokes=ks, speed_mode=speed_mode
+        )
+        expected = reference_analyze(
+            manager, session_id=sid, expected_text=text, keystrokes=ks, speed_mode=speed_mode
+        )
+
+        assert keys(speed) == keys(expected)
+        assert errors == []
+
+    def test_partial_drill_and_unicode(self, manager: NGramManager) -> None:
+        text = "café über the fox"
+        ks = simulate_drill(text[:11], seed=3, error_rate=0.2)
+        sid = uuid.uuid4()
+        speed, _ = manager.analyze(session_id=sid, expected_text=text, keystrokes=ks)
+        expected = reference_analyze(
+            manager,
+            session_id=sid,
+            expected_text=text,
+            keystrokes=ks,
+            speed_mode=SpeedMode.NET,
+        )
+        assert keys(speed) == keys(expected)
+
+    def test_empty_inputs(self, manager: NGramManager) -> None:
+        speed, errors = manager.analyze(
+            session_id=uuid.uuid4(), expected_text="", keystrokes=KeystrokeCollection()
+        )
+        assert speed == [] and errors == []
+        speed, errors = manager.analyze(
+            session_id=uuid.uuid4(), expected_text="abc", keystrokes=KeystrokeCollection()
+        )
+        assert speed == [] and errors == []
+
+
+@pytest.mark.skipif(not NUMPY_AVAILABLE, reason="numpy not installed")
+class TestNumpyBackendParity:
+    """The vectorized NumPy backend must match the pure-Python path exactly."""
+
+    @pytest.mark.parametrize("speed_mode", [SpeedMode.NET, SpeedMode.RAW])
+    @pytest.mark.parametrize("seed", range(12))
+    def test_randomized_drills_match_python(
+        self, manager: NGramManager, seed: int, speed_mode: SpeedMode
+    ) -> None:
+        rng = random.Random(1000 + seed)
+        text = make_text(rng, rng.randint(1, 300))
+        ks = simulate_drill(text, seed=seed, error_rate=0.1)
+        sid = uuid.uuid4()
+
+        py_speed, _ = manager.analyze(
+            session_id=sid,
+            expected_text=text,
+            keystrokes=ks,
+            speed_mode=speed_mode,
+            backend=AnalysisBackend.PYTHON,
+        )
+        np_speed, np_errors = manager.analyze(
+            session_id=sid,
+            expected_text=text,
+            keystrokes=ks,
+            speed_mode=speed_mode,
+            backend=AnalysisBackend.NUMPY,
+        )
+
+        assert keys(np_speed) == keys(py_speed)
+        assert np_errors == []
+
+    @pytest.mark.parametrize("text", ["a", "ab", " a", "a b", "ab  cd", "abc\tdef\nghi "])
+    def test_short_and_separator_heavy_texts(self, manager: NGramManager, text: str) -> None:
+        ks = simulate_drill(text, seed=7, error_rate=0.0)
+        sid = uuid.uuid4()
+        py_speed, _ = manager.analyze(
+            session_id=sid, expected_text=text, keystrokes=ks, backend=AnalysisBackend.PYTHON
+        )
+        np_speed, _ = manager.analyze(
+            session_id=sid, expected_text=text, keystrokes=ks, backend=AnalysisBackend.NUMPY
+        )
+        assert keys(np_speed) == keys(py_speed)
+
+    def test_naive_timestamps_match_python(self, manager: NGramManager) -> None:
+        text = "naive times here"
+        ks = simulate_drill(text, seed=11, error_rate=0.1)
+        for k in ks.raw_keystrokes + ks.net_keystrokes:
+            k.keystroke_time = k.keystroke_time.replace(tzinfo=None)
+        sid = uuid.uuid4()
+        py_speed, _ = manager.analyze(
+            session_id=sid, expected_text=text, keystrokes=ks, backend=AnalysisBackend.PYTHON
+        )
+        np_speed, _ = manager.analyze(
+            session_id=sid, expected_text=text, keystrokes=ks, backend=AnalysisBackend.NUMPY
+        )
+        assert keys(np_speed) == keys(py_speed)
+
+    def test_mixed_naive_and_aware_timestamps_fall_back(self, manager: NGramManager) -> None:
+        text = "mixed zones"
+        ks = simulate_drill(text, seed=5, error_rate=0.0)
+        for k in ks.net_keystrokes[::2]:
+            k.keystroke_time = k.keystroke_time.replace(tzinfo=None)
+        sid = uuid.uuid4()
+        py_speed, _ = manager.analyze(
+            session_id=sid, expected_text=text, keystrokes=ks, backend=AnalysisBackend.PYTHON
+        )
+        np_speed, _ = manager.analyze(
+            session_id=sid, expected_text=text, keystrokes=ks, backend=AnalysisBackend.NUMPY
+        )
+        assert keys(np_speed) == keys(py_speed)
+
+    def test_backend_selected_on_manager(self) -> None:
+        numpy_manager = NGramManager(db_manager=_NullExecutor(), backend=AnalysisBackend.NUMPY)
+        auto_manager = NGramManager(db_manager=_NullExecutor(), backend=AnalysisBackend.AUTO)
+        assert numpy_manager.backend is AnalysisBackend.NUMPY
+        assert auto_manager.backend is AnalysisBackend.NUMPY
+
+
+class TestNGramBatch:
+    """Columnar NGramBatch results must match the per-model path."""
+
+    @pytest.mark.parametrize("backend", [AnalysisBackend.PYTHON, AnalysisBackend.AUTO])
+    @pytest.mark.parametrize("seed", range(6))
+    def test_batch_matches_analyze(
+        self, manager: NGramManager, seed: int, backend: AnalysisBackend
+    ) -> None:
+        rng = random.Random(2000 + seed)
+        text = make_text(rng, rng.randint(1, 200))
+        ks = simulate_drill(text, seed=seed, error_rate=0.1)
+        sid = uuid.uuid4()
+
+        batch, errors = manager.analyze_batch(
+            session_id=sid, expected_text=text, keystrokes=ks, backend=backend
+        )
+        speed, _ = manager.analyze(session_id=sid, expected_text=text, keystrokes=ks)
+
+        assert isinstance(batch, NGramBatch)
+        assert len(batch) == len(speed)
+        assert keys(list(batch)) == keys(speed)
+        assert all(s.session_id == sid and s.created_at == batch.created_at for s in batch)
+        assert errors == []
+
+    def test_persist_batch_writes_same_rows_as_models(self) -> None:
+        text = "café über the fox"
+        ks = simulate_drill(text, seed=4, error_rate=0.1)
+        sid = uuid.uuid4()
+        from_batch = _RecordingExecutor()
+        from_models = _RecordingExecutor()
+
+        batch, _ = NGramManager(db_manager=from_batch).analyze_batch(
+            session_id=sid, expected_text=text, keystrokes=ks
+        )
+        written = NGramManager(db_manager=from_batch).persist_speed_ngrams(items=batch)
+        NGramManager(db_manager=from_models).persist_speed_ngrams(items=list(batch))
+
+        assert written == len(batch) == len(from_batch.rows)
+        assert [r[1:] for r in from_batch.rows] == [r[1:] for r in from_models.rows]
+        assert len({r[0] for r in from_batch.rows}) == written
+
+    def test_from_columns_validates_once(self) -> None:
+        sid = uuid.uuid4()
+        ok = NGramBatch.from_columns(
+            session_id=sid,
+            expected_text="ab cd",
+            speed_mode=SpeedMode.NET,
+            offsets=[0, 3],
+            sizes=[2, 2],
+            durations_ms=[100.0, 50.0],
+        )
+        assert [ok.text_at(i) for i in range(len(ok))] == ["ab", "cd"]
+        assert list(ok.ms_per_keystroke) == [50.0, 25.0]
+
+        bad_columns = [
+            ([1], [2], [10.0]),  # spans the separator
+            ([0], [0], [10.0]),  # size below minimum
+            ([4], [2], [10.0]),  # past end of text
+            ([0], [2], [0.0]),  # non-positive duration
+            ([0, 3], [2], [10.0]),  # ragged columns
+        ]
+        for offsets, sizes, durations in bad_columns:
+            with pytest.raises(ValueError):
+                NGramBatch.from_columns(
+                    session_id=sid,
+                    expected_text="ab cd",
+                    speed_mode=SpeedMode.NET,
+                    offsets=offsets,
+                    sizes=sizes,
+                    durations_ms=durations,
+                )
+
+
+@pytest.mark.slow
+class TestAnalyzeBenchmark:
+    """Benchmark analyze time against drill length (prints a timing table)."""
+
+    def test_analyze_time_vs_drill_length(
+        self, manager: NGramManager, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        lengths = [100, 250, 500, 1000, 2000]
+        rows: List[Tuple[int, int, float, float, float, Optional[float]]] = []
+        for length in lengths:
+            text = make_text(random.Random(length), length)
+            ks = simulate_drill(text, seed=length, error_rate=0.03)
+            sid = uuid.uuid4()
+
+            t0 = time.perf_counter()
+            speed, _ = manager.analyze(session_id=sid, expected_text=text, keystrokes=ks)
+            indexed_ms = (time.perf_counter() - t0) * 1000.0
+
+            t0 = time.perf_counter()
+            manager.analyze_batch(session_id=sid, expected_text=text, keystrokes=ks)
+            batch_ms = (time.perf_counter() - t0) * 1000.0
+
+            t0 = time.perf_counter()
+            reference_analyze(
+                manager,
+                session_id=sid,
+                expected_text=text,
+                keystrokes=ks,
+                speed_mode=SpeedMode.NET,
+            )
+            scan_ms = (time.perf_counter() - t0) * 1000.0
+
+            numpy_ms: Optional[float] = None
+            if NUMPY_AVAILABLE:
+                t0 = time.perf_counter()
+                manager.analyze(
+                    session_id=sid,
+                    expected_text=text,
+                    keystrokes=ks,
+                    backend=AnalysisBackend.NUMPY,
+                )
+                numpy_ms = (time.perf_counter() - t0) * 1000.0
+            rows.append((length, len(speed), indexed_ms, scan_ms, batch_ms, numpy_ms))
+
+        with capsys.disabled():
+            print("\nNGramManager.analyze benchmark (NET mode)")
+            print(
+                f"{'chars':>6} {'ngrams':>7} {'indexed ms':>11} {'scan ms':>9} "
+                f"{'speedup':>8} {'batch ms':>9} {'numpy ms':>9}"
+            )
+            for length, count, indexed_ms, scan_ms, batch_ms, numpy_ms in rows:
+                speedup = scan_ms / indexed_ms if indexed_ms > 0 else float("inf")
+                numpy_col = f"{numpy_ms:>9.1f}" if numpy_ms is not None else f"{'n/a':>9}"
+                print(
+                    f"{length:>6} {count:>7} {indexed_ms:>11.1f} {scan_ms:>9.1f} "
+                    f"{speedup:>7.1f}x {batch_ms:>9.1f} {numpy_col}"
+                )
+
+        # The indexed engine must not lose to the per-window scan on long drills
+        assert rows[-1][2] <= rows[-1][3]
@@ -77,6 +77,7 @@ def test_process_end_of_session_success_path(db_with_tables, test_user, test_key
     assert int(result.get("session_summary_rows", 0)) >= 1
     assert int(result.get("curr_updated", 0)) >= 1
     assert int(result.get("hist_inserted", 0)) >= 1
+    assert float(result.get("commit_ms", -1.0)) >= 0.0
 
     # Assert: DB side effects
     # practice_sessions
@@ -207,12 +208,12 @@ def test_process_end_of_session_keystrokes_save_failure(
     with __import__("pytest").raises(Exception):
         service.process_end_of_session(session, keystroke_collection, save_session_first=True)
 
-    # Session should have been saved before failure
+    # The whole unit of work is rolled back, including the session saved in step 1
     row = db_with_tables.fetchone(
         "SELECT COUNT(*) as c FROM practice_sessions WHERE session_id = ?",
         (session.session_id,),
     )
-    assert row["c"] == 1
+    assert row["c"] == 0
 
     # But no keystrokes persisted successfully (entire batch aborted by per-row failure path)
     ksc = db_with_tables.fetchone(
@@ -262,12 +263,17 @@ def test_process_end_of_session_summarization_failure(
     with __import__("pytest").raises(Exception):
         service.process_end_of_session(session, keystroke_collection, save_session_first=True)
 
-    # Verify that up to n-gram persistence succeeded
+    # Steps 1-3 are rolled back with the failed summarization (single unit of work)
     spd_count = db_with_tables.fetchone(
         "SELECT COUNT(*) as c FROM session_ngram_speed WHERE session_id = ?",
         (session.session_id,),
     )["c"]
-    assert spd_count >= 1
+    assert spd_count == 0
+    ps_count = db_with_tables.fetchone(
+        "SELECT COUNT(*) as c FROM practice_sessions WHERE session_id = ?",
+        (session.session_id,),
+    )["c"]
+    assert ps_count == 0
 
     # Speed summary tables remain unaffected due to failure before step 5 (may not exist rows)
     # Just ensure no exception querying counts
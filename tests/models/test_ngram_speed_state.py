@@ -0,0 +1,75 @@
+"""Tests for the rolling n-gram speed state used by speed summaries."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.ngram_speed_state import (
+    SPEED_STATE_WINDOW,
+    NGramSpeedState,
+    decaying_average,
+    target_metrics,
+)
+
+
+def reference_average(samples_newest_first: list[float]) -> float:
+    """Weighted average as in SQL: weight 1/row_num over the latest 20 rows."""
+    rows = samples_newest_first[:SPEED_STATE_WINDOW]
+    return sum(v * (1.0 / k) for k, v in enumerate(rows, start=1)) / sum(
+        1.0 / k for k in range(1, len(rows) + 1)
+    )
+
+
+class TestDecayingAverage:
+    def test_empty_is_zero(self) -> None:
+        assert decaying_average([]) == 0.0
+
+    def test_single_sample(self) -> None:
+        assert decaying_average([120.0]) == 120.0
+
+    def test_newer_samples_weigh_more(self) -> None:
+        # weights 1 and 1/2: (100 + 200/2) / 1.5
+        assert decaying_average([100.0, 200.0]) == pytest.approx(200.0 / 1.5)
+
+
+class TestNGramSpeedState:
+    def test_push_matches_full_recompute(self) -> None:
+        start = datetime(2025, 1, 1)
+        history: list[float] = []
+        instances = 0
+        state = NGramSpeedState(ngram_text="th", ngram_size=2)
+        for i in range(30):
+            avg = 100.0 + (i * 7) % 23
+            history.insert(0, avg)
+            instances += i + 1
+            state = state.push(
+                session_id=f"s{i}",
+                session_dt=start + timedelta(days=i),
+                avg_ms=avg,
+                instance_count=i + 1,
+            )
+            assert state.decaying_average_ms == pytest.approx(reference_average(history))
+            assert state.instance_count == instances
+
+        assert len(state.samples_ms) == SPEED_STATE_WINDOW
+        assert state.last_session_id == "s29"
+        assert state.last_session_dt == start + timedelta(days=29)
+
+    def test_push_does_not_mutate_original(self) -> None:
+        state = NGramSpeedState(ngram_text="a", ngram_size=1, samples_ms=[100.0], instance_count=2)
+        state.push(session_id="s", session_dt=datetime(2025, 1, 1), avg_ms=50.0, instance_count=1)
+        assert state.samples_ms == [100.0]
+        assert state.instance_count == 2
+
+
+@pytest.mark.parametrize(
+    ("avg", "target", "expected"),
+    [
+        (300.0, 600.0, (200.0, 1)),
+        (600.0, 600.0, (100.0, 1)),
+        (1200.0, 600.0, (50.0, 0)),
+        (0.0, 600.0, (0.0, 1)),
+    ],
+)
+def test_target_metrics(avg: float, target: float, expected: tuple[float, int]) -> None:
+    assert target_metrics(decaying_average_ms=avg, target_speed_ms=target) == expected
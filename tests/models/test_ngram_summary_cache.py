@@ -0,0 +1,124 @@
+"""Tests for the in-process cache of current n-gram speed summaries.
+
+These tests exercise the columnar filters and the LRU/version rules without a
+running PostgreSQL.
+"""
+
+from typing import cast
+
+from db.database_manager import DatabaseManager
+from models.ngram_summary_cache import NGramSummaryCache, SummaryColumns, summary_cache_for
+
+ROWS = [
+    ("s1", "th", 2, 180.0, 100.0, 55.6, 0, 12, "2025-01-01 10:00:00"),
+    ("s2", "he", 2, 90.0, 100.0, 100.0, 1, 3, "2025-01-02 10:00:00"),
+    ("s2", "the", 3, 250.0, 100.0, 40.0, 0, 8, "2025-01-02 10:00:00"),
+    ("s2", "ab", 2, 180.0, 100.0, 55.6, 0, 6, "2025-01-02 10:00:00"),
+]
+KEY = ("user", "keyboard")
+
+
+class _Db:
+    """Stand-in for a DatabaseManager; the registry only needs a weak reference."""
+
+
+class TestSummaryColumns:
+    """Filters, ordering and patching of the columnar summary."""
+
+    def test_rows_round_trip(self) -> None:
+        columns = SummaryColumns(ROWS)
+        assert len(columns) == 4
+        assert [columns.row(i) for i in range(4)] == ROWS
+
+    def test_select_filters(self) -> None:
+        columns = SummaryColumns(ROWS)
+        assert columns.select() == [0, 1, 2, 3]
+        assert columns.select(min_sample_count=6) == [0, 2, 3]
+        assert columns.select(sizes=[3]) == [2]
+        assert columns.select(missed_only=True) == [0, 2, 3]
+        assert columns.select(session_id="s2", missed_only=True) == [2, 3]
+        assert columns.select(allowed_keys="eht") == [0, 1, 2]
+        assert columns.select(allowed_keys=[]) == []
+
+    def test_slowest_first_is_stable(self) -> None:
+        columns = SummaryColumns(ROWS)
+        assert columns.slowest_first(columns.select()) == [2, 0, 3, 1]
+
+    def test_patched_upserts_by_text_and_size(self) -> None:
+        columns = SummaryColumns(ROWS)
+        patched = columns.patched(
+            [
+                ("s3", "th", 2, 150.0, 100.0, 66.7, 0, 14, "2025-01-03 10:00:00"),
+                ("s3", "th", 3, 300.0, 100.0, 33.3, 0, 1, "2025-01-03 10:00:00"),
+            ]
+        )
+        assert len(columns) == 4
+        assert len(patched) == 5
+        assert patched.row(0)[0] == "s3"
+        assert patched.decaying_average_ms[0] == 150.0
+        assert patched.select(session_id="s3") == [0, 4]
+
+
+class TestNGramSummaryCache:
+    """LRU bounds, version checks and counters."""
+
+    def test_get_counts_hits_and_misses(self) -> None:
+        cache = NGramSummaryCache()
+        assert cache.get(KEY) is None
+        assert cache.put(KEY, SummaryColumns(ROWS), version=cache.version())
+        assert cache.get(KEY) is not None
+        stats = cache.stats()
+        assert (stats.hits, stats.misses, stats.entries, stats.rows) == (1, 1, 1, 4)
+        assert stats.hit_rate == 0.5
+
+    def test_stale_load_is_rejected(self) -> None:
+        cache = NGramSummaryCache()
+        version = cache.version()
+        cache.invalidate(KEY)
+        assert not cache.put(KEY, SummaryColumns(ROWS), version=version)
+        assert cache.peek(KEY)[0] is None
+
+    def test_patch_requires_unchanged_cache(self) -> None:
+        cache = NGramSummaryCache()
+        base = SummaryColumns(ROWS)
+        cache.put(KEY, base, version=cache.version())
+        _, version = cache.peek(KEY)
+        new_row = ("s3", "xy", 2, 120.0, 100.0, 83.3, 0, 2, "2025-01-03 10:00:00")
+        assert cache.patch(KEY, base, [new_row], version=version)
+        entry, _ = cache.peek(KEY)
+        assert entry is not None and len(entry) == 5
+
+        # Another write in between: the patch drops the entry instead
+        cache.put(("other", "keyboard"), SummaryColumns(), version=cache.version())
+        assert not cache.patch(KEY, entry, [new_row], version=version)
+        assert cache.peek(KEY)[0] is None
+        stats = cache.stats()
+        assert (stats.patches, stats.invalidations) == (1, 1)
+
+    def test_eviction_by_entries_and_rows(self) -> None:
+        cache = NGramSummaryCache(max_entries=2, max_rows=6)
+        for i in range(3):
+            cache.put((f"u{i}", "k"), SummaryColumns(ROWS[:1]), version=cache.version())
+        assert cache.peek(("u0", "k"))[0] is None
+        cache.put(("big", "k"), SummaryColumns(ROWS), version=cache.version())
+        assert cache.peek(("u1", "k"))[0] is None
+        assert cache.peek(("u2", "k"))[0] is not None
+        assert not cache.put(("huge", "k"), SummaryColumns(ROWS * 2), version=cache.version())
+        stats = cache.stats()
+        assert (stats.entries, stats.rows, stats.evictions) == (2, 5, 2)
+
+    def test_disabled_and_clear(self) -> None:
+        disabled = NGramSummaryCache(max_entries=0)
+        assert not disabled.put(KEY, SummaryColumns(ROWS), version=disabled.version())
+
+        cache = NGramSummaryCache()
+        cache.put(KEY, SummaryColumns(ROWS), version=cache.version())
+        cache.clear()
+        stats = cache.stats()
+        assert (stats.entries, stats.rows, stats.invalidations) == (0, 0, 1)
+
+    def test_shared_per_database(self) -> None:
+        first, second = cast(DatabaseManager, _Db()), cast(DatabaseManager, _Db())
+        shared = summary_cache_for(first)
+        assert summary_cache_for(first) is shared
+        assert summary_cache_for(second) is not shared
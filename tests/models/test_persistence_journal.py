@@ -0,0 +1,86 @@
+"""Tests for the end-of-session persistence journal (no database required)."""
+
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from models.keystroke import Keystroke
+from models.keystroke_collection import KeystrokeCollection
+from models.persistence_journal import PersistenceJournal, PersistJob
+from models.session import Session
+
+
+def _job(start: datetime, text: str = "ab\bc") -> PersistJob:
+    session = Session(
+        snippet_id=str(uuid.uuid4()),
+        snippet_index_start=0,
+        snippet_index_end=len(text),
+        content=text,
+        start_time=start,
+        end_time=start + timedelta(seconds=5),
+        actual_chars=len(text),
+        errors=0,
+        user_id=str(uuid.uuid4()),
+        keyboard_id=str(uuid.uuid4()),
+    )
+    keystrokes = KeystrokeCollection()
+    for i, ch in enumerate(text):
+        keystrokes.add_keystroke(
+            keystroke=Keystroke(
+                session_id=session.session_id,
+                keystroke_time=start + timedelta(milliseconds=120 * i),
+                keystroke_char=ch,
+                expected_char=ch,
+                text_index=i,
+            )
+        )
+    return PersistJob(session=session, keystrokes=keystrokes, save_session_first=True)
+
+
+def test_round_trip_preserves_session_and_keystrokes(tmp_path: Path) -> None:
+    journal = PersistenceJournal(directory=tmp_path)
+    job = _job(datetime(2025, 3, 1, 9, 0, 0))
+    journal.record(job)
+
+    (loaded,) = journal.pending()
+    assert loaded.session == job.session
+    assert loaded.save_session_first is True
+    assert [k.keystroke_char for k in loaded.keystrokes.raw_keystrokes] == list("ab\bc")
+    # Net keystrokes are rebuilt (backspace removed "b")
+    assert [k.keystroke_char for k in loaded.keystrokes.net_keystrokes] == ["a", "c"]
+    assert [k.time_since_previous for k in loaded.keystrokes.raw_keystrokes] == [
+        k.time_since_previous for k in job.keystrokes.raw_keystrokes
+    ]
+
+
+def test_pending_is_oldest_first_and_complete_removes(tmp_path: Path) -> None:
+    journal = PersistenceJournal(directory=tmp_path)
+    later = _job(datetime(2025, 3, 2))
+    earlier = _job(datetime(2025, 3, 1))
+    journal.record(later)
+    journal.record(earlier)
+
+    assert [j.session_id for j in journal.pending()] == [earlier.session_id, later.session_id]
+    journal.complete(earlier.session_id)
+    journal.complete(earlier.session_id)  # idempotent
+    assert len(journal) == 1
+    assert [j.session_id for j in journal.pending()] == [later.session_id]
+
+
+def test_mark_failed_counts_attempts(tmp_path: Path) -> None:
+    journal = PersistenceJournal(directory=tmp_path)
+    job = _job(datetime(2025, 3, 1))
+    journal.record(job)
+    journal.mark_failed(job, error="connection refused")
+    journal.mark_failed(job, error="connection refused again")
+
+    (loaded,) = journal.pending()
+    assert loaded.attempts == 2
+    assert loaded.last_error == "connection refused again"
+
+
+def test_unreadable_entries_are_skipped(tmp_path: Path) -> None:
+    journal = PersistenceJournal(directory=tmp_path)
+    (tmp_path / "broken.json").write_text("{not json", encoding="utf-8")
+    journal.record(_job(datetime(2025, 3, 1)))
+    assert len(journal.pending()) == 1
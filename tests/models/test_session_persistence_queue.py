@@ -0,0 +1,82 @@
+"""Tests for the background PersistenceWorker against a real database."""
+
+import threading
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from desktop_ui.session_persistence_queue import PersistenceWorker
+from models.keystroke import Keystroke
+from models.keystroke_collection import KeystrokeCollection
+from models.persistence_journal import PersistenceJournal, PersistJob
+from models.session import Session
+
+
+def _job(db_with_tables: Any, test_user: Any, test_keyboard: Any, text: str = "helloworld") -> PersistJob:
+    from tests.models.conftest import TestSessionMethodsFixtures
+
+    category_id = TestSessionMethodsFixtures.create_category(db_with_tables)
+    snippet_id = TestSessionMethodsFixtures.create_snippet(db_with_tables, category_id)
+    start = datetime.now()
+    session = Session(
+        snippet_id=snippet_id,
+        snippet_index_start=0,
+        snippet_index_end=len(text),
+        content=text,
+        start_time=start,
+        end_time=start + timedelta(seconds=5),
+        actual_chars=len(text),
+        errors=0,
+        user_id=str(test_user.user_id),
+        keyboard_id=str(test_keyboard.keyboard_id),
+    )
+    keystrokes = KeystrokeCollection()
+    for i, ch in enumerate(text):
+        keystrokes.add_keystroke(
+            keystroke=Keystroke(
+                session_id=session.session_id,
+                keystroke_id=str(uuid.uuid4()),
+                keystroke_time=start + timedelta(milliseconds=100 * i),
+                keystroke_char=ch,
+                expected_char=ch,
+                text_index=i,
+            )
+        )
+    return PersistJob(session=session, keystrokes=keystrokes, save_session_first=True)
+
+
+def test_worker_without_pool_uses_its_own_connection(
+    db_with_tables: Any, test_user: Any, test_keyboard: Any, tmp_path: Path
+) -> None:
+    """Without a pool the worker must not run its transaction on the shared connection."""
+    assert db_with_tables.pool_stats() is None
+    shared = db_with_tables._require_connection()
+    journal = PersistenceJournal(directory=tmp_path)
+    worker = PersistenceWorker(db_manager=db_with_tables, journal=journal, retention=None)
+    persisted: List[Tuple[str, Dict[str, Any]]] = []
+    worker.persisted.connect(lambda sid, results: persisted.append((sid, results)))
+    job = _job(db_with_tables, test_user, test_keyboard)
+    journal.record(job)
+
+    # Keep an open transaction on the shared connection; the worker must not join it
+    shared.autocommit = False
+    try:
+        thread = threading.Thread(target=worker._process, args=(job,))
+        thread.start()
+        thread.join(timeout=60)
+        assert not thread.is_alive()
+        assert shared.autocommit is False
+    finally:
+        shared.rollback()
+        shared.autocommit = True
+
+    assert [sid for sid, _ in persisted] == [job.session_id]
+    assert persisted[0][1]["session_saved"] is True
+    assert len(journal) == 0
+    # Committed on the worker's connection, so the (rolled back) shared one still sees it
+    row = db_with_tables.fetchone(
+        query="SELECT 1 AS found FROM practice_sessions WHERE session_id = ?",
+        params=(job.session_id,),
+    )
+    assert row is not None